@@ -0,0 +1,257 @@
+"""Benchmark generate_docs.py on synthetic inputs.
+
+For every scale (number of apps) a synthetic project is created in a temporary
+directory: apps with sections, fields and workflows, one seed CSV code list and
+one CDS entity per app. Each generate_* function is timed separately, then run
+again under tracemalloc for its peak memory; files and bytes written are
+counted through the output backend. Results are printed as JSON, and --compare
+checks them against an earlier run.
+
+    python scripts/benchmark_docs.py --scales 10,100,1000 -o bench.json
+    python scripts/benchmark_docs.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cds_model
+import generate_docs as gen
+
+GENERATORS = [generate.__name__ for _, generate in gen.GENERATORS]
+
+# Generators faster than this are too noisy to flag in --compare
+MIN_COMPARE_SECONDS = 0.005
+
+
+class CountingBackend:
+    # Counts what a generator writes and passes it on to the real backend
+    def __init__(self, backend):
+        self.backend = backend
+        self.files = 0
+        self.bytes = 0
+
+    def write(self, path, content):
+        self.files += 1
+        self.bytes += len(content.encode('utf-8'))
+        self.backend.write(path, content)
+        return None
+
+    def finish(self):
+        return self.backend.finish()
+
+
+# --- Synthetic inputs ---
+
+def synthetic_cds(count, fields):
+    lines = ["namespace bench;", "using { cuid, managed } from '@sap/cds/common';", ""]
+    for i in range(count):
+        lines.append(f"/** Synthetic entity {i}. */")
+        lines.append(f"entity Entity{i:04d} : cuid, managed {{")
+        for j in range(fields):
+            lines.append(f"  @mandatory field{j:03d} : String({20 + j}); // field {j}")
+        if i:
+            lines.append(f"  parent : Association to Entity{i - 1:04d};")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def write_synthetic_seed(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("code;locale;name;descr\n")
+        for i in range(rows):
+            for locale in ("en", "de"):
+                f.write(f"C{i:05d};{locale};Name {i} ({locale});Description of value {i}\n")
+
+
+def synthetic_inputs(root, scale, sections, fields, rows):
+    # Creates seed and CDS files under root; returns the data dicts for the generator
+    data_dir = os.path.join(root, gen.DATA_DIR)
+    os.makedirs(data_dir)
+    apps, code_lists, entities, section_entities = {}, {}, {}, {}
+    for i in range(scale):
+        name = "mdm-approval" if i == 0 else f"app-{i:04d}"  # action docs are generated for mdm-approval
+        apps[name] = {
+            "title": f"Synthetic App {i}",
+            "description": f"Synthetic app {i} for benchmarking.",
+            "type": "Customer",
+            "sections": {
+                f"section-{s:02d}": {"fields": [
+                    {"label": f"Field {f}", "type": "String", "mandatory": "Yes" if f % 3 == 0 else "No",
+                     "notes": f"Synthetic field {f} | section {s}"}
+                    for f in range(fields)
+                ]}
+                for s in range(sections)
+            },
+            "workflows": ["create-request", "change-request", "approval"],
+        }
+        if i == 0:
+            apps[name]["actions"] = ["approve", "reject", "check-duplicates"]
+        source = f"bench-CodeList{i:04d}.csv"
+        write_synthetic_seed(os.path.join(data_dir, source), rows)
+        code_lists[f"code-list-{i:04d}"] = {"desc": f"Synthetic code list {i}.", "source": source}
+        entities[f"entity-{i:04d}"] = f"bench.Entity{i:04d}"
+    for s in range(sections):
+        section_entities[f"section-{s:02d}"] = f"entity-{s % scale:04d}"
+    cds_path = os.path.join(root, "bench.cds")
+    with open(cds_path, 'w', encoding='utf-8') as f:
+        f.write(synthetic_cds(scale, fields))
+    return apps, code_lists, entities, section_entities, cds_path
+
+
+# --- Runs ---
+
+def run_generators(backend_name, trace):
+    # Returns {generator: {seconds, files, bytes[, peak_bytes]}}
+    results = {}
+    for name in GENERATORS:
+        counter = CountingBackend(gen.make_backend(backend_name))
+        gen._output = counter
+        gen._created_dirs.clear()
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        getattr(gen, name)()
+        seconds = time.perf_counter() - started
+        result = {"seconds": seconds, "files": counter.files, "bytes": counter.bytes}
+        if trace:
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        counter.finish()
+        results[name] = result
+    return results
+
+
+def bench_scale(scale, args):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="docs-bench-") as root:
+        apps, code_lists, entities, section_entities, cds_path = synthetic_inputs(
+            root, scale, args.sections, args.fields, args.rows)
+        os.chdir(root)
+        try:
+            gen.apps, gen.code_lists, gen.entities, gen.section_entities = apps, code_lists, entities, section_entities
+            started = time.perf_counter()
+            gen._cds_model = cds_model.load_model([os.path.relpath(cds_path)], cache_path=None)
+            parse_seconds = time.perf_counter() - started
+            # Best of --repeat untraced runs for time; one traced run for peak memory
+            runs = [run_generators(args.backend, trace=False) for _ in range(args.repeat)]
+            traced = run_generators(args.backend, trace=True)
+        finally:
+            os.chdir(cwd)
+            gen._output = gen.FileSystemBackend()
+    generators = {}
+    for name in GENERATORS:
+        generators[name] = {
+            "seconds": min(run[name]["seconds"] for run in runs),
+            "files": runs[0][name]["files"],
+            "bytes": runs[0][name]["bytes"],
+            "peak_bytes": traced[name]["peak_bytes"],
+        }
+    return {
+        "apps": scale,
+        "sections_per_app": args.sections,
+        "fields_per_section": args.fields,
+        "code_list_rows": args.rows,
+        "cds_parse_seconds": parse_seconds,
+        "generators": generators,
+        "total": {
+            "seconds": sum(g["seconds"] for g in generators.values()),
+            "files": sum(g["files"] for g in generators.values()),
+            "bytes": sum(g["bytes"] for g in generators.values()),
+            "peak_bytes": max(g["peak_bytes"] for g in generators.values()),
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    # Prints per-generator time ratios against a baseline run; returns the regressions
+    previous = {(r["apps"], r["sections_per_app"], r["fields_per_section"], r["code_list_rows"]): r
+                for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = (result["apps"], result["sections_per_app"], result["fields_per_section"], result["code_list_rows"])
+        if key not in previous:
+            print(f"{result['apps']} apps: no baseline at this scale", file=sys.stderr)
+            continue
+        for name, current in [*result["generators"].items(), ("total", result["total"])]:
+            before = previous[key]["total"] if name == "total" else previous[key]["generators"].get(name)
+            if not before or not before["seconds"]:
+                continue
+            ratio = current["seconds"] / before["seconds"]
+            flag = ""
+            if ratio > threshold and current["seconds"] >= MIN_COMPARE_SECONDS:
+                flag = "  REGRESSION"
+                regressions.append((result["apps"], name, ratio))
+            print(f"{result['apps']:>6} apps  {name:<26} {before['seconds'] * 1000:9.1f} ms -> "
+                  f"{current['seconds'] * 1000:9.1f} ms  x{ratio:.2f}{flag}", file=sys.stderr)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate_docs.py on synthetic inputs.")
+    parser.add_argument("--scales", default="10,100,1000", help="comma-separated app counts (default: 10,100,1000)")
+    parser.add_argument("--sections", type=int, default=8, help="sections per app (default: 8)")
+    parser.add_argument("--fields", type=int, default=20, help="fields per section and per entity (default: 20)")
+    parser.add_argument("--rows", type=int, default=100, help="values per synthetic code list (default: 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scale, best is kept (default: 3)")
+    parser.add_argument("--backend", choices=["fs", "memory"], default="fs",
+                        help="write into the temporary directory (fs, default) or render in memory")
+    parser.add_argument("--output", "-o", metavar="FILE", help="write the JSON results to FILE instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="compare against the results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="with --compare, exit status 1 if a generator is this many times slower (default: 1.25)")
+    args = parser.parse_args(argv)
+    try:
+        args.scales = [int(s) for s in args.scales.split(",")]
+    except ValueError:
+        parser.error("--scales must be comma-separated integers")
+    if min(args.scales) < 1 or args.sections < 1 or args.fields < 1 or args.rows < 1 or args.repeat < 1:
+        parser.error("--scales, --sections, --fields, --rows and --repeat must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for scale in args.scales:
+        print(f"Benchmarking {scale} apps...", file=sys.stderr)
+        results.append(bench_scale(scale, args))
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above x{args.threshold}.", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,550 @@
+"""Minimal reader for the CDS sources of this project.
+
+Parses db/data-model.cds, srv/common.cds and the srv/*.cds service definitions
+into a plain-dict model of entities, aspects, types and their elements
+(including associations and compositions). The parsed model is cached on disk
+keyed by the sha256 of every source file, so repeated doc builds skip the parse.
+
+Only the subset of CDS used in this repository is understood; annotate/extend
+statements, actions and functions are skipped.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+
+MODEL_SOURCES = ["db/data-model.cds", "srv/common.cds"]
+SERVICE_SOURCES = "srv/*.cds"
+CACHE_PATH = os.path.join(".docs-cache", "cds-model.json")
+CACHE_VERSION = 1
+
+# Aspects from @sap/cds/common that the data model includes
+BUILTIN_ASPECTS = {
+    "cuid": {
+        "ID": {"type": "UUID", "key": True, "doc": "Primary Key"},
+    },
+    "managed": {
+        "createdAt": {"type": "Timestamp", "doc": "Creation Timestamp"},
+        "createdBy": {"type": "User", "doc": "User who created the record"},
+        "modifiedAt": {"type": "Timestamp", "doc": "Last Change Timestamp"},
+        "modifiedBy": {"type": "User", "doc": "User who last changed the record"},
+    },
+}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<doc>/\*\*.*?\*/)
+  | (?P<block>/\*.*?\*/)
+  | (?P<line>//[^\n]*)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<ident>[$#A-Za-z_][\w$]*(?:\.[$A-Za-z_][\w$]*)*)
+  | (?P<punct>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+_KEYWORDS = {"namespace", "using", "service", "context", "entity", "aspect", "type",
+             "annotate", "extend", "action", "function", "event"}
+
+
+class CdsSyntaxError(Exception):
+    pass
+
+
+class _Token:
+    __slots__ = ("kind", "value", "line")
+
+    def __init__(self, kind, value, line):
+        self.kind = kind
+        self.value = value
+        self.line = line
+
+
+def tokenize(text):
+    # Returns (tokens, line_comments, doc_comments); comments are keyed by line so the
+    # parser can attach them to elements (trailing //) and definitions (leading /** */).
+    tokens, line_comments, doc_comments = [], {}, {}
+    line = 1
+    for m in _TOKEN_RE.finditer(text):
+        kind, value = m.lastgroup, m.group()
+        if kind == "line":
+            line_comments[line] = value[2:].strip()
+        elif kind == "doc":
+            end_line = line + value.count("\n")
+            body = [l.strip().lstrip("*").strip() for l in value[3:-2].splitlines()]
+            doc_comments[end_line] = " ".join(l for l in body if l and not l.startswith("@"))
+        elif kind not in ("ws", "block"):
+            tokens.append(_Token(kind, value, line))
+        line += value.count("\n")
+    return tokens, line_comments, doc_comments
+
+
+class _Parser:
+    def __init__(self, text, source):
+        self.tokens, self.line_comments, self.doc_comments = tokenize(text)
+        self.source = source
+        self.pos = 0
+        self.namespace = ""
+        self.aliases = {}
+        self.definitions = {}
+
+    # --- token helpers ---
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i].value if i < len(self.tokens) else None
+
+    def next(self):
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def accept(self, value):
+        if self.peek() == value:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.accept(value):
+            line = self.tokens[self.pos].line if self.pos < len(self.tokens) else "EOF"
+            raise CdsSyntaxError(f"{self.source}:{line}: expected '{value}', got '{self.peek()}'")
+
+    def skip_balanced(self):
+        # Skips one token, or a whole (...)/{...}/[...] group when positioned on an opener
+        pairs = {"(": ")", "{": "}", "[": "]"}
+        opener = self.next().value
+        if opener not in pairs:
+            return
+        depth = 1
+        while depth:
+            value = self.next().value
+            if value in pairs:
+                depth += 1
+            elif value in pairs.values():
+                depth -= 1
+
+    def skip_statement(self):
+        # Skips to the terminating ';' at depth 0, stopping early at the closing '}' of the
+        # enclosing block or at the start of the next definition
+        self.skip_balanced()
+        while self.peek() is not None and self.peek() not in (";", "}", "@") and self.peek() not in _KEYWORDS:
+            self.skip_balanced()
+        self.accept(";")
+
+    def text_until(self, stops):
+        parts = []
+        while self.peek() is not None and self.peek() not in stops:
+            parts.append(self.next().value)
+        return " ".join(parts)
+
+    # --- annotations ---
+
+    def annotations(self):
+        result = {}
+        while self.peek() == "@":
+            self.next()
+            if self.peek() == "(":
+                self.skip_balanced()
+                continue
+            name = self.next().value
+            value = True
+            if self.accept(":"):
+                if self.peek() in ("{", "["):
+                    self.skip_balanced()
+                    value = None
+                else:
+                    tok = self.next()
+                    value = tok.value[1:-1].replace("''", "'") if tok.kind == "string" else tok.value
+            if value is not None:
+                result[name] = value
+        return result
+
+    # --- definitions ---
+
+    def qualify(self, name, prefix):
+        return f"{prefix}.{name}" if prefix else name
+
+    def resolve(self, name):
+        head, _, rest = name.partition(".")
+        if head in self.aliases:
+            return self.aliases[head] + ("." + rest if rest else "")
+        return name
+
+    def parse(self):
+        self.definitions_block(self.namespace, top_level=True)
+        return self.definitions
+
+    def definitions_block(self, prefix, top_level=False):
+        while self.peek() is not None:
+            if self.peek() == "}":
+                if not top_level:
+                    return
+                self.next()
+                continue
+            start_line = self.tokens[self.pos].line
+            annos = self.annotations()
+            keyword = self.peek()
+            if keyword == "namespace":
+                self.next()
+                self.namespace = prefix = self.next().value
+                self.accept(";")
+            elif keyword == "using":
+                self.using()
+            elif keyword == "service" or keyword == "context":
+                self.next()
+                name = self.qualify(self.next().value, prefix)
+                self.annotations()
+                self.expect("{")
+                self.definitions[name] = {"kind": keyword, "source": self.source}
+                self.definitions_block(name)
+                self.expect("}")
+                self.accept(";")
+            elif keyword in ("entity", "aspect", "type"):
+                self.next()
+                self.definition(keyword, prefix, annos, self.leading_doc(start_line))
+            else:
+                # annotate, extend, action, function, ... are not needed for the model
+                self.skip_statement()
+
+    def leading_doc(self, line):
+        for candidate in (line - 1, line - 2):
+            if candidate in self.doc_comments:
+                return self.doc_comments[candidate]
+        return ""
+
+    def using(self):
+        self.next()
+        if self.peek() == "{":
+            self.skip_statement()
+            return
+        name = self.next().value
+        alias = name.rsplit(".", 1)[-1]
+        if self.accept("as"):
+            alias = self.next().value
+        self.aliases[alias] = name
+        self.skip_statement()
+
+    def definition(self, kind, prefix, annos, doc):
+        name = self.qualify(self.next().value, prefix)
+        annos.update(self.annotations())
+        definition = {"kind": kind, "source": self.source, "scope": prefix, "annotations": annos, "doc": doc,
+                      "includes": [], "elements": {}}
+        if self.accept("as"):
+            self.projection(definition)
+        else:
+            if self.accept(":"):
+                if kind == "type" and self.peek() != "{" and not self.is_include_list():
+                    definition["type"] = self.type_spec()
+                    self.annotations()
+                    self.accept(";")
+                    self.definitions[name] = definition
+                    return
+                definition["includes"].append(self.resolve(self.next().value))
+                while self.accept(","):
+                    definition["includes"].append(self.resolve(self.next().value))
+            self.annotations()
+            if self.peek() == "{":
+                definition["elements"] = self.elements()
+            self.trailer()
+        self.definitions[name] = definition
+
+    def is_include_list(self):
+        # `type X : A, B { ... }` includes aspects; `type X : String(10);` is a derived type
+        return self.peek(1) in (",", "{")
+
+    def trailer(self):
+        if self.accept("actions"):
+            self.skip_balanced()
+        if self.peek() not in (";", "}", "@", None) and self.peek() not in _KEYWORDS:
+            # e.g. `where locale = $user.locale` on a projection
+            self.skip_statement()
+        else:
+            self.accept(";")
+
+    def projection(self, definition):
+        if self.accept("projection"):
+            self.expect("on")
+        else:
+            self.expect("select")
+            self.expect("from")
+        definition["projection"] = self.resolve(self.next().value)
+        if self.accept("as"):
+            self.next()
+        columns = None
+        if self.peek() == "{":
+            columns = self.columns()
+        if self.accept("excluding"):
+            self.expect("{")
+            excluded = []
+            while not self.accept("}"):
+                token = self.next().value
+                if token != ",":
+                    excluded.append(token)
+            definition["excluding"] = excluded
+        definition["columns"] = columns
+        self.trailer()
+
+    # --- elements ---
+
+    def elements(self):
+        self.expect("{")
+        elements = {}
+        while not self.accept("}"):
+            annos = self.annotations()
+            element = {}
+            while self.peek() in ("key", "virtual", "masked"):
+                element[self.next().value] = True
+            tok = self.next()
+            name = tok.value
+            self.expect(":")
+            element.update(self.type_spec())
+            annos.update(self.annotations())
+            self.element_tail(element, annos)
+            last_line = self.tokens[self.pos - 1].line
+            self.accept(";")
+            if annos:
+                element["annotations"] = annos
+            doc = self.line_comments.get(last_line) or self.line_comments.get(tok.line)
+            if doc:
+                element["doc"] = doc
+            elements[name] = element
+        return elements
+
+    def element_tail(self, element, annos):
+        while self.peek() not in (";", "}", None):
+            if self.accept("default"):
+                element["default"] = self.next().value
+            elif self.accept("not"):
+                self.expect("null")
+                element["notNull"] = True
+            elif self.peek() == "@":
+                annos.update(self.annotations())
+            else:
+                self.skip_balanced()
+
+    def type_spec(self):
+        if self.peek() in ("Association", "Composition"):
+            kind = self.next().value
+            self.expect("to" if kind == "Association" else "of")
+            spec = {"type": kind, "cardinality": "one"}
+            if self.peek() in ("many", "one"):
+                spec["cardinality"] = self.next().value
+            elif self.peek() == "[":
+                self.skip_balanced()
+            spec["target"] = self.resolve(self.next().value)
+            if self.accept("on"):
+                spec["on"] = self.text_until((";", "}", "@"))
+            return spec
+        if self.peek() == "{":
+            return {"type": "struct", "elements": self.elements()}
+        many = False
+        if self.accept("many"):
+            many = True
+        elif self.peek() == "array":
+            self.next()
+            self.expect("of")
+            many = True
+        spec = self.type_spec() if self.peek() == "{" else {"type": self.resolve(self.next().value)}
+        if self.peek() == "(":
+            self.next()
+            args = []
+            while not self.accept(")"):
+                token = self.next().value
+                if token != ",":
+                    args.append(int(token) if token.isdigit() else token)
+            spec["args"] = args
+        if many:
+            spec["many"] = True
+        return spec
+
+    def columns(self):
+        self.expect("{")
+        columns = []
+        while not self.accept("}"):
+            if self.accept(","):
+                continue
+            self.annotations()
+            column = {}
+            while self.peek() in ("key", "virtual"):
+                column[self.next().value] = True
+            parts = []
+            while self.peek() not in (",", "}", "as", ":", None):
+                parts.append(self.next().value)
+            column["ref"] = " ".join(parts)
+            if self.accept("as"):
+                column["as"] = self.next().value
+            if self.accept(":"):
+                if self.accept("redirected"):
+                    self.expect("to")
+                    column["redirected"] = self.next().value
+                else:
+                    column.update(self.type_spec())
+            columns.append(column)
+        return columns
+
+
+def parse_cds(text, source="<string>"):
+    return _Parser(text, source).parse()
+
+
+def _resolve_entity(name, definitions, resolved, stack=()):
+    if name in resolved:
+        return resolved[name]
+    definition = definitions.get(name)
+    if definition is None or name in stack:
+        return None
+    stack = stack + (name,)
+    elements = {}
+    for include in definition.get("includes", []):
+        base = BUILTIN_ASPECTS.get(include.rsplit(".", 1)[-1]) if include not in definitions else None
+        if base is None:
+            base = (_resolve_entity(include, definitions, resolved, stack) or {}).get("elements", {})
+        for key, value in base.items():
+            elements[key] = dict(value)
+    elements.update(definition.get("elements", {}))
+
+    if "projection" in definition:
+        base = _resolve_entity(definition["projection"], definitions, resolved, stack)
+        base_elements = base["elements"] if base else {}
+        columns = definition.get("columns")
+        if columns is None:
+            elements = {k: dict(v) for k, v in base_elements.items()}
+        else:
+            for column in columns:
+                if column["ref"] == "*":
+                    for key, value in base_elements.items():
+                        elements.setdefault(key, dict(value))
+                    continue
+                name_ = column.get("as") or column["ref"].rsplit(".", 1)[-1]
+                element = dict(base_elements.get(column["ref"], {}))
+                if "type" in column:
+                    element = {k: v for k, v in column.items() if k not in ("ref", "as")}
+                if column.get("key"):
+                    element["key"] = True
+                if column.get("redirected"):
+                    service = definition.get("service")
+                    element["target"] = f"{service}.{column['redirected']}" if service else column["redirected"]
+                elements[name_] = element
+        for excluded in definition.get("excluding", []):
+            elements.pop(excluded, None)
+
+    result = dict(definition)
+    result["elements"] = elements
+    resolved[name] = result
+    return result
+
+
+def _qualify_references(definitions):
+    # Names are written relative to the enclosing namespace/service; make them absolute
+    def lookup(name, scope):
+        if scope and f"{scope}.{name}" in definitions:
+            return f"{scope}.{name}"
+        return name
+
+    for definition in definitions.values():
+        scope = definition.get("scope", "")
+        definition["includes"] = [lookup(n, scope) for n in definition.get("includes", [])]
+        if "projection" in definition:
+            definition["projection"] = lookup(definition["projection"], scope)
+        for element in definition.get("elements", {}).values():
+            if "target" in element:
+                element["target"] = lookup(element["target"], scope)
+            elif element.get("type") not in (None, "struct"):
+                element["type"] = lookup(element["type"], scope)
+
+
+def build_model(sources):
+    definitions = {}
+    for path in sources:
+        with open(path, 'r', encoding='utf-8') as f:
+            parsed = parse_cds(f.read(), path)
+        services = [n for n, d in parsed.items() if d["kind"] == "service"]
+        for name, definition in parsed.items():
+            owner = next((s for s in services if name.startswith(s + ".")), None)
+            if owner:
+                definition["service"] = owner
+            definitions[name] = definition
+    _qualify_references(definitions)
+    resolved = {}
+    for name, definition in definitions.items():
+        if definition["kind"] in ("entity", "aspect", "type"):
+            _resolve_entity(name, definitions, resolved)
+    for name, definition in definitions.items():
+        resolved.setdefault(name, definition)
+    return resolved
+
+
+def default_sources():
+    services = sorted(p for p in glob.glob(SERVICE_SOURCES) if os.path.normpath(p) not in map(os.path.normpath, MODEL_SOURCES))
+    return MODEL_SOURCES + services
+
+
+def _fingerprint(sources):
+    digests = {}
+    for path in sources:
+        with open(path, 'rb') as f:
+            digests[path] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+class CdsModel:
+    def __init__(self, definitions):
+        self.definitions = definitions
+
+    def __getitem__(self, name):
+        return self.definitions[name]
+
+    def get(self, name, default=None):
+        return self.definitions.get(name, default)
+
+    def entities(self, namespace=None):
+        return {n: d for n, d in self.definitions.items()
+                if d["kind"] == "entity" and (namespace is None or n.startswith(namespace + "."))}
+
+    def projections_of(self, name):
+        return sorted(n for n, d in self.definitions.items() if d.get("projection") == name)
+
+    def compositions(self, name):
+        return {k: v for k, v in self.definitions[name]["elements"].items() if v.get("type") == "Composition"}
+
+    def associations(self, name):
+        return {k: v for k, v in self.definitions[name]["elements"].items() if v.get("type") == "Association"}
+
+
+def load_model(sources=None, cache_path=CACHE_PATH):
+    # Parses the sources, or returns the cached model when no source file changed
+    sources = list(sources or default_sources())
+    fingerprint = _fingerprint(sources)
+    if cache_path:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") == CACHE_VERSION and cached.get("sources") == fingerprint:
+                return CdsModel(cached["definitions"])
+        except (OSError, ValueError):
+            pass
+    definitions = build_model(sources)
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "sources": fingerprint, "definitions": definitions}, f)
+        os.replace(tmp, cache_path)
+    return CdsModel(definitions)
+
+
+def format_type(element):
+    kind = element.get("type", "")
+    if kind in ("Association", "Composition"):
+        joiner = "to" if kind == "Association" else "of"
+        many = " many" if element.get("cardinality") == "many" else ""
+        return f"{kind} {joiner}{many} {element['target'].rsplit('.', 1)[-1]}"
+    if kind == "struct":
+        text = "Structure"
+    else:
+        text = kind.rsplit(".", 1)[-1] if kind.startswith("cds.") else kind
+        if element.get("args"):
+            text += "(" + ",".join(str(a) for a in element["args"]) + ")"
+    return f"many {text}" if element.get("many") else text
@@ -0,0 +1,91 @@
+"""Page templates and Markdown table builders for generate_docs.py.
+
+A template is a Markdown file with {{ name }} slots. Templates are looked up in
+the override directories first (generate_docs.py --templates DIR) and then in
+scripts/templates/, so a deployment can restyle pages without editing Python.
+Each template is split into literal text and slots once and cached; rendering
+a page is a single join. Templates have no logic: loops and optional blocks are
+built in Python and passed in as strings.
+"""
+import os
+import re
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class TemplateError(Exception):
+    pass
+
+
+class Template:
+    def __init__(self, text, name="<string>"):
+        self.name = name
+        # Even indexes hold literal text, odd indexes slot names
+        self.parts = _SLOT_RE.split(text)
+        self.slots = set(self.parts[1::2])
+
+    def render(self, **values):
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            try:
+                parts[i] = str(values[parts[i]])
+            except KeyError:
+                raise TemplateError(f"{self.name}: no value for {{{{ {parts[i]} }}}}") from None
+        return "".join(parts)
+
+
+_search_path = [TEMPLATE_DIR]
+_cache = {}
+
+
+def set_override_dirs(directories):
+    global _search_path
+    _search_path = [*directories, TEMPLATE_DIR]
+    _cache.clear()
+
+
+def search_path():
+    return list(_search_path)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def template_path(name):
+    for directory in _search_path:
+        path = os.path.join(directory, name + ".md")
+        if os.path.isfile(path):
+            return path
+    raise TemplateError(f"template '{name}' not found in {', '.join(_search_path)}")
+
+
+def get_template(name):
+    template = _cache.get(name)
+    if template is None:
+        path = template_path(name)
+        with open(path, 'r', encoding='utf-8') as f:
+            template = _cache[name] = Template(f.read(), path)
+    return template
+
+
+def render(name, /, **values):
+    return get_template(name).render(**values)
+
+
+# --- Tables ---
+
+def table_header(columns, rule=None):
+    # Header and alignment row; the rule defaults to one dash wider than the column name
+    rules = [rule or ":" + "-" * (len(c) + 1) for c in columns]
+    return "| " + " | ".join(columns) + " |\n|" + "|".join(rules) + "|"
+
+
+def table_row(cells):
+    return "| " + " | ".join([str(c) for c in cells]) + " |"
+
+
+def table(columns, rows, rule=None):
+    return "\n".join([table_header(columns, rule), *[table_row(r) for r in rows]])
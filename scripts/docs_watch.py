@@ -0,0 +1,313 @@
+"""Watch mode for generate_docs.py.
+
+Keeps the generator module, its data and the parsed CDS model resident and
+watches the generator, cds_model.py, the CDS sources and the db/data seed files
+(inotify on Linux, stat polling elsewhere). Every page records the inputs it
+depends on (see generate_docs.JOB_INPUTS); after a change only the pages whose
+inputs, job arguments or generator code changed are re-rendered and written.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+import types
+
+import cds_model
+import doc_templates
+
+POLL_INTERVAL = 0.1
+SETTLE_TIME = 0.02  # editors save in bursts (truncate, write, rename); wait for the last event
+
+# Module state that changes while the generator runs, excluded from the code fingerprint
+_RUNTIME_GLOBALS = {"_output", "_created_dirs", "_link_index", "_cds_model"}
+_DATA_GLOBALS = {"apps", "code_lists", "entities", "section_entities", "api_examples",
+                 "integration_specs", "common_specs"}
+
+
+# --- Watchers ---
+
+class InotifyWatcher:
+    # inotify(7) through ctypes; raises OSError where it is not available
+    _EVENTS = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # MODIFY CLOSE_WRITE MOVED_FROM MOVED_TO CREATE DELETE
+    _HEADER = struct.Struct("iIII")
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self._EVENTS)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self.directories[wd] = directory
+
+    def _drain(self):
+        changed = set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, _, _, length = self._HEADER.unpack_from(buffer, offset)
+            offset += self._HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name and wd in self.directories:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def wait(self):
+        # Blocks until something changes and returns the changed paths
+        changed = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed |= self._drain()
+        while select.select([self.fd], [], [], SETTLE_TIME)[0]:
+            changed |= self._drain()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = list(directories)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    snapshot[os.path.join(directory, entry.name)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self):
+        while True:
+            time.sleep(self.interval)
+            current = self._scan()
+            changed = {p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p)}
+            self.snapshot = current
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(directories, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
+
+
+# --- Dependency tracking ---
+
+def _code_key(code):
+    # Compares code objects without line numbers, so editing the data above a function
+    # does not count as a change to the function
+    consts = tuple(_code_key(c) if isinstance(c, types.CodeType) else repr(c) for c in code.co_consts)
+    return (code.co_code, code.co_names, consts)
+
+
+def _value_key(value):
+    if isinstance(value, types.FunctionType):
+        return (value.__name__, _code_key(value.__code__))
+    if isinstance(value, type):
+        return {k: _value_key(v) for k, v in vars(value).items() if isinstance(v, types.FunctionType)}
+    if isinstance(value, dict):
+        return [(_value_key(k), _value_key(v)) for k, v in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_value_key(v) for v in value]
+    return repr(value)
+
+
+def code_fingerprint(module):
+    # Everything in the generator except its data dicts and runtime state
+    digest = hashlib.sha256()
+    for name, value in sorted(vars(module).items()):
+        if name.startswith("__") or name in _RUNTIME_GLOBALS or name in _DATA_GLOBALS or isinstance(value, types.ModuleType):
+            continue
+        digest.update(f"{name}={_value_key(value)!r}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def input_fingerprint(module, key):
+    kind = key[0]
+    if kind == "template":
+        path = doc_templates.template_path(key[1])
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    if kind == "seed":
+        try:
+            st = os.stat(os.path.join(module.DATA_DIR, key[1]))
+        except (OSError, TypeError):
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    if kind == "cds":
+        model = module.get_cds_model()
+        value = [model.get(key[1]), [(p, model[p]["source"]) for p in model.projections_of(key[1])]]
+    else:
+        value = getattr(module, kind)
+        for part in key[1:]:
+            value = value.get(part) if isinstance(value, dict) else None
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def load_generator(path):
+    # Executes a fresh copy of generate_docs.py so edits to its data and code are picked up
+    spec = importlib.util.spec_from_file_location("generate_docs_watched", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class WatchSession:
+    def __init__(self, module, script):
+        self.module = module
+        self.script = script
+        self.code = None
+        self.pages = {}  # job path -> (render name, args, {input: fingerprint}, [output paths])
+
+    def files(self):
+        return sum(len(page[3]) for page in self.pages.values())
+
+    def sources(self):
+        paths = {self.script, os.path.relpath(cds_model.__file__), os.path.relpath(doc_templates.__file__)}
+        paths.update(cds_model.default_sources())
+        return paths
+
+    def template_dirs(self):
+        return {os.path.relpath(d) for d in doc_templates.search_path() if os.path.isdir(d)}
+
+    def directories(self):
+        return sorted({os.path.dirname(p) or "." for p in self.sources()} | {self.module.DATA_DIR} | self.template_dirs())
+
+    def is_input(self, path):
+        path = os.path.relpath(path)
+        directory = os.path.dirname(path)
+        return (path in self.sources() or (path.endswith(".csv") and directory == self.module.DATA_DIR)
+                or (path.endswith(".md") and directory in self.template_dirs()))
+
+    def reload(self, changed):
+        # Reloads what the changed files feed into; returns False if the new state does not load
+        try:
+            if any(p.endswith(".md") for p in changed):
+                doc_templates.clear_cache()
+            if os.path.relpath(doc_templates.__file__) in changed:
+                overrides = doc_templates.search_path()[:-1]
+                importlib.reload(doc_templates)
+                doc_templates.set_override_dirs(overrides)
+                self.module = load_generator(self.script)
+                self.code = None  # table builders and slot handling may have changed every page
+            elif os.path.relpath(cds_model.__file__) in changed:
+                importlib.reload(cds_model)
+                self.module = load_generator(self.script)
+                self.module._cds_model = cds_model.load_model(cache_path=None)  # the cache predates the parser change
+            elif self.script in changed:
+                cds = self.module._cds_model if not any(p.endswith(".cds") for p in changed) else None
+                self.module = load_generator(self.script)
+                self.module._cds_model = cds
+            elif any(p.endswith(".cds") for p in changed):
+                self.module._cds_model = None
+            self.module.get_cds_model()
+        except Exception as e:  # half-saved edits are common while watching
+            print(f"Not regenerating: {type(e).__name__}: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def rebuild(self):
+        # Renders every job whose inputs changed since the last call; returns the number of files rendered
+        module = self.module
+        code = code_fingerprint(module)
+        fingerprints = {}
+        writer = module.IncrementalWriter()
+        if self.pages:
+            writer.current = dict(writer.previous)
+        module._created_dirs.clear()
+        pages, rendered = {}, 0
+        for _, stage in module.STAGES:
+            for path, render, args in stage():
+                inputs = {}
+                for key in module.job_inputs(render, args):
+                    if key not in fingerprints:
+                        fingerprints[key] = input_fingerprint(module, key)
+                    inputs[key] = fingerprints[key]
+                previous = self.pages.get(path)
+                if code == self.code and previous and previous[:3] == (render.__name__, args, inputs):
+                    pages[path] = previous
+                    continue
+                outputs = []
+                for out_path, content in module.render_job(path, render, args):
+                    action = writer.write(out_path, content)
+                    if action:
+                        print(f"{action} {out_path}")
+                    outputs.append(out_path)
+                if previous:
+                    for stale in set(previous[3]) - set(outputs):
+                        writer.current.pop(stale, None)
+                pages[path] = (render.__name__, args, inputs, outputs)
+                rendered += len(outputs)
+        for path in set(self.pages) - set(pages):
+            for stale in self.pages[path][3]:
+                writer.current.pop(stale, None)
+        writer.finish()
+        for path in writer.removed:
+            print(f"Removed {path}")
+        self.pages = pages
+        self.code = code
+        return rendered
+
+
+def watch(module, poll=False):
+    script = os.path.relpath(module.__file__)
+    session = WatchSession(module, script)
+    started = time.perf_counter()
+    rendered = session.rebuild()
+    print(f"Rendered {rendered} pages in {(time.perf_counter() - started) * 1000:.0f} ms.")
+    watcher = make_watcher(session.directories(), poll)
+    kind = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"Watching {', '.join(session.directories())} ({kind}). Press Ctrl+C to stop.")
+    try:
+        while True:
+            changed = {os.path.relpath(p) for p in watcher.wait() if session.is_input(p)}
+            if not changed:
+                continue
+            started = time.perf_counter()
+            if not session.reload(changed):
+                continue
+            try:
+                rendered = session.rebuild()
+            except Exception as e:
+                print(f"Regeneration failed: {type(e).__name__}: {e}", file=sys.stderr)
+                session.code = None  # re-render everything once the inputs are fixed
+                continue
+            print(f"{', '.join(sorted(changed))}: re-rendered {rendered} of {session.files()} pages "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms.")
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
@@ -1,10 +1,406 @@
+import argparse
+import contextlib
+import cProfile
+import csv
+import difflib
+import hashlib
+import io
+import itertools
+import json
 import os
+import posixpath
+import re
+import sys
+import tarfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cds_model
+import doc_templates
+
+CACHE_DIR = ".docs-cache"
+DATA_DIR = "db/data"
+DEFAULT_LOCALE = "en"
+CODE_LIST_PAGE_SIZE = 25
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.json")
+
+# --- Output ---
+
+# Output backends share one interface: write(path, content) returns the action to log
+# ("Created"/"Updated") or None, and finish() returns summary counts for the run.
+
+class FileSystemBackend:
+    def __init__(self):
+        self.written = 0
+
+    def write(self, path, content):
+        _write_bytes(path, content.encode('utf-8'))
+        self.written += 1
+        return "Created"
+
+    def finish(self):
+        return {"written": self.written}
+
+
+class MemoryBackend:
+    # Renders the whole tree into {path: bytes} without touching disk
+    def __init__(self):
+        self.files = {}
+
+    def write(self, path, content):
+        self.files[path] = content.encode('utf-8')
+        return None
+
+    def finish(self):
+        return {"files": len(self.files), "bytes": sum(len(d) for d in self.files.values())}
+
+
+class ArchiveBackend:
+    # Streams every page into a single tar, tar.gz or zip archive ("-" = stdout).
+    # Entries get a fixed timestamp so identical docs produce identical archives.
+    FORMATS = ("tar", "tgz", "zip")
+
+    def __init__(self, fmt, target):
+        self.fmt = fmt
+        self.target = target
+        self.files = 0
+        self.bytes = 0
+        self.mtime = int(os.environ.get("SOURCE_DATE_EPOCH", "315532800"))  # 1980-01-01, earliest zip date
+        self._lock = threading.Lock()
+        self._stream = sys.stdout.buffer if target == "-" else open(target, 'wb')
+        if fmt == "zip":
+            self._archive = zipfile.ZipFile(self._stream, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(fileobj=self._stream, mode="w|gz" if fmt == "tgz" else "w|")
+
+    def write(self, path, content):
+        data = content.encode('utf-8')
+        with self._lock:
+            if self.fmt == "zip":
+                info = zipfile.ZipInfo(path, date_time=time.gmtime(self.mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                self._archive.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(path)
+                info.size = len(data)
+                info.mtime = self.mtime
+                self._archive.addfile(info, io.BytesIO(data))
+            self.files += 1
+            self.bytes += len(data)
+        return None
+
+    def finish(self):
+        self._archive.close()
+        if self._stream is not sys.stdout.buffer:
+            self._stream.close()
+        else:
+            self._stream.flush()
+        return {"files": self.files, "bytes": self.bytes, "archive": self.target}
+
+
+def make_backend(output):
+    if output == "fs":
+        return FileSystemBackend()
+    if output == "memory":
+        return MemoryBackend()
+    fmt, _, target = output.partition(":")
+    if fmt in ArchiveBackend.FORMATS and target:
+        return ArchiveBackend(fmt, target)
+    raise ValueError(f"unknown output '{output}' (expected fs, memory, tar:FILE, tgz:FILE or zip:FILE)")
+
+
+def diff_tree(files, root="docs"):
+    # Compares rendered {path: bytes} with the tree on disk; returns (added, changed, removed)
+    on_disk = set()
+    for directory, _, names in os.walk(root):
+        on_disk.update(os.path.join(directory, n) for n in names)
+    added, changed = [], []
+    for path in sorted(files):
+        if path not in on_disk:
+            added.append(path)
+            continue
+        with open(path, 'rb') as f:
+            if f.read() != files[path]:
+                changed.append(path)
+    removed = sorted(on_disk - set(files))
+    return added, changed, removed
+
+
+def print_tree_diff(files, added, changed, removed):
+    for path in added:
+        print(f"Added {path}")
+    for path in removed:
+        print(f"Removed {path}")
+    for path in changed:
+        with open(path, 'r', encoding='utf-8') as f:
+            old = f.read().splitlines(keepends=True)
+        new = files[path].decode('utf-8').splitlines(keepends=True)
+        sys.stdout.writelines(difflib.unified_diff(old, new, fromfile=f"a/{path}", tofile=f"b/{path}"))
+
+
+class IncrementalWriter:
+    # Keeps a manifest of {path: {sha256, size, mtime_ns}} for every generated file.
+    # Unchanged files are recognised from the hash plus a stat() and are not reopened,
+    # so a no-op regeneration costs one stat per file and leaves mtimes alone.
+
+    def __init__(self, manifest_path=MANIFEST_PATH):
+        self.manifest_path = manifest_path
+        self.previous = self._load()
+        self.current = {}
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.unchanged = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _unchanged_stat(self, path, data, digest):
+        # Returns the file's stat when it already holds `data`, else None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.previous.get(path)
+        if entry and entry["sha256"] == digest and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return st
+        # Manifest missing or stale (fresh checkout, touched file): compare against the file itself
+        if st.st_size != len(data):
+            return None
+        with open(path, 'rb') as f:
+            return st if f.read() == data else None
+
+    def write(self, path, content):
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        st = self._unchanged_stat(path, data, digest)
+        action = None
+        if st is None:
+            action = "Updated" if os.path.exists(path) else "Created"
+            _write_bytes(path, data)
+            st = os.stat(path)
+        # write() may be called from the writer thread pool
+        with self._lock:
+            if action is None:
+                self.unchanged += 1
+            else:
+                (self.changed if action == "Updated" else self.added).append(path)
+            self.current[path] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        return action
+
+    def finish(self):
+        for path in sorted(set(self.previous) - set(self.current)):
+            if os.path.exists(path):
+                os.remove(path)
+                _prune_empty_dirs(os.path.dirname(path))
+            self.removed.append(path)
+        if self.current != self.previous:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "files": self.current}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.manifest_path)
+        return {"added": len(self.added), "changed": len(self.changed), "removed": len(self.removed), "unchanged": self.unchanged}
+
+
+_output = FileSystemBackend()
+_created_dirs = set()
+
+def _ensure_dir(directory):
+    if directory not in _created_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _created_dirs.add(directory)
+
+def _write_bytes(path, data):
+    _ensure_dir(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _prune_empty_dirs(directory, stop="docs"):
+    while directory and os.path.normpath(directory) != os.path.normpath(stop):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+def write_output(path, content):
+    # Returns "Created"/"Updated", or None when nothing is logged for this file
+    # (unchanged in an incremental build, or written to memory/an archive)
+    if _link_index is not None:
+        _link_index.add(path, content)
+    return _output.write(path, content)
 
 def create_file(path, content):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w') as f:
-        f.write(content)
-    print(f"Created {path}")
+    action = write_output(path, content)
+    if _stats is not None:
+        _stats.count(_stats.current, content, action)
+    if action:
+        print(f"{action} {path}")
+
+# --- Instrumentation ---
+
+class StageStats:
+    # Per-stage timing and output counters, with optional cProfile and tracemalloc capture.
+    # Under --jobs the time of a stage is the render and write time summed over all workers.
+
+    def __init__(self, profile_dir=None, trace_memory=False):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.records = {}
+        self.current = None
+        self.hooks = []  # called with each stage's record when the stage ends
+        self._lock = threading.Lock()
+
+    def record(self, name):
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = {"stage": name, "seconds": 0.0, "files": 0, "written": 0, "skipped": 0, "bytes": 0}
+        return record
+
+    def count(self, name, content, action, seconds=0.0):
+        # An output that was unchanged in an incremental build counts as skipped
+        skipped = action is None and isinstance(_output, IncrementalWriter)
+        with self._lock:
+            record = self.record(name)
+            record["files"] += 1
+            record["skipped" if skipped else "written"] += 1
+            record["bytes"] += len(content.encode('utf-8'))
+            record["seconds"] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        record = self.record(name)
+        self.current = name
+        profiler = cProfile.Profile() if self.profile_dir else None
+        if self.trace_memory:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] += time.perf_counter() - started
+            if profiler:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            if self.trace_memory:
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.current = None
+            self.finish_stage(name)
+
+    def finish_stage(self, name):
+        for hook in self.hooks:
+            hook(self.records[name])
+
+    def summary(self):
+        records = list(self.records.values())
+        total = {"stage": "total"}
+        for key in ("seconds", "files", "written", "skipped", "bytes"):
+            total[key] = sum(r[key] for r in records)
+        if self.trace_memory:
+            total["peak_bytes"] = max([r.get("peak_bytes", 0) for r in records], default=0)
+        return {"stages": records, "total": total}
+
+    def format_table(self):
+        summary = self.summary()
+        memory = self.trace_memory
+        header = f"{'Stage':<14} {'Time ms':>9} {'Share':>6} {'Files':>6} {'Written':>8} {'Skipped':>8} {'Bytes':>10}"
+        lines = [header + (f" {'Peak KiB':>9}" if memory else ""), "-" * (len(header) + (10 if memory else 0))]
+        elapsed = summary["total"]["seconds"] or 1.0
+        for r in summary["stages"] + [summary["total"]]:
+            line = (f"{r['stage']:<14} {r['seconds'] * 1000:>9.1f} {r['seconds'] / elapsed:>6.0%} {r['files']:>6} "
+                    f"{r['written']:>8} {r['skipped']:>8} {r['bytes']:>10}")
+            lines.append(line + (f" {r.get('peak_bytes', 0) / 1024:>9.0f}" if memory else ""))
+        return "\n".join(lines)
+
+_stats = None
+
+def stage_scope(name):
+    return _stats.stage(name) if _stats is not None else contextlib.nullcontext()
+
+# --- Link checking ---
+
+_FENCE_RE = re.compile(r"^```.*?^```[^\n]*$", re.M | re.S)
+_HEADING_RE = re.compile(r"^#{1,6}[ \t]+(.+?)[ \t]*#*[ \t]*$", re.M)
+_LINK_RE = re.compile(r"\[[^\]\n]*\]\(([^()\n]*)\)")
+_SCHEME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+def heading_anchor(text):
+    # GitHub-style slug: lowercase, punctuation dropped, spaces become hyphens
+    return re.sub(r"[^\w\- ]", "", text.strip().lower()).replace(" ", "-")
+
+
+class LinkIndex:
+    # Collects the anchors and relative links of every emitted page in one pass, then
+    # resolves all links against that index instead of the filesystem.
+
+    def __init__(self):
+        self.anchors = {}
+        self.links = []
+        self._lock = threading.Lock()
+
+    def add(self, path, content):
+        # Blank out fenced code (keeping line breaks) so JSON samples are not scanned
+        text = _FENCE_RE.sub(lambda m: "\n" * m.group().count("\n"), content)
+        anchors, seen = set(), {}
+        for m in _HEADING_RE.finditer(text):
+            slug = heading_anchor(m.group(1))
+            n = seen.get(slug, 0)
+            seen[slug] = n + 1
+            anchors.add(slug if n == 0 else f"{slug}-{n}")
+        links, line, offset = [], 1, 0
+        for m in _LINK_RE.finditer(text):
+            line += text.count("\n", offset, m.start())
+            offset = m.start()
+            links.append((path, line, m.group(1)))
+        with self._lock:
+            self.anchors[path] = anchors
+            self.links.extend(links)
+
+    def problems(self):
+        # Returns [(source, line, target, reason)] sorted by source page and line
+        resolved_cache = {}
+        found = []
+        for source, line, raw in self.links:
+            target = raw.strip()
+            if target != raw:
+                found.append((source, line, raw, "whitespace around link target"))
+            if not target or _SCHEME_RE.match(target):
+                continue
+            page, _, anchor = target.partition("#")
+            key = (posixpath.dirname(source), page)
+            resolved = resolved_cache.get(key)
+            if resolved is None:
+                resolved = posixpath.normpath(posixpath.join(key[0], page)) if page else None
+                resolved_cache[key] = resolved
+            resolved = resolved or source
+            if resolved not in self.anchors:
+                found.append((source, line, raw, "no such page"))
+            elif anchor and anchor not in self.anchors[resolved]:
+                found.append((source, line, raw, f"no heading '#{anchor}' in {resolved}"))
+        return sorted(found)
+
+
+def check_links(files):
+    # Checks an in-memory tree ({path: str or bytes}, e.g. from render_tree())
+    index = LinkIndex()
+    for path, content in files.items():
+        index.add(path, content.decode('utf-8') if isinstance(content, bytes) else content)
+    return index.problems()
+
+_link_index = None
 
 # --- Data Structures ---
 
@@ -474,81 +870,85 @@ apps = {
     }
 }
 
+# Code list values are streamed from the seed files in db/data (semicolon-delimited CSV).
+# "columns" selects and orders the rendered columns (default: every column except locale);
+# "values" is only used for lists without a seed file.
 code_lists = {
-    "request-types": {"desc": "Defines the type of business partner request. Determines workflow behavior and required fields.", "values": ["Create", "Change", "AdhocSync"]},
-    "source-systems": {"desc": "Identifies the originating system. Controls app-specific validation rules.", "values": ["Salesforce", "Coupa", "PI", "MDM"]},
-    "overall-statuses": {"desc": "Master list of all workflow statuses. Controls UI behavior.", "values": ["New", "Submitted", "Approved", "Rejected", "Completed", "Error", "ComplianceReview", "SAPCreated", "SAPUpdatePending", "SAPUpdateComplete", "SatelliteNotified", "SatelliteConfirmed"]},
-    "status-transitions": {"desc": "Defines valid status changes.", "values": ["New->Submitted", "Submitted->Approved", "Submitted->Rejected", "Approved->SAPCreated"]},
-    "workflow-steps": {"desc": "Defines workflow step sequences.", "values": ["Initiation", "Validation", "Approval", "Integration"]},
-    "bp-types": {"desc": "Distinguishes between organization and individual business partners.", "values": ["ORG", "PERSON"]},
+    "request-types": {"desc": "Defines the type of business partner request. Determines workflow behavior and required fields.", "source": "mdm.db-RequestTypes.csv"},
+    "source-systems": {"desc": "Identifies the originating system. Controls app-specific validation rules.", "source": "mdm.db-SourceSystems.csv"},
+    "overall-statuses": {"desc": "Master list of all workflow statuses. Controls UI behavior.", "source": "mdm.db-OverallStatuses.csv"},
+    "status-transitions": {"desc": "Defines valid status changes.", "source": "mdm.db-StatusTransitions.csv"},
+    "workflow-steps": {"desc": "Defines workflow step sequences.", "source": "mdm.db-WorkflowSteps.csv"},
+    "bp-types": {"desc": "Distinguishes between organization and individual business partners.", "source": "mdm.db-BPTypes.csv"},
     "entity-types": {"desc": "Defines the business relationship type.", "values": ["Customer", "Supplier", "Both"]},
-    "address-types": {"desc": "Categorizes addresses by business function.", "values": ["Business", "Shipping", "Remit-To", "Ordering"]},
-    "countries": {"desc": "ISO 3166-1 alpha-2 country codes.", "values": ["DE", "US", "GB", "FR", "CN", "JP", "IN", "BR"]},
-    "postal-code-patterns": {"desc": "Country-specific postal code validation patterns.", "values": ["US: ^\\d{5}(-\\d{4})?$", "DE: ^\\d{5}$", "GB: ^[A-Z]{1,2}\\d[A-Z\\d]? ?\\d[A-Z]{2}$"]},
-    "payment-terms": {"desc": "Standard payment terms defining when invoices are due.", "values": ["NET30", "NET60", "2%10NET30", "IMMEDIATE"]},
-    "payment-methods": {"desc": "How payments are made to/from the business partner.", "values": ["T (Bank Transfer)", "C (Check)", "D (Direct Debit)", "P (PayPal)"]},
-    "currencies": {"desc": "ISO 4217 currency codes for transactions.", "values": ["EUR", "USD", "GBP", "CHF", "JPY"]},
-    "iban-patterns": {"desc": "Country-specific IBAN validation patterns.", "values": ["DE: ^DE\\d{20}$", "FR: ^FR\\d{25}$"]},
-    "vat-types": {"desc": "Categorizes VAT registration types.", "values": ["EU", "LOCAL", "EXEMPT"]},
-    "vat-patterns": {"desc": "Country-specific VAT ID validation patterns.", "values": ["DE: ^DE\\d{9}$", "AT: ^ATU\\d{8}$"]},
-    "identification-types": {"desc": "Types of business identifications.", "values": ["DUNS", "TAXID", "REGISTER", "SALESFORCE", "COUPA", "PI"]},
-    "email-types": {"desc": "Categorizes email addresses by purpose.", "values": ["GENERAL", "INVOICE", "ORDER"]},
-    "contact-types": {"desc": "Types of contacts associated with the business partner.", "values": ["PRIMARY", "BILLING", "SHIPPING"]},
-    "revenue-streams": {"desc": "Categorizes revenue for financial reporting (Salesforce).", "values": ["License", "Services", "Support", "Maintenance"]},
-    "billing-cycles": {"desc": "Defines invoice frequency for sub-accounts.", "values": ["MONTHLY", "QUARTERLY", "ANNUALLY"]},
-    "dunning-strategies": {"desc": "Collection strategy for overdue payments.", "values": ["Standard", "Aggressive", "VIP"]},
-    "business-channels": {"desc": "Sales channel classification.", "values": ["DIRECT", "PARTNER", "ONLINE"]},
-    "admin-menu": {"desc": "Navigation menu items for Admin Config app.", "values": ["Validation Rules", "Code Lists", "System Config"]},
-    "system-configuration": {"desc": "System-wide settings.", "values": ["AEB_ENABLED", "VIES_ENABLED", "AUTO_APPROVE_LIMIT"]},
-    "status-app-config": {"desc": "Per-status UI configuration.", "values": ["New:Blue", "Approved:Green", "Rejected:Red"]}
+    "address-types": {"desc": "Categorizes addresses by business function.", "source": "mdm.db-AddressTypes.csv"},
+    "countries": {"desc": "ISO 3166-1 alpha-2 country codes.", "source": "sap.common-Countries.csv"},
+    "postal-code-patterns": {"desc": "Country-specific postal code validation patterns.", "source": "mdm.db-PostalCodePatterns.csv",
+                             "columns": ["countryCode", "countryName", "postalCodeLabel", "pattern", "examplePostalCode"]},
+    "payment-terms": {"desc": "Standard payment terms defining when invoices are due.", "source": "mdm.db-PaymentTerms.csv"},
+    "payment-methods": {"desc": "How payments are made to/from the business partner.", "source": "mdm.db-PaymentMethods.csv"},
+    "currencies": {"desc": "ISO 4217 currency codes for transactions.", "source": "sap.common-Currencies.csv"},
+    "iban-patterns": {"desc": "Country-specific IBAN validation patterns.", "source": "mdm.db-IBANPatterns.csv",
+                      "columns": ["countryCode", "countryName", "ibanLength", "pattern", "exampleIBAN"]},
+    "vat-types": {"desc": "Categorizes VAT registration types.", "source": "mdm.db-VatTypes.csv"},
+    "vat-patterns": {"desc": "Country-specific VAT ID validation patterns.", "source": "mdm.db-VATPatterns.csv",
+                     "columns": ["countryCode", "countryName", "vatLabel", "pattern", "exampleVAT", "viesEnabled"]},
+    "identification-types": {"desc": "Types of business identifications.", "source": "mdm.db-IdentificationTypes.csv"},
+    "email-types": {"desc": "Categorizes email addresses by purpose.", "source": "mdm.db-EmailTypes.csv"},
+    "contact-types": {"desc": "Types of contacts associated with the business partner.", "source": "mdm.db-ContactTypes.csv"},
+    "revenue-streams": {"desc": "Categorizes revenue for financial reporting (Salesforce).", "source": "mdm.db-RevenueStreams.csv"},
+    "billing-cycles": {"desc": "Defines invoice frequency for sub-accounts.", "source": "mdm.db-BillingCycles.csv"},
+    "dunning-strategies": {"desc": "Collection strategy for overdue payments.", "source": "mdm.db-DunningStrategies.csv"},
+    "business-channels": {"desc": "Sales channel classification.", "source": "mdm.db-BusinessChannels.csv"},
+    "admin-menu": {"desc": "Navigation menu items for Admin Config app.", "source": "mdm.db-AdminMenu.csv",
+                   "columns": ["code", "title", "description", "category", "sortOrder"]},
+    "system-configuration": {"desc": "System-wide settings.", "source": "mdm.db-SystemConfiguration.csv"},
+    "status-app-config": {"desc": "Per-status UI configuration.", "source": "mdm.db-StatusAppConfig.csv"}
 }
 
-# Entities mapped from db/data-model.cds
+# Entity docs are rendered from the CDS model (db/data-model.cds, srv/*.cds) - see cds_model.py
 entities = {
-    "business-partner-request": [
-        "requestNumber", "entityType", "requestType", "sourceSystem", "status",
-        "partnerName", "name1", "name2", "merchantId", "searchTerm",
-        "partnerRole", "communicationLanguage", "reconAccount", "currency_code",
-        "paymentMethod_code", "paymentTerms_code", "aebStatus", "viesStatus", "duplicateCheckStatus"
-    ],
-    "partner-addresses": [
-        "request", "sapAddressId", "addressType_code", "street", "city",
-        "postalCode", "country_code", "region", "isDefault"
-    ],
-    "partner-banks": [
-        "request", "bankCountry_code", "bankKey", "bankName", "accountNumber",
-        "iban", "swiftCode", "currency_code", "isDefault"
-    ],
-    "partner-emails": [
-        "request", "emailType_code", "emailAddress", "notes", "isDefault"
-    ],
-    "partner-vat-ids": [
-        "request", "country_code", "vatNumber", "vatType_code", "isEstablished", "validationStatus"
-    ],
-    "partner-identifications": [
-        "request", "identificationType_code", "identificationNumber", "country_code", "issuingAuthority", "validFrom", "validTo"
-    ],
-    "sub-accounts": [
-        "request", "subAccountId", "revenueStream_code", "billingCycle_code", "paymentTerms_code", "dunningStrategy_code"
-    ],
-    "change-logs": [
-        "request", "changeDate", "changedBy", "sectionName", "fieldName", "oldValue", "newValue", "changeType"
-    ],
-    "duplicate-checks": [
-        "request", "matchType", "matchScore", "existingBpNumber", "matchDetails", "reviewRequired"
-    ],
-    "change-notifications": [
-        "bpNumber", "bpName", "changeType", "impactedSystems", "fieldsChanged", "notificationSent"
-    ],
-    "notification-acknowledgments": [
-        "notification", "systemOwnerUserId", "targetSystem", "status", "comments", "acknowledgedAt"
-    ]
+    "business-partner-request": "mdm.db.BusinessPartnerRequests",
+    "partner-addresses": "mdm.db.PartnerAddresses",
+    "partner-banks": "mdm.db.PartnerBanks",
+    "partner-emails": "mdm.db.PartnerEmails",
+    "partner-vat-ids": "mdm.db.PartnerVatIds",
+    "partner-identifications": "mdm.db.PartnerIdentifications",
+    "sub-accounts": "mdm.db.SubAccounts",
+    "change-logs": "mdm.db.ChangeLogs",
+    "duplicate-checks": "mdm.db.DuplicateChecks",
+    "change-notifications": "mdm.db.ChangeNotifications",
+    "notification-acknowledgments": "mdm.db.NotificationAcknowledgments"
+}
+
+# App sections backed by a documented entity
+section_entities = {
+    "general-information": "business-partner-request",
+    "payment-information": "business-partner-request",
+    "addresses": "partner-addresses",
+    "bank-accounts": "partner-banks",
+    "emails": "partner-emails",
+    "vat-ids": "partner-vat-ids",
+    "identifications": "partner-identifications",
+    "sub-accounts": "sub-accounts",
+    "notification-details": "notification-acknowledgments"
 }
 
+_cds_model = None
+
+def get_cds_model():
+    global _cds_model
+    if _cds_model is None:
+        _cds_model = cds_model.load_model()
+    return _cds_model
+
+def _md_cell(text):
+    return str(text).replace("|", "\\|").replace("\n", " ")
+
 # --- Content Generators ---
 
-def generate_root_readme():
-    content = """# Business Partner Management System - Documentation
+def render_root_readme():
+    return """# Business Partner Management System - Documentation
 
 ## Quick Navigation
 
@@ -584,187 +984,223 @@ def generate_root_readme():
 - [📋 Development Task List](project/task-list.md)
 - [📁 Documentation Structure](project/structure.md)
 """
-    create_file("docs/README.md", content)
 
-def generate_app_readmes():
+def root_readme_jobs():
+    yield "docs/README.md", render_root_readme, ()
+
+def render_app_readme(app):
+    data = apps[app]
+    sections_links = "\n".join([f"- [{s.replace('-', ' ').title()}](sections/{s}.md)" for s in data["sections"].keys()])
+    workflows_links = "\n".join([f"- [{w.replace('-', ' ').title()}](workflows/{w}.md)" for w in data["workflows"]])
+
+    actions_section = ""
+    if "actions" in data:
+        actions_links = "\n".join([f"- [{a.replace('-', ' ').title()}](actions/{a}.md)" for a in data["actions"]])
+        actions_section = f"\n### Actions\n{actions_links}\n"
+
+    characteristics = doc_templates.table(["Characteristic", "Value"], [
+        ["Entity Type", data.get('type', 'N/A')],
+        ["Source System", app.title()],
+    ])
+    return doc_templates.render("app-readme", title=data['title'], description=data['description'],
+                                section_links=sections_links, workflow_links=workflows_links,
+                                actions=actions_section, characteristics=characteristics)
+
+def app_readme_jobs():
+    for app in apps:
+        yield f"docs/apps/{app}/README.md", render_app_readme, (app,)
+
+def render_section_doc(app, section):
+    data = apps[app]
+    details = data["sections"][section]
+    rows = [
+        [field.get('label', ''), field.get('label', ''), field.get('type', ''), field.get('mandatory', ''),
+         "Editable", "Read-Only", field.get('notes', '')]
+        for field in details.get("fields", [])
+    ] or [["-"] * 7]
+    fields = doc_templates.table(["Field", "Label", "Type", "Mandatory", "Create", "Change", "Notes"], rows)
+
+    if section in section_entities:
+        entity = section_entities[section]
+        entity_link = f"[{entity.replace('-', ' ').title()}](../../../data-model/entities/{entity}.md)"
+    else:
+        entity_link = "[Related Entity](../../../data-model/entities/README.md)"
+
+    return doc_templates.render("section", title=section.replace('-', ' ').title(), section=section.replace('-', ' '),
+                                app_title=data['title'], fields=fields, entity_link=entity_link)
+
+def section_jobs():
     for app, data in apps.items():
-        sections_links = "\n".join([f"- [{s.replace('-', ' ').title()}](sections/{s}.md)" for s in data["sections"].keys()])
-        workflows_links = "\n".join([f"- [{w.replace('-', ' ').title()}](workflows/{w}.md)" for w in data["workflows"]])
+        for section in data["sections"]:
+            yield f"docs/apps/{app}/sections/{section}.md", render_section_doc, (app, section)
 
-        actions_section = ""
-        if "actions" in data:
-            actions_links = "\n".join([f"- [{a.replace('-', ' ').title()}](actions/{a}.md)" for a in data["actions"]])
-            actions_section = f"\n### Actions\n{actions_links}\n"
+def render_workflow_doc(app, workflow):
+    data = apps[app]
+    first_section = next(iter(data["sections"]))
+    return doc_templates.render("workflow", title=workflow.replace('-', ' ').title(), workflow=workflow.replace('-', ' '),
+                                app_title=data['title'],
+                                section_link=f"[{first_section.replace('-', ' ').title()}](../sections/{first_section}.md)")
 
-        content = f"""# {data['title']} - Functional Specification
-
-## Overview
-{data['description']}
-
-## Navigation
-
-### Sections
-{sections_links}
-
-### Workflows
-{workflows_links}
-{actions_section}
-### Validation
-- [Field Validations](validation/field-validations.md)
-- [Section Validations](validation/section-validations.md)
-
-### API
-- [Endpoints](api/endpoints.md)
-- [Examples](api/examples.md)
-
-## Key Characteristics
-| Characteristic | Value |
-|:---------------|:------|
-| Entity Type | {data.get('type', 'N/A')} |
-| Source System | {app.title()} |
-
-← Back to [Main Documentation](../../README.md)
-"""
-        create_file(f"docs/apps/{app}/README.md", content)
-
-def generate_section_docs():
-    for app, data in apps.items():
-        for section, details in data["sections"].items():
-            rows = ""
-            for field in details.get("fields", []):
-                rows += f"| {field.get('label', '')} | {field.get('label', '')} | {field.get('type', '')} | {field.get('mandatory', '')} | Editable | Read-Only | {field.get('notes', '')} |\n"
-
-            if not rows:
-                 rows = "| - | - | - | - | - | - | - |"
-
-            content = f"""# {section.replace('-', ' ').title()}
-
-## Purpose
-This document specifies the {section.replace('-', ' ')} section of the {data['title']}.
-
-## Fields
-
-| Field | Label | Type | Mandatory | Create | Change | Notes |
-|:------|:------|:-----|:----------|:-------|:-------|:------|
-{rows}
-
-## UI Behavior
-- **Visibility**: Always visible unless conditional logic applies.
-- **Editability**: Generally editable in 'New' status, read-only after submission.
-
-## Related Documentation
-- **Entity**: [Related Entity](../../../data-model/entities/README.md)
-- **Validation**: [Validation Rules](../validation/field-validations.md)
-- **SAP Mapping**: [Field Mappings](../../../field-mappings/README.md)
-
-← Back to [{data['title']}](README.md)
-"""
-            create_file(f"docs/apps/{app}/sections/{section}.md", content)
-
-def generate_workflow_docs():
+def workflow_jobs():
     for app, data in apps.items():
         for workflow in data["workflows"]:
-            content = f"""# {workflow.replace('-', ' ').title()}
-
-## Purpose
-This document describes the {workflow.replace('-', ' ')} workflow in the {data['title']}.
-
-## Process Flow
-1. **Initiation**: User clicks 'Create' or receives a task.
-2. **Steps**:
-   - Validation of mandatory fields.
-   - Submission to MDM Approval (if applicable).
-   - Integration with SAP S/4HANA.
-3. **Completion**: Request reaches 'Completed' status or is rejected.
-
-## Status Transitions
-- **Start**: `New`
-- **In-Progress**: `Submitted`, `ApprovalPending`, `SAPUpdatePending`
-- **End**: `Approved`, `Rejected`, `Completed`
-
-## Related Documentation
-- **Sections Used**: [General](sections/general-information.md)
-- **Validations**: [Field Validations](validation/field-validations.md)
-- **Status Flow**: [Status Transitions](../../../status-management/state-machine.md)
-
-← Back to [{data['title']}](README.md)
-"""
-            create_file(f"docs/apps/{app}/workflows/{workflow}.md", content)
-
-def generate_code_list_docs():
-    create_file("docs/data-model/code-lists/README.md", "# Code Lists\n\nIndex of all code lists.\n\n" + "\n".join([f"- [{k}]( {k}.md )" for k in code_lists.keys()]))
-    for code, info in code_lists.items():
-        values_table = "\n".join([f"| {v} | Standard value for {v} |" for v in info["values"]])
-        content = f"""# {code.replace('-', ' ').title()}
-
-## Purpose
-{info['desc']}
-
-## Values
-| Value | Description |
-|:------|:------------|
-{values_table}
-
-## Usage
-- Used in validation rules.
-- Populates dropdowns in UI.
-- Ensures data consistency across apps.
-
-← Back to [Code Lists](README.md)
-"""
-        create_file(f"docs/data-model/code-lists/{code}.md", content)
-
-def generate_action_docs():
-    if "actions" in apps["mdm-approval"]:
-        for action in apps["mdm-approval"]["actions"]:
-            content = f"""# {action.replace('-', ' ').title()}
-
-## Purpose
-Describes the '{action}' action in MDM Approval.
-
-## Logic
-1. **Pre-checks**: Verify current status allows this action.
-2. **Execution**: Call backend API `{action}`.
-3. **Post-processing**: Update status, send notifications, or trigger integration.
-
-## Related Documentation
-- **API Endpoint**: [Endpoints](../api/endpoints.md)
-- **Status Change**: [Status Values](../../../status-management/status-values.md)
-
-← Back to [MDM Approval App](../README.md)
-"""
-            create_file(f"docs/apps/mdm-approval/actions/{action}.md", content)
-
-def generate_entity_docs():
-    create_file("docs/data-model/entities/README.md", "# Entities\n\nOverview of data entities.\n\n" + "\n".join([f"- [{e}]({e}.md)" for e in entities]))
-    for entity, fields in entities.items():
-        field_rows = "\n".join([f"| {f} | String/Association | Business Field |" for f in fields])
-        content = f"""# {entity.replace('-', ' ').title()}
-
-## Description
-Definition of the {entity} entity. This entity stores core business data.
-
-## Fields
-| Name | Type | Description |
-|:-----|:-----|:------------|
-| ID | UUID | Primary Key |
-| createdAt | DateTime | Creation Timestamp |
-| createdBy | String | User who created the record |
-{field_rows}
-
-← Back to [Entities](README.md)
+            yield f"docs/apps/{app}/workflows/{workflow}.md", render_workflow_doc, (app, workflow)
+
+# --- Seed data streaming ---
+
+def read_seed_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f, delimiter=';')
+
+def localized_rows(rows, locale=DEFAULT_LOCALE):
+    for row in rows:
+        if row.get("locale", locale) == locale:
+            yield row
+
+def table_lines(rows, columns):
+    for row in rows:
+        yield doc_templates.table_row([_md_cell(row.get(c) or "") for c in columns])
+
+def paginate(lines, size):
+    # Yields (page_number, lines, is_last) holding at most two pages in memory
+    lines = iter(lines)
+    page = list(itertools.islice(lines, size))
+    number = 1
+    while True:
+        following = list(itertools.islice(lines, size))
+        yield number, page, not following
+        if not following:
+            return
+        page, number = following, number + 1
+
+_LABEL_WORDS = {"Descr": "Description", "Iban": "IBAN", "Sap": "SAP", "Vat": "VAT", "Vies": "VIES"}
+
+def _column_label(column):
+    words = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", column).title().split()
+    return " ".join([_LABEL_WORDS.get(w, w) for w in words])
+
+def _code_list_page_path(code, number):
+    return f"docs/data-model/code-lists/{code}.md" if number == 1 else f"docs/data-model/code-lists/{code}-page-{number}.md"
+
+def code_list_pages(code, info):
+    # Yields (page_number, header, lines, is_last) for a code list without materialising its rows
+    if "source" in info:
+        path = os.path.join(DATA_DIR, info["source"])
+        columns = info.get("columns")
+        if columns is None:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                columns = [c for c in next(csv.reader(f, delimiter=';')) if c != "locale"]
+        header = doc_templates.table_header([_column_label(c) for c in columns], rule=":---")
+        lines = table_lines(localized_rows(read_seed_rows(path)), columns)
+    else:
+        header = doc_templates.table_header(["Value", "Description"])
+        lines = (doc_templates.table_row([v, f"Standard value for {v}"]) for v in info["values"])
+    for number, page, is_last in paginate(lines, CODE_LIST_PAGE_SIZE):
+        yield number, header, page, is_last
+
+def render_code_list_index():
+    return "# Code Lists\n\nIndex of all code lists.\n\n" + "\n".join([f"- [{k}]({k}.md)" for k in code_lists.keys()])
+
+def render_code_list(code):
+    # Yields (path, content) per page so long seed files are rendered page by page
+    info = code_lists[code]
+    title = code.replace('-', ' ').title()
+    source_note = f"\nSource: `{DATA_DIR}/{info['source']}` (locale `{DEFAULT_LOCALE}`).\n" if "source" in info else ""
+    for number, header, page, is_last in code_list_pages(code, info):
+        pager = []
+        if number > 1:
+            pager.append(f"← [Previous page]({os.path.basename(_code_list_page_path(code, number - 1))})")
+        if not is_last:
+            pager.append(f"[Next page]({os.path.basename(_code_list_page_path(code, number + 1))}) →")
+        pager_line = ("\n" + " | ".join(pager) + "\n") if pager else ""
+        values = "\n".join([header, *page])
+        if number == 1:
+            content = doc_templates.render("code-list", title=title, purpose=info['desc'], source_note=source_note,
+                                           values=values, pager=pager_line)
+        else:
+            content = doc_templates.render("code-list-page", title=title, number=number, code=code,
+                                           values=values, pager=pager_line)
+        yield _code_list_page_path(code, number), content
+
+def code_list_jobs():
+    yield "docs/data-model/code-lists/README.md", render_code_list_index, ()
+    for code in code_lists:
+        yield _code_list_page_path(code, 1), render_code_list, (code,)
+
+def render_action_doc(action):
+    return doc_templates.render("action", title=action.replace('-', ' ').title(), action=action)
+
+def action_jobs():
+    for action in apps["mdm-approval"].get("actions", []):
+        yield f"docs/apps/mdm-approval/actions/{action}.md", render_action_doc, (action,)
+
+def render_entity_index():
+    model = get_cds_model()
+    index_rows = "\n".join([
+        doc_templates.table_row([f"[{e}]({e}.md)", f"`{name}`", len(model[name]['elements'])]) for e, name in entities.items()
+    ])
+    return f"""# Entities
+
+Overview of data entities. Generated from the CDS model in `db/data-model.cds`.
+
+| Entity | CDS Name | Elements |
+|:-------|:---------|:---------|
+{index_rows}
 """
-        create_file(f"docs/data-model/entities/{entity}.md", content)
-
-def generate_project_files():
-    create_file("docs/project/structure.md", "# Documentation Structure\n\nThis folder contains the project management and documentation structure details.")
-    create_file("docs/project/task-list.md", "# Development Task List\n\n- [ ] Implement new folder structure\n- [ ] Migrate content\n- [ ] Verify links")
 
-def generate_misc_readmes():
+def render_entity_doc(entity):
+    model = get_cds_model()
+    name = entities[entity]
+    definition = model[name]
+    field_rows = []
+    for field, element in definition["elements"].items():
+        annotations = element.get("annotations", {})
+        mandatory = "Key" if element.get("key") else ("Yes" if annotations.get("mandatory") else "No")
+        description = element.get("doc") or annotations.get("title", "")
+        field_rows.append([field, _md_cell(cds_model.format_type(element)), mandatory,
+                           _md_cell(annotations.get('default', '')), _md_cell(description)])
+
+    relations = [
+        [field, element['type'], element.get('cardinality', 'one'), f"`{element['target']}`"]
+        for field, element in definition["elements"].items() if "target" in element
+    ]
+    relations_section = ""
+    if relations:
+        relations_section = "\n## Associations and Compositions\n" + doc_templates.table(["Name", "Kind", "Cardinality", "Target"], relations) + "\n"
+
+    projections = model.projections_of(name)
+    exposed_section = ""
+    if projections:
+        exposed_section = "\n## Exposed By\n" + "\n".join([f"- `{p}` ({model[p]['source']})" for p in projections]) + "\n"
+
+    description = definition.get("doc") or f"Definition of the {entity} entity. This entity stores core business data."
+    return doc_templates.render("entity", title=entity.replace('-', ' ').title(), description=description, name=name,
+                                source=definition['source'],
+                                fields=doc_templates.table(["Name", "Type", "Mandatory", "Default", "Description"], field_rows),
+                                relations=relations_section, exposed_by=exposed_section)
+
+def entity_jobs():
+    yield "docs/data-model/entities/README.md", render_entity_index, ()
+    for entity in entities:
+        yield f"docs/data-model/entities/{entity}.md", render_entity_doc, (entity,)
+
+def render_text(content):
+    return content
+
+def project_jobs():
+    yield "docs/project/structure.md", render_text, ("# Documentation Structure\n\nThis folder contains the project management and documentation structure details.",)
+    yield "docs/project/task-list.md", render_text, ("# Development Task List\n\n- [ ] Implement new folder structure\n- [ ] Migrate content\n- [ ] Verify links",)
+
+def render_misc_readme(path):
+    title = os.path.basename(path).replace('.md', '').replace('-', ' ').title()
+    home = posixpath.relpath("docs/README.md", posixpath.dirname(path))
+    return f"# {title}\n\nDetailed content for {title}.\n\nThis section covers high-level concepts and specifications.\n\n← Back to [Main Documentation]({home})"
+
+def misc_jobs():
     # Use common_specs to populate specific READMEs
-    create_file("docs/status-management/README.md", common_specs["status-management"])
-    create_file("docs/validation/README.md", common_specs["validation"])
-    create_file("docs/overview/architecture.md", "# System Architecture\n\n" + common_specs["status-management"] + "\n\n" + common_specs["validation"]) # Combining for overview
+    yield "docs/status-management/README.md", render_text, (common_specs["status-management"],)
+    yield "docs/validation/README.md", render_text, (common_specs["validation"],)
+    yield "docs/overview/architecture.md", render_text, ("# System Architecture\n\n" + common_specs["status-management"] + "\n\n" + common_specs["validation"],) # Combining for overview
 
     # Generic ones
     misc_paths = [
@@ -774,43 +1210,296 @@ def generate_misc_readmes():
         "docs/field-mappings/README.md"
     ]
     for p in misc_paths:
-        title = os.path.basename(p).replace('.md', '').replace('-', ' ').title()
-        create_file(p, f"# {title}\n\nDetailed content for {title}.\n\nThis section covers high-level concepts and specifications.\n\n← Back to [Main Documentation](../../README.md)")
+        yield p, render_misc_readme, (p,)
 
     # Special case for integration/compliance subfolders
-    create_file("docs/integration/compliance/aeb/README.md", integration_specs["aeb"])
-    create_file("docs/integration/compliance/vies/README.md", integration_specs["vies"])
+    yield "docs/integration/compliance/aeb/README.md", render_text, (integration_specs["aeb"],)
+    yield "docs/integration/compliance/vies/README.md", render_text, (integration_specs["vies"],)
 
     # ID Preservation logic
-    create_file("docs/integration/sap-s4hana/id-writeback.md", common_specs["id-preservation"])
+    yield "docs/integration/sap-s4hana/id-writeback.md", render_text, (common_specs["id-preservation"],)
+
+def render_api_examples(app):
+    data = apps[app]
+    example_content = "# API Examples\n\n"
+    if "api_example" in data:
+        example_content += f"## {app.title()} Payload\n{data['api_example']}\n"
+    else:
+        example_content += "No specific examples available.\n"
+    return example_content
+
+def api_jobs():
+    for app in apps:
+        yield f"docs/apps/{app}/api/endpoints.md", render_text, ("# API Endpoints\n\nList of API endpoints exposed by this application.\n\n- `GET /Requests`: List requests\n- `POST /Requests`: Create request\n",)
+        yield f"docs/apps/{app}/api/examples.md", render_api_examples, (app,)
+        yield f"docs/apps/{app}/validation/field-validations.md", render_text, ("# Field Validations\n\nValidation rules for fields in this app.\n",)
+        yield f"docs/apps/{app}/validation/section-validations.md", render_text, ("# Section Validations\n\nValidation rules for sections in this app.\n",)
+
+# --- Build ---
+
+# Every generator is a stage producing (path, render, args) jobs. `render` must be a
+# module-level function so jobs can be shipped to worker processes; it returns the
+# page content, or yields (path, content) pairs when a job produces several pages.
+STAGES = [
+    ("root-readme", root_readme_jobs),
+    ("app-readmes", app_readme_jobs),
+    ("sections", section_jobs),
+    ("workflows", workflow_jobs),
+    ("code-lists", code_list_jobs),
+    ("entities", entity_jobs),
+    ("actions", action_jobs),
+    ("misc", misc_jobs),
+    ("api", api_jobs),
+    ("project", project_jobs),
+]
+
+# Inputs each page depends on, by render function: ("seed", file) is a CSV under DATA_DIR,
+# ("cds", name) a CDS definition, ("template", name) a page template, anything else a path
+# into the data dicts above. --watch re-renders a page when one of its inputs, its job
+# arguments or the generator code change.
+JOB_INPUTS = {
+    render_app_readme: lambda app: [("apps", app), ("template", "app-readme")],
+    render_section_doc: lambda app, section: [("apps", app, "title"), ("apps", app, "sections", section),
+                                              ("section_entities", section), ("template", "section")],
+    render_workflow_doc: lambda app, workflow: [("apps", app, "title"), ("apps", app, "sections"), ("template", "workflow")],
+    render_code_list_index: lambda: [("code_lists",)],
+    render_code_list: lambda code: [("code_lists", code), ("seed", code_lists[code].get("source")),
+                                    ("template", "code-list"), ("template", "code-list-page")],
+    render_action_doc: lambda action: [("template", "action")],
+    render_entity_index: lambda: [("entities",)] + [("cds", name) for name in entities.values()],
+    render_entity_doc: lambda entity: [("entities", entity), ("cds", entities[entity]), ("template", "entity")],
+    render_api_examples: lambda app: [("apps", app, "api_example")],
+}
+
+def job_inputs(render, args):
+    inputs = JOB_INPUTS.get(render)
+    return inputs(*args) if inputs else []
+
+def render_job(path, render, args):
+    result = render(*args)
+    if isinstance(result, str):
+        return [(path, result)]
+    return result
+
+def run_jobs(jobs):
+    for path, render, args in jobs:
+        for out_path, content in render_job(path, render, args):
+            create_file(out_path, content)
+
+def _render_job_in_worker(job):
+    started = time.perf_counter()
+    outputs = list(render_job(*job))
+    return outputs, time.perf_counter() - started
+
+def _timed_write(path, content):
+    started = time.perf_counter()
+    return write_output(path, content), time.perf_counter() - started
+
+def build_parallel(staged_jobs, workers):
+    # Renders in a process pool and writes through a thread pool. Directories are created
+    # once up front and results are consumed in job order, so output and log are deterministic.
+    # staged_jobs holds (stage name, job) pairs so the results can be attributed to stages.
+    staged_jobs = list(staged_jobs)
+    jobs = [job for _, job in staged_jobs]
+    for directory in sorted({os.path.dirname(path) for path, _, _ in jobs}):
+        _ensure_dir(directory)
+    get_cds_model()  # parse (or load) once so forked workers inherit it
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as renderers, ThreadPoolExecutor(max_workers=workers) as writers:
+        pending = []
+        for (stage, _), (outputs, render_seconds) in zip(staged_jobs, renderers.map(_render_job_in_worker, jobs, chunksize=chunksize)):
+            if _stats is not None:
+                _stats.record(stage)["seconds"] += render_seconds
+            pending.extend((stage, path, content, writers.submit(_timed_write, path, content)) for path, content in outputs)
+        for stage, path, content, future in pending:
+            action, write_seconds = future.result()
+            if _stats is not None:
+                _stats.count(stage, content, action, write_seconds)
+            if action:
+                print(f"{action} {path}")
+    if _stats is not None:
+        for stage in dict.fromkeys(stage for stage, _ in staged_jobs):
+            _stats.finish_stage(stage)
+
+def generate_root_readme():
+    run_jobs(root_readme_jobs())
 
+def generate_app_readmes():
+    run_jobs(app_readme_jobs())
+
+def generate_section_docs():
+    run_jobs(section_jobs())
+
+def generate_workflow_docs():
+    run_jobs(workflow_jobs())
+
+def generate_code_list_docs():
+    run_jobs(code_list_jobs())
+
+def generate_entity_docs():
+    run_jobs(entity_jobs())
+
+def generate_action_docs():
+    run_jobs(action_jobs())
+
+def generate_misc_readmes():
+    run_jobs(misc_jobs())
 
 def generate_api_docs():
-    for app, data in apps.items():
-        create_file(f"docs/apps/{app}/api/endpoints.md", "# API Endpoints\n\nList of API endpoints exposed by this application.\n\n- `GET /Requests`: List requests\n- `POST /Requests`: Create request\n")
+    run_jobs(api_jobs())
 
-        example_content = "# API Examples\n\n"
-        if "api_example" in data:
-            example_content += f"## {app.title()} Payload\n{data['api_example']}\n"
+def generate_project_files():
+    run_jobs(project_jobs())
+
+# Sequential build order, by stage name
+GENERATORS = [
+    ("root-readme", generate_root_readme),
+    ("app-readmes", generate_app_readmes),
+    ("sections", generate_section_docs),
+    ("workflows", generate_workflow_docs),
+    ("code-lists", generate_code_list_docs),
+    ("entities", generate_entity_docs),
+    ("actions", generate_action_docs),
+    ("misc", generate_misc_readmes),
+    ("api", generate_api_docs),
+    ("project", generate_project_files),
+]
+
+def build(workers=1):
+    if workers == 1:
+        for name, generate in GENERATORS:
+            with stage_scope(name):
+                generate()
+    else:
+        build_parallel(((name, job) for name, jobs in STAGES for job in jobs()), workers)
+
+def render_tree(workers=1):
+    # Renders the whole documentation set into memory and returns {path: bytes}
+    global _output
+    previous, _output = _output, MemoryBackend()
+    try:
+        build(workers)
+        return _output.files
+    finally:
+        _output = previous
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Markdown documentation tree under docs/.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only write files whose content changed and delete outputs no longer generated (manifest: {MANIFEST_PATH})")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="render in N worker processes and write with N threads (0 = one per CPU, default: 1 = sequential)")
+    parser.add_argument("--output", default="fs", metavar="TARGET",
+                        help="fs (write docs/, default), memory (render without writing), or tar:FILE, tgz:FILE, zip:FILE "
+                             "to stream everything into one archive (FILE '-' = stdout)")
+    parser.add_argument("--templates", action="append", default=[], metavar="DIR",
+                        help=f"look for page templates in DIR before {os.path.relpath(doc_templates.TEMPLATE_DIR)} (repeatable)")
+    parser.add_argument("--check-links", action="store_true",
+                        help="check every relative link and #anchor against the generated pages; exit status 1 on broken links")
+    parser.add_argument("--diff", action="store_true",
+                        help="render in memory and diff against the docs/ tree on disk; exit status 1 if they differ")
+    parser.add_argument("--stats", nargs="?", const="table", metavar="FORMAT[:FILE]",
+                        help="print per-stage time, bytes rendered and files written/skipped as a table (default) "
+                             "or json, optionally to FILE (e.g. --stats json:build-stats.json)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="run each stage under cProfile and write DIR/<stage>.prof (implies --stats table)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the peak traced memory of each stage with tracemalloc (implies --stats table)")
+    parser.add_argument("--watch", action="store_true",
+                        help="build incrementally, then watch the generator, CDS and seed files and re-render only the affected pages")
+    parser.add_argument("--poll", action="store_true",
+                        help="with --watch, poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+    if args.incremental and args.output != "fs":
+        parser.error("--incremental only applies to --output fs")
+    if args.diff and (args.output != "fs" or args.incremental):
+        parser.error("--diff cannot be combined with --output or --incremental")
+    if args.watch and (args.output != "fs" or args.diff or args.check_links or args.jobs != 1):
+        parser.error("--watch cannot be combined with --output, --diff, --check-links or --jobs")
+    if args.poll and not args.watch:
+        parser.error("--poll requires --watch")
+    if (args.profile or args.trace_memory) and args.jobs != 1:
+        parser.error("--profile and --trace-memory need a sequential build (--jobs 1)")
+    if args.watch and (args.stats or args.profile or args.trace_memory):
+        parser.error("--watch cannot be combined with --stats, --profile or --trace-memory")
+    if args.stats is None and (args.profile or args.trace_memory):
+        args.stats = "table"
+    if args.stats is not None and args.stats.partition(":")[0] not in ("table", "json"):
+        parser.error(f"unknown --stats format '{args.stats}' (expected table or json, optionally :FILE)")
+    for directory in args.templates:
+        if not os.path.isdir(directory):
+            parser.error(f"--templates: {directory} is not a directory")
+    fmt, _, target = args.output.partition(":")
+    if args.output not in ("fs", "memory") and not (fmt in ArchiveBackend.FORMATS and target):
+        parser.error(f"unknown --output '{args.output}'")
+    return args
+
+def report_links(index, log=sys.stdout):
+    problems = index.problems()
+    for source, line, target, reason in problems:
+        print(f"{source}:{line}: broken link '{target}' ({reason})", file=log)
+    print(f"Checked {len(index.links)} links across {len(index.anchors)} pages: {len(problems)} broken.", file=log)
+    return not problems
+
+def report_stats(stats, spec, log=sys.stdout):
+    fmt, _, target = spec.partition(":")
+    text = json.dumps(stats.summary(), indent=2) if fmt == "json" else stats.format_table()
+    if target:
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text, file=log)
+
+def main(argv=None):
+    global _output, _link_index, _stats
+    args = parse_args(argv)
+    doc_templates.set_override_dirs(args.templates)
+    if args.watch:
+        import docs_watch
+        return docs_watch.watch(sys.modules[__name__], poll=args.poll)
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    log = sys.stderr if args.output.endswith(":-") else sys.stdout
+    try:
+        _output = IncrementalWriter() if args.incremental else make_backend("memory" if args.diff else args.output)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    _created_dirs.clear()
+    _link_index = LinkIndex() if args.check_links else None
+    _stats = StageStats(args.profile, args.trace_memory) if args.stats else None
+    try:
+        build(workers)
+        stats = _output.finish()
+        links_ok = _link_index is None or report_links(_link_index, log)
+        if _stats is not None:
+            report_stats(_stats, args.stats, log)
+        if isinstance(_output, IncrementalWriter):
+            for path in _output.removed:
+                print(f"Removed {path}")
+            print(f"Documentation generation complete: {stats['added']} added, {stats['changed']} changed, "
+                  f"{stats['removed']} removed, {stats['unchanged']} unchanged.")
+        elif args.diff:
+            added, changed, removed = diff_tree(_output.files)
+            print_tree_diff(_output.files, added, changed, removed)
+            if added or changed or removed:
+                print(f"docs/ is out of date: {len(added)} added, {len(changed)} changed, {len(removed)} removed.")
+                return 1
+            print(f"docs/ is up to date ({stats['files']} files).")
+            return 0 if links_ok else 1
+        elif isinstance(_output, MemoryBackend):
+            print(f"Rendered {stats['files']} files ({stats['bytes']} bytes) in memory.")
+        elif isinstance(_output, ArchiveBackend):
+            print(f"Wrote {stats['files']} files ({stats['bytes']} bytes) to {stats['archive']}.", file=log)
         else:
-            example_content += "No specific examples available.\n"
-
-        create_file(f"docs/apps/{app}/api/examples.md", example_content)
-        create_file(f"docs/apps/{app}/validation/field-validations.md", "# Field Validations\n\nValidation rules for fields in this app.\n")
-        create_file(f"docs/apps/{app}/validation/section-validations.md", "# Section Validations\n\nValidation rules for sections in this app.\n")
-
-def main():
-    generate_root_readme()
-    generate_app_readmes()
-    generate_section_docs()
-    generate_workflow_docs()
-    generate_code_list_docs()
-    generate_entity_docs()
-    generate_action_docs()
-    generate_misc_readmes()
-    generate_api_docs()
-    generate_project_files()
-    print("Documentation generation complete.")
+            print("Documentation generation complete.")
+        return 0 if links_ok else 1
+    except doc_templates.TemplateError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        _output = FileSystemBackend()
+        _link_index = None
+        _stats = None
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -13,6 +13,12 @@ const {
   sanitizeCommonFields,
   simpleRateLimit
 } = require('./srv/middleware/validation');
+const duplicateChecker = require('./srv/lib/shared/duplicate-checker');
+const requestNumberGenerator = require('./srv/utils/request-number-generator');
+const keyset = require('./srv/lib/shared/keyset-pagination');
+const partnerBulkIngest = require('./srv/lib/shared/partner-bulk-ingest');
+const sapPartnerService = require('./srv/lib/shared/sap-partner-service');
+const statusFeed = require('./srv/lib/status-feed');
 
 /**
  * CAP Server Bootstrap Configuration
@@ -65,11 +71,14 @@ cds.on('bootstrap', (app) => {
   integrationRouter.post('/partners/create', validateCreatePartner, createPartnerRequest);
   integrationRouter.post('/partners/update', validateUpdatePartner, updatePartnerRequest);
   integrationRouter.get('/partners/:requestNumber/status', validateRequestNumber, getRequestStatus);
+  integrationRouter.get('/partners/status-feed', (req, res) => statusFeed.handle(req, res));
   integrationRouter.get('/partners/requests', validateRequestQuery, getPartnerRequests);
 
   // Bulk operations
   integrationRouter.post('/partners/bulk/create', validateBulkCreate, bulkCreatePartnerRequests);
   integrationRouter.post('/partners/bulk/status', validateBulkStatus, getBulkRequestStatus);
+  integrationRouter.post('/partners/bulk/duplicate-check', validateBulkStatus, checkBulkDuplicates);
+  integrationRouter.post('/partners/bulk/ingest', (req, res) => partnerBulkIngest.handle(req, res));
 
   // Webhook endpoints for external systems to receive notifications
   integrationRouter.post('/webhooks/partner-approved', validateWebhook, handlePartnerApproved);
@@ -248,21 +257,22 @@ async function getRequestStatus(req, res) {
     const db = await cds.connect.to('db');
     const { BusinessPartnerRequests } = db.entities('mdm.db');
 
-    const request = await db.read(BusinessPartnerRequests)
-      .where({ requestNumber })
-      .columns(['requestNumber', 'status', 'statusCriticality', 'sapBpNumber', 'rejectionReason', 'createdAt', 'modifiedAt']);
+    const request = await db.run(SELECT.one.from(BusinessPartnerRequests)
+      .columns('requestNumber', 'status', 'statusCriticality', 'sapBpNumber', 'rejectionReason', 'createdAt', 'modifiedAt')
+      .where({ requestNumber }));
 
-    if (!request || request.length === 0) {
+    if (!request) {
       return res.status(404).json({
         error: 'Request not found',
         message: `No request found with number: ${requestNumber}`
       });
     }
 
-    res.json({
+    // Pollers revalidate with If-None-Match (ETag of modifiedAt in ms) and get 304 until the status changes
+    statusFeed.sendConditional(req, res, {
       success: true,
-      data: request[0]
-    });
+      data: request
+    }, request.modifiedAt || request.createdAt);
 
   } catch (error) {
     console.error('Error getting request status:', error);
@@ -278,33 +288,45 @@ async function getRequestStatus(req, res) {
  */
 async function getPartnerRequests(req, res) {
   try {
-    const { status, sourceSystem, limit = 50, offset = 0 } = req.query;
+    const { status, sourceSystem, limit = 50, offset = 0, cursor } = req.query;
     console.log(`📋 Getting partner requests - Status: ${status}, Source: ${sourceSystem || req.sourceSystem}`);
 
     const db = await cds.connect.to('db');
     const { BusinessPartnerRequests } = db.entities('mdm.db');
-
-    let query = db.read(BusinessPartnerRequests)
-      .columns(['requestNumber', 'partnerName', 'status', 'statusCriticality', 'sourceSystem', 'createdAt', 'modifiedAt'])
-      .limit(parseInt(limit), parseInt(offset));
+    const pageSize = parseInt(limit);
 
     // Filter by source system (only show requests from the authenticated system)
-    query = query.where({ sourceSystem: sourceSystem || req.sourceSystem });
+    const where = { sourceSystem: sourceSystem || req.sourceSystem };
 
     // Filter by status if provided
     if (status) {
-      query = query.and({ status });
+      where.status = status;
     }
 
-    const requests = await query;
+    // Newest first; with a cursor, the page after it (keyset pagination), else by offset
+    const query = SELECT.from(BusinessPartnerRequests)
+      .columns(['ID', 'requestNumber', 'partnerName', 'status', 'statusCriticality', 'sourceSystem', 'createdAt', 'modifiedAt'])
+      .where(where);
+    try {
+      keyset.pageQuery(query, { cursor, pageSize });
+    } catch (error) {
+      return res.status(400).json({ error: 'Invalid cursor', message: error.message });
+    }
+    if (!cursor && parseInt(offset) > 0) {
+      query.limit(pageSize + 1, parseInt(offset));
+    }
+
+    const page = keyset.toPage(await db.run(query), pageSize);
 
     res.json({
       success: true,
-      data: requests,
+      data: page.items.map(({ ID, ...request }) => request),
       pagination: {
-        limit: parseInt(limit),
-        offset: parseInt(offset),
-        total: requests.length
+        limit: pageSize,
+        offset: cursor ? null : parseInt(offset),
+        total: page.items.length,
+        hasNext: page.nextCursor !== null,
+        nextCursor: page.nextCursor
       }
     });
 
@@ -335,7 +357,7 @@ async function bulkCreatePartnerRequests(req, res) {
     if (requests.length > 50) {
       return res.status(400).json({
         error: 'Batch size exceeded',
-        message: 'Maximum 50 requests allowed per batch'
+        message: 'Maximum 50 requests allowed per batch; use /integration/partners/bulk/ingest for larger loads'
       });
     }
 
@@ -367,7 +389,7 @@ async function bulkCreatePartnerRequests(req, res) {
         // Generate request number
         const timestamp = new Date().toISOString().slice(0, 10).replace(/-/g, '');
         const counter = await getNextCounter(db);
-        requestData.requestNumber = `MDM-${timestamp}-${(counter + i).toString().padStart(4, '0')}`;
+        requestData.requestNumber = `MDM-${timestamp}-${counter.toString().padStart(4, '0')}`;
 
         // Set initial status
         requestData.status = 'Draft';
@@ -424,13 +446,16 @@ async function getBulkRequestStatus(req, res) {
     const db = await cds.connect.to('db');
     const { BusinessPartnerRequests } = db.entities('mdm.db');
 
+    // Feed cursor taken before the read: following the status feed from it misses no change
+    const cursor = await statusFeed.currentSequence();
     const requests = await db.read(BusinessPartnerRequests)
       .where({ requestNumber: { in: requestNumbers } })
       .columns(['requestNumber', 'status', 'statusCriticality', 'sapBpNumber', 'rejectionReason']);
 
     res.json({
       success: true,
-      data: requests
+      data: requests,
+      cursor
     });
 
   } catch (error) {
@@ -442,6 +467,47 @@ async function getBulkRequestStatus(req, res) {
   }
 }
 
+/**
+ * Run duplicate checks for multiple requests in one batch
+ */
+async function checkBulkDuplicates(req, res) {
+  try {
+    const { requestNumbers } = req.body;
+
+    if (!Array.isArray(requestNumbers) || requestNumbers.length === 0) {
+      return res.status(400).json({
+        error: 'Invalid request format',
+        message: 'requestNumbers array is required'
+      });
+    }
+
+    const db = await cds.connect.to('db');
+    const { BusinessPartnerRequests } = db.entities('mdm.db');
+
+    const requests = await db.read(BusinessPartnerRequests)
+      .where({ requestNumber: { in: requestNumbers } })
+      .columns(['ID', 'requestNumber']);
+
+    const duplicatesByRequest = await duplicateChecker.checkDuplicatesBatch(requests.map(r => r.ID));
+
+    res.json({
+      success: true,
+      data: requests.map(r => ({
+        requestNumber: r.requestNumber,
+        duplicateCount: (duplicatesByRequest.get(r.ID) || []).length,
+        duplicates: duplicatesByRequest.get(r.ID) || []
+      }))
+    });
+
+  } catch (error) {
+    console.error('Error in bulk duplicate check:', error);
+    res.status(500).json({
+      error: 'Bulk duplicate check failed',
+      message: error.message
+    });
+  }
+}
+
 /**
  * Handle partner approved webhook
  */
@@ -483,7 +549,8 @@ async function healthCheck(req, res) {
       services: {
         database: 'connected',
         api: 'operational'
-      }
+      },
+      notificationOutbox: await require('./srv/lib/notification-outbox').getMetrics()
     });
   } catch (error) {
     res.status(503).json({
@@ -514,13 +581,19 @@ async function listEndpoints(req, res) {
     {
       method: 'GET',
       path: '/integration/partners/:requestNumber/status',
-      description: 'Get request status by request number',
+      description: 'Get request status by request number; revalidate with If-None-Match (ETag) to get 304 while unchanged. Last-Modified has one-second precision, so If-Modified-Since alone can miss a change made in the same second',
+      authentication: 'API Key + Source System header required'
+    },
+    {
+      method: 'GET',
+      path: '/integration/partners/status-feed',
+      description: 'Status changes after a cursor (?after=<cursor>&wait=<seconds>, long-poll); Server-Sent Events with Accept: text/event-stream, resumed from Last-Event-ID',
       authentication: 'API Key + Source System header required'
     },
     {
       method: 'GET',
       path: '/integration/partners/requests',
-      description: 'Get list of partner requests with filtering',
+      description: 'Get list of partner requests with filtering (pass pagination.nextCursor as cursor for the next page)',
       authentication: 'API Key + Source System header required'
     },
     {
@@ -532,7 +605,19 @@ async function listEndpoints(req, res) {
     {
       method: 'POST',
       path: '/integration/partners/bulk/status',
-      description: 'Get status for multiple requests',
+      description: 'Get status for multiple requests (returns a cursor for the status feed)',
+      authentication: 'API Key + Source System header required'
+    },
+    {
+      method: 'POST',
+      path: '/integration/partners/bulk/duplicate-check',
+      description: 'Run duplicate checks for multiple requests',
+      authentication: 'API Key + Source System header required'
+    },
+    {
+      method: 'POST',
+      path: '/integration/partners/bulk/ingest',
+      description: 'Bulk load partner requests from an NDJSON body (one partner per line, no size limit); streams one NDJSON result per line',
       authentication: 'API Key + Source System header required'
     },
     {
@@ -558,11 +643,14 @@ async function listEndpoints(req, res) {
 
 /**
  * Helper function to get next counter for request number generation
+ * Uses an atomic counter row; the first call continues after the existing request count
  */
 async function getNextCounter(db) {
-  const { BusinessPartnerRequests } = db.entities('mdm.db');
-  const count = await db.read(BusinessPartnerRequests).columns('count(*) as count');
-  return (count[0]?.count || 0) + 1;
+  return requestNumberGenerator.nextValue('INTEGRATION', db, async () => {
+    const { BusinessPartnerRequests } = db.entities('mdm.db');
+    const count = await db.read(BusinessPartnerRequests).columns('count(*) as count');
+    return count[0]?.count || 0;
+  });
 }
 
 /**
@@ -604,6 +692,9 @@ async function updateSapBpNumber(req, res) {
       .set({ sapBpNumber, modifiedAt: new Date().toISOString() })
       .where({ ID: request[0].ID });
 
+    // The partner was written back to SAP: drop the cached copy
+    sapPartnerService.invalidatePartner(sapBpNumber);
+
     console.log(`✅ SAP BP Number updated successfully for ${requestNumber}`);
 
     return res.json({
@@ -736,5 +827,21 @@ async function updateSatelliteSystemId(req, res) {
   }
 }
 
+// Keep the fuzzy duplicate detection index and the SAP partner cache in sync with
+// ExistingPartners from startup on (the partner search index is built in the background),
+// compile the country validation patterns before the first request, start the
+// webhook outbox workers, log request status changes for the status feed and create
+// the indexes declared in the data model
+cds.on('served', async () => {
+  const db = await cds.connect.to('db');
+  require('./srv/lib/partner-name-index').attach(db);
+  statusFeed.attach(db);
+  sapPartnerService.attach(db);
+  sapPartnerService.buildSearchIndex(db);
+  await require('./srv/lib/shared/pattern-registry').load(db);
+  require('./srv/lib/notification-outbox').start(db);
+  await require('./srv/lib/shared/db-indexes').ensureIndexes(db);
+});
+
 // Export the CDS server module
 module.exports = cds.server;
\ No newline at end of file
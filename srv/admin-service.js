@@ -1,5 +1,7 @@
 const cds = require('@sap/cds');
 const ValidationService = require('./lib/validation-service');
+const codeListCache = require('./lib/shared/code-list-cache');
+const NotificationService = require('./lib/notification-service');
 
 /**
  * Admin Service Implementation
@@ -185,8 +187,8 @@ module.exports = cds.service.impl(async function() {
         .set({ isActive: newStatus })
         .where({ ID });
 
-      // Clear validation cache so new status takes effect immediately
-      validationService.clearCache();
+      // Invalidate cached lookups for this rule's context so the new status takes effect immediately
+      validationService.invalidateRules('ValidationRules', [rule]);
 
       log.info('Rule active status toggled', { ruleID: ID, newStatus });
 
@@ -257,8 +259,8 @@ module.exports = cds.service.impl(async function() {
         .set({ isActive: newStatus })
         .where({ ID });
 
-      // Clear validation cache
-      validationService.clearCache();
+      // Invalidate cached lookups for this rule's context
+      validationService.invalidateRules('SectionValidationRules', [rule]);
 
       log.info('Section rule active status toggled', { ruleID: ID, newStatus });
 
@@ -292,8 +294,9 @@ module.exports = cds.service.impl(async function() {
         updated++;
       }
 
-      // Clear validation cache so new priorities take effect
-      validationService.clearCache();
+      // Invalidate cached lookups of the reordered rules so new priorities take effect
+      const reordered = await SELECT.from(ValidationRules).where({ ID: { in: updates.map(u => u.ruleID) } });
+      validationService.invalidateRules('ValidationRules', reordered);
 
       log.info('Rule priorities updated', { updated });
 
@@ -355,8 +358,8 @@ module.exports = cds.service.impl(async function() {
         cloned++;
       }
 
-      // Clear cache
-      validationService.clearCache();
+      // Invalidate cached lookups of the target context
+      validationService.invalidateRules('ValidationRules', rulesToClone);
 
       log.info('Rules cloned successfully', { cloned });
 
@@ -374,17 +377,45 @@ module.exports = cds.service.impl(async function() {
   // ===== Cache Management =====
 
   /**
-   * Clear validation cache after rule changes
-   * Ensures new rules take effect immediately
+   * Invalidate cached rule lookups after rule changes
+   * Only lookups whose context the old or new rule values match are dropped,
+   * so validation for unrelated contexts stays cached
    */
-  this.after(['CREATE', 'UPDATE', 'DELETE'], 'ValidationRules', () => {
-    log.info('ValidationRules modified - clearing cache');
-    validationService.clearCache();
+  const previousRules = new WeakMap(); // req -> rule rows before UPDATE/DELETE
+
+  for (const [entityName, entity] of [['ValidationRules', ValidationRules], ['SectionValidationRules', SectionValidationRules]]) {
+    this.before(['UPDATE', 'DELETE'], entityName, async (req) => {
+      if (req.data && req.data.ID !== undefined) {
+        previousRules.set(req, await SELECT.from(entity).where({ ID: req.data.ID }));
+      }
+    });
+
+    this.after(['CREATE', 'UPDATE', 'DELETE'], entityName, (result, req) => {
+      const before = previousRules.get(req);
+      // Without the previous values (e.g. a bulk statement) every lookup of the entity is dropped
+      const rules = before ? [...before, ...(req.event === 'DELETE' ? [] : before.map(rule => ({ ...rule, ...req.data })))]
+        : req.event === 'CREATE' ? [req.data] : [];
+      log.info(`${entityName} modified - invalidating cached rules`, { event: req.event });
+      validationService.invalidateRules(entityName, rules);
+    });
+  }
+
+  /**
+   * Drop a code list from the in-memory cache of the satellite services when it is changed here
+   */
+  const codeLists = codeListCache.CODE_LISTS.filter(name => this.entities[name]);
+  this.after(['CREATE', 'UPDATE', 'DELETE'], codeLists, (result, req) => {
+    const name = req.target.name.split('.').pop();
+    log.info(`${name} modified - invalidating cached code list`, { event: req.event });
+    codeListCache.invalidate(name);
   });
 
-  this.after(['CREATE', 'UPDATE', 'DELETE'], 'SectionValidationRules', () => {
-    log.info('SectionValidationRules modified - clearing cache');
-    validationService.clearCache();
+  /**
+   * Drop the cached satellite systems of the notification service when the configuration changes
+   */
+  this.after(['CREATE', 'UPDATE', 'DELETE'], 'SystemConfiguration', (result, req) => {
+    log.info('SystemConfiguration modified - invalidating cached satellite systems', { event: req.event });
+    NotificationService.invalidateSatelliteSystems();
   });
 
   // ===== Service Initialization Complete =====
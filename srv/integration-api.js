@@ -1,5 +1,7 @@
 const cds = require('@sap/cds');
 const requestNumberGenerator = require('./utils/request-number-generator');
+const partnerBulkIngest = require('./lib/shared/partner-bulk-ingest');
+const statusFeed = require('./lib/status-feed');
 
 /**
  * Integration API for External Systems
@@ -22,11 +24,13 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
     router.post('/partners/create', this.createPartnerRequest.bind(this));
     router.post('/partners/update', this.updatePartnerRequest.bind(this));
     router.get('/partners/:requestNumber/status', this.getRequestStatus.bind(this));
+    router.get('/partners/status-feed', (req, res) => statusFeed.handle(req, res));
     router.get('/partners/requests', this.getPartnerRequests.bind(this));
 
     // Bulk operations
     router.post('/partners/bulk/create', this.bulkCreatePartnerRequests.bind(this));
     router.post('/partners/bulk/status', this.getBulkRequestStatus.bind(this));
+    router.post('/partners/bulk/ingest', (req, res) => partnerBulkIngest.handle(req, res));
 
     // Webhook endpoints for external systems to receive notifications
     router.post('/webhooks/partner-approved', this.handlePartnerApproved.bind(this));
@@ -98,27 +102,7 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
       const requestNumber = await requestNumberGenerator.getNextNumber('MDM', db);
 
       // Create the business partner request
-      const requestData = {
-        requestNumber,
-        entityType: partnerData.entityType || 'Supplier',
-        requestType: 'Create',
-        sourceSystem,
-        status: 'Draft',
-        requesterId: partnerData.requesterId || 'external-system',
-        requesterName: partnerData.requesterName || `${sourceSystem} System`,
-        requesterEmail: partnerData.requesterEmail || `${sourceSystem.toLowerCase()}@company.com`,
-        partnerName: partnerData.partnerName,
-        searchTerm: partnerData.searchTerm || partnerData.partnerName.substring(0, 20),
-        partnerRole: partnerData.partnerRole || partnerData.entityType || 'Supplier',
-        businessChannels: partnerData.businessChannels,
-        coupaInternalNo: partnerData.coupaInternalNo,
-        salesforceId: partnerData.salesforceId,
-        piId: partnerData.piId,
-        paymentTerms: partnerData.paymentTerms,
-        paymentMethod: partnerData.paymentMethod || 'BankTransfer',
-        reconAccount: partnerData.reconAccount,
-        comments: partnerData.comments || `Created via ${sourceSystem} integration`
-      };
+      const requestData = partnerBulkIngest.buildPartnerRequest(partnerData, sourceSystem, requestNumber);
 
       const result = await INSERT.into('mdm.db.BusinessPartnerRequests').entries(requestData);
       const requestId = result.req ? result.req.data.ID : result.ID;
@@ -160,16 +144,7 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
       }
 
       // Create approval history entry
-      await INSERT.into('mdm.db.ApprovalHistory').entries({
-        request_ID: requestId,
-        approverUserId: 'system',
-        approverName: `${sourceSystem} Integration`,
-        action: 'Create',
-        previousStatus: null,
-        newStatus: 'Draft',
-        comments: `Request created via ${sourceSystem} integration API`,
-        systemGenerated: true
-      });
+      await INSERT.into('mdm.db.ApprovalHistory').entries(partnerBulkIngest.creationHistoryEntry(requestId, sourceSystem));
 
       res.status(201).json({
         success: true,
@@ -286,13 +261,19 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
         });
       }
 
+      // Revalidations (If-None-Match) are answered before the history is read
+      const lastModified = request.modifiedAt || request.createdAt;
+      if (statusFeed.notModified(req, res, lastModified)) {
+        return;
+      }
+
       // Get approval history
       const history = await SELECT.from('mdm.db.ApprovalHistory')
         .where({ request_ID: request.ID })
         .orderBy('createdAt desc')
         .limit(10);
 
-      res.json({
+      statusFeed.sendConditional(req, res, {
         requestNumber,
         requestId: request.ID,
         status: request.status,
@@ -316,7 +297,7 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
           timestamp: h.createdAt,
           comments: h.comments
         }))
-      });
+      }, lastModified);
 
     } catch (error) {
       console.error('Error getting request status:', error);
@@ -327,6 +308,45 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
     }
   }
 
+  // Get Bulk Request Status - External System Endpoint
+  async getBulkRequestStatus(req, res) {
+    try {
+      const { sourceSystem } = req;
+      const { requestNumbers } = req.body;
+
+      if (!Array.isArray(requestNumbers) || requestNumbers.length === 0) {
+        return res.status(400).json({
+          error: 'requestNumbers array is required and cannot be empty'
+        });
+      }
+
+      // Feed cursor taken before the read: following the status feed from it misses no change
+      const cursor = await statusFeed.currentSequence();
+      const requests = await SELECT.from('mdm.db.BusinessPartnerRequests')
+        .columns('requestNumber', 'status', 'sapBpNumber', 'rejectionReason', 'modifiedAt')
+        .where({ requestNumber: { in: requestNumbers }, sourceSystem });
+
+      res.json({
+        success: true,
+        data: requests.map(request => ({
+          requestNumber: request.requestNumber,
+          status: request.status,
+          sapBpNumber: request.sapBpNumber,
+          rejectionReason: request.rejectionReason,
+          updatedAt: request.modifiedAt
+        })),
+        cursor
+      });
+
+    } catch (error) {
+      console.error('Error getting bulk request status:', error);
+      res.status(500).json({
+        error: 'Failed to get bulk request status',
+        details: error.message
+      });
+    }
+  }
+
   // Get Partner Requests with filtering
   async getPartnerRequests(req, res) {
     try {
@@ -410,7 +430,7 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
 
       if (partners.length > 50) {
         return res.status(400).json({
-          error: 'Maximum 50 partners can be processed in one bulk request'
+          error: 'Maximum 50 partners can be processed in one bulk request; use /integration/partners/bulk/ingest for larger loads'
         });
       }
 
@@ -538,14 +558,32 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
       {
         endpoint: '/integration/partners/{requestNumber}/status',
         method: 'GET',
-        description: 'Get request status and history',
+        description: 'Get request status and history; send the ETag as If-None-Match to get 304 while unchanged (Last-Modified has one-second precision, so If-Modified-Since alone can miss a change made in the same second)',
         samplePayload: 'No payload required'
       },
+      {
+        endpoint: '/integration/partners/status-feed',
+        method: 'GET',
+        description: 'Status changes of your requests after a cursor: waits up to 25s for the next change (long-poll) and returns { events, cursor }; with Accept: text/event-stream streams them as Server-Sent Events',
+        samplePayload: 'Query parameters: after (cursor from the previous response or bulk status), wait (seconds), requestNumbers (comma-separated)'
+      },
+      {
+        endpoint: '/integration/partners/bulk/status',
+        method: 'POST',
+        description: 'Get status for multiple requests, with a cursor to follow the status feed from',
+        samplePayload: JSON.stringify({ requestNumbers: ['COUPA-0000000001', 'COUPA-0000000002'] }, null, 2)
+      },
       {
         endpoint: '/integration/partners/requests',
         method: 'GET',
         description: 'Get list of partner requests with filters',
         samplePayload: 'Query parameters: status, requestType, limit, offset, fromDate, toDate'
+      },
+      {
+        endpoint: '/integration/partners/bulk/ingest',
+        method: 'POST',
+        description: 'Bulk load partner requests (Content-Type application/x-ndjson, one create payload per line); responds with one NDJSON result per line and a final summary line',
+        samplePayload: '{"partnerName":"ACME Corporation","addresses":[{"addressType":"Main","city":"New York","country_code":"US"}]}\n{"partnerName":"Globex Ltd","addresses":[...]}'
       }
     ];
 
@@ -564,46 +602,21 @@ module.exports = class IntegrationAPI extends cds.ApplicationService {
 
   // Helper method to validate partner data
   validatePartnerData(data, requestType) {
-    const errors = [];
-
-    if (!data.partnerName || data.partnerName.trim().length < 3) {
-      errors.push('partnerName is required and must be at least 3 characters');
-    }
-
-    if (requestType === 'Create') {
-      if (!data.addresses || data.addresses.length === 0) {
-        errors.push('At least one address is required for create requests');
-      } else {
-        const hasMainAddress = data.addresses.some(addr => addr.addressType === 'Main');
-        if (!hasMainAddress) {
-          errors.push('A Main address is required (established address)');
-        }
-      }
-    }
-
-    if (requestType === 'Update' && !data.existingBpNumber) {
-      errors.push('existingBpNumber is required for update requests');
-    }
-
-    return {
-      isValid: errors.length === 0,
-      errors
-    };
+    return partnerBulkIngest.validatePartnerRecord(data, requestType);
   }
 
   // Helper method to process single partner request
   async processSinglePartnerRequest(partnerData, sourceSystem) {
-    // Implementation similar to createPartnerRequest but returns result object
-    // ... (simplified for brevity)
-
-    // Generate request number using unified generator
-    const db = await cds.connect.to('db');
-    const requestNumber = await requestNumberGenerator.getNextNumber('MDM', db);
+    const validation = this.validatePartnerData(partnerData, 'Create');
+    if (!validation.isValid) {
+      throw new Error(validation.errors.join('; '));
+    }
 
-    // Create request and return result
+    // Request, children and history in one transaction (same path as bulk ingest)
+    const [created] = await partnerBulkIngest.insertRequests([partnerData], sourceSystem);
     return {
-      requestNumber,
-      requestId: 'generated-id', // would be actual ID from database
+      requestNumber: created.requestNumber,
+      requestId: created.ID,
       status: 'Success'
     };
   }
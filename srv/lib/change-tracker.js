@@ -8,13 +8,41 @@ const { v4: uuidv4 } = require('uuid');
  * - Showing detailed change history in all requesting apps (Coupa, Salesforce, MDM)
  * - Future Satellite Acknowledgment App for cross-system change notifications
  */
+// Child collections compared by _compareChildEntities (subAccounts have their own comparison)
+const CHILD_COLLECTIONS = [
+  { property: 'addresses', section: 'Addresses', identifier: '_getAddressIdentifier' },
+  { property: 'emails', section: 'Email Contacts', identifier: '_getEmailIdentifier' },
+  { property: 'banks', section: 'Banking Details', identifier: '_getBankIdentifier' },
+  { property: 'vatIds', section: 'VAT IDs', identifier: '_getVatIdentifier' }
+];
+
+// Fields of child records that are not compared
+const SKIPPED_CHILD_FIELDS = new Set(['ID', 'createdAt', 'createdBy', 'modifiedAt', 'modifiedBy', 'request_ID']);
+
+const CHANGE_LOG_COLUMNS = [
+  'ID', 'request_ID', 'changeDate', 'changedBy', 'changedByName',
+  'sectionName', 'fieldName', 'fieldLabel', 'oldValue', 'newValue', 'changeType', 'recordIdentifier',
+  'createdAt', 'createdBy', 'modifiedAt', 'modifiedBy'
+];
+
+// Length of ChangeLogs.recordIdentifier
+const RECORD_IDENTIFIER_LENGTH = 100;
+
 class ChangeTracker {
-  constructor() {
+  /**
+   * @param {Object} [options]
+   * @param {Number} [options.coalesceThreshold] - Identical field changes in at least this
+   *   many child records of a section are logged as one entry (default 5)
+   */
+  constructor({ coalesceThreshold = 5 } = {}) {
     this.log = cds.log('change-tracker');
+    this.coalesceThreshold = coalesceThreshold;
   }
 
   /**
    * Track changes between old and new request data
+   * Child records are matched by ID, and identical field changes across many child
+   * records of a section (a bulk edit) are coalesced into one entry.
    * @param {String} requestId - Request UUID
    * @param {Object} oldData - Old request data (before update)
    * @param {Object} newData - New request data (after update)
@@ -23,145 +51,36 @@ class ChangeTracker {
    * @returns {Array} Array of change log entries
    */
   async trackChanges(requestId, oldData, newData, userId = 'system', userDisplayName = 'System') {
-    const changeLogs = [];
-    const changeDate = new Date().toISOString();
-
     try {
       // Track main entity field changes
-      const mainFieldChanges = this._compareMainFields(oldData, newData);
-      mainFieldChanges.forEach(change => {
-        changeLogs.push({
-          ID: uuidv4(),
-          request_ID: requestId,
-          changeDate,
-          changedBy: userId,
-          changedByName: userDisplayName,
-          ...change,
-          createdAt: changeDate,
-          createdBy: userId,
-          modifiedAt: changeDate,
-          modifiedBy: userId
-        });
-      });
+      const changes = this._compareMainFields(oldData, newData);
 
       // Track child entity changes (addresses, emails, banks, vatIds)
-      if (oldData.addresses || newData.addresses) {
-        const addressChanges = this._compareChildEntities(
-          oldData.addresses || [],
-          newData.addresses || [],
-          'Addresses',
-          this._getAddressIdentifier.bind(this)
-        );
-        addressChanges.forEach(change => {
-          changeLogs.push({
-            ID: uuidv4(),
-            request_ID: requestId,
-            changeDate,
-            changedBy: userId,
-            changedByName: userDisplayName,
-            ...change,
-            createdAt: changeDate,
-            createdBy: userId,
-            modifiedAt: changeDate,
-            modifiedBy: userId
-          });
-        });
-      }
-
-      if (oldData.emails || newData.emails) {
-        const emailChanges = this._compareChildEntities(
-          oldData.emails || [],
-          newData.emails || [],
-          'Email Contacts',
-          this._getEmailIdentifier.bind(this)
-        );
-        emailChanges.forEach(change => {
-          changeLogs.push({
-            ID: uuidv4(),
-            request_ID: requestId,
-            changeDate,
-            changedBy: userId,
-            changedByName: userDisplayName,
-            ...change,
-            createdAt: changeDate,
-            createdBy: userId,
-            modifiedAt: changeDate,
-            modifiedBy: userId
-          });
-        });
-      }
-
-      if (oldData.banks || newData.banks) {
-        const bankChanges = this._compareChildEntities(
-          oldData.banks || [],
-          newData.banks || [],
-          'Banking Details',
-          this._getBankIdentifier.bind(this)
-        );
-        bankChanges.forEach(change => {
-          changeLogs.push({
-            ID: uuidv4(),
-            request_ID: requestId,
-            changeDate,
-            changedBy: userId,
-            changedByName: userDisplayName,
-            ...change,
-            createdAt: changeDate,
-            createdBy: userId,
-            modifiedAt: changeDate,
-            modifiedBy: userId
-          });
-        });
-      }
-
-      if (oldData.vatIds || newData.vatIds) {
-        const vatChanges = this._compareChildEntities(
-          oldData.vatIds || [],
-          newData.vatIds || [],
-          'VAT IDs',
-          this._getVatIdentifier.bind(this)
-        );
-        vatChanges.forEach(change => {
-          changeLogs.push({
-            ID: uuidv4(),
-            request_ID: requestId,
-            changeDate,
-            changedBy: userId,
-            changedByName: userDisplayName,
-            ...change,
-            createdAt: changeDate,
-            createdBy: userId,
-            modifiedAt: changeDate,
-            modifiedBy: userId
-          });
-        });
+      for (const { property, section, identifier } of CHILD_COLLECTIONS) {
+        if (oldData[property] || newData[property]) {
+          append(changes, this._compareChildEntities(
+            oldData[property] || [],
+            newData[property] || [],
+            section,
+            this[identifier].bind(this)
+          ));
+        }
       }
 
       // Track SubAccounts changes (Salesforce only)
       if (oldData.subAccounts || newData.subAccounts) {
-        const subAccountChanges = this._compareSubAccounts(
+        append(changes, this._compareSubAccounts(
           oldData.subAccounts || [],
           newData.subAccounts || []
-        );
-        subAccountChanges.forEach(change => {
-          changeLogs.push({
-            ID: uuidv4(),
-            request_ID: requestId,
-            changeDate,
-            changedBy: userId,
-            changedByName: userDisplayName,
-            ...change,
-            createdAt: changeDate,
-            createdBy: userId,
-            modifiedAt: changeDate,
-            modifiedBy: userId
-          });
-        });
+        ));
       }
 
+      const changeLogs = this._toChangeLogs(this._coalesceChanges(changes), requestId, userId, userDisplayName);
+
       this.log.info('Changes tracked', {
         requestId,
         changeCount: changeLogs.length,
+        fieldChanges: changes.length,
         userId
       });
 
@@ -176,6 +95,76 @@ class ChangeTracker {
     }
   }
 
+  /**
+   * Turn changes into ChangeLogs entries
+   * @private
+   */
+  _toChangeLogs(changes, requestId, userId, userDisplayName) {
+    const changeDate = new Date().toISOString();
+    return changes.map(change => ({
+      ID: uuidv4(),
+      request_ID: requestId,
+      changeDate,
+      changedBy: userId,
+      changedByName: userDisplayName,
+      sectionName: change.sectionName,
+      fieldName: change.fieldName,
+      fieldLabel: change.fieldLabel,
+      oldValue: change.oldValue,
+      newValue: change.newValue,
+      changeType: change.changeType,
+      recordIdentifier: change.recordIdentifier,
+      createdAt: changeDate,
+      createdBy: userId,
+      modifiedAt: changeDate,
+      modifiedBy: userId
+    }));
+  }
+
+  /**
+   * Merge the same field change (same old and new value) made to many child records
+   * of a section into one change listing the records
+   * @private
+   */
+  _coalesceChanges(changes) {
+    const keys = changes.map(change => (change.changeType === 'Modified' && change.recordIdentifier !== null)
+      ? `${change.sectionName}\u0000${change.fieldName}\u0000${change.oldValue}\u0000${change.newValue}`
+      : null);
+
+    const groups = new Map();
+    keys.forEach((key, index) => {
+      if (key === null) return;
+      if (!groups.has(key)) groups.set(key, []);
+      groups.get(key).push(changes[index]);
+    });
+
+    const coalesced = [];
+    changes.forEach((change, index) => {
+      const group = keys[index] === null ? null : groups.get(keys[index]);
+      if (!group || group.length < this.coalesceThreshold) {
+        coalesced.push(change);
+      } else if (group[0] === change) {
+        coalesced.push({
+          ...change,
+          recordIdentifier: this._summarizeIdentifiers(group.map(c => c.recordIdentifier))
+        });
+      }
+    });
+
+    return coalesced;
+  }
+
+  /**
+   * Record identifier of a coalesced change, shortened to fit the column
+   * @private
+   */
+  _summarizeIdentifiers(identifiers) {
+    const summary = `${identifiers.length} records: ${identifiers.join(', ')}`;
+    return summary.length <= RECORD_IDENTIFIER_LENGTH
+      ? summary
+      : summary.substring(0, RECORD_IDENTIFIER_LENGTH - 3) + '...';
+  }
+
   /**
    * Compare main entity fields and return changes
    * @private
@@ -217,12 +206,9 @@ class ChangeTracker {
     };
 
     Object.keys(fieldsToTrack).forEach(fieldName => {
-      const oldValue = oldData[fieldName];
-      const newValue = newData[fieldName];
-
       // Only track if value actually changed (handle null/undefined as empty string)
-      const oldStr = oldValue !== null && oldValue !== undefined ? String(oldValue) : '';
-      const newStr = newValue !== null && newValue !== undefined ? String(newValue) : '';
+      const oldStr = toChangeValue(oldData[fieldName]);
+      const newStr = toChangeValue(newData[fieldName]);
 
       if (oldStr !== newStr) {
         const fieldConfig = fieldsToTrack[fieldName];
@@ -269,11 +255,12 @@ class ChangeTracker {
     };
 
     const formatter = getFormatter(sectionName);
+    const oldById = indexById(oldEntities);
+    const newById = indexById(newEntities);
 
     // Track deleted entities
     oldEntities.forEach((oldEntity, index) => {
-      const matchingNew = newEntities.find(ne => ne.ID === oldEntity.ID);
-      if (!matchingNew) {
+      if (!newById.has(oldEntity.ID)) {
         const identifier = identifierFn(oldEntity, index + 1);
         changes.push({
           sectionName,
@@ -289,7 +276,7 @@ class ChangeTracker {
 
     // Track new and modified entities
     newEntities.forEach((newEntity, index) => {
-      const matchingOld = oldEntities.find(oe => oe.ID === newEntity.ID);
+      const matchingOld = oldById.get(newEntity.ID);
       const identifier = identifierFn(newEntity, index + 1);
 
       if (!matchingOld) {
@@ -305,20 +292,14 @@ class ChangeTracker {
         });
       } else {
         // Modified entity - track field-level changes
-        Object.keys(newEntity).forEach(fieldName => {
+        for (const fieldName of Object.keys(newEntity)) {
           // Skip system fields and ID
-          if (fieldName.startsWith('_') || fieldName === 'ID' ||
-              fieldName === 'createdAt' || fieldName === 'createdBy' ||
-              fieldName === 'modifiedAt' || fieldName === 'modifiedBy' ||
-              fieldName === 'request_ID') {
-            return;
+          if (fieldName.startsWith('_') || SKIPPED_CHILD_FIELDS.has(fieldName)) {
+            continue;
           }
 
-          const oldValue = matchingOld[fieldName];
-          const newValue = newEntity[fieldName];
-
-          const oldStr = oldValue !== null && oldValue !== undefined ? String(oldValue) : '';
-          const newStr = newValue !== null && newValue !== undefined ? String(newValue) : '';
+          const oldStr = toChangeValue(matchingOld[fieldName]);
+          const newStr = toChangeValue(newEntity[fieldName]);
 
           if (oldStr !== newStr) {
             changes.push({
@@ -331,7 +312,7 @@ class ChangeTracker {
               recordIdentifier: identifier
             });
           }
-        });
+        }
       }
     });
 
@@ -344,11 +325,12 @@ class ChangeTracker {
    */
   _compareSubAccounts(oldSubAccounts, newSubAccounts) {
     const changes = [];
+    const oldById = indexById(oldSubAccounts);
+    const newById = indexById(newSubAccounts);
 
     // Track deleted subAccounts
     oldSubAccounts.forEach((oldSub, index) => {
-      const matchingNew = newSubAccounts.find(ns => ns.ID === oldSub.ID);
-      if (!matchingNew) {
+      if (!newById.has(oldSub.ID)) {
         const identifier = `SubAccount #${index + 1} (${oldSub.subAccountId || 'N/A'})`;
         changes.push({
           sectionName: 'SubAccounts',
@@ -364,7 +346,7 @@ class ChangeTracker {
 
     // Track new and modified subAccounts
     newSubAccounts.forEach((newSub, index) => {
-      const matchingOld = oldSubAccounts.find(os => os.ID === newSub.ID);
+      const matchingOld = oldById.get(newSub.ID);
       const identifier = `SubAccount #${index + 1} (${newSub.subAccountId || 'N/A'})`;
 
       if (!matchingOld) {
@@ -386,11 +368,8 @@ class ChangeTracker {
         ];
 
         subAccountFields.forEach(fieldName => {
-          const oldValue = matchingOld[fieldName];
-          const newValue = newSub[fieldName];
-
-          const oldStr = oldValue !== null && oldValue !== undefined ? String(oldValue) : '';
-          const newStr = newValue !== null && newValue !== undefined ? String(newValue) : '';
+          const oldStr = toChangeValue(matchingOld[fieldName]);
+          const newStr = toChangeValue(newSub[fieldName]);
 
           if (oldStr !== newStr) {
             changes.push({
@@ -413,7 +392,7 @@ class ChangeTracker {
             'SubAccount Banks',
             (bank, idx) => `${identifier} - Bank #${idx}`
           );
-          changes.push(...bankChanges);
+          append(changes, bankChanges);
         }
 
         // Track SubAccount emails
@@ -424,7 +403,7 @@ class ChangeTracker {
             'SubAccount Emails',
             (email, idx) => `${identifier} - Email #${idx}`
           );
-          changes.push(...emailChanges);
+          append(changes, emailChanges);
         }
       }
     });
@@ -587,7 +566,7 @@ class ChangeTracker {
   }
 
   /**
-   * Save change logs to database
+   * Save change logs to database in one bulk insert
    * @param {Array} changeLogs - Array of change log entries
    */
   async saveChangeLogs(changeLogs) {
@@ -599,7 +578,9 @@ class ChangeTracker {
       const db = await cds.connect.to('db');
       const { ChangeLogs } = db.entities('mdm.db');
 
-      await INSERT.into(ChangeLogs).entries(changeLogs);
+      await INSERT.into(ChangeLogs)
+        .columns(CHANGE_LOG_COLUMNS)
+        .rows(changeLogs.map(entry => CHANGE_LOG_COLUMNS.map(column => entry[column] ?? null)));
 
       this.log.info('Change logs saved', { count: changeLogs.length });
     } catch (error) {
@@ -609,4 +590,29 @@ class ChangeTracker {
   }
 }
 
+/**
+ * Map of entities by ID; the first entity wins when IDs repeat
+ */
+function indexById(entities) {
+  const byId = new Map();
+  for (const entity of entities) {
+    if (!byId.has(entity.ID)) byId.set(entity.ID, entity);
+  }
+  return byId;
+}
+
+/**
+ * Compared and logged form of a value (null and undefined as empty string)
+ */
+function toChangeValue(value) {
+  return value !== null && value !== undefined ? String(value) : '';
+}
+
+/**
+ * Append items without spreading them into call arguments (safe for large arrays)
+ */
+function append(target, items) {
+  for (const item of items) target.push(item);
+}
+
 module.exports = ChangeTracker;
@@ -8,6 +8,8 @@
  * @date December 2024
  */
 
+const patternRegistry = require('./shared/pattern-registry');
+
 const customValidators = {
   /**
    * Validate street address format
@@ -295,33 +297,18 @@ const customValidators = {
    * Country-specific postal code validation
    */
   validatePostalCodeByCountry: async (value, data, rule, db) => {
-    const addresses = data.addresses || [];
-
-    const postalCodeRules = {
-      'DE': { pattern: /^[0-9]{5}$/, example: '10115' },
-      'US': { pattern: /^[0-9]{5}(-[0-9]{4})?$/, example: '12345 or 12345-6789' },
-      'GB': { pattern: /^[A-Z]{1,2}[0-9][A-Z0-9]? ?[0-9][A-Z]{2}$/i, example: 'SW1A 1AA' },
-      'FR': { pattern: /^[0-9]{5}$/, example: '75001' },
-      'CA': { pattern: /^[A-Z][0-9][A-Z] ?[0-9][A-Z][0-9]$/i, example: 'K1A 0B1' },
-      'NL': { pattern: /^[0-9]{4} ?[A-Z]{2}$/i, example: '1012 AB' }
-    };
-
-    const invalidAddresses = addresses.filter(addr => {
-      if (!addr.postalCode || !addr.country) return false;
-
-      const rule = postalCodeRules[addr.country];
-      if (!rule) return false; // No rule for this country - skip validation
-
-      return !rule.pattern.test(addr.postalCode);
-    });
+    if (db) {
+      await patternRegistry.load(db);
+    }
 
-    if (invalidAddresses.length > 0) {
-      const country = invalidAddresses[0].country;
-      const rule = postalCodeRules[country];
+    // Checks all addresses of the request against the precompiled country patterns
+    const addresses = (data.addresses || []).map(addr => ({ ...addr, country_code: addr.country }));
+    const { errors } = patternRegistry.validateRequestData({ addresses });
 
+    if (errors.length > 0) {
       return {
         isValid: false,
-        errorMessage: `Postal code format for ${country} is invalid. Expected format: ${rule.example}`,
+        errorMessage: errors[0].message,
         errorSeverity: 'Error',
         blockSubmission: true
       };
@@ -1,5 +1,7 @@
 const cds = require('@sap/cds');
 const axios = require('axios');
+const LruCache = require('./shared/lru-cache');
+const { Semaphore } = require('./shared/rate-limiter');
 
 /**
  * Enhanced AEB Trade Compliance Service
@@ -11,17 +13,41 @@ const axios = require('axios');
  * - Comprehensive risk scoring algorithm (0-100)
  * - Test data covering all risk scenarios
  * - Minimal changes needed for production deployment
+ * - Batched screening: addresses of concurrent screenings are sent together
+ * - Result cache by name and address fingerprint, cleared when the list version changes
+ * - Mock fallback when the AEB API fails; fallback results are flagged and not cached
  *
  * @module enhanced-aeb-service
  */
 
 class EnhancedAEBService {
-    constructor() {
-        this.USE_MOCK = process.env.AEB_USE_MOCK !== 'false';
-        this.AEB_API_URL = process.env.AEB_API_URL || 'https://rz3.aeb.de/test4ce/rest/ComplianceScreening';
-        this.AEB_API_KEY = process.env.AEB_API_KEY;
-        this.AEB_CLIENT_ID = process.env.AEB_CLIENT_ID;
+    /**
+     * @param {Object} [options] - Overrides of the AEB_* environment settings
+     * @param {boolean} [options.useMock] - Use mock screening (AEB_USE_MOCK, default true)
+     * @param {number} [options.batchWindowMs] - How long addresses are collected before a call (AEB_BATCH_WINDOW_MS, default 20)
+     * @param {number} [options.batchSize] - Maximum addresses per call (AEB_BATCH_SIZE, default 100)
+     * @param {number} [options.maxConcurrent] - Calls in flight (AEB_MAX_CONCURRENT, default 4)
+     * @param {number} [options.cacheTTL] - Result cache TTL in ms (AEB_CACHE_TTL_HOURS, default 24h)
+     * @param {string} [options.listVersion] - Current screening list version (AEB_LIST_VERSION)
+     */
+    constructor(options = {}) {
+        const env = process.env;
+        this.USE_MOCK = options.useMock ?? env.AEB_USE_MOCK !== 'false';
+        this.AEB_API_URL = env.AEB_API_URL || 'https://rz3.aeb.de/test4ce/rest/ComplianceScreening';
+        this.AEB_API_KEY = env.AEB_API_KEY;
+        this.AEB_CLIENT_ID = env.AEB_CLIENT_ID;
         this.log = cds.log('enhanced-aeb-service');
+
+        this.batchWindowMs = options.batchWindowMs ?? (Number(env.AEB_BATCH_WINDOW_MS) || 20);
+        this.batchSize = options.batchSize ?? (Number(env.AEB_BATCH_SIZE) || 100);
+        this.concurrency = new Semaphore(options.maxConcurrent ?? (Number(env.AEB_MAX_CONCURRENT) || 4));
+        this.pendingBatches = new Map(); // screening parameters key -> { screeningParameters, items, timer }
+        this.screeningCache = new LruCache({
+            maxEntries: 10000,
+            ttl: options.cacheTTL ?? (Number(env.AEB_CACHE_TTL_HOURS) || 24) * 60 * 60 * 1000
+        });
+        this.listVersion = options.listVersion ?? env.AEB_LIST_VERSION ?? null;
+        this.stats = { batches: 0, addressesSent: 0 };
     }
 
     /**
@@ -79,19 +105,174 @@ class EnhancedAEBService {
     /**
      * Screen addresses using mock or production API
      *
+     * Addresses screened before with the same name and address fingerprint, screening
+     * parameters and list version are answered from the cache. The others are queued
+     * and sent together with those of concurrent screenings: a batch is sent when it
+     * is full or when the batch window has passed. When the AEB API call fails, the
+     * addresses get mock results flagged with `fallback: true`, which are not cached.
+     *
      * @param {Object} payload - AEB API format payload
      * @returns {Promise<Object>} AEB API format response
      */
     async screenAddresses(payload) {
-        if (this.USE_MOCK) {
-            this.log.info('Using mock AEB screening');
-            return this.mockScreenAddresses(payload);
-        } else {
-            this.log.info('Using production AEB API');
-            return this.callRealAEBAPI(payload);
+        const screeningParameters = payload.screeningParameters || {};
+        const parametersKey = JSON.stringify(screeningParameters);
+
+        const results = await Promise.all(payload.addresses.map(async address => {
+            const cacheKey = `${this.listVersion}|${parametersKey}|${this.fingerprint(address)}`;
+            const result = await this.screeningCache.getOrCompute(cacheKey,
+                () => this.enqueueScreening(screeningParameters, parametersKey, address))
+                .catch(error => this.fallbackScreening(screeningParameters, address, error));
+            return { ...result, referenceId: address.referenceId };
+        }));
+
+        // One screening ID when all addresses were screened in the same call
+        const screeningIds = new Set(results.map(r => r.screeningId));
+        return {
+            screeningId: screeningIds.size === 1
+                ? results[0].screeningId
+                : `AEB-${Date.now()}-${this.generateRandomId()}`,
+            screeningDate: new Date().toISOString(),
+            results,
+            summary: this.buildSummary(results)
+        };
+    }
+
+    /**
+     * Mock result for an address whose AEB API call failed
+     * The failed screening rejected inside the cache, so this result is never cached.
+     *
+     * @param {Object} screeningParameters - AEB screening parameters
+     * @param {Object} address - AEB API format address
+     * @param {Error} error - Screening error; errors other than API failures are rethrown
+     * @returns {Promise<Object>} Mock screening result flagged with fallback: true
+     */
+    async fallbackScreening(screeningParameters, address, error) {
+        if (!error.apiFailure) throw error;
+
+        this.log.warn('Falling back to mock screening due to API error', { error: error.message });
+        const response = await this.mockScreenAddresses({ screeningParameters, addresses: [address] });
+        return { ...response.results[0], screeningId: response.screeningId, fallback: true };
+    }
+
+    /**
+     * Fingerprint of the screened fields of an address (case and whitespace insensitive)
+     *
+     * @param {Object} address - AEB API format address
+     * @returns {String} Fingerprint
+     */
+    fingerprint(address) {
+        return [address.name, address.street, address.city, address.postalCode, address.countryISO]
+            .map(value => String(value || '').toUpperCase().replace(/\s+/g, ' ').trim())
+            .join('|');
+    }
+
+    /**
+     * Queue an address for the next batch with the same screening parameters
+     *
+     * @param {Object} screeningParameters - AEB screening parameters
+     * @param {String} parametersKey - Serialized screening parameters
+     * @param {Object} address - AEB API format address
+     * @returns {Promise<Object>} Screening result for the address
+     */
+    enqueueScreening(screeningParameters, parametersKey, address) {
+        return new Promise((resolve, reject) => {
+            let batch = this.pendingBatches.get(parametersKey);
+            if (!batch) {
+                batch = { screeningParameters, items: [] };
+                batch.timer = setTimeout(() => this.flushBatch(parametersKey), this.batchWindowMs);
+                this.pendingBatches.set(parametersKey, batch);
+            }
+            batch.items.push({ address, resolve, reject });
+            if (batch.items.length >= this.batchSize) {
+                this.flushBatch(parametersKey);
+            }
+        });
+    }
+
+    /**
+     * Send a queued batch (within the concurrency limit)
+     *
+     * @param {String} parametersKey - Serialized screening parameters
+     */
+    flushBatch(parametersKey) {
+        const batch = this.pendingBatches.get(parametersKey);
+        if (!batch) return;
+        this.pendingBatches.delete(parametersKey);
+        clearTimeout(batch.timer);
+        this.concurrency.run(() => this.sendBatch(batch));
+    }
+
+    /**
+     * Screen a batch in one call and settle the queued screenings
+     *
+     * @param {Object} batch - Queued batch
+     * @returns {Promise<void>}
+     */
+    async sendBatch(batch) {
+        const payload = {
+            screeningParameters: batch.screeningParameters,
+            addresses: batch.items.map((item, index) => ({ ...item.address, referenceId: `BATCH_${index}` }))
+        };
+
+        try {
+            let response;
+            if (this.USE_MOCK) {
+                this.log.info('Using mock AEB screening', { addressCount: payload.addresses.length });
+                response = await this.mockScreenAddresses(payload);
+            } else {
+                this.log.info('Using production AEB API', { addressCount: payload.addresses.length });
+                response = await this.callRealAEBAPI(payload);
+            }
+            this.stats.batches++;
+            this.stats.addressesSent += payload.addresses.length;
+            this.setListVersion(response.listVersion);
+
+            const resultsByReference = new Map(response.results.map(r => [r.referenceId, r]));
+            batch.items.forEach((item, index) => {
+                const result = resultsByReference.get(`BATCH_${index}`);
+                if (result) {
+                    item.resolve({ ...result, screeningId: response.screeningId });
+                } else {
+                    item.reject(new Error(`AEB response contains no result for address ${item.address.referenceId}`));
+                }
+            });
+        } catch (error) {
+            batch.items.forEach(item => item.reject(error));
         }
     }
 
+    /**
+     * Record the screening list version; cached results of other versions are dropped
+     *
+     * @param {String} version - List version reported by AEB (ignored if empty)
+     */
+    setListVersion(version) {
+        if (!version || version === this.listVersion) return;
+        this.log.info('AEB screening list version changed, clearing screening cache', {
+            from: this.listVersion,
+            to: version
+        });
+        this.listVersion = version;
+        this.screeningCache.clear();
+    }
+
+    /**
+     * Summary of address results in AEB API format
+     *
+     * @param {Array} results - Address results
+     * @returns {Object} Summary
+     */
+    buildSummary(results) {
+        const overallRiskScore = Math.max(...results.map(r => r.riskScore));
+        return {
+            totalAddresses: results.length,
+            matchesFound: results.filter(r => r.matchFound).length,
+            overallRiskScore,
+            overallStatus: this.determineStatus(overallRiskScore)
+        };
+    }
+
     /**
      * Map our address structure to AEB API format
      *
@@ -147,18 +328,11 @@ class EnhancedAEBService {
             };
         });
 
-        const summary = {
-            totalAddresses: results.length,
-            matchesFound: results.filter(r => r.matchFound).length,
-            overallRiskScore: Math.max(...results.map(r => r.riskScore)),
-            overallStatus: this.determineStatus(Math.max(...results.map(r => r.riskScore)))
-        };
-
         return {
             screeningId,
             screeningDate,
             results,
-            summary
+            summary: this.buildSummary(results)
         };
     }
 
@@ -370,6 +544,7 @@ class EnhancedAEBService {
             riskScore: maxRiskScore,
             screeningId: apiResult.screeningId,
             screeningDate: apiResult.screeningDate,
+            fallback: apiResult.results.some(r => r.fallback === true),
             results: apiResult.results,
             summary: apiResult.summary
         };
@@ -410,9 +585,10 @@ class EnhancedAEBService {
                 data: error.response?.data
             });
 
-            // Fallback to mock in case of API failure
-            this.log.warn('Falling back to mock screening due to API error');
-            return this.mockScreenAddresses(payload);
+            // The queued screenings reject, so nothing is cached; screenAddresses falls back to mock
+            const failure = new Error(`AEB API call failed: ${error.message}`);
+            failure.apiFailure = true;
+            throw failure;
         }
     }
 
@@ -436,6 +612,9 @@ class EnhancedAEBService {
             mode: this.USE_MOCK ? 'MOCK' : 'PRODUCTION',
             apiUrl: this.AEB_API_URL,
             configured: !this.USE_MOCK ? !!(this.AEB_API_KEY && this.AEB_CLIENT_ID) : true,
+            listVersion: this.listVersion,
+            batching: { windowMs: this.batchWindowMs, batchSize: this.batchSize, ...this.stats },
+            cache: this.screeningCache.getStats(),
             timestamp: new Date().toISOString()
         };
     }
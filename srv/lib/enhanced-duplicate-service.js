@@ -1,5 +1,6 @@
 const cds = require('@sap/cds');
 const fuzzy = require('fuzzy');
+const partnerNameIndex = require('./partner-name-index');
 
 /**
  * Enhanced Duplicate Detection Service
@@ -168,9 +169,12 @@ class EnhancedDuplicateService {
     }
 
     try {
-      // Get all existing partners for comparison
-      const existingPartners = await SELECT.from('mdm.db.ExistingPartners')
-        .where({ status: 'Active' }); // Only check against active partners
+      // Narrow the comparison to partners sharing a blocking key with the name
+      const targetName = this.normalizeName(request.partnerName);
+      const candidateIds = await partnerNameIndex.candidates(targetName);
+
+      const existingPartners = candidateIds.length === 0 ? [] : await SELECT.from('mdm.db.ExistingPartners')
+        .where({ status: 'Active', ID: { in: candidateIds } }); // Only check against active partners
 
       if (!existingPartners || existingPartners.length === 0) {
         console.log('📭 No existing partners found for fuzzy matching');
@@ -178,7 +182,6 @@ class EnhancedDuplicateService {
       }
 
       // Prepare names for fuzzy matching
-      const targetName = this.normalizeName(request.partnerName);
       const candidates = existingPartners.map(partner => ({
         ...partner,
         normalizedName: this.normalizeName(partner.partnerName)
@@ -510,32 +513,7 @@ class EnhancedDuplicateService {
    * @returns {string} Normalized name
    */
   normalizeName(name) {
-    if (!name) return '';
-
-    let normalized = name.trim().toLowerCase();
-
-    // Remove common business entity suffixes
-    const suffixes = [
-      'ltd', 'limited', 'inc', 'incorporated', 'corp', 'corporation',
-      'llc', 'llp', 'lp', 'gmbh', 'ag', 'sa', 'sas', 'bv', 'nv',
-      'pty', 'pvt', 'private', 'public', 'co', 'company', '&', 'and'
-    ];
-
-    for (const suffix of suffixes) {
-      const patterns = [
-        new RegExp(`\\b${suffix}\\b\\.?$`, 'i'),  // End of string
-        new RegExp(`\\b${suffix}\\b\\.?\\s+`, 'i') // Followed by space
-      ];
-
-      for (const pattern of patterns) {
-        normalized = normalized.replace(pattern, ' ');
-      }
-    }
-
-    // Remove extra whitespace and special characters
-    normalized = normalized.replace(/[^\w\s]/g, ' ').replace(/\s+/g, ' ').trim();
-
-    return normalized;
+    return partnerNameIndex.normalizePartnerName(name);
   }
 
   /**
@@ -1,5 +1,8 @@
 const ErrorHandler = require('./error-handler');
 
+// Loaded on first use: the registry reads its built-in fallbacks from InputValidator.PATTERNS
+const patternRegistry = () => require('./shared/pattern-registry');
+
 /**
  * Comprehensive Input Validation and Sanitization Module
  * Implements security best practices for MDM Business Partner data
@@ -54,6 +57,21 @@ class InputValidator {
     // IBAN validation
     IBAN: /^[A-Z]{2}[0-9]{2}[A-Z0-9]{4}[0-9]{7}([A-Z0-9]?){0,16}$/,
 
+    // IBAN length by country
+    IBAN_LENGTHS: {
+      'AD': 24, 'AE': 23, 'AL': 28, 'AT': 20, 'AZ': 28, 'BA': 20, 'BE': 16,
+      'BG': 22, 'BH': 22, 'BR': 29, 'BY': 28, 'CH': 21, 'CR': 22, 'CY': 28,
+      'CZ': 24, 'DE': 22, 'DK': 18, 'DO': 28, 'EE': 20, 'EG': 29, 'ES': 24,
+      'FI': 18, 'FO': 18, 'FR': 27, 'GB': 22, 'GE': 22, 'GI': 23, 'GL': 18,
+      'GR': 27, 'GT': 28, 'HR': 21, 'HU': 28, 'IE': 22, 'IL': 23, 'IS': 26,
+      'IT': 27, 'JO': 30, 'KW': 30, 'KZ': 20, 'LB': 28, 'LI': 21, 'LT': 20,
+      'LU': 20, 'LV': 21, 'MC': 27, 'MD': 24, 'ME': 22, 'MK': 19, 'MR': 27,
+      'MT': 31, 'MU': 30, 'NL': 18, 'NO': 15, 'PK': 24, 'PL': 28, 'PS': 29,
+      'PT': 25, 'QA': 29, 'RO': 24, 'RS': 22, 'SA': 24, 'SE': 24, 'SI': 19,
+      'SK': 24, 'SM': 27, 'TN': 24, 'TR': 26, 'UA': 29, 'VA': 22, 'VG': 24,
+      'XK': 20
+    },
+
     // SWIFT/BIC code
     SWIFT: /^[A-Z]{6}[A-Z0-9]{2}([A-Z0-9]{3})?$/,
 
@@ -370,8 +388,7 @@ class InputValidator {
 
     // Postal code validation by country
     if (address.country_code && address.postalCode) {
-      const pattern = this.PATTERNS.POSTAL_CODES[address.country_code];
-      if (pattern && !pattern.test(address.postalCode)) {
+      if (patternRegistry().checkPostalCode(address.country_code, address.postalCode)) {
         warnings.push({
           field: `${prefix}.postalCode`,
           message: `Postal code format may be invalid for ${address.country_code}`,
@@ -497,8 +514,7 @@ class InputValidator {
 
     // Country-specific VAT ID format validation
     if (vatId.country_code && vatId.vatNumber) {
-      const pattern = this.PATTERNS.VAT_PATTERNS[vatId.country_code];
-      if (pattern && !pattern.test(vatId.vatNumber)) {
+      if (patternRegistry().checkVatNumber(vatId.vatNumber, vatId.country_code)) {
         warnings.push({
           field: `${prefix}.vatNumber`,
           message: `VAT number format may be invalid for ${vatId.country_code}`,
@@ -716,52 +732,9 @@ class InputValidator {
       throw new Error('IBAN is required');
     }
 
-    // Remove spaces and convert to uppercase
-    const cleanIBAN = iban.replace(/\s/g, '').toUpperCase();
-
-    // Check basic format: 2 letters + 2 digits + up to 30 alphanumeric
-    const basicFormat = /^[A-Z]{2}[0-9]{2}[A-Z0-9]{1,30}$/;
-    if (!basicFormat.test(cleanIBAN)) {
-      throw new Error('Invalid IBAN format');
-    }
-
-    // Validate IBAN length by country
-    const ibanLengths = {
-      'AD': 24, 'AE': 23, 'AL': 28, 'AT': 20, 'AZ': 28, 'BA': 20, 'BE': 16,
-      'BG': 22, 'BH': 22, 'BR': 29, 'BY': 28, 'CH': 21, 'CR': 22, 'CY': 28,
-      'CZ': 24, 'DE': 22, 'DK': 18, 'DO': 28, 'EE': 20, 'EG': 29, 'ES': 24,
-      'FI': 18, 'FO': 18, 'FR': 27, 'GB': 22, 'GE': 22, 'GI': 23, 'GL': 18,
-      'GR': 27, 'GT': 28, 'HR': 21, 'HU': 28, 'IE': 22, 'IL': 23, 'IS': 26,
-      'IT': 27, 'JO': 30, 'KW': 30, 'KZ': 20, 'LB': 28, 'LI': 21, 'LT': 20,
-      'LU': 20, 'LV': 21, 'MC': 27, 'MD': 24, 'ME': 22, 'MK': 19, 'MR': 27,
-      'MT': 31, 'MU': 30, 'NL': 18, 'NO': 15, 'PK': 24, 'PL': 28, 'PS': 29,
-      'PT': 25, 'QA': 29, 'RO': 24, 'RS': 22, 'SA': 24, 'SE': 24, 'SI': 19,
-      'SK': 24, 'SM': 27, 'TN': 24, 'TR': 26, 'UA': 29, 'VA': 22, 'VG': 24,
-      'XK': 20
-    };
-
-    const countryCode = cleanIBAN.substring(0, 2);
-    const expectedLength = ibanLengths[countryCode];
-
-    if (expectedLength && cleanIBAN.length !== expectedLength) {
-      throw new Error(`IBAN length for ${countryCode} should be ${expectedLength} characters, but got ${cleanIBAN.length}`);
-    }
-
-    // Validate check digits using mod-97 algorithm
-    const rearranged = cleanIBAN.substring(4) + cleanIBAN.substring(0, 4);
-    const numericIBAN = rearranged.replace(/[A-Z]/g, (char) => {
-      return (char.charCodeAt(0) - 55).toString();
-    });
-
-    // Calculate mod 97 for large numbers
-    let remainder = numericIBAN;
-    while (remainder.length > 2) {
-      const block = remainder.substring(0, 9);
-      remainder = (parseInt(block, 10) % 97).toString() + remainder.substring(block.length);
-    }
-
-    if (parseInt(remainder, 10) % 97 !== 1) {
-      throw new Error('Invalid IBAN check digits');
+    const problem = patternRegistry().checkIban(iban);
+    if (problem) {
+      throw new Error(problem);
     }
 
     // IBAN is valid
@@ -779,21 +752,9 @@ class InputValidator {
       throw new Error('VAT number is required');
     }
 
-    // Extract country code (first 2 letters)
-    const countryMatch = vatNumber.match(/^([A-Z]{2})/);
-    if (!countryMatch) {
-      throw new Error('VAT number must start with 2-letter country code');
-    }
-
-    const countryCode = countryMatch[1];
-    const pattern = InputValidator.PATTERNS.VAT_PATTERNS[countryCode];
-
-    if (!pattern) {
-      throw new Error(`VAT validation not supported for country: ${countryCode}`);
-    }
-
-    if (!pattern.test(vatNumber)) {
-      throw new Error(`Invalid VAT number format for ${countryCode}`);
+    const problem = patternRegistry().checkVatNumber(vatNumber);
+    if (problem) {
+      throw new Error(problem);
     }
 
     // VAT number is valid
@@ -801,4 +762,4 @@ class InputValidator {
   }
 }
 
-module.exports = InputValidator;
\ No newline at end of file
+module.exports = InputValidator;
\ No newline at end of file
@@ -0,0 +1,523 @@
+const cds = require('@sap/cds');
+const axios = require('axios');
+const { Semaphore, CircuitBreaker } = require('./shared/rate-limiter');
+
+/**
+ * Notification Outbox
+ *
+ * Outgoing webhooks are written to the NotificationOutbox table in the transaction of
+ * the status change that causes them: they are sent only if that change commits and
+ * survive restarts, and the user-facing request never waits for a webhook.
+ *
+ * A background worker pool sends the queued webhooks:
+ * - Rows are claimed with a lease, so several app instances can share the table
+ * - Each target system has its own concurrency limit, so a slow system does not hold
+ *   up the others, and its own timeout (timeoutMs of the entry). A claim pass does not
+ *   wait for the deliveries it starts, and it leaves the entries of a target that has
+ *   its limit of deliveries in progress for a later pass
+ * - A target that fails OUTBOX_BREAKER_THRESHOLD times in a row is paused for
+ *   OUTBOX_BREAKER_COOLDOWN_MS (circuit breaker): its entries are postponed without
+ *   using up attempts until a trial delivery succeeds
+ * - Failed deliveries are retried with exponential backoff; rows that still fail after
+ *   OUTBOX_MAX_ATTEMPTS are moved to 'DeadLetter'
+ * - Queue depth and delivery latency are reported by getMetrics(); the counts are read
+ *   through the byDue index and never scan the delivered rows
+ * - Sent rows are deleted after OUTBOX_SENT_RETENTION_DAYS (default 7) and dead letters
+ *   after OUTBOX_DEAD_LETTER_RETENTION_DAYS (default 30), checked every
+ *   OUTBOX_PURGE_INTERVAL_MS (default 1 hour)
+ * - Entries of a satellite fan-out (notificationId) report back: the change
+ *   notification is marked as sent once all its entries are 'Sent', and a dead-lettered
+ *   entry marks the acknowledgement of its target system as 'Failed'
+ *
+ * @module notification-outbox
+ */
+
+const OUTBOX = 'mdm.db.NotificationOutbox';
+const NOTIFICATIONS = 'mdm.db.ChangeNotifications';
+const ACKNOWLEDGMENTS = 'mdm.db.NotificationAcknowledgments';
+const LATENCY_SAMPLES = 500;
+const PURGE_BATCH_SIZE = 1000;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Post a webhook once
+ *
+ * @param {string} url - Webhook URL
+ * @param {Object} payload - Webhook payload
+ * @param {number} [timeout] - Timeout in milliseconds
+ * @returns {Promise<Object>} { status, data }
+ */
+async function postWebhook(url, payload, timeout = 30000) {
+  const response = await axios.post(url, payload, {
+    headers: {
+      'Content-Type': 'application/json',
+      'X-Source-System': 'MDM',
+      'X-Event-Type': payload.event || payload.eventType,
+      'X-Request-ID': payload.requestId,
+      'User-Agent': 'MDM-Notification-Service/1.0'
+    },
+    timeout,
+    validateStatus: (status) => status >= 200 && status < 300
+  });
+  return { status: response.status, data: response.data };
+}
+
+class NotificationOutbox {
+
+  constructor() {
+    const env = process.env;
+    this.log = cds.log('notification-outbox');
+    this.pollInterval = Number(env.OUTBOX_POLL_MS) || 1000;
+    this.batchSize = Number(env.OUTBOX_BATCH_SIZE) || 50;
+    this.workers = new Semaphore(Number(env.OUTBOX_WORKERS) || 8);
+    this.targetConcurrency = Number(env.OUTBOX_TARGET_CONCURRENCY) || 2;
+    this.breakerThreshold = Number(env.OUTBOX_BREAKER_THRESHOLD) || 5;
+    this.breakerCooldown = Number(env.OUTBOX_BREAKER_COOLDOWN_MS) || 60000;
+    this.maxAttempts = Number(env.OUTBOX_MAX_ATTEMPTS) || 8;
+    this.retryDelay = Number(env.OUTBOX_RETRY_DELAY_MS) || 1000;
+    this.maxRetryDelay = 10 * 60 * 1000; // 10 minutes
+    this.leaseTime = 5 * 60 * 1000; // Claimed rows are retried after 5 minutes
+    this.timeout = 30000;
+    this.sentRetention = (Number(env.OUTBOX_SENT_RETENTION_DAYS) || 7) * DAY_MS;
+    this.deadLetterRetention = (Number(env.OUTBOX_DEAD_LETTER_RETENTION_DAYS) || 30) * DAY_MS;
+    this.purgeInterval = Number(env.OUTBOX_PURGE_INTERVAL_MS) || 60 * 60 * 1000;
+
+    this.targets = new Map(); // target system -> Semaphore
+    this.claimed = new Map(); // target system -> claimed entries not delivered yet
+    this.deliveries = new Set(); // Promises of the deliveries in progress
+    this.breakers = new Map(); // target system -> CircuitBreaker
+    this.db = null;
+    this.timer = null;
+    this.purgeTimer = null;
+    this.draining = null;
+    this.drainAgain = false;
+    this.metrics = { sent: 0, failedAttempts: 0, deadLettered: 0, inFlight: 0 };
+    this.latencies = []; // Recent { queuedMs, deliveryMs } samples
+  }
+
+  /**
+   * Queue a webhook in the current transaction
+   *
+   * @param {Object} notification
+   * @param {string} notification.target - Target system name
+   * @param {string} notification.url - Webhook URL
+   * @param {Object} notification.payload - Webhook payload
+   * @param {string} [notification.event] - Event type
+   * @param {string} [notification.requestId] - Related request ID
+   * @param {number} [notification.timeout] - Delivery timeout in milliseconds
+   * @param {string} [notification.notificationId] - ChangeNotifications ID of a satellite fan-out
+   * @returns {Promise<string>} Outbox entry ID
+   */
+  async enqueue(notification) {
+    const [ID] = await this.enqueueMany([notification]);
+    return ID;
+  }
+
+  /**
+   * Queue several webhooks in the current transaction with one INSERT
+   *
+   * @param {Array<Object>} notifications - See enqueue()
+   * @returns {Promise<Array<string>>} Outbox entry IDs in the order of the notifications
+   */
+  async enqueueMany(notifications) {
+    if (notifications.length === 0) return [];
+    const now = new Date().toISOString();
+    const entries = notifications.map(({ target, url, payload, event, requestId, timeout, notificationId }) => ({
+      ID: cds.utils.uuid(),
+      target,
+      url,
+      event,
+      request_ID: requestId,
+      notification_ID: notificationId || null,
+      payload: JSON.stringify(payload),
+      timeoutMs: timeout || null,
+      status: 'Pending',
+      attempts: 0,
+      enqueuedAt: now,
+      nextAttemptAt: now
+    }));
+    await INSERT.into(OUTBOX).entries(entries);
+
+    // Send right after the surrounding transaction commits instead of at the next poll
+    if (this.timer && typeof cds.context?.on === 'function') {
+      cds.context.on('succeeded', () => this.wakeUp());
+    }
+    return entries.map(entry => entry.ID);
+  }
+
+  /**
+   * Start the background workers
+   *
+   * @param {Object} db - Database service
+   */
+  start(db) {
+    this.db = db;
+    if (this.timer) return;
+    this.timer = setInterval(() => this.wakeUp(), this.pollInterval);
+    this.timer.unref?.();
+    this.purgeTimer = setInterval(() => {
+      this.purge().catch(error => this.log.error('Outbox purge failed', { error: error.message }));
+    }, this.purgeInterval);
+    this.purgeTimer.unref?.();
+    this.log.info('Notification outbox started', {
+      pollInterval: this.pollInterval,
+      targetConcurrency: this.targetConcurrency,
+      maxAttempts: this.maxAttempts
+    });
+  }
+
+  /**
+   * Stop polling (deliveries in progress finish)
+   */
+  stop() {
+    clearInterval(this.timer);
+    clearInterval(this.purgeTimer);
+    this.timer = null;
+    this.purgeTimer = null;
+  }
+
+  /**
+   * Claim due entries in the background unless a claim pass is running
+   * The pass ends once the entries are claimed; their deliveries go on in the background.
+   */
+  wakeUp() {
+    if (this.draining) {
+      this.drainAgain = true;
+      return;
+    }
+    this.draining = this.claimDue()
+      .catch(error => this.log.error('Outbox drain failed', { error: error.message }))
+      .finally(() => {
+        this.draining = null;
+        if (this.drainAgain) {
+          this.drainAgain = false;
+          this.wakeUp();
+        }
+      });
+  }
+
+  /**
+   * Claim and deliver the due entries, waiting for the deliveries
+   * Entries of a target that already has its limit of deliveries in progress are left
+   * for a later pass.
+   *
+   * @returns {Promise<Object>} Counts of claimed, sent, retried, dead-lettered and deferred entries
+   */
+  async drain() {
+    const { summary, deliveries } = await this.claimDue();
+    await Promise.all(deliveries);
+    return summary;
+  }
+
+  /**
+   * Claim the due entries and start their deliveries
+   * Returns without waiting for the deliveries, so a slow target does not delay the
+   * next pass and the entries of the other targets.
+   *
+   * @returns {Promise<Object>} { summary, deliveries } - the sent, retried and dead-lettered
+   *   counts of the summary are complete once the deliveries have settled
+   */
+  async claimDue() {
+    const db = this.db || await cds.connect.to('db');
+    const now = new Date().toISOString();
+
+    // Due entries, and entries whose worker lease has expired
+    const due = await db.run(SELECT.from(OUTBOX)
+      .columns('ID', 'request_ID', 'notification_ID', 'target', 'url', 'payload', 'timeoutMs', 'attempts', 'enqueuedAt')
+      .where({ status: 'Pending', nextAttemptAt: { '<=': now } })
+      .or({ status: 'Processing', lockedUntil: { '<': now } })
+      .orderBy('nextAttemptAt')
+      .limit(this.batchSize));
+
+    const lockedUntil = new Date(Date.now() + this.leaseTime).toISOString();
+    const summary = { claimed: 0, sent: 0, retried: 0, deadLettered: 0, deferred: 0 };
+    const deliveries = [];
+    const deferred = new Map(); // next attempt -> IDs of entries held back by an open circuit
+
+    for (const entry of due) {
+      // The target's limit is taken by deliveries in progress; a later pass claims the entry
+      if ((this.claimed.get(entry.target) || 0) >= this.targetConcurrency) {
+        continue;
+      }
+
+      const breaker = this.breaker(entry.target);
+      if (!breaker.tryAcquire()) {
+        const retryAt = new Date(Math.max(breaker.openUntil, Date.now() + this.retryDelay)).toISOString();
+        deferred.set(retryAt, [...(deferred.get(retryAt) || []), entry.ID]);
+        continue;
+      }
+
+      // Each claim counts an attempt, so only one worker can claim an entry
+      const claimed = await db.run(UPDATE(OUTBOX)
+        .set({ status: 'Processing', lockedUntil, attempts: entry.attempts + 1 })
+        .where({ ID: entry.ID, attempts: entry.attempts }));
+      if (!claimed) {
+        breaker.cancel();
+        continue;
+      }
+
+      summary.claimed++;
+      entry.attempts++;
+      this.claimed.set(entry.target, (this.claimed.get(entry.target) || 0) + 1);
+      const delivery = this.targetLimit(entry.target)
+        .run(() => this.workers.run(() => this.deliver(db, entry)))
+        .then(outcome => { summary[outcome]++; })
+        .catch(error => this.log.error('Outbox delivery failed', { ID: entry.ID, target: entry.target, error: error.message }))
+        .finally(() => {
+          this.claimed.set(entry.target, this.claimed.get(entry.target) - 1);
+          this.deliveries.delete(delivery);
+        });
+      this.deliveries.add(delivery);
+      deliveries.push(delivery);
+    }
+
+    // Postpone the held back entries in one statement per retry time (expired leases are left as they are)
+    for (const [nextAttemptAt, ids] of deferred) {
+      summary.deferred += await db.run(UPDATE(OUTBOX)
+        .set({ nextAttemptAt })
+        .where({ ID: { in: ids }, status: 'Pending' }));
+    }
+
+    return { summary, deliveries };
+  }
+
+  /**
+   * Concurrency limit of a target system
+   *
+   * @param {string} target - Target system name
+   * @returns {Semaphore} Limit shared by all deliveries to the target
+   */
+  targetLimit(target) {
+    if (!this.targets.has(target)) {
+      this.targets.set(target, new Semaphore(this.targetConcurrency));
+    }
+    return this.targets.get(target);
+  }
+
+  /**
+   * Circuit breaker of a target system
+   *
+   * @param {string} target - Target system name
+   * @returns {CircuitBreaker} Breaker shared by all deliveries to the target
+   */
+  breaker(target) {
+    if (!this.breakers.has(target)) {
+      this.breakers.set(target, new CircuitBreaker({ threshold: this.breakerThreshold, cooldownMs: this.breakerCooldown }));
+    }
+    return this.breakers.get(target);
+  }
+
+  /**
+   * Circuit state of a target system
+   *
+   * @param {string} target - Target system name
+   * @returns {string} 'closed', 'open' or 'half-open'
+   */
+  circuitState(target) {
+    return this.breakers.has(target) ? this.breakers.get(target).state : 'closed';
+  }
+
+  /**
+   * Deliver one claimed entry and record the outcome
+   *
+   * @param {Object} db - Database service
+   * @param {Object} entry - Claimed outbox entry
+   * @returns {Promise<string>} 'sent', 'retried' or 'deadLettered'
+   */
+  async deliver(db, entry) {
+    const startedAt = Date.now();
+    this.metrics.inFlight++;
+
+    try {
+      await postWebhook(entry.url, JSON.parse(entry.payload), entry.timeoutMs || this.timeout);
+      this.breaker(entry.target).recordSuccess();
+
+      await db.run(UPDATE(OUTBOX)
+        .set({ status: 'Sent', sentAt: new Date().toISOString(), lockedUntil: null, lastError: null })
+        .where({ ID: entry.ID }));
+      this.metrics.sent++;
+      this.recordLatency(Date.now() - Date.parse(entry.enqueuedAt), Date.now() - startedAt);
+      await this.recordNotificationOutcome(db, entry, 'Sent');
+      return 'sent';
+
+    } catch (error) {
+      this.metrics.failedAttempts++;
+      this.breaker(entry.target).recordFailure();
+      const lastError = String(error.message).substring(0, 1000);
+
+      if (entry.attempts >= this.maxAttempts) {
+        await db.run(UPDATE(OUTBOX)
+          .set({ status: 'DeadLetter', lockedUntil: null, lastError })
+          .where({ ID: entry.ID }));
+        this.metrics.deadLettered++;
+        this.log.error('Webhook moved to dead letter', { ID: entry.ID, target: entry.target, attempts: entry.attempts, error: lastError });
+        await this.recordNotificationOutcome(db, entry, 'DeadLetter', lastError);
+        return 'deadLettered';
+      }
+
+      const delay = this.backoff(entry.attempts);
+      await db.run(UPDATE(OUTBOX)
+        .set({ status: 'Pending', lockedUntil: null, lastError, nextAttemptAt: new Date(Date.now() + delay).toISOString() })
+        .where({ ID: entry.ID }));
+      this.log.warn('Webhook delivery failed, retrying', { ID: entry.ID, target: entry.target, attempt: entry.attempts, delay });
+      return 'retried';
+
+    } finally {
+      this.metrics.inFlight--;
+    }
+  }
+
+  /**
+   * Write the outcome of a satellite fan-out entry to its change notification and
+   * acknowledgement (entries without a notification are skipped). Failures are logged:
+   * the delivery itself is already recorded.
+   *
+   * @param {Object} db - Database service
+   * @param {Object} entry - Outbox entry
+   * @param {string} status - 'Sent' or 'DeadLetter'
+   * @param {string} [lastError] - Delivery error
+   */
+  async recordNotificationOutcome(db, entry, status, lastError = null) {
+    if (!entry.notification_ID) return;
+    const acknowledgement = { request_ID: entry.request_ID, targetSystem: entry.target };
+
+    try {
+      if (status === 'DeadLetter') {
+        await db.run(UPDATE(ACKNOWLEDGMENTS)
+          .set({ status: 'Failed', lastError })
+          .where({ ...acknowledgement, status: 'Pending' }));
+        return;
+      }
+
+      // A delivery that succeeded after retryDeadLetters() is awaiting acknowledgement again
+      await db.run(UPDATE(ACKNOWLEDGMENTS)
+        .set({ status: 'Pending', lastError: null })
+        .where({ ...acknowledgement, status: 'Failed' }));
+
+      const open = await db.run(SELECT.one.from(OUTBOX)
+        .columns('count(*) as count')
+        .where({ notification_ID: entry.notification_ID, status: { '!=': 'Sent' } }));
+      if (Number(open.count) === 0) {
+        await db.run(UPDATE(NOTIFICATIONS)
+          .set({ notificationSent: true, notificationSentAt: new Date().toISOString() })
+          .where({ ID: entry.notification_ID, notificationSent: false }));
+      }
+    } catch (error) {
+      this.log.warn('Could not record the notification outcome', { ID: entry.ID, status, error: error.message });
+    }
+  }
+
+  /**
+   * Delay before the next attempt: exponential with up to 20% jitter
+   *
+   * @param {number} attempts - Attempts made so far
+   * @returns {number} Delay in milliseconds
+   */
+  backoff(attempts) {
+    const delay = Math.min(this.retryDelay * Math.pow(2, attempts - 1), this.maxRetryDelay);
+    return Math.round(delay * (1 + Math.random() * 0.2));
+  }
+
+  recordLatency(queuedMs, deliveryMs) {
+    this.latencies.push({ queuedMs, deliveryMs });
+    if (this.latencies.length > LATENCY_SAMPLES) {
+      this.latencies.shift();
+    }
+  }
+
+  /**
+   * Queue entries in 'DeadLetter' again
+   *
+   * @param {string} [target] - Only entries for this target system
+   * @returns {Promise<number>} Number of entries queued again
+   */
+  async retryDeadLetters(target) {
+    const db = this.db || await cds.connect.to('db');
+    const where = target ? { status: 'DeadLetter', target } : { status: 'DeadLetter' };
+    const count = await db.run(UPDATE(OUTBOX)
+      .set({ status: 'Pending', attempts: 0, nextAttemptAt: new Date().toISOString() })
+      .where(where));
+    this.wakeUp();
+    return count;
+  }
+
+  /**
+   * Delete Sent rows and dead letters older than their retention period, in batches.
+   * The age of a finished row is taken from nextAttemptAt (its last attempt), so the
+   * rows are found through the byDue index.
+   *
+   * @returns {Promise<Object>} Deleted rows { Sent, DeadLetter }
+   */
+  async purge() {
+    const db = this.db || await cds.connect.to('db');
+    const deleted = { Sent: 0, DeadLetter: 0 };
+    const retention = { Sent: this.sentRetention, DeadLetter: this.deadLetterRetention };
+
+    for (const status of Object.keys(deleted)) {
+      const before = new Date(Date.now() - retention[status]).toISOString();
+      for (;;) {
+        const rows = await db.run(SELECT.from(OUTBOX)
+          .columns('ID')
+          .where({ status, nextAttemptAt: { '<': before } })
+          .limit(PURGE_BATCH_SIZE));
+        if (rows.length === 0) break;
+        deleted[status] += await db.run(DELETE.from(OUTBOX).where({ ID: { in: rows.map(row => row.ID) } }));
+        if (rows.length < PURGE_BATCH_SIZE) break;
+      }
+    }
+
+    if (deleted.Sent + deleted.DeadLetter > 0) {
+      this.log.info('Outbox purged', deleted);
+    }
+    return deleted;
+  }
+
+  /**
+   * Queue depth and delivery latency
+   * Only the open statuses are counted (a range of the byDue index); delivered rows are
+   * reported by the 'sent' counter of this process.
+   *
+   * @returns {Promise<Object>} Metrics
+   */
+  async getMetrics() {
+    const db = this.db || await cds.connect.to('db');
+    const [byStatus, oldest] = await Promise.all([
+      db.run(SELECT.from(OUTBOX)
+        .columns('status', 'count(*) as count')
+        .where({ status: { in: ['Pending', 'Processing', 'DeadLetter'] } })
+        .groupBy('status')),
+      db.run(SELECT.one.from(OUTBOX).columns('min(enqueuedAt) as enqueuedAt').where({ status: 'Pending' }))
+    ]);
+
+    const depth = { Pending: 0, Processing: 0, DeadLetter: 0 };
+    byStatus.forEach(row => { depth[row.status] = Number(row.count); });
+
+    return {
+      depth,
+      oldestPendingAgeMs: oldest?.enqueuedAt ? Date.now() - Date.parse(oldest.enqueuedAt) : 0,
+      ...this.metrics,
+      circuits: Object.fromEntries([...this.breakers].map(([target, breaker]) => [target, breaker.state])),
+      latency: {
+        samples: this.latencies.length,
+        queuedMs: percentiles(this.latencies.map(l => l.queuedMs)),
+        deliveryMs: percentiles(this.latencies.map(l => l.deliveryMs))
+      }
+    };
+  }
+}
+
+function percentiles(values) {
+  if (values.length === 0) return { avg: 0, p50: 0, p95: 0, max: 0 };
+  const sorted = [...values].sort((a, b) => a - b);
+  const at = (p) => sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+  return {
+    avg: Math.round(sorted.reduce((sum, v) => sum + v, 0) / sorted.length),
+    p50: at(0.5),
+    p95: at(0.95),
+    max: sorted[sorted.length - 1]
+  };
+}
+
+// Export singleton instance
+module.exports = new NotificationOutbox();
+module.exports.postWebhook = postWebhook;
@@ -1,17 +1,56 @@
 const cds = require('@sap/cds');
-const axios = require('axios');
 const nodemailer = require('nodemailer');
 const ErrorHandler = require('./error-handler');
+const notificationOutbox = require('./notification-outbox');
+const LruCache = require('./shared/lru-cache');
+
+// Satellite systems configured in SystemConfiguration, shared by all service instances;
+// dropped by the AdminService when the configuration changes
+const satelliteRegistry = new LruCache({
+  maxEntries: 1,
+  ttl: (Number(process.env.SATELLITE_REGISTRY_TTL_MINUTES) || 5) * 60 * 1000
+});
+
+/**
+ * Satellite systems from SystemConfiguration rows
+ * 'satellite.<name>' holds the webhook URL, 'satellite.<name>.timeoutMs' the
+ * delivery timeout of the system. Systems without an active URL row are left out.
+ *
+ * @param {Array} rows - SystemConfiguration rows
+ * @returns {Array} [{ name, webhookUrl, description, timeoutMs }]
+ */
+function satelliteSystemsFromConfig(rows) {
+  const systems = new Map();
+  const system = (name) => {
+    if (!systems.has(name)) {
+      systems.set(name, { name, webhookUrl: null, description: null, timeoutMs: null });
+    }
+    return systems.get(name);
+  };
+
+  for (const row of rows) {
+    const [, name, setting] = row.configKey.match(/^satellite\.([^.]+)(?:\.(.+))?$/) || [];
+    if (!name) continue;
+    if (!setting) {
+      Object.assign(system(name), { webhookUrl: row.configValue, description: row.description });
+    } else if (setting === 'timeoutMs') {
+      system(name).timeoutMs = Number(row.configValue) || null;
+    }
+  }
+  return [...systems.values()].filter(system => system.webhookUrl);
+}
 
 /**
  * Comprehensive Notification Service
  * Handles email notifications, webhook callbacks, and system integrations
+ *
+ * Webhooks are queued in the notification outbox (see notification-outbox.js) and
+ * sent in the background, so they add no latency to the calling request.
  */
 class NotificationService {
 
   constructor() {
     console.log('DEBUG: NotificationService constructor start');
-    this.webhookQueue = [];
     this.emailQueue = [];
     this.retryAttempts = 3;
     this.retryDelay = 1000; // Initial delay in milliseconds
@@ -108,7 +147,10 @@ class NotificationService {
 
       // 4. Send notifications to satellite systems if approved
       if (event === 'approved') {
-        const satelliteResult = await this.notifySatelliteSystems(request, context);
+        const satelliteResult = await this.notifySatelliteSystems(request, {
+          ...context,
+          notificationId: systemNotification.notificationId
+        });
         notifications.push({
           type: 'satellite',
           target: 'multiple',
@@ -133,7 +175,8 @@ class NotificationService {
   }
 
   /**
-   * Send webhook notification to external system
+   * Queue webhook notifications to external system
+   * Written to the outbox in the current transaction; sent after it commits.
    *
    * @param {Object} request - Business partner request
    * @param {string} event - Event type
@@ -152,30 +195,30 @@ class NotificationService {
     const results = [];
 
     for (const webhookUrl of webhookUrls) {
-      try {
-        const result = await this.sendWebhookWithRetry(webhookUrl, payload, request.sourceSystem);
-        results.push({
-          url: webhookUrl,
-          status: 'success',
-          response: result
-        });
-      } catch (error) {
-        results.push({
-          url: webhookUrl,
-          status: 'failed',
-          error: error.message
-        });
-      }
+      const outboxId = await notificationOutbox.enqueue({
+        target: request.sourceSystem,
+        url: webhookUrl,
+        payload,
+        event,
+        requestId: request.ID
+      });
+      results.push({
+        url: webhookUrl,
+        status: 'queued',
+        outboxId
+      });
     }
 
     return {
-      status: results.every(r => r.status === 'success') ? 'success' : 'partial',
+      status: 'queued',
       results
     };
   }
 
   /**
-   * Send webhook with retry logic
+   * Send webhook immediately with retry logic
+   * Blocks the caller until the webhook succeeds or all attempts fail;
+   * status notifications go through the outbox instead.
    *
    * @param {string} url - Webhook URL
    * @param {Object} payload - Webhook payload
@@ -189,22 +232,11 @@ class NotificationService {
       try {
         console.log(`🔄 Webhook attempt ${attempt}/${this.retryAttempts} to ${sourceSystem}`);
 
-        const response = await axios.post(url, payload, {
-          headers: {
-            'Content-Type': 'application/json',
-            'X-Source-System': 'MDM',
-            'X-Event-Type': payload.event,
-            'X-Request-ID': payload.requestId,
-            'User-Agent': 'MDM-Notification-Service/1.0'
-          },
-          timeout: 30000, // 30 seconds timeout
-          validateStatus: (status) => status >= 200 && status < 300
-        });
+        const response = await notificationOutbox.postWebhook(url, payload, 30000); // 30 seconds timeout
 
         console.log(`✅ Webhook successful to ${sourceSystem}: ${response.status}`);
         return {
-          status: response.status,
-          data: response.data,
+          ...response,
           attempt
         };
 
@@ -406,6 +438,7 @@ class NotificationService {
       const impactedSystems = this.getImpactedSystems(request);
 
       const notificationData = {
+        ID: cds.utils.uuid(),
         bpNumber: request.sapBpNumber || request.requestNumber,
         bpName: request.partnerName,
         changeType: event,
@@ -426,11 +459,11 @@ class NotificationService {
         notificationSent: false
       };
 
-      const result = await INSERT.into('mdm.db.ChangeNotifications').entries(notificationData);
+      await INSERT.into('mdm.db.ChangeNotifications').entries(notificationData);
 
       return {
         status: 'created',
-        notificationId: result.ID || 'system-generated-id',
+        notificationId: notificationData.ID,
         impactedSystems
       };
 
@@ -442,34 +475,50 @@ class NotificationService {
 
   /**
    * Notify satellite systems about partner changes
+   * The webhooks of all systems are queued with one outbox INSERT; the outbox workers
+   * deliver them in parallel, each with the timeout and circuit breaker of its system.
+   * Each system gets a pending acknowledgement (one INSERT); the outbox marks the change
+   * notification as sent once every webhook is delivered, or the acknowledgement as
+   * failed when a webhook is dead-lettered.
    *
    * @param {Object} request - Business partner request
-   * @param {Object} context - Additional context
+   * @param {Object} context - Additional context (notificationId: ChangeNotifications ID)
    * @returns {Promise<Object>} Satellite notification result
    */
   async notifySatelliteSystems(request, context) {
-    const satelliteSystems = await this.getSatelliteSystems();
-    const notifications = [];
-
-    for (const system of satelliteSystems) {
-      try {
-        const notification = await this.sendSatelliteNotification(system, request, context);
-        notifications.push({
-          system: system.name,
-          status: 'sent',
-          result: notification
-        });
-      } catch (error) {
-        notifications.push({
-          system: system.name,
-          status: 'failed',
-          error: error.message
-        });
-      }
+    // Only systems with a webhook URL take part in the fan-out
+    const satelliteSystems = (await this.getSatelliteSystems()).filter(system => system.webhookUrl);
+    if (satelliteSystems.length === 0) {
+      return { status: 'success', notifications: [] };
     }
 
+    const outboxIds = await notificationOutbox.enqueueMany(satelliteSystems.map(system => {
+      const payload = this.buildSatellitePayload(system, request, context);
+      return {
+        target: system.name,
+        url: system.webhookUrl,
+        payload,
+        event: payload.eventType,
+        requestId: request.ID,
+        timeout: system.timeoutMs,
+        notificationId: context.notificationId
+      };
+    }));
+
+    await this.recordSatelliteDelivery(request, satelliteSystems, context.notificationId);
+
+    const notifications = satelliteSystems.map((system, i) => {
+      // Deliveries to a system with an open circuit wait until it recovers
+      const circuit = notificationOutbox.circuitState(system.name);
+      return {
+        system: system.name,
+        status: circuit === 'open' ? 'deferred' : 'queued',
+        result: { status: 'queued', outboxId: outboxIds[i], circuit }
+      };
+    });
+
     return {
-      status: notifications.every(n => n.status === 'sent') ? 'success' : 'partial',
+      status: notifications.every(n => n.status !== 'failed') ? 'success' : 'partial',
       notifications
     };
   }
@@ -483,8 +532,41 @@ class NotificationService {
    * @returns {Promise<Object>} Notification result
    */
   async sendSatelliteNotification(system, request, context) {
-    const payload = {
+    if (system.webhookUrl) {
+      const payload = this.buildSatellitePayload(system, request, context);
+      const outboxId = await notificationOutbox.enqueue({
+        target: system.name,
+        url: system.webhookUrl,
+        payload,
+        event: payload.eventType,
+        requestId: request.ID,
+        timeout: system.timeoutMs
+      });
+      return { status: 'queued', outboxId };
+    } else {
+      // Store for batch processing or manual acknowledgment
+      return { status: 'queued', message: 'Queued for manual acknowledgment' };
+    }
+  }
+
+  /**
+   * Build the approval payload for a satellite system
+   * The top-level fields identify the notification and request for the acknowledgement
+   * the system sends back (see integration/satellite-mock.js).
+   *
+   * @param {Object} system - Satellite system configuration
+   * @param {Object} request - Business partner request
+   * @param {Object} context - Additional context
+   * @returns {Object} Webhook payload
+   */
+  buildSatellitePayload(system, request, context) {
+    return {
       eventType: 'partner_approved',
+      notificationId: context.notificationId,
+      requestId: request.ID,
+      requestNumber: request.requestNumber,
+      status: request.status,
+      sapBpNumber: request.sapBpNumber,
       partner: {
         sapBpNumber: request.sapBpNumber,
         name: request.partnerName,
@@ -493,17 +575,47 @@ class NotificationService {
         approvedAt: request.approvedAt
       },
       notification: {
-        id: `notif-${Date.now()}`,
+        id: context.notificationId || `notif-${Date.now()}`,
         timestamp: new Date().toISOString(),
         targetSystem: system.name
       }
     };
+  }
 
-    if (system.webhookUrl) {
-      return await this.sendWebhookWithRetry(system.webhookUrl, payload, system.name);
-    } else {
-      // Store for batch processing or manual acknowledgment
-      return { status: 'queued', message: 'Queued for manual acknowledgment' };
+  /**
+   * Create the pending acknowledgements of the notified systems that have none for the
+   * request yet (the outbox records the delivery outcome on them)
+   *
+   * @param {Object} request - Business partner request
+   * @param {Array} systems - Notified satellite systems
+   * @param {string} [notificationId] - ChangeNotifications ID
+   */
+  async recordSatelliteDelivery(request, systems, notificationId) {
+    const now = new Date().toISOString();
+    const existing = await SELECT.from('mdm.db.NotificationAcknowledgments')
+      .columns('targetSystem')
+      .where({ request_ID: request.ID, targetSystem: { in: systems.map(system => system.name) } });
+    const acknowledged = new Set(existing.map(row => row.targetSystem));
+
+    const acknowledgements = systems
+      .filter(system => !acknowledged.has(system.name))
+      .map(system => ({
+        ID: cds.utils.uuid(),
+        notification_ID: notificationId || null,
+        request_ID: request.ID,
+        targetSystem: system.name,
+        status: 'Pending',
+        notificationDate: now,
+        partnerName: request.name1 || request.partnerName,
+        requestNumber: request.requestNumber,
+        sapBpNumber: request.sapBpNumber,
+        sourceSystem: request.sourceSystem,
+        changeDescription: `Business Partner approved in MDM and sent to ${system.name}`,
+        notificationSentBy: 'MDM System'
+      }));
+
+    if (acknowledgements.length > 0) {
+      await INSERT.into('mdm.db.NotificationAcknowledgments').entries(acknowledgements);
     }
   }
 
@@ -782,19 +894,18 @@ class NotificationService {
 
   /**
    * Get satellite systems configuration
+   * Read once and cached for SATELLITE_REGISTRY_TTL_MINUTES (default 5).
    *
    * @returns {Promise<Array>} Satellite systems
    */
   async getSatelliteSystems() {
     try {
-      const systems = await SELECT.from('mdm.db.SystemConfiguration')
-        .where({ configKey: { like: 'satellite.%' }, isActive: true });
-
-      return systems.map(sys => ({
-        name: sys.configKey.replace('satellite.', ''),
-        webhookUrl: sys.configValue,
-        description: sys.description
-      }));
+      return await satelliteRegistry.getOrCompute('systems', async () => {
+        const rows = await SELECT.from('mdm.db.SystemConfiguration')
+          .columns('configKey', 'configValue', 'description')
+          .where({ configKey: { like: 'satellite.%' }, isActive: true });
+        return satelliteSystemsFromConfig(rows);
+      });
 
     } catch (error) {
       console.error('Error getting satellite systems:', error);
@@ -806,6 +917,13 @@ class NotificationService {
     }
   }
 
+  /**
+   * Drop the cached satellite systems (after SystemConfiguration was changed)
+   */
+  static invalidateSatelliteSystems() {
+    satelliteRegistry.clear();
+  }
+
   /**
    * Utility function to sleep for specified milliseconds
    *
@@ -835,23 +953,12 @@ class NotificationService {
 
   /**
    * Process webhook queue
+   * Delivers the due outbox entries now instead of waiting for the background workers
+   *
+   * @returns {Promise<Object>} Counts of claimed, sent, retried, dead-lettered and deferred entries
    */
   async processWebhookQueue() {
-    const results = [];
-    while (this.webhookQueue.length > 0) {
-      const webhook = this.webhookQueue.shift();
-      try {
-        const result = await this.sendWebhookWithRetry(
-          webhook.url,
-          webhook.payload,
-          webhook.system
-        );
-        results.push({ webhook: webhook.id, status: 'success', result });
-      } catch (error) {
-        results.push({ webhook: webhook.id, status: 'failed', error: error.message });
-      }
-    }
-    return results;
+    return notificationOutbox.drain();
   }
 
   /**
@@ -949,4 +1056,5 @@ MDM System Team
   }
 }
 
-module.exports = NotificationService;
\ No newline at end of file
+module.exports = NotificationService;
+module.exports.satelliteSystemsFromConfig = satelliteSystemsFromConfig;
\ No newline at end of file
@@ -0,0 +1,312 @@
+const cds = require('@sap/cds');
+
+/**
+ * Partner Name Index
+ *
+ * Persistent blocking-key index over ExistingPartners for fuzzy duplicate detection.
+ * Every partner name is normalized and split into tokens; each token contributes a
+ * prefix key (first 4 characters) and a phonetic key (Soundex). A duplicate check only
+ * scores partners that share at least one key with the request name, instead of
+ * loading and fuzzy-filtering the whole partner master.
+ *
+ * Keys live in mdm.db.ExistingPartnerNameKeys and are maintained incrementally by
+ * handlers on the database service for CREATE/UPDATE/DELETE of ExistingPartners.
+ * Rows loaded without those handlers (cds deploy, CSV seed data) are picked up by a
+ * one-time rebuild when the index is found to be out of sync: the row count and highest
+ * ID of ExistingPartners are kept in mdm.db.ExistingPartnerNameIndexState (adjusted by the
+ * same handlers) and compared at startup.
+ *
+ * @module partner-name-index
+ */
+
+const PARTNERS = 'mdm.db.ExistingPartners';
+const NAME_KEYS = 'mdm.db.ExistingPartnerNameKeys';
+const INDEX_STATE = 'mdm.db.ExistingPartnerNameIndexState';
+const STATE_ID = 'ExistingPartners';
+
+const PREFIX_LENGTH = 4;
+const MIN_TOKEN_LENGTH = 2;
+const MAX_CANDIDATES = 200;  // Upper bound on partners scored per check
+const REBUILD_PAGE_SIZE = 1000;
+
+// Common business entity suffixes, compiled once instead of on every normalization
+const LEGAL_SUFFIXES = [
+  'ltd', 'limited', 'inc', 'incorporated', 'corp', 'corporation',
+  'llc', 'llp', 'lp', 'gmbh', 'ag', 'sa', 'sas', 'bv', 'nv',
+  'pty', 'pvt', 'private', 'public', 'co', 'company', '&', 'and'
+];
+const SUFFIX_PATTERNS = LEGAL_SUFFIXES.flatMap(suffix => [
+  new RegExp(`\\b${suffix}\\b\\.?$`, 'i'),  // End of string
+  new RegExp(`\\b${suffix}\\b\\.?\\s+`, 'i') // Followed by space
+]);
+
+const SOUNDEX_CODES = {
+  b: '1', f: '1', p: '1', v: '1',
+  c: '2', g: '2', j: '2', k: '2', q: '2', s: '2', x: '2', z: '2',
+  d: '3', t: '3',
+  l: '4',
+  m: '5', n: '5',
+  r: '6'
+};
+
+/**
+ * Normalize partner name for consistent comparison
+ * Removes common business suffixes and standardizes format
+ *
+ * @param {string} name - Original partner name
+ * @returns {string} Normalized name
+ */
+function normalizePartnerName(name) {
+  if (!name) return '';
+
+  let normalized = name.trim().toLowerCase();
+
+  for (const pattern of SUFFIX_PATTERNS) {
+    normalized = normalized.replace(pattern, ' ');
+  }
+
+  // Remove extra whitespace and special characters
+  return normalized.replace(/[^\w\s]/g, ' ').replace(/\s+/g, ' ').trim();
+}
+
+/**
+ * Soundex code of a single token (letter + 3 digits)
+ *
+ * @param {string} token - Lowercase token
+ * @returns {string} Soundex code, or the token itself if it has no letters
+ */
+function soundex(token) {
+  const letters = token.replace(/[^a-z]/g, '');
+  if (!letters) return token;
+
+  let code = letters[0];
+  let previous = SOUNDEX_CODES[letters[0]] || '';
+  for (let i = 1; i < letters.length && code.length < 4; i++) {
+    const letter = letters[i];
+    const digit = SOUNDEX_CODES[letter] || '';
+    if (digit && digit !== previous) {
+      code += digit;
+    }
+    // 'h' and 'w' do not separate letters with the same code; vowels do
+    if (letter !== 'h' && letter !== 'w') {
+      previous = digit;
+    }
+  }
+  return code.padEnd(4, '0');
+}
+
+/**
+ * Blocking keys for a normalized partner name
+ *
+ * @param {string} normalizedName - Output of normalizePartnerName()
+ * @returns {Array<string>} Distinct keys, e.g. ['t:acme', 's:a250']
+ */
+function blockingKeys(normalizedName) {
+  const keys = new Set();
+  for (const token of (normalizedName || '').split(' ')) {
+    if (token.length < MIN_TOKEN_LENGTH) continue;
+    keys.add(`t:${token.slice(0, PREFIX_LENGTH)}`);
+    keys.add(`s:${soundex(token)}`);
+  }
+  return [...keys];
+}
+
+function keyRows(partners) {
+  const rows = [];
+  for (const partner of partners) {
+    if (!partner.ID) continue;
+    for (const blockingKey of blockingKeys(normalizePartnerName(partner.partnerName))) {
+      rows.push({ blockingKey, partner_ID: partner.ID });
+    }
+  }
+  return rows;
+}
+
+class PartnerNameIndex {
+  constructor() {
+    this.log = cds.log('partner-name-index');
+    this.attachedTo = null;
+    this.ready = null;
+    // Keys shared by more active partners than this (e.g. 'trading', 'services') do not
+    // narrow the search and are skipped as long as the name has a more selective key
+    this.maxKeyPartners = Number(process.env.NAME_INDEX_MAX_KEY_PARTNERS) || 1000;
+  }
+
+  /**
+   * Register the handlers that keep the index in sync with ExistingPartners.
+   * Safe to call repeatedly; handlers are registered once per database service.
+   *
+   * @param {Object} db - Database service
+   */
+  attach(db) {
+    if (this.attachedTo === db) return;
+    this.attachedTo = db;
+
+    db.after('CREATE', PARTNERS, async (result, req) => {
+      const partners = (Array.isArray(req.data) ? req.data : [req.data]).filter(p => p && p.ID);
+      await this.reindex(db, partners.filter(p => p.partnerName !== undefined));
+      await this._adjustState(db, partners.length);
+    });
+
+    db.after('UPDATE', PARTNERS, async (result, req) => {
+      if (!req.data || req.data.partnerName === undefined) return;
+      const where = req.query && req.query.UPDATE && req.query.UPDATE.where;
+      const query = SELECT.from(PARTNERS).columns('ID', 'partnerName');
+      const partners = await db.run(where ? query.where(where) : query);
+      await this.reindex(db, partners);
+    });
+
+    const deleted = new WeakMap(); // req -> IDs of the partners about to be deleted
+
+    db.before('DELETE', PARTNERS, async (req) => {
+      const query = req.query && req.query.DELETE;
+      const where = query && (query.where || (query.from && query.from.ref && query.from.ref[0].where));
+      if (where) {
+        const partners = await db.run(SELECT.from(PARTNERS).columns('ID').where(where));
+        deleted.set(req, partners.map(partner => partner.ID));
+      }
+    });
+
+    db.after('DELETE', PARTNERS, async (result, req) => {
+      const ids = deleted.get(req);
+      if (ids) {
+        if (ids.length > 0) {
+          await db.run(DELETE.from(NAME_KEYS).where({ partner_ID: { in: ids } }));
+        }
+      } else {
+        // Delete of every partner
+        await db.run(DELETE.from(NAME_KEYS));
+      }
+      await this._adjustState(db, -(Number(result) || 0));
+    });
+
+    this.log.debug('Partner name index attached');
+  }
+
+  /**
+   * Replace the keys of the given partners
+   *
+   * @param {Object} db - Database service
+   * @param {Array<Object>} partners - Partners with ID and partnerName
+   */
+  async reindex(db, partners) {
+    if (partners.length === 0) return;
+    await db.run(DELETE.from(NAME_KEYS).where({ partner_ID: { in: partners.map(p => p.ID) } }));
+    const rows = keyRows(partners);
+    if (rows.length > 0) {
+      await db.run(INSERT.into(NAME_KEYS).entries(rows));
+    }
+  }
+
+  /**
+   * Record partners added (or removed) through the handlers in the sync marker
+   *
+   * @param {Object} db - Database service
+   * @param {number} delta - Change of the partner count
+   * @private
+   */
+  async _adjustState(db, delta) {
+    if (!delta) return;
+    const { maxPartnerId } = await this._snapshot(db);
+    await db.run(UPDATE(INDEX_STATE).with({ partnerCount: { '+=': delta }, maxPartnerId }).where({ ID: STATE_ID }));
+  }
+
+  /**
+   * Row count and highest ID of ExistingPartners (both answered from the primary key)
+   *
+   * @param {Object} db - Database service
+   * @returns {Promise<Object>} { partnerCount, maxPartnerId }
+   * @private
+   */
+  async _snapshot(db) {
+    const row = await db.run(SELECT.one.from(PARTNERS).columns('count(1) as partnerCount', 'max(ID) as maxPartnerId'));
+    return { partnerCount: Number(row.partnerCount), maxPartnerId: row.maxPartnerId || null };
+  }
+
+  /**
+   * Rebuild the whole index if partners were loaded without the handlers (e.g. after
+   * seeding), detected by comparing ExistingPartners with the sync marker.
+   * Runs once per process.
+   *
+   * @param {Object} db - Database service
+   */
+  ensureBuilt(db) {
+    if (!this.ready) {
+      this.ready = this._syncIfStale(db).catch(error => {
+        this.ready = null;
+        throw error;
+      });
+    }
+    return this.ready;
+  }
+
+  async _syncIfStale(db) {
+    const snapshot = await this._snapshot(db);
+    const state = await db.run(SELECT.one.from(INDEX_STATE).where({ ID: STATE_ID }));
+    if (state && Number(state.partnerCount) === snapshot.partnerCount && state.maxPartnerId === snapshot.maxPartnerId) {
+      return;
+    }
+
+    const partners = snapshot.partnerCount;
+    this.log.info('Rebuilding partner name index', { partners, indexed: state ? Number(state.partnerCount) : null });
+    await db.run(DELETE.from(NAME_KEYS));
+    let lastId = null;
+    for (;;) {
+      const query = SELECT.from(PARTNERS).columns('ID', 'partnerName').orderBy('ID').limit(REBUILD_PAGE_SIZE);
+      const page = await db.run(lastId ? query.where({ ID: { '>': lastId } }) : query);
+      if (page.length === 0) break;
+      const rows = keyRows(page);
+      if (rows.length > 0) {
+        await db.run(INSERT.into(NAME_KEYS).entries(rows));
+      }
+      lastId = page[page.length - 1].ID;
+    }
+    await db.run(UPSERT.into(INDEX_STATE).entries({ ID: STATE_ID, ...snapshot, builtAt: new Date().toISOString() }));
+    this.log.info('Partner name index rebuilt', { partners });
+  }
+
+  /**
+   * IDs of active partners sharing blocking keys with a name, best candidates first
+   *
+   * Each key reads at most maxKeyPartners + 1 rows, so a check never loads the whole
+   * posting list of a common token.
+   *
+   * @param {string} normalizedName - Output of normalizePartnerName()
+   * @param {number} [limit] - Maximum number of candidates
+   * @returns {Promise<Array<string>>} ExistingPartners IDs
+   */
+  async candidates(normalizedName, limit = MAX_CANDIDATES) {
+    const keys = blockingKeys(normalizedName);
+    if (keys.length === 0) return [];
+
+    const db = await cds.connect.to('db');
+    this.attach(db);
+    await this.ensureBuilt(db);
+
+    const postings = await Promise.all(keys.map(blockingKey => db.run(SELECT.from(NAME_KEYS)
+      .columns('partner_ID')
+      .where('blockingKey =', blockingKey, 'and partner.status =', 'Active')
+      .limit(this.maxKeyPartners + 1))));
+    const selective = postings.filter(rows => rows.length <= this.maxKeyPartners);
+    if (selective.length < postings.length) {
+      this.log.debug('Skipping common blocking keys', { name: normalizedName, skipped: postings.length - selective.length });
+    }
+
+    // Rank by the number of shared keys so the cap drops the weakest candidates
+    const shared = new Map();
+    for (const rows of (selective.length > 0 ? selective : postings)) {
+      for (const { partner_ID } of rows) {
+        shared.set(partner_ID, (shared.get(partner_ID) || 0) + 1);
+      }
+    }
+    return [...shared.entries()]
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, limit)
+      .map(([id]) => id);
+  }
+}
+
+module.exports = new PartnerNameIndex();
+module.exports.normalizePartnerName = normalizePartnerName;
+module.exports.blockingKeys = blockingKeys;
+module.exports.soundex = soundex;
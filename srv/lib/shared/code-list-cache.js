@@ -0,0 +1,286 @@
+const cds = require('@sap/cds');
+const LruCache = require('./lru-cache');
+
+/**
+ * Code List Cache
+ *
+ * Code lists (PaymentTerms, AddressTypes, VatTypes, ...) are read by every value
+ * help and almost never change. Each list is read once from the database, split by
+ * locale and kept in memory; READs of the satellite services (Coupa, Salesforce, PI)
+ * are answered from that copy for the locale of the request.
+ *
+ * - Filters of the form field = value (combined with 'and', incl. key lookups),
+ *   $select, $orderby, $top/$skip and $count are evaluated in memory
+ * - Other queries ($search, $expand, $apply, other operators) are passed to the
+ *   database and their rows filtered by locale in one pass
+ * - Writes through the AdminService drop the list (invalidate()); entries also
+ *   expire after CODE_LIST_CACHE_TTL_MINUTES (default 60) for other app instances
+ *
+ * @module code-list-cache
+ */
+
+const SUPPORTED_LOCALES = ['en', 'de'];
+const DEFAULT_LOCALE = 'en';
+
+// Locale-dependent code lists of the mdm.db namespace served by the satellite services
+const CODE_LISTS = [
+    'RequestTypes', 'SourceSystems', 'OverallStatuses', 'PaymentTerms', 'PaymentMethods',
+    'RevenueStreams', 'BillingCycles', 'AddressTypes', 'EmailTypes', 'VatTypes',
+    'IdentificationTypes', 'DocumentTypes', 'BPTypes', 'ContactTypes', 'DunningStrategies'
+];
+
+/**
+ * Locale of a request from its Accept-Language header
+ * @param {Object} req - CDS request
+ * @returns {string} Supported locale, 'en' for all others
+ */
+function requestLocale(req) {
+    const locale = req._?.req?.headers?.['accept-language']?.split(',')[0]?.split('-')[0] || DEFAULT_LOCALE;
+    return SUPPORTED_LOCALES.includes(locale) ? locale : DEFAULT_LOCALE;
+}
+
+class CodeListCache {
+    constructor() {
+        this.log = cds.log('code-list-cache');
+        this.lists = new LruCache({
+            maxEntries: CODE_LISTS.length,
+            ttl: (Number(process.env.CODE_LIST_CACHE_TTL_MINUTES) || 60) * 60 * 1000
+        });
+        this.columns = new Map(); // service entity name -> default columns
+        this.fallbacks = 0;
+    }
+
+    /**
+     * Serve the READs of the given code list entities of a service from the cache
+     * @param {Object} srv - Application service
+     * @param {string[]} entities - Entity names (same names as in mdm.db)
+     */
+    register(srv, entities) {
+        for (const entity of entities) {
+            srv.on('READ', entity, (req, next) => this.read(entity, req, next));
+        }
+    }
+
+    /**
+     * Answer a READ from the cache, or from the database if the query cannot be
+     * evaluated in memory
+     * @param {string} entity - Code list name
+     * @param {Object} req - CDS request
+     * @param {Function} next - Next handler (database read)
+     * @returns {Promise<Array|Object>} Rows of the request locale
+     */
+    async read(entity, req, next) {
+        const locale = requestLocale(req);
+        const query = this._parse(req.query?.SELECT);
+
+        if (!query) {
+            this.fallbacks++;
+            return filterByLocale(await next(), locale);
+        }
+
+        // An explicit locale (e.g. a key lookup) selects that locale instead of the request's
+        const partitions = await this._partitions(entity);
+        const explicitLocale = query.conditions.find(([field]) => field === 'locale');
+        let rows = (partitions.get(explicitLocale ? explicitLocale[1] : locale) || [])
+            .filter(row => query.conditions.every(([field, value]) => matches(row[field], value)));
+        const count = rows.length;
+
+        if (query.orderBy.length > 0) {
+            rows = [...rows].sort((a, b) => {
+                for (const { field, descending } of query.orderBy) {
+                    const order = compare(a[field], b[field]);
+                    if (order !== 0) return descending ? -order : order;
+                }
+                return 0;
+            });
+        }
+        if (query.offset || query.rows !== undefined) {
+            rows = rows.slice(query.offset, query.rows === undefined ? undefined : query.offset + query.rows);
+        }
+
+        const columns = query.columns || this._defaultColumns(req.target);
+        const result = rows.map(row => {
+            const projected = {};
+            for (const { field, as } of columns) {
+                projected[as] = row[field];
+            }
+            return projected;
+        });
+
+        if (query.one) {
+            return result[0] ?? null;
+        }
+        if (query.count) {
+            result.$count = count;
+        }
+        return result;
+    }
+
+    /**
+     * Rows of a code list by locale (rows without a locale belong to every locale)
+     * @param {string} entity - Code list name
+     * @returns {Promise<Map>} locale -> rows
+     */
+    _partitions(entity) {
+        return this.lists.getOrCompute(entity, async () => {
+            const db = await cds.connect.to('db');
+            const rows = await db.run(SELECT.from(`mdm.db.${entity}`).orderBy('code'));
+
+            const partitions = new Map(SUPPORTED_LOCALES.map(locale => [locale, []]));
+            for (const row of rows) {
+                if (!row.locale) {
+                    partitions.forEach(partition => partition.push(row));
+                } else if (partitions.has(row.locale)) {
+                    partitions.get(row.locale).push(row);
+                }
+            }
+            this.log.debug(`${entity} loaded`, { rows: rows.length });
+            return partitions;
+        });
+    }
+
+    /**
+     * Parse the parts of a SELECT that are evaluated in memory
+     * @param {Object} select - CQN SELECT
+     * @returns {Object|null} { conditions, columns, orderBy, offset, rows, count, one }, or null
+     *   if the query has to be run by the database
+     */
+    _parse(select) {
+        if (!select || select.search || select.groupBy || select.having || select.distinct) return null;
+
+        // Key lookups carry their condition in the from ref: PaymentTerms(code='X',locale='en')
+        const from = select.from?.ref;
+        if (!from || from.length !== 1) return null;
+        const conditions = [];
+        if (!collectConditions(from[0].where, conditions) || !collectConditions(select.where, conditions)) return null;
+
+        let columns = null;
+        if (select.columns && !select.columns.some(column => column === '*' || column.ref?.[0] === '*')) {
+            columns = [];
+            for (const column of select.columns) {
+                if (!column.ref || column.ref.length !== 1 || column.expand || column.inline) return null;
+                columns.push({ field: column.ref[0], as: column.as || column.ref[0] });
+            }
+        }
+
+        const orderBy = [];
+        for (const order of select.orderBy || []) {
+            if (!order.ref || order.ref.length !== 1) return null;
+            orderBy.push({ field: order.ref[0], descending: order.sort === 'desc' });
+        }
+
+        return {
+            conditions,
+            columns,
+            orderBy,
+            offset: select.limit?.offset?.val || 0,
+            rows: select.limit?.rows?.val,
+            count: !!select.count,
+            one: !!select.one
+        };
+    }
+
+    /**
+     * Columns returned without $select: the persisted elements of the service entity
+     * @param {Object} target - Service entity definition
+     * @returns {Array} [{ field, as }]
+     */
+    _defaultColumns(target) {
+        if (!this.columns.has(target.name)) {
+            const columns = Object.entries(target.elements)
+                .filter(([, element]) => !element.virtual && !element.isAssociation)
+                .map(([name]) => ({ field: name, as: name }));
+            this.columns.set(target.name, columns);
+        }
+        return this.columns.get(target.name);
+    }
+
+    /**
+     * Drop a cached code list (after it was changed)
+     * @param {string} [entity] - Code list name; all lists if omitted
+     */
+    invalidate(entity) {
+        if (entity) {
+            this.lists.delete(entity);
+        } else {
+            this.lists.clear();
+        }
+    }
+
+    /**
+     * Get cache statistics
+     * @returns {Object} LruCache statistics and the number of database fallbacks
+     */
+    getStats() {
+        return { ...this.lists.getStats(), fallbacks: this.fallbacks };
+    }
+}
+
+/**
+ * Collect field = value conditions joined by 'and'
+ * @param {Array} where - CQN where clause
+ * @param {Array} conditions - Receives [field, value] pairs
+ * @returns {boolean} False if the clause has other operators or expressions
+ */
+function collectConditions(where, conditions) {
+    if (!where || where.length === 0) return true;
+    for (let i = 0; i < where.length; i++) {
+        const token = where[i];
+        if (token.xpr) {
+            if (!collectConditions(token.xpr, conditions)) return false;
+        } else if (where[i + 1] === '=' && where[i + 2]) {
+            const [left, right] = [token, where[i + 2]];
+            if (left.ref?.length === 1 && 'val' in right) {
+                conditions.push([left.ref[0], right.val]);
+            } else if (right.ref?.length === 1 && 'val' in left) {
+                conditions.push([right.ref[0], left.val]);
+            } else {
+                return false;
+            }
+            i += 2;
+        } else {
+            return false;
+        }
+        if (i + 1 < where.length) {
+            if (where[i + 1] !== 'and') return false;
+            i++;
+        }
+    }
+    return true;
+}
+
+function matches(value, expected) {
+    if (typeof expected === 'boolean') return Boolean(value) === expected;
+    return value === expected || (value !== null && value !== undefined && String(value) === String(expected));
+}
+
+function compare(a, b) {
+    if (a === b) return 0;
+    if (a === null || a === undefined) return -1;
+    if (b === null || b === undefined) return 1;
+    return typeof a === 'string' ? a.localeCompare(b) : (a < b ? -1 : 1);
+}
+
+/**
+ * Keep the rows of a locale (and rows without a locale), in place and in one pass
+ * Single rows (key lookups) are returned as they are.
+ * @param {Array|Object} results - Database result
+ * @param {string} locale - Request locale
+ * @returns {Array|Object} The filtered result
+ */
+function filterByLocale(results, locale) {
+    if (!Array.isArray(results)) return results;
+    let kept = 0;
+    for (const row of results) {
+        if (!row.locale || row.locale === locale) {
+            results[kept++] = row;
+        }
+    }
+    results.length = kept;
+    return results;
+}
+
+// Export singleton instance
+module.exports = new CodeListCache();
+module.exports.CODE_LISTS = CODE_LISTS;
+module.exports.requestLocale = requestLocale;
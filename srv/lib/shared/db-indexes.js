@@ -0,0 +1,61 @@
+const cds = require('@sap/cds');
+
+/**
+ * Database indexes declared in the data model
+ *
+ * CDS has no index syntax for SQLite, so indexes are declared on entities with the
+ * @mdm.indexes annotation and created at startup:
+ *
+ *   @mdm.indexes: [{ name: 'byRequest', columns: ['request_ID'] }]
+ *   entity PartnerAddresses { ... }
+ *
+ * Columns are database column names (foreign keys as <association>_ID).
+ *
+ * @module db-indexes
+ */
+
+const log = cds.log('db-indexes');
+
+// Databases supporting CREATE INDEX IF NOT EXISTS
+const SUPPORTED_KINDS = ['sqlite', 'better-sqlite', 'postgres'];
+
+/**
+ * Index definitions of a model
+ * @param {Object} model - Compiled CDS model
+ * @returns {Array} [{ name, table, columns }]
+ */
+function declaredIndexes(model) {
+    const indexes = [];
+    for (const [entityName, definition] of Object.entries(model.definitions)) {
+        if (definition.kind !== 'entity' || !definition['@mdm.indexes'] || definition.query || definition.projection) {
+            continue;
+        }
+        const table = entityName.replace(/\./g, '_');
+        for (const index of definition['@mdm.indexes']) {
+            indexes.push({ name: `${table}_${index.name}`, table, columns: index.columns });
+        }
+    }
+    return indexes;
+}
+
+/**
+ * Create the declared indexes that do not exist yet
+ * @param {Object} db - Database service
+ * @returns {Promise<number>} Number of declared indexes
+ */
+async function ensureIndexes(db) {
+    const kind = db.options?.kind || db.kind;
+    if (!SUPPORTED_KINDS.includes(kind)) {
+        log.info(`Skipping declared indexes for database kind ${kind}; deploy them with the database artifacts`);
+        return 0;
+    }
+
+    const indexes = declaredIndexes(db.model || cds.model);
+    for (const index of indexes) {
+        await db.run(`CREATE INDEX IF NOT EXISTS ${index.name} ON ${index.table} (${index.columns.join(', ')})`);
+    }
+    log.info('Declared indexes ensured', { count: indexes.length });
+    return indexes.length;
+}
+
+module.exports = { declaredIndexes, ensureIndexes };
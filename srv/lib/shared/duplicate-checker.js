@@ -7,6 +7,12 @@ const cds = require('@sap/cds');
  * @module duplicate-checker
  */
 
+// Requests per set-based query in checkDuplicatesBatch (bounds IN lists and OR'ed LIKEs)
+const BATCH_CHUNK_SIZE = 100;
+
+// Name matches kept per request (same as the LIMIT of the single request check)
+const NAME_MATCH_LIMIT = 10;
+
 /**
  * Check for duplicate partners using VAT ID and name matching
  *
@@ -53,9 +59,7 @@ async function checkDuplicates(requestID, serviceContext, isDraft = false, servi
         await persistDuplicateResults(requestID, duplicates, db);
 
         // 4. Update request header with duplicate check status
-        const duplicateCheckStatus = duplicates.length === 0
-            ? 'No Duplicates'
-            : `${duplicates.length} Duplicate${duplicates.length > 1 ? 's' : ''} Found`;
+        const duplicateCheckStatus = duplicateCheckStatusText(duplicates.length);
 
         await UPDATE(BusinessPartnerRequests).set({
             duplicateCheckStatus: duplicateCheckStatus,
@@ -72,6 +76,97 @@ async function checkDuplicates(requestID, serviceContext, isDraft = false, servi
     }
 }
 
+/**
+ * Check many active requests for duplicate partners at once (bulk imports)
+ *
+ * Same matching rules as checkDuplicates(), but requests, VAT IDs and candidate
+ * partners are read with one set-based query per kind (per chunk of requests),
+ * and all DuplicateChecks rows are written in one bulk insert.
+ *
+ * @param {Array<String>} requestIDs - UUIDs of business partner requests
+ * @returns {Promise<Map<String, Array>>} Duplicate match objects per request ID;
+ *   requests that do not exist are left out
+ */
+async function checkDuplicatesBatch(requestIDs) {
+    const log = cds.log('duplicate-checker');
+    const ids = [...new Set(requestIDs)];
+    log.info('Checking for duplicates in batch', { requests: ids.length });
+
+    const db = await cds.connect.to('db');
+    const { ExistingPartners, BusinessPartnerRequests, PartnerVatIds, DuplicateChecks } = db.entities('mdm.db');
+    const results = new Map();
+
+    try {
+        for (let start = 0; start < ids.length; start += BATCH_CHUNK_SIZE) {
+            const chunk = ids.slice(start, start + BATCH_CHUNK_SIZE);
+
+            const requests = await SELECT.from(BusinessPartnerRequests)
+                .columns('ID', 'partnerName')
+                .where({ ID: { in: chunk } });
+            const vatRows = await SELECT.from(PartnerVatIds)
+                .columns('request_ID', 'vatNumber')
+                .where({ request_ID: { in: chunk } });
+
+            const vatPartners = await findVatPartnersBatch(vatRows, ExistingPartners, db);
+            const namePartners = await findNamePartnersBatch(requests, ExistingPartners, db);
+
+            for (const request of requests) {
+                const duplicates = [];
+
+                // 1. VAT ID Matching (Exact Match)
+                for (const vat of vatRows) {
+                    if (vat.request_ID !== request.ID || !vat.vatNumber) continue;
+                    for (const match of vatPartners.get(vat.vatNumber) || []) {
+                        duplicates.push(vatDuplicate(match, vat.vatNumber));
+                    }
+                }
+
+                // 2. Name Matching, skipping partners already found by VAT
+                for (const match of namePartners.get(request.ID) || []) {
+                    const bpNum = truncateString(match.sapBpNumber, 20);
+                    if (!duplicates.some(d => d.sapBpNumber === bpNum)) {
+                        duplicates.push(nameDuplicate(match));
+                    }
+                }
+
+                results.set(request.ID, duplicates);
+            }
+        }
+
+        // 3. Persist all results in one insert (history is kept, as in checkDuplicates)
+        const checkTimestamp = new Date().toISOString();
+        const entries = [];
+        for (const [requestID, duplicates] of results) {
+            entries.push(...duplicates.map(d => duplicateCheckEntry(requestID, d, checkTimestamp)));
+        }
+        if (entries.length > 0) {
+            await INSERT.into(DuplicateChecks).entries(entries);
+        }
+
+        // 4. Update request headers, one statement per distinct status
+        const byStatus = new Map();
+        for (const [requestID, duplicates] of results) {
+            const status = duplicateCheckStatusText(duplicates.length);
+            if (!byStatus.has(status)) byStatus.set(status, []);
+            byStatus.get(status).push(requestID);
+        }
+        for (const [duplicateCheckStatus, statusIDs] of byStatus) {
+            await UPDATE(BusinessPartnerRequests).set({
+                duplicateCheckStatus: duplicateCheckStatus,
+                duplicateCheckDate: checkTimestamp
+            }).where({ ID: { in: statusIDs } });
+        }
+
+        log.info('Batch duplicate check completed', { requests: results.size, checks: entries.length });
+
+        return results;
+
+    } catch (error) {
+        log.error('Error checking duplicates in batch', { requests: ids.length, error: error.message });
+        throw error;
+    }
+}
+
 /**
  * Load request data and VAT IDs from draft or active entity
  *
@@ -140,16 +235,7 @@ async function findVatDuplicates(vatIds, ExistingPartners, db) {
             .where({ establishedVatId: vat.vatNumber });
 
         for (const match of matches) {
-            duplicates.push({
-                sapBpNumber: truncateString(match.sapBpNumber, 20),
-                partnerName: match.partnerName,
-                vatId: vat.vatNumber,
-                street: parseAddressStreet(match.establishedAddress),
-                city: 'Unknown',
-                country: match.establishedCountry || '',
-                matchScore: 100,
-                matchType: 'VAT'
-            });
+            duplicates.push(vatDuplicate(match, vat.vatNumber));
         }
     }
 
@@ -167,29 +253,127 @@ async function findNameDuplicates(partnerName, ExistingPartners, db, existingDup
     const nameMatches = await db.read(ExistingPartners)
         .columns('sapBpNumber', 'partnerName', 'establishedAddress', 'establishedCountry', 'establishedVatId')
         .where({ partnerName: { like: `%${partnerName}%` } })
-        .limit(10);
+        .limit(NAME_MATCH_LIMIT);
 
     for (const match of nameMatches) {
         const bpNum = truncateString(match.sapBpNumber, 20);
 
         // Avoid adding if already found by VAT
         if (!existingDuplicates.some(d => d.sapBpNumber === bpNum)) {
-            duplicates.push({
-                sapBpNumber: bpNum,
-                partnerName: match.partnerName,
-                vatId: match.establishedVatId || '',
-                street: parseAddressStreet(match.establishedAddress),
-                city: 'Unknown',
-                country: match.establishedCountry || '',
-                matchScore: 80,
-                matchType: 'Name'
-            });
+            duplicates.push(nameDuplicate(match));
         }
     }
 
     return duplicates;
 }
 
+/**
+ * Find partners for the VAT IDs of many requests with one query
+ *
+ * @private
+ * @returns {Promise<Map<String, Array>>} Matching partners per VAT number
+ */
+async function findVatPartnersBatch(vatRows, ExistingPartners, db) {
+    const vatNumbers = [...new Set(vatRows.map(vat => vat.vatNumber).filter(Boolean))];
+    const partnersByVat = new Map();
+    if (vatNumbers.length === 0) return partnersByVat;
+
+    const matches = await db.read(ExistingPartners)
+        .columns('sapBpNumber', 'partnerName', 'establishedAddress', 'establishedCountry', 'establishedVatId')
+        .where({ establishedVatId: { in: vatNumbers } });
+
+    for (const match of matches) {
+        if (!partnersByVat.has(match.establishedVatId)) partnersByVat.set(match.establishedVatId, []);
+        partnersByVat.get(match.establishedVatId).push(match);
+    }
+    return partnersByVat;
+}
+
+/**
+ * Find name matches for many requests with one query
+ * The LIKE conditions of all requests are combined with OR and the rows are
+ * assigned back to the requests whose name they contain, at most 10 each.
+ *
+ * The combined query reads at most 10 rows per request. If it reaches that limit, a
+ * broad name may have taken the rows of others, so requests left with fewer than 10
+ * matches are completed with their own query (LIMIT 10, as in checkDuplicates).
+ *
+ * @private
+ * @returns {Promise<Map<String, Array>>} Matching partners per request ID
+ */
+async function findNamePartnersBatch(requests, ExistingPartners, db) {
+    const named = requests.filter(r => r.partnerName);
+    const partnersByRequest = new Map();
+    if (named.length === 0) return partnersByRequest;
+
+    const columns = ['sapBpNumber', 'partnerName', 'establishedAddress', 'establishedCountry', 'establishedVatId'];
+    const where = [];
+    for (const request of named) {
+        if (where.length > 0) where.push('or');
+        where.push({ ref: ['partnerName'] }, 'like', { val: `%${request.partnerName}%` });
+    }
+    const limit = named.length * NAME_MATCH_LIMIT;
+    const query = SELECT.from(ExistingPartners).columns(...columns).limit(limit);
+    query.SELECT.where = where;
+    const matches = await db.run(query);
+
+    const incomplete = [];
+    for (const request of named) {
+        const name = request.partnerName.toLowerCase();
+        const found = matches
+            .filter(match => match.partnerName && match.partnerName.toLowerCase().includes(name))
+            .slice(0, NAME_MATCH_LIMIT);
+        partnersByRequest.set(request.ID, found);
+        if (found.length < NAME_MATCH_LIMIT) incomplete.push(request);
+    }
+
+    if (matches.length >= limit) {
+        await Promise.all(incomplete.map(async (request) => {
+            partnersByRequest.set(request.ID, await db.read(ExistingPartners)
+                .columns(...columns)
+                .where({ partnerName: { like: `%${request.partnerName}%` } })
+                .limit(NAME_MATCH_LIMIT));
+        }));
+    }
+    return partnersByRequest;
+}
+
+/**
+ * Duplicate match object for an exact VAT ID match
+ *
+ * @private
+ */
+function vatDuplicate(match, vatNumber) {
+    return {
+        sapBpNumber: truncateString(match.sapBpNumber, 20),
+        partnerName: match.partnerName,
+        vatId: vatNumber,
+        street: parseAddressStreet(match.establishedAddress),
+        city: 'Unknown',
+        country: match.establishedCountry || '',
+        matchScore: 100,
+        matchType: 'VAT'
+    };
+}
+
+/**
+ * Duplicate match object for a name match
+ *
+ * @private
+ */
+function nameDuplicate(match) {
+    return {
+        sapBpNumber: truncateString(match.sapBpNumber, 20),
+        partnerName: match.partnerName,
+        vatId: match.establishedVatId || '',
+        street: parseAddressStreet(match.establishedAddress),
+        city: 'Unknown',
+        country: match.establishedCountry || '',
+        matchScore: 80,
+        matchType: 'Name'
+    };
+}
+
 /**
  * Persist duplicate check results to database
  * NOTE: Does NOT delete old results - keeps history of all duplicate checks
@@ -205,23 +389,43 @@ async function persistDuplicateResults(requestID, duplicates, db) {
     // Insert new checks with timestamp
     if (duplicates.length > 0) {
         const checkTimestamp = new Date().toISOString();
-        const entries = duplicates.map(d => ({
-            request_ID: requestID,
-            checkDate: checkTimestamp,
-            matchType: d.matchType,
-            matchScore: d.matchScore,
-            existingBpNumber: d.sapBpNumber,
-            existingBpName: d.partnerName,
-            matchDetails: `Matched by ${d.matchType}: ${d.matchType === 'VAT' ? d.vatId : d.partnerName}`,
-            establishedVatId: d.vatId,
-            establishedCountry: d.country,
-            reviewRequired: true
-        }));
+        const entries = duplicates.map(d => duplicateCheckEntry(requestID, d, checkTimestamp));
 
         await INSERT.into(DuplicateChecks).entries(entries);
     }
 }
 
+/**
+ * DuplicateChecks row for a duplicate match object
+ *
+ * @private
+ */
+function duplicateCheckEntry(requestID, d, checkTimestamp) {
+    return {
+        request_ID: requestID,
+        checkDate: checkTimestamp,
+        matchType: d.matchType,
+        matchScore: d.matchScore,
+        existingBpNumber: d.sapBpNumber,
+        existingBpName: d.partnerName,
+        matchDetails: `Matched by ${d.matchType}: ${d.matchType === 'VAT' ? d.vatId : d.partnerName}`,
+        establishedVatId: d.vatId,
+        establishedCountry: d.country,
+        reviewRequired: true
+    };
+}
+
+/**
+ * Status text stored in duplicateCheckStatus for a number of matches
+ *
+ * @private
+ */
+function duplicateCheckStatusText(count) {
+    return count === 0
+        ? 'No Duplicates'
+        : `${count} Duplicate${count > 1 ? 's' : ''} Found`;
+}
+
 /**
  * Truncate string to specified length
  *
@@ -243,5 +447,6 @@ function parseAddressStreet(address) {
 }
 
 module.exports = {
-    checkDuplicates
+    checkDuplicates,
+    checkDuplicatesBatch
 };
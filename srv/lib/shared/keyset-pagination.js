@@ -0,0 +1,112 @@
+/**
+ * Keyset (cursor) pagination
+ *
+ * Pages are read with a "sorts after the last row of the previous page" condition on
+ * an indexed sort key instead of an OFFSET, so every page costs the same wherever it
+ * is in the table. The cursor handed to clients is an opaque base64url string with
+ * the sort key values of the last row of a page.
+ *
+ * Every order ends with ID, so rows with equal sort values still have a total order.
+ * Sort columns must not be null.
+ *
+ * @module keyset-pagination
+ */
+
+const ORDERS = {
+    createdAt: [{ column: 'createdAt', desc: true }, { column: 'ID', desc: true }],
+    requestNumber: [{ column: 'requestNumber', desc: true }, { column: 'ID', desc: true }]
+};
+
+/**
+ * Encode the cursor of a row
+ * @param {Object} row - Last row of a page (must contain the order columns)
+ * @param {Array} order - Sort keys
+ * @returns {string} Cursor
+ */
+function encodeCursor(row, order) {
+    return Buffer.from(JSON.stringify(order.map(key => row[key.column]))).toString('base64url');
+}
+
+/**
+ * Decode a cursor
+ * @param {string} cursor - Cursor from encodeCursor
+ * @param {Array} order - Sort keys the cursor was created for
+ * @returns {Array|null} Sort key values, or null if the cursor is invalid
+ */
+function decodeCursor(cursor, order) {
+    try {
+        const values = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        const valid = Array.isArray(values) && values.length === order.length &&
+            values.every(value => typeof value === 'string' || typeof value === 'number');
+        return valid ? values : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Condition selecting the rows after the given sort key values:
+ * (k1 < v1) or (k1 = v1 and k2 < v2) or ...
+ * @param {Array} values - Sort key values of the last row
+ * @param {Array} order - Sort keys
+ * @returns {Array} CXN expression
+ */
+function afterCondition(values, order) {
+    const condition = [];
+    order.forEach((key, i) => {
+        const xpr = [];
+        for (let j = 0; j < i; j++) {
+            xpr.push({ ref: [order[j].column] }, '=', { val: values[j] }, 'and');
+        }
+        xpr.push({ ref: [key.column] }, key.desc ? '<' : '>', { val: values[i] });
+        if (condition.length > 0) condition.push('or');
+        condition.push({ xpr });
+    });
+    return condition;
+}
+
+/**
+ * Restrict a SELECT to one page: order, cursor condition and a limit of one row more
+ * than the page size (to detect whether a next page exists)
+ * @param {Object} query - SELECT query (its where clause is kept)
+ * @param {Object} options
+ * @param {string} [options.cursor] - Cursor of the previous page
+ * @param {number} options.pageSize - Rows per page
+ * @param {Array} [options.order] - Sort keys (default: newest first)
+ * @returns {Object} The query
+ * @throws {Error} If the cursor is invalid
+ */
+function pageQuery(query, { cursor, pageSize, order = ORDERS.createdAt }) {
+    if (cursor) {
+        const values = decodeCursor(cursor, order);
+        if (!values) {
+            throw new Error('Invalid pagination cursor');
+        }
+        const condition = afterCondition(values, order);
+        const where = query.SELECT.where;
+        query.SELECT.where = where && where.length > 0
+            ? [{ xpr: where }, 'and', { xpr: condition }]
+            : condition;
+    }
+    return query
+        .orderBy(order.map(key => `${key.column} ${key.desc ? 'desc' : 'asc'}`))
+        .limit(pageSize + 1);
+}
+
+/**
+ * Split the rows of a pageQuery into the page and the cursor of the next page
+ * @param {Array} rows - Rows read with pageQuery
+ * @param {number} pageSize - Rows per page
+ * @param {Array} [order] - Sort keys used by pageQuery
+ * @returns {Object} { items, nextCursor } (nextCursor is null on the last page)
+ */
+function toPage(rows, pageSize, order = ORDERS.createdAt) {
+    const hasMore = rows.length > pageSize;
+    const items = hasMore ? rows.slice(0, pageSize) : rows;
+    return {
+        items,
+        nextCursor: hasMore ? encodeCursor(items[items.length - 1], order) : null
+    };
+}
+
+module.exports = { ORDERS, encodeCursor, decodeCursor, pageQuery, toPage };
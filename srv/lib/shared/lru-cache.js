@@ -0,0 +1,183 @@
+/**
+ * Bounded in-memory cache with least-recently-used eviction and per-entry TTL
+ *
+ * Entries live in a Map in recency order (a hit moves the entry to the end), so
+ * eviction drops the first key. Expired entries are removed lazily on access and
+ * whenever the cache is full, so no timers are kept per entry.
+ *
+ * @class LruCache
+ */
+class LruCache {
+    /**
+     * @param {Object} options
+     * @param {number} options.maxEntries - Maximum number of entries kept
+     * @param {number} options.ttl - Time to live per entry in milliseconds
+     */
+    constructor({ maxEntries = 1000, ttl = 5 * 60 * 1000 } = {}) {
+        this.maxEntries = maxEntries;
+        this.ttl = ttl;
+        this.entries = new Map(); // key -> { value, expiresAt }
+        this.pending = new Map(); // key -> Promise of a value being computed
+        this.resetStats();
+    }
+
+    /**
+     * Get a cached value
+     * @param {string} key - Cache key
+     * @returns {*} Cached value, or undefined on a miss
+     */
+    get(key) {
+        const entry = this.entries.get(key);
+        if (!entry) {
+            this.misses++;
+            return undefined;
+        }
+        if (entry.expiresAt <= Date.now()) {
+            this.entries.delete(key);
+            this.expirations++;
+            this.misses++;
+            return undefined;
+        }
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        this.hits++;
+        return entry.value;
+    }
+
+    /**
+     * Store a value, evicting the least recently used entry when full
+     * @param {string} key - Cache key
+     * @param {*} value - Value to cache
+     * @param {number} [ttl] - Time to live in milliseconds (defaults to the cache TTL)
+     */
+    set(key, value, ttl = this.ttl) {
+        this.entries.delete(key);
+        if (this.entries.size >= this.maxEntries) {
+            this.prune();
+        }
+        while (this.entries.size >= this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+            this.evictions++;
+        }
+        this.entries.set(key, { value, expiresAt: Date.now() + ttl });
+    }
+
+    /**
+     * Get a cached value or compute and cache it
+     * Concurrent misses for the same key share one computation.
+     * @param {string} key - Cache key
+     * @param {Function} compute - Async function returning the value
+     * @returns {Promise<*>} Cached or computed value
+     */
+    async getOrCompute(key, compute) {
+        const cached = this.get(key);
+        if (cached !== undefined) {
+            return cached;
+        }
+        if (!this.pending.has(key)) {
+            const pending = Promise.resolve()
+                .then(compute)
+                .then(value => {
+                    // Do not resurrect an entry invalidated while it was computed
+                    if (this.pending.get(key) === pending) {
+                        this.set(key, value);
+                    }
+                    return value;
+                })
+                .finally(() => {
+                    if (this.pending.get(key) === pending) {
+                        this.pending.delete(key);
+                    }
+                });
+            this.pending.set(key, pending);
+        }
+        return this.pending.get(key);
+    }
+
+    /**
+     * Remove one entry
+     * @param {string} key - Cache key
+     * @returns {boolean} True if an entry was removed
+     */
+    delete(key) {
+        this.pending.delete(key);
+        return this.entries.delete(key);
+    }
+
+    /**
+     * Remove all entries matching a predicate
+     * @param {Function} predicate - Called with (value, key)
+     * @returns {number} Number of entries removed
+     */
+    deleteWhere(predicate) {
+        let removed = 0;
+        for (const [key, entry] of this.entries) {
+            if (predicate(entry.value, key)) {
+                this.entries.delete(key);
+                removed++;
+            }
+        }
+        // Values being computed may already be stale; let them finish uncached
+        this.pending.clear();
+        return removed;
+    }
+
+    /**
+     * Remove expired entries
+     * @returns {number} Number of entries removed
+     */
+    prune() {
+        const now = Date.now();
+        let removed = 0;
+        for (const [key, entry] of this.entries) {
+            if (entry.expiresAt <= now) {
+                this.entries.delete(key);
+                removed++;
+            }
+        }
+        this.expirations += removed;
+        return removed;
+    }
+
+    /**
+     * Remove all entries
+     */
+    clear() {
+        this.entries.clear();
+        this.pending.clear();
+    }
+
+    get size() {
+        return this.entries.size;
+    }
+
+    /**
+     * Reset hit/miss counters
+     */
+    resetStats() {
+        this.hits = 0;
+        this.misses = 0;
+        this.evictions = 0;
+        this.expirations = 0;
+    }
+
+    /**
+     * Get cache statistics
+     * @returns {Object} Size, limits and hit/miss counters
+     */
+    getStats() {
+        const lookups = this.hits + this.misses;
+        return {
+            size: this.entries.size,
+            maxEntries: this.maxEntries,
+            ttlSeconds: this.ttl / 1000,
+            hits: this.hits,
+            misses: this.misses,
+            hitRate: lookups ? this.hits / lookups : 0,
+            evictions: this.evictions,
+            expirations: this.expirations
+        };
+    }
+}
+
+module.exports = LruCache;
@@ -0,0 +1,332 @@
+const cds = require('@sap/cds');
+const readline = require('readline');
+const requestNumberGenerator = require('../../utils/request-number-generator');
+const { sanitizeStrings, validateCreatePartner, validateRecord } = require('../../middleware/validation');
+
+/**
+ * Partner Bulk Ingest
+ *
+ * Creates partner requests from an NDJSON body (one partner per line, same fields as
+ * POST /integration/partners/create) for nightly loads of tens of thousands of partners.
+ *
+ * - The body is read as a stream and processed in chunks (BULK_INGEST_CHUNK_SIZE,
+ *   default 500 records), so memory use does not grow with the load
+ * - Each record is validated with the rules of POST /integration/partners/create, then
+ *   each chunk is written in one transaction: one range of request
+ *   numbers and one multi-row INSERT per table (requests, addresses, emails, banks,
+ *   VAT IDs, approval history)
+ * - If a chunk fails to write, its records are written one by one so that only the
+ *   failing records are reported as errors
+ * - Results are reported per record (with the NDJSON line number) as each chunk completes
+ *
+ * @module partner-bulk-ingest
+ */
+
+const REQUESTS = 'mdm.db.BusinessPartnerRequests';
+const HISTORY = 'mdm.db.ApprovalHistory';
+const CHILD_ENTITIES = {
+    addresses: 'mdm.db.PartnerAddresses',
+    emails: 'mdm.db.PartnerEmails',
+    banks: 'mdm.db.PartnerBanks',
+    vatIds: 'mdm.db.PartnerVatIds'
+};
+
+/**
+ * Validate partner data of an integration request
+ * @param {Object} data - Partner data
+ * @param {string} requestType - 'Create' or 'Update'
+ * @returns {Object} { isValid, errors }
+ */
+function validatePartnerRecord(data, requestType) {
+    const errors = [];
+
+    if (!data.partnerName || data.partnerName.trim().length < 3) {
+        errors.push('partnerName is required and must be at least 3 characters');
+    }
+
+    if (requestType === 'Create') {
+        if (!data.addresses || data.addresses.length === 0) {
+            errors.push('At least one address is required for create requests');
+        } else {
+            const hasMainAddress = data.addresses.some(addr => addr.addressType === 'Main');
+            if (!hasMainAddress) {
+                errors.push('A Main address is required (established address)');
+            }
+        }
+    }
+
+    if (requestType === 'Update' && !data.existingBpNumber) {
+        errors.push('existingBpNumber is required for update requests');
+    }
+
+    return {
+        isValid: errors.length === 0,
+        errors
+    };
+}
+
+/**
+ * BusinessPartnerRequests row of a create request from an external system
+ * @param {Object} partnerData - Partner data
+ * @param {string} sourceSystem - Calling system
+ * @param {string} requestNumber - Request number
+ * @returns {Object} Request row
+ */
+function buildPartnerRequest(partnerData, sourceSystem, requestNumber) {
+    return {
+        requestNumber,
+        entityType: partnerData.entityType || 'Supplier',
+        requestType: 'Create',
+        sourceSystem,
+        status: 'Draft',
+        requesterId: partnerData.requesterId || 'external-system',
+        requesterName: partnerData.requesterName || `${sourceSystem} System`,
+        requesterEmail: partnerData.requesterEmail || `${sourceSystem.toLowerCase()}@company.com`,
+        partnerName: partnerData.partnerName,
+        searchTerm: partnerData.searchTerm || partnerData.partnerName.substring(0, 20),
+        partnerRole: partnerData.partnerRole || partnerData.entityType || 'Supplier',
+        businessChannels: partnerData.businessChannels,
+        coupaInternalNo: partnerData.coupaInternalNo,
+        salesforceId: partnerData.salesforceId,
+        piId: partnerData.piId,
+        paymentTerms: partnerData.paymentTerms,
+        paymentMethod: partnerData.paymentMethod || 'BankTransfer',
+        reconAccount: partnerData.reconAccount,
+        comments: partnerData.comments || `Created via ${sourceSystem} integration`
+    };
+}
+
+/**
+ * ApprovalHistory row of a request created by an external system
+ * @param {string} requestId - Request ID
+ * @param {string} sourceSystem - Calling system
+ * @returns {Object} History row
+ */
+function creationHistoryEntry(requestId, sourceSystem) {
+    return {
+        request_ID: requestId,
+        approverUserId: 'system',
+        approverName: `${sourceSystem} Integration`,
+        action: 'Create',
+        previousStatus: null,
+        newStatus: 'Draft',
+        comments: `Request created via ${sourceSystem} integration API`,
+        systemGenerated: true
+    };
+}
+
+/**
+ * Read NDJSON records from a stream in chunks
+ * @param {Object} stream - Readable stream
+ * @param {number} chunkSize - Records per chunk
+ * @yields {Array} [{ line, record, error }] (error set for lines that are not a JSON object)
+ */
+async function* readNdjsonChunks(stream, chunkSize) {
+    const lines = readline.createInterface({ input: stream, crlfDelay: Infinity });
+    let chunk = [];
+    let lineNumber = 0;
+
+    for await (const line of lines) {
+        lineNumber++;
+        if (!line.trim()) continue;
+
+        let record = null;
+        let error = null;
+        try {
+            record = JSON.parse(line);
+            if (!record || typeof record !== 'object' || Array.isArray(record)) {
+                record = null;
+                error = 'Each line must be a JSON object';
+            }
+        } catch (parseError) {
+            error = `Invalid JSON: ${parseError.message}`;
+        }
+        chunk.push({ line: lineNumber, record, error });
+
+        if (chunk.length >= chunkSize) {
+            yield chunk;
+            chunk = [];
+        }
+    }
+    if (chunk.length > 0) {
+        yield chunk;
+    }
+}
+
+class PartnerBulkIngest {
+    constructor() {
+        this.log = cds.log('partner-bulk-ingest');
+        this.chunkSize = Number(process.env.BULK_INGEST_CHUNK_SIZE) || 500;
+        this.prefix = 'MDM';
+    }
+
+    /**
+     * Express handler: NDJSON request body in, NDJSON results out
+     * One result line per record, then a { summary } line.
+     * @param {Object} req - Express request (req.sourceSystem set by authentication)
+     * @param {Object} res - Express response
+     */
+    async handle(req, res) {
+        if (!req.is('application/x-ndjson') && !req.is('application/jsonl')) {
+            return res.status(415).json({
+                error: 'Unsupported content type',
+                message: 'Send one partner per line with Content-Type application/x-ndjson'
+            });
+        }
+
+        res.status(200).type('application/x-ndjson');
+        const write = (value) => new Promise(resolve => {
+            if (res.write(JSON.stringify(value) + '\n')) resolve();
+            else res.once('drain', resolve);
+        });
+
+        try {
+            const summary = await this.ingest(req, req.sourceSystem, async (results) => {
+                for (const result of results) {
+                    await write(result);
+                }
+            });
+            res.end(JSON.stringify({ summary }) + '\n');
+        } catch (error) {
+            this.log.error('Bulk ingest failed', { sourceSystem: req.sourceSystem, error: error.message });
+            res.end(JSON.stringify({ error: 'Bulk ingest failed', details: error.message }) + '\n');
+        }
+    }
+
+    /**
+     * Create partner requests from an NDJSON stream
+     * @param {Object} stream - Readable stream of NDJSON
+     * @param {string} sourceSystem - Calling system
+     * @param {Function} onResults - Async callback with the per-record results of each chunk
+     * @returns {Promise<Object>} Summary { total, successful, failed, chunks, durationMs }
+     */
+    async ingest(stream, sourceSystem, onResults) {
+        const startedAt = Date.now();
+        const summary = { total: 0, successful: 0, failed: 0, chunks: 0 };
+
+        for await (const chunk of readNdjsonChunks(stream, this.chunkSize)) {
+            const results = await this.processChunk(chunk, sourceSystem);
+            summary.chunks++;
+            summary.total += results.length;
+            summary.successful += results.filter(r => r.status === 'Success').length;
+            summary.failed += results.filter(r => r.status === 'Error').length;
+            await onResults(results);
+        }
+
+        summary.durationMs = Date.now() - startedAt;
+        this.log.info('Bulk ingest completed', { sourceSystem, ...summary });
+        return summary;
+    }
+
+    /**
+     * Validate and write one chunk
+     * @param {Array} chunk - [{ line, record, error }]
+     * @param {string} sourceSystem - Calling system
+     * @returns {Promise<Array>} Per-record results in chunk order
+     */
+    async processChunk(chunk, sourceSystem) {
+        const results = new Array(chunk.length);
+        const valid = [];
+
+        const errorsPerRecord = await Promise.all(chunk.map(item => this.validateItem(item)));
+        errorsPerRecord.forEach((errors, index) => {
+            const item = chunk[index];
+            if (errors.length > 0) {
+                results[index] = { line: item.line, partnerName: item.record?.partnerName, status: 'Error', errors };
+            } else {
+                valid.push(index);
+            }
+        });
+
+        if (valid.length === 0) {
+            return results;
+        }
+
+        const succeed = (index, created) => {
+            results[index] = {
+                line: chunk[index].line,
+                partnerName: chunk[index].record.partnerName,
+                status: 'Success',
+                requestNumber: created.requestNumber,
+                requestId: created.ID
+            };
+        };
+
+        try {
+            const created = await this.insertRequests(valid.map(index => chunk[index].record), sourceSystem);
+            valid.forEach((index, i) => succeed(index, created[i]));
+        } catch (error) {
+            // A record broke the multi-row insert: write the records one by one
+            this.log.warn('Chunk insert failed, retrying records individually', { records: valid.length, error: error.message });
+            for (const index of valid) {
+                try {
+                    const [created] = await this.insertRequests([chunk[index].record], sourceSystem);
+                    succeed(index, created);
+                } catch (recordError) {
+                    results[index] = {
+                        line: chunk[index].line,
+                        partnerName: chunk[index].record.partnerName,
+                        status: 'Error',
+                        errors: [recordError.message]
+                    };
+                }
+            }
+        }
+
+        return results;
+    }
+
+    /**
+     * Validate one NDJSON record with the create endpoint rules (field formats, lengths,
+     * allowed values; sanitized in place) and the integration rules (Main address)
+     * @param {Object} item - { line, record, error }
+     * @returns {Promise<Array>} Error messages, empty if the record can be written
+     */
+    async validateItem(item) {
+        if (item.error) {
+            return [item.error];
+        }
+        const record = sanitizeStrings(item.record);
+        const fieldErrors = await validateRecord(validateCreatePartner, record);
+        return [...fieldErrors, ...validatePartnerRecord(record, 'Create').errors];
+    }
+
+    /**
+     * Insert requests with their children and history in one transaction
+     * @param {Array} records - Validated partner records
+     * @param {string} sourceSystem - Calling system
+     * @returns {Promise<Array>} Created request rows (ID, requestNumber, ...) in record order
+     */
+    async insertRequests(records, sourceSystem) {
+        const db = await cds.connect.to('db');
+
+        return db.tx(async (tx) => {
+            const requestNumbers = await requestNumberGenerator.getNextNumbers(this.prefix, records.length, tx);
+            const requests = records.map((record, i) => ({
+                ID: cds.utils.uuid(),
+                ...buildPartnerRequest(record, sourceSystem, requestNumbers[i])
+            }));
+            await tx.run(INSERT.into(REQUESTS).entries(requests));
+
+            for (const [property, entity] of Object.entries(CHILD_ENTITIES)) {
+                const rows = [];
+                records.forEach((record, i) => {
+                    (record[property] || []).forEach(child => rows.push({ ...child, request_ID: requests[i].ID }));
+                });
+                if (rows.length > 0) {
+                    await tx.run(INSERT.into(entity).entries(rows));
+                }
+            }
+
+            await tx.run(INSERT.into(HISTORY).entries(requests.map(request => creationHistoryEntry(request.ID, sourceSystem))));
+            return requests;
+        });
+    }
+}
+
+// Export singleton instance
+module.exports = new PartnerBulkIngest();
+module.exports.validatePartnerRecord = validatePartnerRecord;
+module.exports.buildPartnerRequest = buildPartnerRequest;
+module.exports.creationHistoryEntry = creationHistoryEntry;
+module.exports.readNdjsonChunks = readNdjsonChunks;
@@ -0,0 +1,257 @@
+const cds = require('@sap/cds');
+const InputValidator = require('../input-validator');
+const LruCache = require('./lru-cache');
+
+/**
+ * Pattern Registry
+ *
+ * Country-specific postal code, IBAN and VAT patterns, compiled once and kept by
+ * country code. The PostalCodePatterns, IBANPatterns and VATPatterns tables are
+ * read on the first load() (and again after one of them changes); countries
+ * missing from the tables fall back to the built-in InputValidator.PATTERNS.
+ * Until load() has run, only the built-in patterns are used.
+ *
+ * Regex patterns coming from validation rules are compiled once through compile().
+ *
+ * @module pattern-registry
+ */
+
+const PATTERN_ENTITIES = ['mdm.db.PostalCodePatterns', 'mdm.db.IBANPatterns', 'mdm.db.VATPatterns'];
+
+class PatternRegistry {
+    constructor() {
+        this.log = cds.log('pattern-registry');
+        this.regexes = new LruCache({ maxEntries: 1000, ttl: Infinity });
+        this.attachedTo = null;
+        this.loading = null;
+        this._useBuiltins();
+    }
+
+    /**
+     * Reset to the built-in patterns of InputValidator
+     * @private
+     */
+    _useBuiltins() {
+        const { POSTAL_CODES, VAT_PATTERNS, IBAN_LENGTHS } = InputValidator.PATTERNS;
+        this.postalCodes = new Map(Object.entries(POSTAL_CODES).map(([country, pattern]) => [country, { pattern }]));
+        this.vatPatterns = new Map(Object.entries(VAT_PATTERNS).map(([country, pattern]) => [country, { pattern }]));
+        this.ibanSpecs = new Map(Object.entries(IBAN_LENGTHS).map(([country, length]) => [country, { length }]));
+    }
+
+    /**
+     * Load and compile the pattern tables (once; concurrent callers share the load)
+     * @param {Object} db - Database service
+     * @returns {Promise<void>}
+     */
+    load(db) {
+        if (!this.loading) {
+            this.loading = this._load(db).catch(error => {
+                this.loading = null;
+                this.log.error('Failed to load validation patterns, using built-in patterns', { error: error.message });
+            });
+        }
+        return this.loading;
+    }
+
+    /**
+     * Drop the loaded tables; the next load() reads them again
+     */
+    invalidate() {
+        this.loading = null;
+    }
+
+    async _load(db) {
+        this._attach(db);
+        const [postalRows, ibanRows, vatRows] = await Promise.all(PATTERN_ENTITIES.map(entity =>
+            db.run(SELECT.from(entity).where({ isActive: true }))
+        ));
+
+        this._useBuiltins();
+        for (const row of preferEnglish(postalRows)) {
+            const pattern = this._compileRow(row, 'PostalCodePatterns');
+            if (pattern) {
+                this.postalCodes.set(row.countryCode, { pattern, example: row.examplePostalCode });
+            }
+        }
+        for (const row of preferEnglish(vatRows)) {
+            const pattern = this._compileRow(row, 'VATPatterns');
+            if (pattern) {
+                this.vatPatterns.set(row.countryCode, { pattern, example: row.exampleVAT });
+            }
+        }
+        for (const row of preferEnglish(ibanRows)) {
+            this.ibanSpecs.set(row.countryCode, {
+                length: row.ibanLength,
+                pattern: row.pattern ? this._compileRow(row, 'IBANPatterns') : null
+            });
+        }
+
+        this.log.info('Validation patterns loaded', {
+            postalCodes: this.postalCodes.size,
+            vat: this.vatPatterns.size,
+            iban: this.ibanSpecs.size
+        });
+    }
+
+    _compileRow(row, entity) {
+        try {
+            return new RegExp(row.pattern);
+        } catch (error) {
+            this.log.warn(`Invalid pattern in ${entity} for ${row.countryCode}: ${row.pattern}`);
+            return null;
+        }
+    }
+
+    _attach(db) {
+        if (this.attachedTo === db) return;
+        this.attachedTo = db;
+        db.after(['CREATE', 'UPDATE', 'DELETE'], PATTERN_ENTITIES, () => this.invalidate());
+    }
+
+    /**
+     * Compiled RegExp for a pattern string (compiled once per pattern)
+     * @param {string} pattern - Regex source
+     * @returns {RegExp} Compiled pattern
+     * @throws {SyntaxError} If the pattern is invalid
+     */
+    compile(pattern) {
+        let regex = this.regexes.get(pattern);
+        if (!regex) {
+            regex = new RegExp(pattern);
+            this.regexes.set(pattern, regex);
+        }
+        return regex;
+    }
+
+    /**
+     * Check a postal code against the pattern of its country
+     * @param {string} countryCode - ISO country code
+     * @param {string} postalCode - Postal code
+     * @returns {string|null} Problem description, or null if valid or no pattern is known
+     */
+    checkPostalCode(countryCode, postalCode) {
+        const entry = this.postalCodes.get(countryCode);
+        if (!entry || !postalCode) return null;
+        if (entry.pattern.test(String(postalCode).trim().toUpperCase())) return null;
+        return entry.example
+            ? `Postal code format for ${countryCode} is invalid. Expected format: ${entry.example}`
+            : `Postal code format may be invalid for ${countryCode}`;
+    }
+
+    /**
+     * Check a VAT number
+     * @param {string} vatNumber - VAT number, starting with the country prefix
+     * @param {string} [countryCode] - Country to check against; without it the prefix decides
+     *   and an unknown country is reported
+     * @returns {string|null} Problem description, or null if valid
+     */
+    checkVatNumber(vatNumber, countryCode) {
+        if (countryCode) {
+            const entry = this.vatPatterns.get(countryCode);
+            if (!entry || entry.pattern.test(vatNumber)) return null;
+            return `Invalid VAT number format for ${countryCode}`;
+        }
+
+        // Extract country code (first 2 letters)
+        const countryMatch = vatNumber.match(/^([A-Z]{2})/);
+        if (!countryMatch) {
+            return 'VAT number must start with 2-letter country code';
+        }
+
+        const entry = this.vatPatterns.get(countryMatch[1]);
+        if (!entry) {
+            return `VAT validation not supported for country: ${countryMatch[1]}`;
+        }
+        return entry.pattern.test(vatNumber) ? null : `Invalid VAT number format for ${countryMatch[1]}`;
+    }
+
+    /**
+     * Check an IBAN: format, country length, optional country pattern and mod-97 check digits
+     * @param {string} iban - IBAN, spaces allowed
+     * @returns {string|null} Problem description, or null if valid
+     */
+    checkIban(iban) {
+        // Remove spaces and convert to uppercase
+        const cleanIBAN = iban.replace(/\s/g, '').toUpperCase();
+
+        // Check basic format: 2 letters + 2 digits + up to 30 alphanumeric
+        if (!/^[A-Z]{2}[0-9]{2}[A-Z0-9]{1,30}$/.test(cleanIBAN)) {
+            return 'Invalid IBAN format';
+        }
+
+        const countryCode = cleanIBAN.substring(0, 2);
+        const spec = this.ibanSpecs.get(countryCode);
+
+        if (spec && spec.length && cleanIBAN.length !== spec.length) {
+            return `IBAN length for ${countryCode} should be ${spec.length} characters, but got ${cleanIBAN.length}`;
+        }
+        if (spec && spec.pattern && !spec.pattern.test(cleanIBAN)) {
+            return `Invalid IBAN format for ${countryCode}`;
+        }
+
+        // Validate check digits using mod-97 algorithm, one character at a time
+        const rearranged = cleanIBAN.substring(4) + cleanIBAN.substring(0, 4);
+        let remainder = 0;
+        for (let i = 0; i < rearranged.length; i++) {
+            const code = rearranged.charCodeAt(i);
+            remainder = code >= 65
+                ? (remainder * 100 + code - 55) % 97
+                : (remainder * 10 + code - 48) % 97;
+        }
+
+        return remainder === 1 ? null : 'Invalid IBAN check digits';
+    }
+
+    /**
+     * Check all postal codes, IBANs and VAT IDs of a request in one call
+     * Covers addresses, banks, vatIds and the banks of subAccounts.
+     *
+     * @param {Object} data - Request data with child arrays
+     * @returns {Object} { isValid, errors: [{ entity, index, field, value, message }] }
+     */
+    validateRequestData(data) {
+        const errors = [];
+
+        (data.addresses || []).forEach((address, index) => {
+            const message = this.checkPostalCode(address.country_code || address.country, address.postalCode);
+            if (message) {
+                errors.push({ entity: 'PartnerAddresses', index, field: 'postalCode', value: address.postalCode, message });
+            }
+        });
+
+        const checkBanks = (banks, entity) => (banks || []).forEach((bank, index) => {
+            const message = bank.iban ? this.checkIban(bank.iban) : null;
+            if (message) {
+                errors.push({ entity, index, field: 'iban', value: bank.iban, message });
+            }
+        });
+        checkBanks(data.banks, 'PartnerBanks');
+        (data.subAccounts || []).forEach(subAccount => checkBanks(subAccount.banks, 'SubAccountBanks'));
+
+        (data.vatIds || []).forEach((vatId, index) => {
+            const message = vatId.vatNumber ? this.checkVatNumber(vatId.vatNumber, vatId.country_code) : null;
+            if (message) {
+                errors.push({ entity: 'PartnerVatIds', index, field: 'vatNumber', value: vatId.vatNumber, message });
+            }
+        });
+
+        return { isValid: errors.length === 0, errors };
+    }
+}
+
+/**
+ * One row per country, the English row where a country has several locales
+ * (patterns do not differ between locales)
+ */
+function preferEnglish(rows) {
+    const byCountry = new Map();
+    for (const row of rows) {
+        if (!byCountry.has(row.countryCode) || row.locale === 'en') {
+            byCountry.set(row.countryCode, row);
+        }
+    }
+    return byCountry.values();
+}
+
+// Export singleton instance
+module.exports = new PatternRegistry();
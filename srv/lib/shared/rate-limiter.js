@@ -0,0 +1,172 @@
+/**
+ * Rate and concurrency limits for calls to external services
+ *
+ * TokenBucket spaces calls to a sustained rate while allowing short bursts;
+ * Semaphore bounds the number of calls in flight. Waiters are served in order.
+ * CircuitBreaker stops calls to a system that keeps failing.
+ *
+ * @module rate-limiter
+ */
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Token bucket rate limiter
+ *
+ * @class TokenBucket
+ */
+class TokenBucket {
+    /**
+     * @param {Object} options
+     * @param {number} options.ratePerSecond - Sustained calls per second (Infinity disables the limit)
+     * @param {number} options.burst - Calls allowed at once after an idle period
+     */
+    constructor({ ratePerSecond = 5, burst = ratePerSecond } = {}) {
+        this.ratePerSecond = ratePerSecond;
+        this.capacity = Math.max(1, burst);
+        this.tokens = this.capacity;
+        this.updatedAt = Date.now();
+        this.queue = Promise.resolve();
+    }
+
+    _refill() {
+        const now = Date.now();
+        this.tokens = Math.min(this.capacity, this.tokens + (now - this.updatedAt) * this.ratePerSecond / 1000);
+        this.updatedAt = now;
+    }
+
+    /**
+     * Wait for a token
+     * @returns {Promise<void>} Resolves when the call may proceed
+     */
+    take() {
+        if (this.ratePerSecond === Infinity) {
+            return Promise.resolve();
+        }
+        // Chain the waiters so tokens are handed out in call order
+        const turn = this.queue.then(async () => {
+            this._refill();
+            if (this.tokens < 1) {
+                await sleep((1 - this.tokens) * 1000 / this.ratePerSecond);
+                this._refill();
+            }
+            this.tokens -= 1;
+        });
+        this.queue = turn;
+        return turn;
+    }
+}
+
+/**
+ * Counting semaphore
+ *
+ * @class Semaphore
+ */
+class Semaphore {
+    /**
+     * @param {number} limit - Maximum number of holders at once
+     */
+    constructor(limit) {
+        this.limit = Math.max(1, limit);
+        this.active = 0;
+        this.waiting = [];
+    }
+
+    async acquire() {
+        if (this.active < this.limit) {
+            this.active++;
+            return;
+        }
+        await new Promise(resolve => this.waiting.push(resolve));
+    }
+
+    release() {
+        const next = this.waiting.shift();
+        if (next) {
+            next(); // The slot passes directly to the next waiter
+        } else {
+            this.active--;
+        }
+    }
+
+    /**
+     * Run a function while holding a slot
+     * @param {Function} fn - Async function
+     * @returns {Promise<*>} Result of fn
+     */
+    async run(fn) {
+        await this.acquire();
+        try {
+            return await fn();
+        } finally {
+            this.release();
+        }
+    }
+}
+
+/**
+ * Circuit breaker for the calls to one external system
+ *
+ * After `threshold` consecutive failures the circuit opens and calls are refused for
+ * `cooldownMs`. Then a single trial call is let through (half-open): its success
+ * closes the circuit, its failure opens it again.
+ *
+ * @class CircuitBreaker
+ */
+class CircuitBreaker {
+    /**
+     * @param {Object} options
+     * @param {number} options.threshold - Consecutive failures that open the circuit
+     * @param {number} options.cooldownMs - Time the circuit stays open
+     */
+    constructor({ threshold = 5, cooldownMs = 60000 } = {}) {
+        this.threshold = Math.max(1, threshold);
+        this.cooldownMs = cooldownMs;
+        this.failures = 0;
+        this.openUntil = 0;
+        this.trialInFlight = false;
+    }
+
+    /**
+     * @returns {string} 'closed', 'open' or 'half-open'
+     */
+    get state() {
+        if (this.failures < this.threshold) return 'closed';
+        return Date.now() < this.openUntil ? 'open' : 'half-open';
+    }
+
+    /**
+     * Take permission for a call
+     * @returns {boolean} False while the circuit is open or the half-open trial is running
+     */
+    tryAcquire() {
+        const state = this.state;
+        if (state === 'closed') return true;
+        if (state === 'open' || this.trialInFlight) return false;
+        this.trialInFlight = true;
+        return true;
+    }
+
+    /**
+     * Give back a permission that was not used for a call
+     */
+    cancel() {
+        this.trialInFlight = false;
+    }
+
+    recordSuccess() {
+        this.failures = 0;
+        this.openUntil = 0;
+        this.trialInFlight = false;
+    }
+
+    recordFailure() {
+        this.failures++;
+        this.trialInFlight = false;
+        if (this.failures >= this.threshold) {
+            this.openUntil = Date.now() + this.cooldownMs;
+        }
+    }
+}
+
+module.exports = { TokenBucket, Semaphore, CircuitBreaker };
@@ -1,13 +1,67 @@
 const cds = require('@sap/cds');
+const LruCache = require('./lru-cache');
+const TokenIndex = require('./token-index');
+const { normalizePartnerName } = require('../partner-name-index');
 
 /**
  * Shared SAP Partner Service
  * Consolidates SAP partner lookup, import, and search functions
  * Used by Coupa and Salesforce services
  *
+ * - Partners are read through a cache by BP number (SAP_PARTNER_CACHE_TTL_MINUTES,
+ *   default 15; SAP_PARTNER_CACHE_SIZE, default 10000 partners)
+ * - Searches by name or VAT ID use an in-memory token index over partner name, VAT ID
+ *   and city, built once from ExistingPartners; until it is built they query the table
+ * - attach() keeps cache and index in sync with writes to ExistingPartners, and
+ *   invalidatePartner() drops a partner after an SAP writeback
+ *
  * @module sap-partner-service
  */
 
+const PARTNERS = 'mdm.db.ExistingPartners';
+const INDEX_COLUMNS = ['ID', 'sapBpNumber', 'partnerName', 'establishedVatId', 'establishedAddress'];
+const INDEX_PAGE_SIZE = 5000;
+const SEARCH_LIMIT = 20;
+const MIN_TERM_LENGTH = 2;
+
+const partnerCache = new LruCache({
+    maxEntries: Number(process.env.SAP_PARTNER_CACHE_SIZE) || 10000,
+    ttl: (Number(process.env.SAP_PARTNER_CACHE_TTL_MINUTES) || 15) * 60 * 1000
+});
+const searchIndex = new TokenIndex();
+let indexReady = null;     // Promise of the index build, set once a build has started
+let indexBuilt = false;
+let indexGeneration = 0;   // Incremented on reset so an outdated build stops
+let attachedTo = null;     // Database service the sync handlers are registered on
+
+/**
+ * Read an ExistingPartners row by BP number through the partner cache
+ * Unknown BP numbers are cached as null.
+ *
+ * @param {String} sapBpNumber - SAP Business Partner Number
+ * @param {Object} db - CDS database connection
+ * @returns {Promise<Object|null>} Partner row
+ */
+function findPartner(sapBpNumber, db) {
+    return partnerCache.getOrCompute(sapBpNumber, async () => {
+        const database = db || await cds.connect.to('db');
+        return (await database.run(SELECT.one.from(PARTNERS).where({ sapBpNumber }))) || null;
+    });
+}
+
+/**
+ * Drop a partner from the cache, e.g. after it was written back to SAP
+ *
+ * @param {String} [sapBpNumber] - SAP Business Partner Number; all partners if omitted
+ */
+function invalidatePartner(sapBpNumber) {
+    if (sapBpNumber) {
+        partnerCache.delete(sapBpNumber);
+    } else {
+        partnerCache.clear();
+    }
+}
+
 /**
  * Get SAP Partner Details by BP Number
  *
@@ -20,18 +74,14 @@ async function getSAPPartnerDetails(sapBpNumber, db) {
     log.info('Fetching SAP Partner Details', { sapBpNumber });
 
     try {
-        // Use SELECT API for better compatibility
-        const partners = await SELECT.from('mdm.db.ExistingPartners')
-            .where({ sapBpNumber })
-            .limit(1);
+        const partner = await findPartner(sapBpNumber, db);
 
-        if (!partners || partners.length === 0) {
+        if (!partner) {
             // Return mock response for demo
             log.warn('Partner not found, returning mock data', { sapBpNumber });
             return createMockPartner(sapBpNumber);
         }
 
-        const partner = partners[0];
         return mapPartnerToDetails(partner);
 
     } catch (error) {
@@ -53,18 +103,15 @@ async function importSAPPartner(sapBpNumber, sourceSystem, db) {
     log.info('Importing SAP Partner', { sapBpNumber, sourceSystem });
 
     try {
-        const { ExistingPartners } = db.entities('mdm.db');
-
-        const partners = await db.read(ExistingPartners).where({ sapBpNumber }).limit(1);
+        const partner = await findPartner(sapBpNumber, db);
 
-        if (!partners || partners.length === 0) {
+        if (!partner) {
             return JSON.stringify({
                 success: false,
                 message: `Partner ${sapBpNumber} not found`
             });
         }
 
-        const partner = partners[0];
         const requestData = mapPartnerToRequestData(partner, sourceSystem);
 
         return JSON.stringify({
@@ -83,6 +130,8 @@ async function importSAPPartner(sapBpNumber, sourceSystem, db) {
 
 /**
  * Search SAP Partners by criteria
+ * BP numbers are looked up through the partner cache; names (matched against partner
+ * name, VAT ID and city, words as prefixes) and VAT IDs through the search index.
  *
  * @param {Object} criteria - Search criteria { partnerName, sapBpNumber, vatId, satelliteSystemId }
  * @param {Object} db - CDS database connection
@@ -93,36 +142,43 @@ async function searchSAPPartners(criteria, db) {
     log.info('Searching SAP Partners', { criteria });
 
     try {
-        const { ExistingPartners } = db.entities('mdm.db');
-        const { partnerName, sapBpNumber, vatId, satelliteSystemId } = criteria;
-
-        let query = SELECT.from(ExistingPartners);
+        const { partnerName, sapBpNumber, vatId } = criteria;
+        let partners;
+        let scores = null;
 
         if (sapBpNumber) {
-            query.where({ sapBpNumber });
-        } else if (vatId) {
-            query.where({ establishedVatId: vatId });
-        } else if (partnerName) {
-            query.where({ partnerName: { like: `%${partnerName}%` } });
-        } else {
+            const partner = await findPartner(sapBpNumber, db);
+            partners = partner ? [partner] : [];
+        } else if (!vatId && !partnerName) {
             return [];
-        }
-
-        query.limit(20);
+        } else {
+            const terms = vatId ? vatTokens(vatId).slice(0, 1) : searchTerms(partnerName);
+            const hits = terms.length > 0 ? await searchIndexFor(terms, { prefix: !vatId }, db) : null;
 
-        const partners = await db.run(query);
+            if (hits) {
+                scores = new Map(hits.map(hit => [hit.id, Math.round(100 * hit.score / hit.maxScore)]));
+                const rows = hits.length > 0 ? await db.run(SELECT.from(PARTNERS).where({ ID: { in: hits.map(hit => hit.id) } })) : [];
+                partners = rows.sort((a, b) => scores.get(b.ID) - scores.get(a.ID) || a.partnerName.localeCompare(b.partnerName));
+            } else {
+                // Index not built yet (or a one-letter name): query the table
+                const query = SELECT.from(PARTNERS).limit(SEARCH_LIMIT);
+                partners = await db.run(vatId
+                    ? query.where({ establishedVatId: vatId })
+                    : query.where({ partnerName: { like: `%${partnerName}%` } }));
+            }
+        }
 
         const results = partners.map(p => ({
             sapBpNumber: p.sapBpNumber,
             partnerName: p.partnerName,
             vatId: p.establishedVatId || '',
             street: p.establishedAddress ? p.establishedAddress.split(',')[0] : '',
-            city: 'Unknown',
+            city: parseAddress(p.establishedAddress).city || 'Unknown',
             country: p.establishedCountry || '',
-            matchScore: 100
+            matchScore: scores ? scores.get(p.ID) : 100
         }));
 
-        log.info('Search completed', { resultCount: results.length });
+        log.info('Search completed', { resultCount: results.length, indexed: !!scores });
         return results;
 
     } catch (error) {
@@ -131,6 +187,160 @@ async function searchSAPPartners(criteria, db) {
     }
 }
 
+/**
+ * Search the partner index, or start building it and return null while it is not ready
+ *
+ * @private
+ */
+async function searchIndexFor(terms, options, db) {
+    if (!indexBuilt) {
+        buildSearchIndex(db);
+        return null;
+    }
+    return searchIndex.search(terms, { ...options, limit: SEARCH_LIMIT });
+}
+
+/**
+ * Build the partner search index once (concurrent callers share the build)
+ * Loads ExistingPartners in pages of INDEX_PAGE_SIZE rows.
+ *
+ * @param {Object} db - CDS database connection
+ * @returns {Promise<void>}
+ */
+function buildSearchIndex(db) {
+    if (!indexReady) {
+        indexReady = loadSearchIndex(db, ++indexGeneration).catch(error => {
+            resetSearchIndex();
+            cds.log('sap-partner').error('Failed to build partner search index', { error: error.message });
+        });
+    }
+    return indexReady;
+}
+
+async function loadSearchIndex(db, generation) {
+    const database = db || await cds.connect.to('db');
+    attach(database);
+    const startedAt = Date.now();
+    let lastId = null;
+    for (;;) {
+        const query = SELECT.from(PARTNERS).columns(...INDEX_COLUMNS).orderBy('ID').limit(INDEX_PAGE_SIZE);
+        const page = await database.run(lastId ? query.where({ ID: { '>': lastId } }) : query);
+        if (generation !== indexGeneration) return; // Reset while loading
+        if (page.length === 0) break;
+        page.forEach(partner => searchIndex.add(partner.ID, partnerTokens(partner)));
+        lastId = page[page.length - 1].ID;
+    }
+    searchIndex.sortTokens();
+    indexBuilt = true;
+    cds.log('sap-partner').info('Partner search index built', { ...searchIndex.getStats(), durationMs: Date.now() - startedAt });
+}
+
+/**
+ * Keep the partner cache and the search index in sync with writes to ExistingPartners.
+ * Safe to call repeatedly; handlers are registered once per database service.
+ *
+ * @param {Object} db - Database service
+ */
+function attach(db) {
+    if (attachedTo === db) return;
+    attachedTo = db;
+
+    const deleted = new WeakMap(); // req -> rows about to be deleted
+
+    db.after(['CREATE', 'UPDATE'], PARTNERS, async (result, req) => {
+        const where = req.query && req.query.UPDATE && req.query.UPDATE.where;
+        if (req.event === 'UPDATE' && !where) {
+            // Update of every partner: start over
+            resetSearchIndex();
+            return;
+        }
+        const partners = req.event === 'CREATE'
+            ? (Array.isArray(req.data) ? req.data : [req.data]).filter(p => p && p.ID)
+            : await db.run(SELECT.from(PARTNERS).columns(...INDEX_COLUMNS).where(where));
+
+        if (req.event === 'UPDATE' && req.data && req.data.sapBpNumber !== undefined) {
+            partnerCache.clear(); // The previous BP number is not known
+        } else {
+            partners.forEach(partner => partnerCache.delete(partner.sapBpNumber));
+        }
+        if (indexReady) {
+            partners.forEach(partner => searchIndex.add(partner.ID, partnerTokens(partner)));
+        }
+    });
+
+    db.before('DELETE', PARTNERS, async (req) => {
+        const where = req.query && req.query.DELETE && req.query.DELETE.where;
+        if (where) {
+            deleted.set(req, await db.run(SELECT.from(PARTNERS).columns('ID', 'sapBpNumber').where(where)));
+        }
+    });
+
+    db.after('DELETE', PARTNERS, (result, req) => {
+        const partners = deleted.get(req);
+        if (!partners) {
+            resetSearchIndex();
+            return;
+        }
+        partners.forEach(partner => {
+            partnerCache.delete(partner.sapBpNumber);
+            searchIndex.remove(partner.ID);
+        });
+    });
+}
+
+function resetSearchIndex() {
+    partnerCache.clear();
+    searchIndex.clear();
+    indexReady = null;
+    indexBuilt = false;
+    indexGeneration++;
+}
+
+/**
+ * Partner cache and search index statistics
+ *
+ * @returns {Object} { cache, searchIndex }
+ */
+function getCacheStats() {
+    return {
+        cache: partnerCache.getStats(),
+        searchIndex: { ...searchIndex.getStats(), ready: indexBuilt }
+    };
+}
+
+/**
+ * Index tokens of a partner: name words, VAT ID and city words
+ *
+ * @private
+ */
+function partnerTokens(partner) {
+    return [
+        ...searchTerms(partner.partnerName),
+        ...vatTokens(partner.establishedVatId),
+        ...searchTerms(parseAddress(partner.establishedAddress).city)
+    ];
+}
+
+/**
+ * Words of a name or city as normalized for duplicate detection
+ *
+ * @private
+ */
+function searchTerms(text) {
+    return normalizePartnerName(text).split(' ').filter(term => term.length >= MIN_TERM_LENGTH);
+}
+
+/**
+ * VAT ID without separators, and without its country prefix
+ *
+ * @private
+ */
+function vatTokens(vatId) {
+    const vat = (vatId || '').toLowerCase().replace(/[^a-z0-9]/g, '');
+    if (!vat) return [];
+    return /^[a-z]{2}\d/.test(vat) ? [vat, vat.slice(2)] : [vat];
+}
+
 /**
  * Create mock partner for demo purposes
  *
@@ -337,5 +547,10 @@ function parseAddress(addressString, country) {
 module.exports = {
     getSAPPartnerDetails,
     importSAPPartner,
-    searchSAPPartners
+    searchSAPPartners,
+    findPartner,
+    invalidatePartner,
+    buildSearchIndex,
+    attach,
+    getCacheStats
 };
@@ -0,0 +1,205 @@
+/**
+ * In-memory inverted index for token search
+ *
+ * Each document (an ID with a set of tokens) gets a document number; every token
+ * keeps the numbers of the documents containing it. A search returns the documents
+ * that match all query terms, where a term matches a token exactly or as its prefix
+ * ("acm" finds "acme"), best matches first.
+ *
+ * Documents are replaced with add() and removed with remove(); removed numbers are
+ * skipped until enough accumulate to compact the postings.
+ *
+ * @class TokenIndex
+ */
+class TokenIndex {
+    constructor() {
+        this.clear();
+    }
+
+    /**
+     * Remove all documents
+     */
+    clear() {
+        this.ids = [];               // document number -> ID (null once removed)
+        this.docs = new Map();       // ID -> document number
+        this.postings = new Map();   // token -> document numbers
+        this.sortedTokens = [];      // tokens in sort order for prefix lookups
+        this.newTokens = [];         // tokens added since sortedTokens was built
+        this.removed = 0;
+    }
+
+    get size() {
+        return this.docs.size;
+    }
+
+    /**
+     * Add a document, replacing an earlier version with the same ID
+     * @param {string} id - Document ID
+     * @param {Iterable<string>} tokens - Tokens of the document
+     */
+    add(id, tokens) {
+        this.remove(id);
+        const doc = this.ids.length;
+        this.ids.push(id);
+        this.docs.set(id, doc);
+        for (const token of new Set(tokens)) {
+            if (!token) continue;
+            let posting = this.postings.get(token);
+            if (!posting) {
+                posting = [];
+                this.postings.set(token, posting);
+                this.newTokens.push(token);
+            }
+            posting.push(doc);
+        }
+    }
+
+    /**
+     * Remove a document
+     * @param {string} id - Document ID
+     * @returns {boolean} True if the document was indexed
+     */
+    remove(id) {
+        const doc = this.docs.get(id);
+        if (doc === undefined) return false;
+        this.docs.delete(id);
+        this.ids[doc] = null;
+        this.removed++;
+        if (this.removed > 1000 && this.removed > this.ids.length / 4) {
+            this._compact();
+        }
+        return true;
+    }
+
+    /**
+     * Renumber the remaining documents and drop removed ones from the postings
+     * @private
+     */
+    _compact() {
+        const renumbered = new Int32Array(this.ids.length).fill(-1);
+        const ids = [];
+        this.ids.forEach((id, doc) => {
+            if (id !== null) {
+                renumbered[doc] = ids.length;
+                this.docs.set(id, ids.length);
+                ids.push(id);
+            }
+        });
+        for (const [token, posting] of this.postings) {
+            const kept = posting.map(doc => renumbered[doc]).filter(doc => doc >= 0);
+            if (kept.length > 0) {
+                this.postings.set(token, kept);
+            } else {
+                this.postings.delete(token);
+            }
+        }
+        this.ids = ids;
+        this.removed = 0;
+        this.sortTokens();
+    }
+
+    /**
+     * Sort all tokens for prefix lookups (done on demand; call after a bulk load)
+     */
+    sortTokens() {
+        this.sortedTokens = [...this.postings.keys()].sort();
+        this.newTokens = [];
+    }
+
+    /**
+     * Tokens starting with a prefix: binary search over the sorted tokens, plus a scan
+     * of the tokens added since (sorted in once there are more than a few thousand)
+     * @private
+     */
+    _tokensWithPrefix(prefix) {
+        if (this.newTokens.length > 5000 || this.newTokens.length > this.sortedTokens.length) {
+            this.sortTokens();
+        }
+        const tokens = this.sortedTokens;
+        let low = 0;
+        let high = tokens.length;
+        while (low < high) {
+            const middle = (low + high) >>> 1;
+            if (tokens[middle] < prefix) low = middle + 1;
+            else high = middle;
+        }
+        const matches = [];
+        for (let i = low; i < tokens.length && tokens[i].startsWith(prefix); i++) {
+            if (this.postings.has(tokens[i])) matches.push(tokens[i]);
+        }
+        for (const token of this.newTokens) {
+            if (token.startsWith(prefix) && this.postings.has(token)) matches.push(token);
+        }
+        return matches;
+    }
+
+    /**
+     * Documents matching all terms, best first
+     * A term scores 2 for an exact token match and 1 for a prefix match.
+     * @param {string[]} terms - Query terms
+     * @param {Object} [options]
+     * @param {boolean} [options.prefix=true] - Let terms match token prefixes
+     * @param {number} [options.limit=20] - Maximum number of results
+     * @returns {Array} [{ id, score, maxScore }]
+     */
+    search(terms, { prefix = true, limit = 20 } = {}) {
+        const distinct = [...new Set(terms)].filter(Boolean);
+        if (distinct.length === 0) return [];
+
+        // Postings per term; intersect starting with the rarest term
+        const matches = distinct.map(term => {
+            const tokens = prefix ? this._tokensWithPrefix(term) : (this.postings.has(term) ? [term] : []);
+            const lists = tokens.map(token => ({ posting: this.postings.get(token), score: token === term ? 2 : 1 }));
+            return { lists, size: lists.reduce((sum, list) => sum + list.posting.length, 0) };
+        }).sort((a, b) => a.size - b.size);
+
+        // Per document: terms matched so far, score of the current term, total score
+        const matched = new Uint8Array(this.ids.length);
+        const termScore = new Uint8Array(this.ids.length);
+        const total = new Uint16Array(this.ids.length);
+        let candidates = [];
+
+        matches.forEach(({ lists }, term) => {
+            const next = [];
+            for (const { posting, score } of lists) {
+                for (const doc of posting) {
+                    if (matched[doc] === term && this.ids[doc] !== null) {
+                        matched[doc] = term + 1;
+                        termScore[doc] = score;
+                        total[doc] += score;
+                        next.push(doc);
+                    } else if (matched[doc] === term + 1 && termScore[doc] < score) {
+                        total[doc] += score - termScore[doc];
+                        termScore[doc] = score;
+                    }
+                }
+            }
+            candidates = next;
+        });
+
+        // Scores are small integers: bucket the documents instead of sorting them all
+        const maxScore = 2 * distinct.length;
+        const buckets = Array.from({ length: maxScore + 1 }, () => []);
+        for (const doc of candidates) {
+            if (buckets[total[doc]].length < limit) buckets[total[doc]].push(doc);
+        }
+        const results = [];
+        for (let score = maxScore; score > 0 && results.length < limit; score--) {
+            for (const doc of buckets[score]) {
+                if (results.length === limit) break;
+                results.push({ id: this.ids[doc], score, maxScore });
+            }
+        }
+        return results;
+    }
+
+    /**
+     * Get index statistics
+     * @returns {Object} Documents, distinct tokens and removed documents not yet compacted
+     */
+    getStats() {
+        return { documents: this.docs.size, tokens: this.postings.size, removed: this.removed };
+    }
+}
+
+module.exports = TokenIndex;
@@ -0,0 +1,527 @@
+const cds = require('@sap/cds');
+const crypto = require('crypto');
+const requestNumberGenerator = require('../utils/request-number-generator');
+
+/**
+ * Request Status Feed
+ *
+ * Satellite systems follow their requests through a change feed instead of polling the
+ * status endpoints. Every status (or SAP BP number) change of a BusinessPartnerRequest
+ * is appended to mdm.db.RequestStatusEvents in the transaction of the change, by
+ * handlers on the database service, so the log holds exactly the committed transitions.
+ *
+ * - Events are numbered from a counter row that stays locked until the transaction
+ *   ends: sequence order is commit order, and a client that has seen sequence N has
+ *   seen every earlier event
+ * - GET /integration/partners/status-feed?after=<sequence> answers as soon as there
+ *   are events after the cursor (long-poll, up to STATUS_FEED_MAX_WAIT_S, default 25)
+ *   and returns the cursor for the next call; with Accept: text/event-stream the
+ *   events are streamed as Server-Sent Events (id = sequence, resumed from
+ *   Last-Event-ID)
+ * - While clients are waiting, one poll per instance (STATUS_FEED_POLL_MS, default
+ *   1000, immediately after local commits) reads new events into a buffer of the most
+ *   recent STATUS_FEED_BUFFER_SIZE events (default 10000) that serves all clients;
+ *   older cursors are read from the table
+ *
+ * sendConditional() answers the status endpoints with ETag / Last-Modified validators;
+ * notModified() answers a revalidation from the modification time alone, before the
+ * response body is read.
+ *
+ * @module status-feed
+ */
+
+const REQUESTS = 'mdm.db.BusinessPartnerRequests';
+const EVENTS = 'mdm.db.RequestStatusEvents';
+const SEQUENCE_COUNTER = 'STATUS_EVENTS';
+const TRACKED = ['status', 'sapBpNumber'];
+const EVENT_COLUMNS = ['sequence', 'requestNumber', 'sourceSystem', 'previousStatus', 'status', 'sapBpNumber', 'occurredAt'];
+const PAGE_SIZE = 500;
+const HEARTBEAT_INTERVAL = 15000;
+
+/**
+ * Tracked columns set by an UPDATE
+ *
+ * @param {Object} update - CQN UPDATE
+ * @returns {Object} e.g. { status: 'Approved' }; expressions other than values are ignored
+ */
+function updatedValues(update) {
+  const values = {};
+  for (const source of [update && update.data, update && update.with]) {
+    if (!source) continue;
+    for (const column of TRACKED) {
+      const value = source[column];
+      if (value === undefined) continue;
+      if (value === null || typeof value !== 'object') {
+        values[column] = value;
+      } else if ('val' in value) {
+        values[column] = value.val;
+      }
+    }
+  }
+  return values;
+}
+
+function matches(event, filter) {
+  return (!filter.sourceSystem || event.sourceSystem === filter.sourceSystem) &&
+    (!filter.requestNumbers || filter.requestNumbers.has(event.requestNumber));
+}
+
+/**
+ * Set ETag and Last-Modified validators derived from the last change of a resource, and
+ * send 304 Not Modified if the client's If-None-Match / If-Modified-Since still matches.
+ * The ETag has millisecond precision; Last-Modified has one-second precision, so clients
+ * should revalidate with If-None-Match: If-Modified-Since alone answers 304 for a change
+ * made in the same second as the previous one.
+ *
+ * @param {Object} req - Express request
+ * @param {Object} res - Express response
+ * @param {string|Date} lastModified - Last change of the resource
+ * @returns {boolean} true if 304 was sent
+ */
+function notModified(req, res, lastModified) {
+  const modified = new Date(lastModified);
+  res.set({
+    'ETag': `W/"${modified.getTime().toString(36)}"`,
+    'Last-Modified': modified.toUTCString(),
+    'Cache-Control': 'private, no-cache'
+  });
+  if (req.fresh) {
+    res.status(304).end();
+    return true;
+  }
+  return false;
+}
+
+/**
+ * Send a JSON body with ETag and Last-Modified validators, or 304 Not Modified if the
+ * client's If-None-Match / If-Modified-Since still matches. With lastModified the
+ * validators are those of notModified(), else the ETag is a hash of the body.
+ *
+ * @param {Object} req - Express request
+ * @param {Object} res - Express response
+ * @param {Object} body - Response body
+ * @param {string|Date} [lastModified] - Last change of the resource
+ */
+function sendConditional(req, res, body, lastModified) {
+  const json = JSON.stringify(body);
+  if (lastModified) {
+    if (notModified(req, res, lastModified)) return;
+  } else {
+    const hash = crypto.createHash('sha1').update(json).digest('base64url');
+    res.set({ 'ETag': `W/"${hash}"`, 'Cache-Control': 'private, no-cache' });
+    if (req.fresh) {
+      return res.status(304).end();
+    }
+  }
+  res.type('application/json').send(json);
+}
+
+class StatusFeed {
+  constructor() {
+    const env = process.env;
+    this.log = cds.log('status-feed');
+    this.pollInterval = Number(env.STATUS_FEED_POLL_MS) || 1000;
+    this.maxWait = (Number(env.STATUS_FEED_MAX_WAIT_S) || 25) * 1000;
+    this.bufferSize = Number(env.STATUS_FEED_BUFFER_SIZE) || 10000;
+
+    this.attachedTo = null;
+    this.db = null;
+    this.requestEntities = new Map(); // entity name -> resolves to BusinessPartnerRequests
+    this.previous = new WeakMap();    // UPDATE request -> rows before the update
+
+    this.listeners = new Set();
+    this.buffer = [];         // Recent events in sequence order
+    this.floor = null;        // The buffer holds every event after this sequence (null: not polling)
+    this.lastSequence = 0;    // Highest sequence read
+    this.timer = null;
+    this.ready = null;        // First poll
+    this.polling = null;
+    this.pollAgain = false;
+  }
+
+  /**
+   * Register the handlers that append status events for changes of
+   * BusinessPartnerRequests (also through service projections).
+   * Safe to call repeatedly; handlers are registered once per database service.
+   *
+   * @param {Object} db - Database service
+   */
+  attach(db) {
+    if (this.attachedTo === db) return;
+    this.attachedTo = db;
+    this.db = db;
+
+    db.before('UPDATE', async (req) => {
+      if (!this.isRequestEntity(req.target)) return;
+      const changes = updatedValues(req.query && req.query.UPDATE);
+      if (Object.keys(changes).length === 0) return;
+      const { UPDATE } = req.query;
+      const where = UPDATE.where || (UPDATE.entity && UPDATE.entity.ref && UPDATE.entity.ref[0].where);
+      if (!where) return; // Updates of all requests are not tracked
+      const rows = await db.run(SELECT.from(REQUESTS)
+        .columns('ID', 'requestNumber', 'sourceSystem', 'status', 'sapBpNumber')
+        .where(where));
+      this.previous.set(req, { rows, changes });
+    });
+
+    db.after('UPDATE', async (result, req) => {
+      const captured = this.previous.get(req);
+      if (!captured) return;
+      const { rows, changes } = captured;
+      const changed = rows.filter(row => TRACKED.some(column => column in changes && changes[column] !== row[column]));
+      await this.append(db, changed.map(row => ({
+        request_ID: row.ID,
+        requestNumber: row.requestNumber,
+        sourceSystem: row.sourceSystem,
+        previousStatus: row.status,
+        status: 'status' in changes ? changes.status : row.status,
+        sapBpNumber: 'sapBpNumber' in changes ? changes.sapBpNumber : row.sapBpNumber
+      })));
+    });
+
+    db.after('CREATE', async (result, req) => {
+      if (!this.isRequestEntity(req.target)) return;
+      const rows = (Array.isArray(req.data) ? req.data : [req.data]).filter(row => row && row.ID);
+      await this.append(db, rows.map(row => ({
+        request_ID: row.ID,
+        requestNumber: row.requestNumber,
+        sourceSystem: row.sourceSystem,
+        previousStatus: null,
+        status: row.status || 'Draft',
+        sapBpNumber: row.sapBpNumber
+      })));
+    });
+
+    this.log.debug('Status feed attached');
+  }
+
+  /**
+   * Whether an entity is BusinessPartnerRequests or a projection on it (drafts are not)
+   *
+   * @param {Object|string} target - Entity definition or name
+   * @returns {boolean}
+   */
+  isRequestEntity(target) {
+    const name = typeof target === 'string' ? target : target && target.name;
+    if (!name) return false;
+    if (!this.requestEntities.has(name)) {
+      const definitions = (cds.model && cds.model.definitions) || {};
+      let entity = definitions[name] || target;
+      let found = false;
+      for (let depth = 0; entity && depth < 10 && !found; depth++) {
+        found = entity.name === REQUESTS;
+        const source = (entity.projection && entity.projection.from) ||
+          (entity.query && entity.query.SELECT && entity.query.SELECT.from);
+        entity = source && source.ref && definitions[source.ref[0]];
+      }
+      this.requestEntities.set(name, found);
+    }
+    return this.requestEntities.get(name);
+  }
+
+  /**
+   * Append events in the current transaction
+   *
+   * @param {Object} db - Database service or transaction
+   * @param {Array<Object>} events - Events without sequence and timestamp
+   */
+  async append(db, events) {
+    if (events.length === 0) return;
+    const first = await requestNumberGenerator.reserveValues(SEQUENCE_COUNTER, events.length, db);
+    const occurredAt = new Date().toISOString();
+    await db.run(INSERT.into(EVENTS).entries(events.map((event, i) => ({ ...event, sequence: first + i, occurredAt }))));
+
+    // Deliver right after the surrounding transaction commits instead of at the next poll
+    if (this.timer && typeof cds.context?.on === 'function') {
+      cds.context.on('succeeded', () => this.wakeUp());
+    }
+  }
+
+  /**
+   * Express handler: long-poll (JSON) or Server-Sent Events (Accept: text/event-stream)
+   * Query: after (cursor; default: now), wait (seconds, long-poll only),
+   * requestNumbers (comma-separated), sourceSystem (default: the calling system)
+   *
+   * @param {Object} req - Express request (req.sourceSystem set by authentication)
+   * @param {Object} res - Express response
+   */
+  async handle(req, res) {
+    const after = req.get('Last-Event-ID') || req.query.after;
+    if (after !== undefined && !/^\d+$/.test(after)) {
+      return res.status(400).json({
+        error: 'Invalid cursor',
+        message: 'after must be the sequence (cursor) of a previous response'
+      });
+    }
+    const requestNumbers = req.query.requestNumbers
+      ? new Set(String(req.query.requestNumbers).split(',').map(n => n.trim()).filter(Boolean))
+      : null;
+    const filter = { sourceSystem: req.query.sourceSystem || req.sourceSystem, requestNumbers };
+    const cursor = after === undefined ? null : Number(after);
+
+    try {
+      if (req.accepts(['json', 'text/event-stream']) === 'text/event-stream') {
+        return await this.stream(res, filter, cursor);
+      }
+      const wait = Math.min(req.query.wait === undefined ? this.maxWait : Number(req.query.wait) * 1000 || 0, this.maxWait);
+      const page = await this.next(cursor, filter, wait, res);
+      res.set('Cache-Control', 'no-store').json({ success: true, ...page });
+    } catch (error) {
+      this.log.error('Status feed failed', { sourceSystem: filter.sourceSystem, error: error.message });
+      if (!res.headersSent) {
+        res.status(500).json({ error: 'Status feed failed', message: error.message });
+      } else {
+        res.end();
+      }
+    }
+  }
+
+  /**
+   * Events after a cursor, waiting up to waitMs for the first one
+   *
+   * @param {number|null} after - Cursor; null for events from now on
+   * @param {Object} filter - { sourceSystem, requestNumbers }
+   * @param {number} waitMs - Maximum wait
+   * @param {Object} [res] - Express response; the wait ends when the client disconnects
+   * @returns {Promise<Object>} { events, cursor }
+   */
+  async next(after, filter, waitMs, res) {
+    const listener = this._listen(filter, after);
+    try {
+      await this.ready;
+      if (after === null) {
+        after = listener.cursor = await this.currentSequence();
+      }
+      const page = await this.read(after, filter);
+      if (page.events.length > 0 || waitMs <= 0) return page;
+
+      if (listener.queue.length === 0) {
+        let timeout;
+        await new Promise(resolve => {
+          listener.wake = resolve;
+          timeout = setTimeout(resolve, waitMs);
+          if (res) res.once('close', resolve);
+        });
+        clearTimeout(timeout);
+      }
+      const events = listener.queue.filter(event => event.sequence > after).slice(0, PAGE_SIZE);
+      return {
+        events,
+        cursor: events.length > 0 ? events[events.length - 1].sequence : Math.max(after, this.lastSequence)
+      };
+    } finally {
+      this._unlisten(listener);
+    }
+  }
+
+  /**
+   * Stream the events after a cursor, then new events as they are read, as
+   * Server-Sent Events until the client disconnects
+   *
+   * @param {Object} res - Express response
+   * @param {Object} filter - { sourceSystem, requestNumbers }
+   * @param {number|null} after - Cursor; null for events from now on
+   */
+  async stream(res, filter, after) {
+    res.status(200).set({
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-store',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    const listener = this._listen(filter, after);
+    let closed = false;
+    const heartbeat = setInterval(() => res.write(': keep-alive\n\n'), HEARTBEAT_INTERVAL);
+    res.once('close', () => {
+      closed = true;
+      clearInterval(heartbeat);
+      this._unlisten(listener);
+      if (listener.wake) listener.wake();
+    });
+
+    await this.ready;
+    if (listener.cursor === null) {
+      listener.cursor = await this.currentSequence();
+    }
+
+    // Catch up from the cursor, then send what the poll delivers
+    for (let page = null; !closed && (!page || page.events.length === PAGE_SIZE);) {
+      page = await this.read(listener.cursor, filter);
+      await this._send(res, listener, page.events);
+    }
+    while (!closed) {
+      const events = listener.queue.splice(0).filter(event => event.sequence > listener.cursor);
+      if (events.length > 0) {
+        await this._send(res, listener, events);
+      } else {
+        await new Promise(resolve => { listener.wake = resolve; });
+        listener.wake = null;
+      }
+    }
+  }
+
+  async _send(res, listener, events) {
+    if (events.length === 0) return;
+    let flushed = true;
+    for (const event of events) {
+      flushed = res.write(`id: ${event.sequence}\nevent: status\ndata: ${JSON.stringify(event)}\n\n`);
+      listener.cursor = event.sequence;
+    }
+    if (!flushed) {
+      await new Promise(resolve => {
+        res.once('drain', resolve);
+        res.once('close', resolve);
+      });
+    }
+  }
+
+  /**
+   * One page of events after a cursor, from the buffer if it covers the cursor
+   *
+   * @param {number} after - Cursor
+   * @param {Object} filter - { sourceSystem, requestNumbers }
+   * @returns {Promise<Object>} { events, cursor } - cursor is the value for the next call
+   */
+  async read(after, filter) {
+    if (this.floor !== null && after >= this.floor) {
+      // Binary search for the first buffered event after the cursor
+      let low = 0;
+      let high = this.buffer.length;
+      while (low < high) {
+        const middle = (low + high) >>> 1;
+        if (this.buffer[middle].sequence <= after) low = middle + 1;
+        else high = middle;
+      }
+      const events = [];
+      for (let i = low; i < this.buffer.length && events.length < PAGE_SIZE; i++) {
+        if (matches(this.buffer[i], filter)) events.push(this.buffer[i]);
+      }
+      const cursor = events.length === PAGE_SIZE ? events[PAGE_SIZE - 1].sequence : Math.max(after, this.lastSequence);
+      return { events, cursor };
+    }
+
+    const db = this.db || await cds.connect.to('db');
+    const where = { sequence: { '>': after } };
+    if (filter.sourceSystem) where.sourceSystem = filter.sourceSystem;
+    if (filter.requestNumbers) where.requestNumber = { in: [...filter.requestNumbers] };
+    const events = (await db.run(SELECT.from(EVENTS).columns(EVENT_COLUMNS).where(where).orderBy('sequence').limit(PAGE_SIZE)))
+      .map(toEvent);
+    return { events, cursor: events.length > 0 ? events[events.length - 1].sequence : after };
+  }
+
+  /**
+   * Sequence of the latest committed event (a cursor for "from now on")
+   *
+   * @returns {Promise<number>}
+   */
+  async currentSequence() {
+    if (this.floor !== null) return this.lastSequence;
+    const db = this.db || await cds.connect.to('db');
+    const row = await db.run(SELECT.one.from(EVENTS).columns('max(sequence) as last'));
+    return Number(row && row.last) || 0;
+  }
+
+  _listen(filter, cursor) {
+    const listener = { filter, cursor, queue: [], wake: null };
+    this.listeners.add(listener);
+    if (!this.timer) {
+      this.timer = setInterval(() => this.wakeUp(), this.pollInterval);
+      this.timer.unref?.();
+      this.ready = this.wakeUp();
+    }
+    return listener;
+  }
+
+  _unlisten(listener) {
+    this.listeners.delete(listener);
+    if (this.listeners.size === 0 && this.timer) {
+      // Without clients the buffer would go stale: drop it and stop polling
+      clearInterval(this.timer);
+      this.timer = null;
+      this.buffer = [];
+      this.floor = null;
+    }
+  }
+
+  /**
+   * Poll for new events unless a poll is running
+   *
+   * @returns {Promise<void>} Completion of the current poll
+   */
+  wakeUp() {
+    if (this.polling) {
+      this.pollAgain = true;
+      return this.polling;
+    }
+    this.polling = this.poll()
+      .catch(error => this.log.warn('Status feed poll failed', { error: error.message }))
+      .finally(() => {
+        this.polling = null;
+        if (this.pollAgain && this.timer) {
+          this.pollAgain = false;
+          this.wakeUp();
+        }
+      });
+    return this.polling;
+  }
+
+  /**
+   * Read new events into the buffer and hand them to the waiting clients
+   */
+  async poll() {
+    const db = this.db || await cds.connect.to('db');
+    if (this.floor === null) {
+      const row = await db.run(SELECT.one.from(EVENTS).columns('max(sequence) as last'));
+      if (!this.timer) return;
+      this.buffer = [];
+      this.lastSequence = Number(row && row.last) || 0;
+      this.floor = this.lastSequence;
+      return;
+    }
+
+    for (;;) {
+      const events = (await db.run(SELECT.from(EVENTS).columns(EVENT_COLUMNS)
+        .where({ sequence: { '>': this.lastSequence } })
+        .orderBy('sequence')
+        .limit(PAGE_SIZE))).map(toEvent);
+      if (!this.timer || events.length === 0) return;
+
+      this.buffer.push(...events);
+      this.lastSequence = events[events.length - 1].sequence;
+      if (this.buffer.length > this.bufferSize) {
+        const dropped = this.buffer.splice(0, this.buffer.length - this.bufferSize);
+        this.floor = dropped[dropped.length - 1].sequence;
+      }
+
+      for (const listener of this.listeners) {
+        const matching = events.filter(event =>
+          (listener.cursor === null || event.sequence > listener.cursor) && matches(event, listener.filter));
+        if (matching.length > 0) {
+          listener.queue.push(...matching);
+          if (listener.wake) listener.wake();
+        }
+      }
+      if (events.length < PAGE_SIZE) return;
+    }
+  }
+
+  /**
+   * Get feed statistics
+   *
+   * @returns {Object} Connected clients, buffered events and the latest sequence read
+   */
+  getStats() {
+    return { listeners: this.listeners.size, buffered: this.buffer.length, lastSequence: this.lastSequence };
+  }
+}
+
+function toEvent(row) {
+  return { ...row, sequence: Number(row.sequence) };
+}
+
+module.exports = new StatusFeed();
+module.exports.sendConditional = sendConditional;
+module.exports.notModified = notModified;
+module.exports.updatedValues = updatedValues;
@@ -1,4 +1,10 @@
 const cds = require('@sap/cds');
+const LruCache = require('./shared/lru-cache');
+const patternRegistry = require('./shared/pattern-registry');
+
+// Rule lookups shared by all ValidationService instances (services create one per request).
+// Entries: { entity, locales, context, rules }; admin writes invalidate the affected contexts.
+const ruleCache = new LruCache({ maxEntries: 500, ttl: 5 * 60 * 1000 });
 
 /**
  * Dynamic validation service that executes database-driven validation rules
@@ -17,8 +23,7 @@ class ValidationService {
   constructor(db) {
     this.db = db;
     this.log = cds.log('validation-service');
-    this.validationCache = new Map(); // Cache for performance
-    this.cacheTimeout = 5 * 60 * 1000; // 5 minutes
+    this.validationCache = ruleCache;
   }
 
   /**
@@ -40,6 +45,13 @@ class ValidationService {
     const context = { status, sourceSystem, entityType, requestType, locale };
 
     try {
+      // Country patterns are read and compiled once, not per rule
+      await patternRegistry.load(this.db);
+
+      // Postal codes, IBANs and VAT IDs are checked against the country patterns in one
+      // pass; IBAN and VAT rules report from this result instead of checking each value
+      const patternCheck = patternRegistry.validateRequestData(data);
+
       // 1. Get applicable field-level rules with fallback logic
       const fieldRules = await this.getApplicableRules(context, locale);
       this.log.info(`Found ${fieldRules.length} field-level rules`);
@@ -54,7 +66,7 @@ class ValidationService {
           continue;
         }
 
-        const result = await this.executeFieldValidation(rule, data);
+        const result = await this.executeFieldValidation(rule, data, patternCheck);
         if (!result.isValid) {
           this.addValidationMessage(result, rule, errors, warnings);
         }
@@ -129,14 +141,23 @@ class ValidationService {
    */
   async getApplicableRules(context, locale = 'en') {
     const { status, sourceSystem, entityType, requestType } = context;
-    const cacheKey = `${status}-${sourceSystem}-${entityType}-${requestType}-${locale}`;
-
-    // Check cache first
-    if (this.validationCache.has(cacheKey)) {
-      this.log.info('Using cached validation rules');
-      return this.validationCache.get(cacheKey);
-    }
+    const cacheKey = `ValidationRules|${status}|${sourceSystem}|${entityType}|${requestType}|${locale}`;
+
+    const entry = await this.validationCache.getOrCompute(cacheKey, async () => ({
+      entity: 'ValidationRules',
+      context: { status, sourceSystem, entityType, requestType },
+      ...await this._loadApplicableRules(context, locale)
+    }));
+    return entry.rules;
+  }
 
+  /**
+   * Load and rank the field rules for a context (cache miss path of getApplicableRules)
+   * @returns {Object} { rules, locales } - locales the rules were read for
+   * @private
+   */
+  async _loadApplicableRules(context, locale) {
+    const { status, sourceSystem, entityType, requestType } = context;
     const { ValidationRules } = this.db.entities('mdm.db');
 
     // Normalize locale: Only 'en' and 'de' are supported, fallback to 'en' for others
@@ -149,6 +170,7 @@ class ValidationService {
       isActive: true,
       locale: effectiveLocale
     });
+    const locales = [effectiveLocale];
 
     // If no rules found for locale and locale is not 'en', fallback to English
     if (allRules.length === 0 && effectiveLocale !== 'en') {
@@ -157,6 +179,7 @@ class ValidationService {
         isActive: true,
         locale: 'en'
       });
+      locales.push('en');
     }
 
     // Filter rules that match the context (field is null OR equals context value)
@@ -186,11 +209,7 @@ class ValidationService {
     // Deduplicate rules (most specific wins)
     const deduplicatedRules = this.deduplicateRules(matchingRules);
 
-    // Cache for performance
-    this.validationCache.set(cacheKey, deduplicatedRules);
-    setTimeout(() => this.validationCache.delete(cacheKey), this.cacheTimeout);
-
-    return deduplicatedRules;
+    return { rules: deduplicatedRules, locales };
   }
 
   /**
@@ -221,8 +240,12 @@ class ValidationService {
   /**
    * Execute field-level validation
    * Dispatches to specific validation methods based on validationRule type
+   * @param {Object} rule - Validation rule
+   * @param {Object} data - Request data
+   * @param {Object} [patternCheck] - Result of patternRegistry.validateRequestData(data);
+   *   without it, IBAN and VAT values are checked one by one
    */
-  async executeFieldValidation(rule, data) {
+  async executeFieldValidation(rule, data, patternCheck = null) {
     const { validationType, targetEntity, targetField, validationRule, validationValue } = rule;
 
     // Get field value from data
@@ -254,10 +277,10 @@ class ValidationService {
         return this.validateEmail(fieldValue, rule);
 
       case 'VAT':
-        return this.validateVAT(fieldValue, rule);
+        return patternCheck ? this.validateFromPatternCheck(patternCheck, rule) : this.validateVAT(fieldValue, rule);
 
       case 'IBAN':
-        return this.validateIBAN(fieldValue, rule);
+        return patternCheck ? this.validateFromPatternCheck(patternCheck, rule) : this.validateIBAN(fieldValue, rule);
 
       case 'Custom':
         return this.executeCustomValidator(rule.customValidator, fieldValue, data, rule);
@@ -590,7 +613,7 @@ class ValidationService {
     if (!value) return { isValid: true };
 
     try {
-      const regex = new RegExp(pattern);
+      const regex = patternRegistry.compile(pattern);
 
       // Handle arrays
       if (Array.isArray(value)) {
@@ -649,93 +672,66 @@ class ValidationService {
   }
 
   /**
-   * Validate VAT number using existing InputValidator
+   * Validate VAT number(s) against the country patterns of the pattern registry
    */
   validateVAT(value, rule) {
-    if (!value) return { isValid: true };
-
-    try {
-      const InputValidator = require('./input-validator');
-      const validator = new InputValidator();
-
-      // Handle arrays
-      if (Array.isArray(value)) {
-        const errors = [];
-        for (const val of value) {
-          if (val) {
-            try {
-              validator.validateVATNumber(val);
-            } catch (error) {
-              errors.push(val);
-            }
-          }
-        }
-
-        const isValid = errors.length === 0;
-        return {
-          isValid,
-          errorMessage: isValid ? null : rule.errorMessage,
-          errorSeverity: rule.errorSeverity,
-          blockSubmission: rule.blockSubmission
-        };
-      }
-
-      // Handle single value
-      validator.validateVATNumber(value);
-      return { isValid: true };
-    } catch (error) {
-      return {
-        isValid: false,
-        errorMessage: rule.errorMessage || error.message,
-        errorSeverity: rule.errorSeverity,
-        blockSubmission: rule.blockSubmission
-      };
-    }
+    return this.validateWithRegistry(value, rule, val => patternRegistry.checkVatNumber(val));
   }
 
   /**
-   * Validate IBAN using existing InputValidator
+   * Validate IBAN(s): country length, pattern and check digits from the pattern registry
    */
   validateIBAN(value, rule) {
-    if (!value) return { isValid: true };
-
-    try {
-      const InputValidator = require('./input-validator');
-      const validator = new InputValidator();
+    return this.validateWithRegistry(value, rule, val => patternRegistry.checkIban(val));
+  }
 
-      // Handle arrays
-      if (Array.isArray(value)) {
-        const errors = [];
-        for (const val of value) {
-          if (val) {
-            try {
-              validator.validateIBAN(val);
-            } catch (error) {
-              errors.push(val);
-            }
-          }
-        }
+  /**
+   * Result of an IBAN or VAT rule from the pattern check of the whole request
+   * (problems of the rule's targetEntity and targetField)
+   * @param {Object} patternCheck - Result of patternRegistry.validateRequestData()
+   * @param {Object} rule - Validation rule
+   */
+  validateFromPatternCheck(patternCheck, rule) {
+    const problem = patternCheck.errors.find(error =>
+      error.entity === rule.targetEntity && error.field === rule.targetField);
+    if (!problem) return { isValid: true };
+    return {
+      isValid: false,
+      errorMessage: rule.errorMessage || problem.message,
+      errorSeverity: rule.errorSeverity,
+      blockSubmission: rule.blockSubmission
+    };
+  }
 
-        const isValid = errors.length === 0;
-        return {
-          isValid,
-          errorMessage: isValid ? null : rule.errorMessage,
-          errorSeverity: rule.errorSeverity,
-          blockSubmission: rule.blockSubmission
-        };
-      }
+  /**
+   * Run a pattern registry check on a single value or on every value of an array
+   * @param {*} value - Field value or array of values
+   * @param {Object} rule - Validation rule
+   * @param {Function} check - Returns a problem description or null
+   */
+  validateWithRegistry(value, rule, check) {
+    if (!value) return { isValid: true };
 
-      // Handle single value
-      validator.validateIBAN(value);
-      return { isValid: true };
-    } catch (error) {
+    // Handle arrays
+    if (Array.isArray(value)) {
+      const isValid = value.every(val => !val || !check(String(val)));
       return {
-        isValid: false,
-        errorMessage: rule.errorMessage || error.message,
+        isValid,
+        errorMessage: isValid ? null : rule.errorMessage,
         errorSeverity: rule.errorSeverity,
         blockSubmission: rule.blockSubmission
       };
     }
+
+    // Handle single value
+    const problem = check(String(value));
+    if (!problem) return { isValid: true };
+    return {
+      isValid: false,
+      errorMessage: rule.errorMessage || problem,
+      errorSeverity: rule.errorSeverity,
+      blockSubmission: rule.blockSubmission
+    };
   }
 
   /**
@@ -773,7 +769,7 @@ class ValidationService {
 
     // Validate postal codes for matching addresses
     try {
-      const regex = new RegExp(pattern);
+      const regex = patternRegistry.compile(pattern);
       const invalidPostalCodes = matchingAddresses.filter(addr => {
         return addr.postalCode && !regex.test(String(addr.postalCode));
       });
@@ -884,6 +880,23 @@ class ValidationService {
    * @param {String} locale - User's language (en, de, etc.) - defaults to 'en' for unsupported languages
    */
   async getSectionRules(context, locale = 'en') {
+    const { status, sourceSystem, entityType } = context;
+    const cacheKey = `SectionValidationRules|${status}|${sourceSystem}|${entityType}|${locale}`;
+
+    const entry = await this.validationCache.getOrCompute(cacheKey, async () => ({
+      entity: 'SectionValidationRules',
+      context: { status, sourceSystem, entityType },
+      ...await this._loadSectionRules(context, locale)
+    }));
+    return entry.rules;
+  }
+
+  /**
+   * Load the section rules for a context (cache miss path of getSectionRules)
+   * @returns {Object} { rules, locales } - locales the rules were read for
+   * @private
+   */
+  async _loadSectionRules(context, locale) {
     const { status, sourceSystem, entityType } = context;
     const { SectionValidationRules } = this.db.entities('mdm.db');
 
@@ -895,6 +908,7 @@ class ValidationService {
       isActive: true,
       locale: effectiveLocale
     });
+    const locales = [effectiveLocale];
 
     // If no rules found for locale and locale is not 'en', fallback to English
     if (allRules.length === 0 && effectiveLocale !== 'en') {
@@ -903,6 +917,7 @@ class ValidationService {
         isActive: true,
         locale: 'en'
       });
+      locales.push('en');
     }
 
     // Filter rules that match the context
@@ -917,7 +932,7 @@ class ValidationService {
     // Sort by priority
     matchingRules.sort((a, b) => a.priority - b.priority);
 
-    return matchingRules;
+    return { rules: matchingRules, locales };
   }
 
   /**
@@ -1000,13 +1015,38 @@ class ValidationService {
     this.log.info('Validation cache cleared');
   }
 
+  /**
+   * Drop cached lookups that the given rules can affect
+   * A rule affects a cached context when its locale was read for it and each of its
+   * context fields is empty (applies to all) or equal to the context value. Fields
+   * missing from a rule (partial update payloads) are treated as empty, so the
+   * invalidation may be broader than needed but never leaves a stale entry.
+   *
+   * @param {String} entity - 'ValidationRules' or 'SectionValidationRules'
+   * @param {Array<Object>} rules - Rule rows (old and new values); empty drops every lookup of the entity
+   * @returns {Number} Number of cache entries removed
+   */
+  invalidateRules(entity, rules = []) {
+    const applies = (value, contextValue) => value === undefined || value === null || value === contextValue;
+
+    const removed = this.validationCache.deleteWhere(entry => entry.entity === entity && (
+      rules.length === 0 || rules.some(rule =>
+        (rule.locale === undefined || entry.locales.includes(rule.locale)) &&
+        Object.entries(entry.context).every(([field, contextValue]) => applies(rule[field], contextValue))
+      )
+    ));
+
+    this.log.info('Validation cache invalidated', { entity, rules: rules.length, removed });
+    return removed;
+  }
+
   /**
    * Get cache statistics
    */
   getCacheStats() {
     return {
-      size: this.validationCache.size,
-      keys: Array.from(this.validationCache.keys())
+      ...this.validationCache.getStats(),
+      keys: Array.from(this.validationCache.entries.keys())
     };
   }
 }
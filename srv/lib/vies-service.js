@@ -1,5 +1,8 @@
+const cds = require('@sap/cds');
 const soap = require('soap');
 const axios = require('axios');
+const LruCache = require('./shared/lru-cache');
+const { TokenBucket, Semaphore } = require('./shared/rate-limiter');
 
 /**
  * VIES (VAT Information Exchange System) Service Integration
@@ -9,21 +12,44 @@ const axios = require('axios');
  * - VAT format validation by country before VIES check
  * - Batch processing capability for multiple VAT IDs
  * - Service availability fallback handling
- * - Validation result caching to reduce API calls
+ * - Validation result caching to reduce API calls (in memory and in the
+ *   ViesValidationResults table, shared across instances and restarts)
+ * - Rate limiting (token bucket) and bounded concurrency for VIES calls;
+ *   concurrent checks of the same VAT number share one call
  * - Support for non-EU VAT validation where applicable
  *
  * @class VIESService
  */
 class VIESService {
 
-  constructor() {
+  /**
+   * @param {Object} [options] - Overrides of the VIES_* environment settings
+   * @param {number} [options.cacheTTL] - Result cache TTL in ms (VIES_CACHE_TTL_HOURS, default 24h)
+   * @param {number} [options.ratePerSecond] - Sustained VIES calls per second (VIES_RATE_LIMIT, default 5)
+   * @param {number} [options.burst] - VIES calls allowed at once after idling (VIES_BURST, default 5)
+   * @param {number} [options.maxConcurrent] - VIES calls in flight (VIES_MAX_CONCURRENT, default 5)
+   * @param {boolean} [options.persistentCache] - Also cache in the database (default true)
+   * @param {boolean} [options.useMockService] - Force mock or real mode
+   * @param {number} [options.mockLatencyMs] - Fixed mock response time (VIES_MOCK_LATENCY_MS,
+   *   default random 200-1200ms); use a fixed value to benchmark throughput
+   */
+  constructor(options = {}) {
+    const env = process.env;
     this.viesWsdlUrl = 'http://ec.europa.eu/taxation_customs/vies/checkVatService.wsdl';
     this.viesServiceUrl = 'http://ec.europa.eu/taxation_customs/vies/services/checkVatService';
     this.timeout = 10000; // 10 seconds timeout
     this.retryAttempts = 2;
-    this.cacheTTL = 24 * 60 * 60 * 1000; // 24 hours cache
-    this.cache = new Map(); // Simple in-memory cache
-    this.useMockService = process.env.NODE_ENV === 'development' || !process.env.VIES_ENABLED;
+    this.cacheTTL = options.cacheTTL ?? (Number(env.VIES_CACHE_TTL_HOURS) || 24) * 60 * 60 * 1000;
+    this.cache = new LruCache({ maxEntries: 5000, ttl: this.cacheTTL });
+    this.persistentCache = options.persistentCache ?? true;
+    this.inFlight = new Map(); // cacheKey -> Promise of a running validation
+    this.useMockService = options.useMockService ?? (env.NODE_ENV === 'development' || !env.VIES_ENABLED);
+    this.mockLatencyMs = options.mockLatencyMs ?? (env.VIES_MOCK_LATENCY_MS !== undefined ? Number(env.VIES_MOCK_LATENCY_MS) : null);
+
+    const ratePerSecond = options.ratePerSecond ?? (Number(env.VIES_RATE_LIMIT) || 5);
+    this.rateLimiter = new TokenBucket({ ratePerSecond, burst: options.burst ?? (Number(env.VIES_BURST) || ratePerSecond) });
+    this.concurrency = new Semaphore(options.maxConcurrent ?? (Number(env.VIES_MAX_CONCURRENT) || 5));
+    this.stats = { requests: 0, memoryHits: 0, persistentHits: 0, coalesced: 0, viesCalls: 0 };
 
     // EU country codes supported by VIES
     this.euCountries = [
@@ -85,42 +111,24 @@ class VIESService {
 
       // Check cache first
       const cacheKey = `${countryCode}${vatNumber}`;
+      this.stats.requests++;
       const cachedResult = this.getCachedResult(cacheKey);
       if (cachedResult) {
         console.log('📋 Returning cached VIES result');
+        this.stats.memoryHits++;
         return cachedResult;
       }
 
-      // Format validation
-      const formatValidation = this.validateVatFormat(countryCode, vatNumber);
-      if (!formatValidation.isValid) {
-        const result = {
-          isValid: false,
-          vatNumber: vatNumber,
-          countryCode: countryCode,
-          errorMessage: formatValidation.error,
-          validationDate: new Date().toISOString(),
-          source: 'format_validation',
-          companyName: null,
-          companyAddress: null
-        };
-        this.setCachedResult(cacheKey, result);
-        return result;
+      // Identical checks already running share their result
+      if (this.inFlight.has(cacheKey)) {
+        this.stats.coalesced++;
+        return { ...await this.inFlight.get(cacheKey), coalesced: true };
       }
 
-      // Perform VIES validation
-      let result;
-      if (this.useMockService) {
-        result = await this.performMockViesValidation(countryCode, vatNumber);
-      } else {
-        result = await this.performRealViesValidation(countryCode, vatNumber);
-      }
-
-      // Cache the result
-      this.setCachedResult(cacheKey, result);
-
-      console.log(`✅ VIES validation completed for: ${countryCode}${vatNumber} - ${result.isValid ? 'Valid' : 'Invalid'}`);
-      return result;
+      const pending = this.performValidation(countryCode, vatNumber, cacheKey)
+        .finally(() => this.inFlight.delete(cacheKey));
+      this.inFlight.set(cacheKey, pending);
+      return await pending;
 
     } catch (error) {
       console.error('❌ VIES validation error:', error);
@@ -137,6 +145,62 @@ class VIESService {
     }
   }
 
+  /**
+   * Validate a VAT ID that is not in the memory cache:
+   * format check, persistent cache, then a rate-limited VIES call
+   *
+   * @param {string} countryCode - Normalized two-letter country code
+   * @param {string} vatNumber - Normalized VAT number without country prefix
+   * @param {string} cacheKey - Cache key
+   * @returns {Promise<Object>} Validation result
+   * @private
+   */
+  async performValidation(countryCode, vatNumber, cacheKey) {
+    // Format validation
+    const formatValidation = this.validateVatFormat(countryCode, vatNumber);
+    if (!formatValidation.isValid) {
+      const result = {
+        isValid: false,
+        vatNumber: vatNumber,
+        countryCode: countryCode,
+        errorMessage: formatValidation.error,
+        validationDate: new Date().toISOString(),
+        source: 'format_validation',
+        companyName: null,
+        companyAddress: null
+      };
+      this.setCachedResult(cacheKey, result);
+      return result;
+    }
+
+    // Results stored by this or another instance
+    const storedResult = await this.getPersistedResult(countryCode, vatNumber);
+    if (storedResult) {
+      console.log('📋 Returning stored VIES result');
+      this.stats.persistentHits++;
+      this.setCachedResult(cacheKey, storedResult.result, storedResult.timestamp);
+      return this.getCachedResult(cacheKey);
+    }
+
+    // Perform VIES validation within the rate and concurrency limits
+    const result = await this.concurrency.run(async () => {
+      await this.rateLimiter.take();
+      this.stats.viesCalls++;
+      return this.useMockService
+        ? this.performMockViesValidation(countryCode, vatNumber)
+        : this.performRealViesValidation(countryCode, vatNumber);
+    });
+
+    // Cache the result; service failures are not cached so the next check retries
+    if (result.source !== 'vies_error') {
+      this.setCachedResult(cacheKey, result);
+      await this.persistResult(countryCode, vatNumber, result);
+    }
+
+    console.log(`✅ VIES validation completed for: ${countryCode}${vatNumber} - ${result.isValid ? 'Valid' : 'Invalid'}`);
+    return result;
+  }
+
   /**
    * Validate multiple VAT IDs in batch
    *
@@ -144,49 +208,30 @@ class VIESService {
    * @returns {Promise<Array>} Array of validation results
    */
   async validateVatIdsBatch(vatIds) {
-    console.log(`📦 Starting batch VIES validation for ${vatIds.length} VAT IDs`);
-
     if (!vatIds || vatIds.length === 0) {
       return [];
     }
 
-    const results = [];
-    const batchSize = 5; // Process in smaller batches to avoid overwhelming VIES
-
-    for (let i = 0; i < vatIds.length; i += batchSize) {
-      const batch = vatIds.slice(i, i + batchSize);
-      console.log(`🔄 Processing batch ${Math.floor(i / batchSize) + 1}/${Math.ceil(vatIds.length / batchSize)}`);
-
-      const batchPromises = batch.map(vatId =>
-        this.validateVatId(vatId.countryCode, vatId.vatNumber)
-      );
+    console.log(`📦 Starting batch VIES validation for ${vatIds.length} VAT IDs`);
 
+    // All checks start at once; the rate limiter and concurrency bound pace the VIES
+    // calls, and repeated VAT numbers share one call
+    const results = await Promise.all(vatIds.map(async vatId => {
       try {
-        const batchResults = await Promise.all(batchPromises);
-        results.push(...batchResults);
-
-        // Small delay between batches to be respectful to VIES service
-        if (i + batchSize < vatIds.length) {
-          await new Promise(resolve => setTimeout(resolve, 1000));
-        }
-
+        return await this.validateVatId(vatId.countryCode, vatId.vatNumber);
       } catch (error) {
-        console.error(`❌ Error processing batch ${Math.floor(i / batchSize) + 1}:`, error);
-        // Add error results for this batch
-        batch.forEach(vatId => {
-          results.push({
-            isValid: false,
-            vatNumber: vatId.vatNumber,
-            countryCode: vatId.countryCode,
-            errorMessage: `Batch validation failed: ${error.message}`,
-            validationDate: new Date().toISOString(),
-            source: 'batch_error',
-            companyName: null,
-            companyAddress: null
-          });
-        });
+        return {
+          isValid: false,
+          vatNumber: vatId.vatNumber,
+          countryCode: vatId.countryCode,
+          errorMessage: `Batch validation failed: ${error.message}`,
+          validationDate: new Date().toISOString(),
+          source: 'batch_error',
+          companyName: null,
+          companyAddress: null
+        };
       }
-    }
+    }));
 
     console.log(`✅ Batch VIES validation completed. ${results.filter(r => r.isValid).length}/${results.length} valid`);
     return results;
@@ -322,7 +367,7 @@ class VIESService {
     console.log('🎭 Performing mock VIES validation...');
 
     // Simulate processing time
-    const processingTime = Math.random() * 1000 + 200; // 200-1200ms
+    const processingTime = this.mockLatencyMs ?? Math.random() * 1000 + 200; // 200-1200ms
     await new Promise(resolve => setTimeout(resolve, processingTime));
 
     // Mock validation logic
@@ -406,12 +451,6 @@ class VIESService {
     const cached = this.cache.get(cacheKey);
     if (!cached) return null;
 
-    const isExpired = (Date.now() - cached.timestamp) > this.cacheTTL;
-    if (isExpired) {
-      this.cache.delete(cacheKey);
-      return null;
-    }
-
     return {
       ...cached.result,
       fromCache: true,
@@ -424,16 +463,60 @@ class VIESService {
    *
    * @param {string} cacheKey - Cache key
    * @param {Object} result - Validation result to cache
+   * @param {number} [timestamp] - When the result was obtained (defaults to now)
    */
-  setCachedResult(cacheKey, result) {
-    this.cache.set(cacheKey, {
-      result: result,
-      timestamp: Date.now()
-    });
+  setCachedResult(cacheKey, result, timestamp = Date.now()) {
+    const ttl = this.cacheTTL - (Date.now() - timestamp);
+    if (ttl > 0) {
+      this.cache.set(cacheKey, { result, timestamp }, ttl);
+    }
+  }
 
-    // Clean up old cache entries periodically
-    if (this.cache.size > 1000) {
-      this.cleanupCache();
+  /**
+   * Read a stored result that is younger than the cache TTL
+   *
+   * @param {string} countryCode - Country code
+   * @param {string} vatNumber - VAT number without country prefix
+   * @returns {Promise<Object|null>} { result, timestamp } or null
+   */
+  async getPersistedResult(countryCode, vatNumber) {
+    if (!this.persistentCache) return null;
+
+    try {
+      const db = await cds.connect.to('db');
+      const notBefore = new Date(Date.now() - this.cacheTTL).toISOString();
+      const row = await db.run(SELECT.one.from('mdm.db.ViesValidationResults')
+        .where({ countryCode, vatNumber, validatedAt: { '>': notBefore } }));
+      if (!row) return null;
+      return { result: JSON.parse(row.result), timestamp: Date.parse(row.validatedAt) };
+    } catch (error) {
+      // The persistent cache is an optimization; fall back to VIES
+      console.log('⚠️ Could not read stored VIES result:', error.message);
+      return null;
+    }
+  }
+
+  /**
+   * Store a result for other instances and later restarts
+   *
+   * @param {string} countryCode - Country code
+   * @param {string} vatNumber - VAT number without country prefix
+   * @param {Object} result - Validation result
+   */
+  async persistResult(countryCode, vatNumber, result) {
+    if (!this.persistentCache) return;
+
+    try {
+      const db = await cds.connect.to('db');
+      await db.run(UPSERT.into('mdm.db.ViesValidationResults').entries({
+        countryCode,
+        vatNumber,
+        isValid: result.isValid,
+        result: JSON.stringify(result),
+        validatedAt: new Date().toISOString()
+      }));
+    } catch (error) {
+      console.log('⚠️ Could not store VIES result:', error.message);
     }
   }
 
@@ -441,12 +524,7 @@ class VIESService {
    * Clean up expired cache entries
    */
   cleanupCache() {
-    const now = Date.now();
-    for (const [key, value] of this.cache.entries()) {
-      if ((now - value.timestamp) > this.cacheTTL) {
-        this.cache.delete(key);
-      }
-    }
+    this.cache.prune();
     console.log(`🧹 Cache cleanup completed. Size: ${this.cache.size}`);
   }
 
@@ -456,24 +534,18 @@ class VIESService {
    * @returns {Object} Cache statistics
    */
   getCacheStats() {
-    const now = Date.now();
-    let validEntries = 0;
-    let expiredEntries = 0;
-
-    for (const [key, value] of this.cache.entries()) {
-      if ((now - value.timestamp) > this.cacheTTL) {
-        expiredEntries++;
-      } else {
-        validEntries++;
-      }
-    }
+    const expiredEntries = this.cache.prune();
+    const lookups = this.stats.requests;
+    const served = this.stats.memoryHits + this.stats.persistentHits + this.stats.coalesced;
 
     return {
-      totalEntries: this.cache.size,
-      validEntries: validEntries,
-      expiredEntries: expiredEntries,
-      cacheHitRate: this.cacheHitRate || 0,
-      cacheTTLHours: this.cacheTTL / (1000 * 60 * 60)
+      totalEntries: this.cache.size + expiredEntries,
+      validEntries: this.cache.size,
+      expiredEntries,
+      cacheHitRate: lookups ? served / lookups : 0,
+      cacheTTLHours: this.cacheTTL / (1000 * 60 * 60),
+      ...this.stats,
+      inFlight: this.inFlight.size
     };
   }
 
@@ -520,4 +592,4 @@ class VIESService {
   }
 }
 
-module.exports = VIESService;
\ No newline at end of file
+module.exports = VIESService;
\ No newline at end of file
@@ -10,6 +10,7 @@ const enhancedAEBService = require('./lib/enhanced-aeb-service');
 const VIESService = require('./lib/vies-service');
 const ValidationService = require('./lib/validation-service');
 const requestNumberGenerator = require('./utils/request-number-generator');
+const keyset = require('./lib/shared/keyset-pagination');
 
 // Import modular handlers
 const mdmHandlers = require('./mdm-service/index');
@@ -339,6 +340,51 @@ module.exports = cds.service.impl(async function () {
     });
   });
 
+  // ================================
+  // APPROVAL LIST PAGES
+  // ================================
+
+  // Columns of list views; child compositions are loaded by the object page only
+  const APPROVAL_LIST_COLUMNS = [
+    'ID', 'requestNumber', 'partnerName', 'requestType', 'status', 'sourceSystem',
+    'aebStatus', 'viesStatus', 'duplicateCheckStatus', 'createdAt', 'createdBy'
+  ];
+
+  /**
+   * Get one page of approval requests by cursor
+   * Keyset pagination on createdAt or requestNumber, so every page costs the same
+   * regardless of table size (see db/data-model.cds for the supporting indexes)
+   */
+  this.on('getApprovalRequestPage', async (req) => {
+    const { cursor, status, sourceSystem, sortBy = 'createdAt' } = req.data;
+    const pageSize = Math.min(Math.max(req.data.pageSize || 50, 1), 200);
+    const order = keyset.ORDERS[sortBy];
+    if (!order) {
+      return req.reject(400, `Invalid sortBy: ${sortBy}. Use 'createdAt' or 'requestNumber'`);
+    }
+
+    // Same rows as the list report: 'New' requests are not shown in the MDM app
+    if (status === 'New') {
+      return { items: [], nextCursor: null };
+    }
+    const where = { status: status || { '!=': 'New' } };
+    if (sourceSystem) {
+      where.sourceSystem = sourceSystem;
+    }
+    if (sortBy === 'requestNumber') {
+      where.requestNumber = { '!=': null };
+    }
+    const query = SELECT.from(MDMApprovalRequests).columns(APPROVAL_LIST_COLUMNS).where(where);
+
+    try {
+      keyset.pageQuery(query, { cursor, pageSize, order });
+    } catch (error) {
+      return req.reject(400, error.message);
+    }
+
+    return keyset.toPage(await query, pageSize, order);
+  });
+
   // ================================
   // GET BP DETAILS FUNCTION
   // ================================
@@ -355,10 +401,10 @@ module.exports = cds.service.impl(async function () {
 
     try {
       const db = await cds.connect.to('db');
-      const { ExistingPartners } = db.entities('mdm.db');
+      const sapPartnerService = require('./lib/shared/sap-partner-service');
 
-      // Get partner details
-      const partner = await SELECT.one.from(ExistingPartners).where({ sapBpNumber: bpNumber });
+      // Get partner details (through the shared partner cache)
+      const partner = await sapPartnerService.findPartner(bpNumber, db);
 
       if (!partner) {
         log.warn('BP not found', { bpNumber });
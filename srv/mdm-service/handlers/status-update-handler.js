@@ -96,7 +96,9 @@ class StatusUpdateHandler {
  * @param {Object} log - Logger instance
  */
 async function checkCompletion(requestId, MDMApprovalRequests, ApprovalHistory, log) {
-  const request = await SELECT.one.from(MDMApprovalRequests).where({ ID: requestId });
+  const request = await SELECT.one.from(MDMApprovalRequests)
+    .columns('requestNumber', 'requestType', 'status', 'sapInitialStatus', 'satelliteStatus', 'sapIdUpdateStatus')
+    .where({ ID: requestId });
   if (!request) return;
 
   let isComplete = false;
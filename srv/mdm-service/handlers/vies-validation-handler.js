@@ -38,31 +38,33 @@ class VIESValidationHandler {
         let allValid = true;
         let hasError = false;
 
-        // Validate each VAT ID
-        for (const vat of vatIds) {
-          if (vat.vatType_code === 'VAT') {
-            log.debug('Validating VAT ID', { country: vat.country_code, vatNumber: vat.vatNumber });
-
-            const result = await viesService.validateVatId(vat.country_code, vat.vatNumber);
-
-            // Update VAT ID with validation results
-            await UPDATE(PartnerVatIds).set({
-              validationStatus: result.isValid ? 'Valid' : 'Invalid',
-              validationDetails: result.isValid
-                ? `Valid VAT ID - ${result.name || 'Company name unavailable'}`
-                : (result.errorMessage || 'Invalid VAT ID'),
-              validationDate: new Date().toISOString()
-            }).where({ ID: vat.ID });
-
-            validationResults.push({
-              vatId: `${vat.country_code}${vat.vatNumber}`,
-              valid: result.isValid,
-              message: result.isValid ? 'Valid' : (result.errorMessage || 'Invalid')
-            });
-
-            if (!result.isValid) allValid = false;
-            if (result.errorMessage) hasError = true;
-          }
+        // Validate all VAT IDs together; the VIES service paces the calls
+        const vatTypeIds = vatIds.filter(vat => vat.vatType_code === 'VAT');
+        log.debug('Validating VAT IDs', { requestID: ID, count: vatTypeIds.length });
+        const results = await viesService.validateVatIdsBatch(
+          vatTypeIds.map(vat => ({ countryCode: vat.country_code, vatNumber: vat.vatNumber }))
+        );
+
+        for (const [index, vat] of vatTypeIds.entries()) {
+          const result = results[index];
+
+          // Update VAT ID with validation results
+          await UPDATE(PartnerVatIds).set({
+            validationStatus: result.isValid ? 'Valid' : 'Invalid',
+            validationDetails: result.isValid
+              ? `Valid VAT ID - ${result.name || 'Company name unavailable'}`
+              : (result.errorMessage || 'Invalid VAT ID'),
+            validationDate: new Date().toISOString()
+          }).where({ ID: vat.ID });
+
+          validationResults.push({
+            vatId: `${vat.country_code}${vat.vatNumber}`,
+            valid: result.isValid,
+            message: result.isValid ? 'Valid' : (result.errorMessage || 'Invalid')
+          });
+
+          if (!result.isValid) allValid = false;
+          if (result.errorMessage) hasError = true;
         }
 
         // Check if there were no VAT IDs to validate
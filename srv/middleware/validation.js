@@ -6,6 +6,10 @@ const { body, param, query, validationResult } = require('express-validator');
  * Following SAP CAP and Express.js security best practices
  */
 
+// Request numbers of the integration API (MDM-YYYYMMDD-NNNN) and of the request number
+// generator, also used for bulk-ingested requests (PREFIX-NNNNNNNNNN)
+const REQUEST_NUMBER_PATTERN = /^[A-Z]+-(?:[0-9]{8}-)?[0-9]+$/;
+
 /**
  * Validation error handler middleware
  * Returns standardized error response for validation failures
@@ -239,7 +243,7 @@ const validateRequestNumber = [
   param('requestNumber')
     .trim()
     .notEmpty().withMessage('Request number is required')
-    .matches(/^[A-Z]+-[0-9]+-[0-9]+$/).withMessage('Invalid request number format (expected: SYSTEM-YYYYMMDD-NNNN)')
+    .matches(REQUEST_NUMBER_PATTERN).withMessage('Invalid request number format (expected: SYSTEM-YYYYMMDD-NNNN or SYSTEM-NNNNNNNNNN)')
     .escape(),
 
   handleValidationErrors
@@ -271,6 +275,11 @@ const validateRequestQuery = [
     .isInt({ min: 0 }).withMessage('Offset must be a positive integer')
     .toInt(),
 
+  query('cursor')
+    .optional()
+    .isBase64({ urlSafe: true }).withMessage('Cursor must be a cursor returned by a previous page')
+    .isLength({ max: 500 }).withMessage('Cursor is too long'),
+
   handleValidationErrors
 ];
 
@@ -299,7 +308,7 @@ const validateBulkStatus = [
 
   body('requestNumbers.*')
     .trim()
-    .matches(/^[A-Z]+-[0-9]+-[0-9]+$/).withMessage('Invalid request number format'),
+    .matches(REQUEST_NUMBER_PATTERN).withMessage('Invalid request number format'),
 
   handleValidationErrors
 ];
@@ -311,7 +320,7 @@ const validateWebhook = [
   body('requestNumber')
     .trim()
     .notEmpty().withMessage('Request number is required')
-    .matches(/^[A-Z]+-[0-9]+-[0-9]+$/).withMessage('Invalid request number format'),
+    .matches(REQUEST_NUMBER_PATTERN).withMessage('Invalid request number format'),
 
   body('sapBpNumber')
     .optional({ checkFalsy: true })
@@ -332,21 +341,47 @@ const validateWebhook = [
  * This middleware runs before specific validation rules
  */
 const sanitizeCommonFields = (req, res, next) => {
-  // Remove any potentially harmful HTML/script tags from string fields
   if (req.body) {
-    Object.keys(req.body).forEach(key => {
-      if (typeof req.body[key] === 'string') {
-        // Basic XSS prevention
-        req.body[key] = req.body[key]
-          .replace(/<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>/gi, '')
-          .replace(/<iframe\b[^<]*(?:(?!<\/iframe>)<[^<]*)*<\/iframe>/gi, '');
-      }
-    });
+    sanitizeStrings(req.body);
   }
 
   next();
 };
 
+/**
+ * Remove any potentially harmful HTML/script tags from the string fields of an object
+ * (also used for records that do not arrive as a JSON body, e.g. NDJSON bulk ingest)
+ */
+const sanitizeStrings = (data) => {
+  Object.keys(data).forEach(key => {
+    if (typeof data[key] === 'string') {
+      // Basic XSS prevention
+      data[key] = data[key]
+        .replace(/<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>/gi, '')
+        .replace(/<iframe\b[^<]*(?:(?!<\/iframe>)<[^<]*)*<\/iframe>/gi, '');
+    }
+  });
+  return data;
+};
+
+/**
+ * Run the validation chains of an endpoint against a record that does not arrive as the
+ * JSON body of a request (e.g. a line of an NDJSON bulk ingest). Sanitizers such as
+ * .trim() and .escape() are applied to the record in place.
+ * @param {Array} rules - Validation chains, e.g. validateCreatePartner
+ * @param {Object} record - Record to validate
+ * @returns {Promise<Array>} Error messages ("field: message"), empty if the record is valid
+ */
+const validateRecord = async (rules, record) => {
+  const req = { body: record };
+  for (const rule of rules) {
+    if (typeof rule.run === 'function') {
+      await rule.run(req);
+    }
+  }
+  return validationResult(req).array().map(error => `${error.path || error.param}: ${error.msg}`);
+};
+
 /**
  * Rate limiting helper (can be enhanced with redis)
  * Simple in-memory implementation for demonstration
@@ -393,6 +428,8 @@ module.exports = {
   validateBulkStatus,
   validateWebhook,
   sanitizeCommonFields,
+  sanitizeStrings,
+  validateRecord,
   simpleRateLimit,
   handleValidationErrors
 };
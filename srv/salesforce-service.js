@@ -6,6 +6,7 @@ const sapPartnerService = require('./lib/shared/sap-partner-service');
 const ValidationService = require('./lib/validation-service');
 const ChangeTracker = require('./lib/change-tracker');
 const requestNumberGenerator = require('./utils/request-number-generator');
+const codeListCache = require('./lib/shared/code-list-cache');
 
 /**
  * Refactored Salesforce Service Implementation
@@ -20,34 +21,16 @@ module.exports = cds.service.impl(async function () {
     log.info('Salesforce Service initialized');
 
     // ================================
-    // LOCALE FILTER FOR CODE LISTS
+    // CODE LISTS
     // ================================
-    // Filter code list entities by locale after query execution
+    // Served from the shared in-memory code list cache for the locale of the request
     const codeListEntities = [
         'RequestTypes', 'SourceSystems', 'OverallStatuses', 'PaymentTerms', 'PaymentMethods',
         'RevenueStreams', 'BillingCycles', 'AddressTypes', 'EmailTypes', 'VatTypes',
         'IdentificationTypes', 'DocumentTypes', 'BPTypes', 'ContactTypes', 'DunningStrategies'
     ];
 
-    codeListEntities.forEach(entity => {
-        this.after('READ', entity, (results, req) => {
-            if (!Array.isArray(results) || results.length === 0) return;
-
-            // Get locale from Accept-Language header, fallback to 'en'
-            const locale = req._.req?.headers?.['accept-language']?.split(',')[0]?.split('-')[0] || 'en';
-            // Only use supported locales (en, de), fallback to 'en' for others
-            const supportedLocale = ['en', 'de'].includes(locale) ? locale : 'en';
-
-            log.debug(`[${entity}] Filtering by locale: ${supportedLocale}`);
-
-            // Filter results by locale - modify array in place
-            for (let i = results.length - 1; i >= 0; i--) {
-                if (results[i].locale && results[i].locale !== supportedLocale) {
-                    results.splice(i, 1);
-                }
-            }
-        });
-    });
+    codeListCache.register(this, codeListEntities);
 
     // ================================
     // DRAFT INITIALIZATION
@@ -18,6 +18,8 @@ module.exports = cds.service.impl(async function() {
         item.statusCriticality = 3; // Green (Success)
       } else if (item.status === 'Pending') {
         item.statusCriticality = 2; // Yellow (Warning)
+      } else if (item.status === 'Failed') {
+        item.statusCriticality = 1; // Red (Error)
       } else {
         item.statusCriticality = 0; // Default (Neutral)
       }
@@ -16,6 +16,11 @@
  *   - MDM-0000000001
  *   - ADHOC-0000000001
  *
+ * Numbers come from the RequestNumberCounters table (one row per prefix, atomic
+ * increment), so parallel creates from different services and instances never
+ * share a number. Set REQUEST_NUMBER_BLOCK_SIZE to reserve blocks of numbers per
+ * instance instead of one database round trip per number.
+ *
  * Works consistently for:
  * - Draft entities
  * - Active entities
@@ -26,7 +31,20 @@
 
 const cds = require('@sap/cds');
 
+const COUNTERS = 'mdm.db.RequestNumberCounters';
+
 class RequestNumberGenerator {
+    constructor() {
+        // Numbers reserved per database round trip. With 1 (default) every number is
+        // allocated in the caller's transaction, so a rolled-back create leaves no gap.
+        // Larger blocks are reserved in a root transaction of their own (see nextValue)
+        // and handed out from memory; numbers left in a block when the process stops
+        // are skipped.
+        this.blockSize = Math.max(1, parseInt(process.env.REQUEST_NUMBER_BLOCK_SIZE, 10) || 1);
+        this._blocks = new Map();   // counter -> { next, last }
+        this._pending = new Map();  // counter -> Promise of a block being reserved
+    }
+
     /**
      * Generate next request number for given prefix
      * @param {string} prefix - Service prefix (SALESFORCE, COUPA, MDM)
@@ -39,39 +57,11 @@ class RequestNumberGenerator {
             db = await cds.connect.to('db');
         }
 
-        const { BusinessPartnerRequests } = db.entities;
-
         try {
-            let lastRequest;
-
-            // For ADHOC prefix, query by requestType instead of sourceSystem
-            if (prefix === 'ADHOC') {
-                lastRequest = await db.read(BusinessPartnerRequests)
-                    .where({ requestType: 'AdhocSync' })
-                    .orderBy({ requestNumber: 'desc' })
-                    .limit(1);
-            } else {
-                // Query for the last request number with this prefix by sourceSystem
-                lastRequest = await db.read(BusinessPartnerRequests)
-                    .where({ sourceSystem: this._prefixToSourceSystem(prefix) })
-                    .orderBy({ requestNumber: 'desc' })
-                    .limit(1);
-            }
-
-            let nextNumber = 1;
-
-            // Extract the current highest number if exists
-            if (lastRequest && lastRequest.length > 0 && lastRequest[0].requestNumber) {
-                const requestNumber = lastRequest[0].requestNumber;
+            // Validates the prefix before a counter row is created for it
+            this._prefixToSourceSystem(prefix);
 
-                // Extract numeric part: PREFIX-NNNNNNNNNN
-                const regex = new RegExp(`${prefix}-(\\d+)`);
-                const match = requestNumber.match(regex);
-
-                if (match && match[1]) {
-                    nextNumber = parseInt(match[1], 10) + 1;
-                }
-            }
+            const nextNumber = await this.nextValue(prefix, db, () => this._highestExistingNumber(prefix, db));
 
             // Format with 10-digit padding
             const formattedNumber = nextNumber.toString().padStart(10, '0');
@@ -83,6 +73,195 @@ class RequestNumberGenerator {
         }
     }
 
+    /**
+     * Generate a contiguous range of request numbers for given prefix
+     * The range is reserved with one counter update in the caller's transaction
+     * (independent of REQUEST_NUMBER_BLOCK_SIZE), for bulk creates.
+     * @param {string} prefix - Service prefix (SALESFORCE, COUPA, MDM)
+     * @param {number} count - Number of request numbers
+     * @param {object} db - Database connection or transaction (optional)
+     * @returns {Promise<string[]>} - Formatted request numbers
+     */
+    async getNextNumbers(prefix, count, db = null) {
+        if (!db) {
+            db = await cds.connect.to('db');
+        }
+        if (count < 1) {
+            return [];
+        }
+
+        try {
+            this._prefixToSourceSystem(prefix);
+
+            const first = await this._reserve(prefix, count, db, () => this._highestExistingNumber(prefix, db));
+            return Array.from({ length: count }, (_, i) => `${prefix}-${(first + i).toString().padStart(10, '0')}`);
+
+        } catch (error) {
+            console.error(`[RequestNumberGenerator] Error generating ${count} numbers for ${prefix}:`, error);
+            throw new Error(`Failed to generate request numbers: ${error.message}`);
+        }
+    }
+
+    /**
+     * Reserve a range of values of a named counter in the caller's transaction
+     * No block is cached: the counter row stays locked until the transaction ends,
+     * so the values are committed in the order they were reserved (event sequences).
+     * @param {string} counter - Counter name
+     * @param {number} count - Number of values
+     * @param {object} db - Transaction
+     * @returns {Promise<number>} - First value of the range
+     */
+    async reserveValues(counter, count, db) {
+        return this._reserve(counter, count, db, async () => 0);
+    }
+
+    /**
+     * Next value of a named counter
+     * Increments the RequestNumberCounters row atomically, so concurrent callers
+     * (also in other instances) never receive the same value.
+     * With REQUEST_NUMBER_BLOCK_SIZE > 1 a block is reserved in a new root transaction,
+     * so a rolled-back caller cannot take back a block that is already handed out.
+     * SQLite runs one transaction at a time, so there the block is reserved in the
+     * caller's transaction instead and handed out to others only after it commits.
+     * @param {string} counter - Counter name (request number prefix)
+     * @param {object} db - Database connection
+     * @param {Function} seed - Async function returning the value to start after
+     *   when the counter row does not exist yet
+     * @returns {Promise<number>} - Next value
+     */
+    async nextValue(counter, db, seed = async () => 0) {
+        if (this.blockSize === 1) {
+            return this._reserve(counter, 1, db, seed);
+        }
+
+        for (;;) {
+            const block = this._blocks.get(counter);
+            if (block && block.next <= block.last) {
+                return block.next++;
+            }
+            // In the caller's transaction on SQLite (a separate one would wait for it)
+            if (cds.env.requires.db?.kind === 'sqlite' && (db !== cds.db || cds.context?.tx)) {
+                const first = await this._reserve(counter, this.blockSize, db, seed);
+                cds.context?.on('succeeded', () => {
+                    this._blocks.set(counter, { next: first + 1, last: first + this.blockSize - 1 });
+                });
+                return first;
+            }
+            if (!this._pending.has(counter)) {
+                // A new root transaction (not nested in the caller's)
+                const tenant = cds.context?.tenant;
+                const pending = cds.connect.to('db')
+                    .then(root => root.tx({ tenant }, tx => this._reserve(counter, this.blockSize, tx, seed)))
+                    .then(first => {
+                        this._blocks.set(counter, { next: first, last: first + this.blockSize - 1 });
+                    })
+                    .finally(() => this._pending.delete(counter));
+                this._pending.set(counter, pending);
+            }
+            await this._pending.get(counter);
+        }
+    }
+
+    /**
+     * Reserve a range of counter values
+     * @param {string} counter - Counter name
+     * @param {number} count - Number of values to reserve
+     * @param {object} db - Database connection or transaction
+     * @param {Function} seed - See nextValue()
+     * @returns {Promise<number>} - First value of the range
+     * @private
+     */
+    async _reserve(counter, count, db, seed) {
+        // The increment and the read of the new value must be in one transaction: callers
+        // without one (e.g. plain Express routes) get their own
+        if (db === cds.db && !cds.context?.tx) {
+            return db.tx(tx => this._reserve(counter, count, tx, seed));
+        }
+
+        const increment = UPDATE(COUNTERS).with({ lastNumber: { '+=': count } }).where({ prefix: counter });
+
+        if (!await db.run(increment)) {
+            await this._createCounter(counter, db, seed);
+            if (!await db.run(increment)) {
+                throw new Error(`Counter ${counter} could not be created`);
+            }
+        }
+
+        const row = await db.run(SELECT.one.from(COUNTERS).columns('lastNumber').where({ prefix: counter }));
+        return Number(row.lastNumber) - count + 1;
+    }
+
+    /**
+     * Create a missing counter row, starting after the seed value
+     * The row is inserted in a transaction of its own, so a caller that loses the race
+     * for the row keeps a usable transaction (PostgreSQL and HANA abort a transaction
+     * after a failed statement). SQLite runs one transaction at a time: there is no
+     * race to lose there, and a separate transaction would wait for the caller's, so
+     * the row is inserted in the caller's transaction.
+     * @param {string} counter - Counter name
+     * @param {object} db - Database connection or transaction of the caller
+     * @param {Function} seed - See nextValue()
+     * @private
+     */
+    async _createCounter(counter, db, seed) {
+        const insert = INSERT.into(COUNTERS).entries({ prefix: counter, lastNumber: await seed() });
+        try {
+            if (cds.env.requires.db?.kind === 'sqlite') {
+                await db.run(insert);
+            } else {
+                // A new root transaction (not nested in the caller's)
+                const root = await cds.connect.to('db');
+                await root.tx({ tenant: cds.context?.tenant }, tx => tx.run(insert));
+            }
+        } catch (error) {
+            // Another caller created the row first
+            const existing = await db.run(SELECT.one.from(COUNTERS).columns('prefix').where({ prefix: counter }));
+            if (!existing) throw error;
+        }
+    }
+
+    /**
+     * Highest number already used for a prefix, to start a new counter after
+     * request numbers created before the counter table existed
+     * @param {string} prefix - Service prefix
+     * @param {object} db - Database connection
+     * @returns {Promise<number>} - Highest existing number, 0 if none
+     * @private
+     */
+    async _highestExistingNumber(prefix, db) {
+        const { BusinessPartnerRequests } = db.entities;
+        let lastRequest;
+
+        // For ADHOC prefix, query by requestType instead of sourceSystem
+        if (prefix === 'ADHOC') {
+            lastRequest = await db.read(BusinessPartnerRequests)
+                .where({ requestType: 'AdhocSync' })
+                .orderBy({ requestNumber: 'desc' })
+                .limit(1);
+        } else {
+            // Query for the last request number with this prefix by sourceSystem
+            lastRequest = await db.read(BusinessPartnerRequests)
+                .where({ sourceSystem: this._prefixToSourceSystem(prefix) })
+                .orderBy({ requestNumber: 'desc' })
+                .limit(1);
+        }
+
+        // Extract the current highest number if exists
+        if (lastRequest && lastRequest.length > 0 && lastRequest[0].requestNumber) {
+            const requestNumber = lastRequest[0].requestNumber;
+
+            // Extract numeric part: PREFIX-NNNNNNNNNN
+            const regex = new RegExp(`${prefix}-(\\d+)`);
+            const match = requestNumber.match(regex);
+
+            if (match && match[1]) {
+                return parseInt(match[1], 10);
+            }
+        }
+
+        return 0;
+    }
+
     /**
      * Map prefix to source system name
      * @param {string} prefix - Service prefix
@@ -0,0 +1,89 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Change Tracker - coalesced child record changes', () => {
+    let ChangeTracker;
+
+    const addresses = (count, city) => Array.from({ length: count }, (_, i) => ({
+        ID: `00000000-0000-0000-0000-00000000000${i}`,
+        addressType_code: 'Main',
+        street: `Street ${i}`,
+        city
+    }));
+    const banks = (count, bankKey) => Array.from({ length: count }, (_, i) => ({
+        ID: `00000000-0000-0000-0000-00000000010${i}`,
+        bankCountry_code: 'DE',
+        bankKey
+    }));
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        ChangeTracker = require('../srv/lib/change-tracker');
+    });
+
+    it('should store a bulk edit of more than 5 child records as one ChangeLogs row', async () => {
+        const requestId = cds.utils.uuid();
+        const tracker = new ChangeTracker();
+        const oldAddresses = addresses(7, 'Berlin');
+        const newAddresses = addresses(7, 'Munich');
+        newAddresses[0].street = 'New Street 1';
+
+        const changeLogs = await tracker.trackChanges(
+            requestId,
+            { partnerName: 'Old Name', addresses: oldAddresses },
+            { partnerName: 'New Name', addresses: newAddresses },
+            'alice',
+            'Alice Admin'
+        );
+        await tracker.saveChangeLogs(changeLogs);
+
+        const rows = await SELECT.from('mdm.db.ChangeLogs').where({ request_ID: requestId });
+        expect(rows.map(row => row.fieldName).sort()).to.deep.equal(['city', 'partnerName', 'street']);
+
+        const city = rows.find(row => row.fieldName === 'city');
+        expect(city).to.include({
+            sectionName: 'Addresses',
+            fieldLabel: 'City',
+            oldValue: 'Berlin',
+            newValue: 'Munich',
+            changeType: 'Modified',
+            changedBy: 'alice',
+            changedByName: 'Alice Admin'
+        });
+        // Seven identifiers do not fit the column, so the summary is cut to 100 characters
+        expect(city.recordIdentifier).to.have.length(100);
+        expect(city.recordIdentifier).to.match(/^7 records: Address #1 \(Main - Munich\), Address #2 \(Main - Munich\), .*\.\.\.$/);
+
+        const street = rows.find(row => row.fieldName === 'street');
+        expect(street).to.include({ oldValue: 'Street 0', newValue: 'New Street 1', recordIdentifier: 'Address #1 (Main - Munich)' });
+    });
+
+    it('should coalesce from 5 identical changes and keep fewer as separate rows', async () => {
+        const tracker = new ChangeTracker();
+
+        const five = await tracker.trackChanges(cds.utils.uuid(), { banks: banks(5, '100') }, { banks: banks(5, '200') });
+        expect(five).to.have.length(1);
+        expect(five[0]).to.include({
+            sectionName: 'Banking Details',
+            fieldName: 'bankKey',
+            oldValue: '100',
+            newValue: '200',
+            recordIdentifier: '5 records: Bank #1 (DE), Bank #2 (DE), Bank #3 (DE), Bank #4 (DE), Bank #5 (DE)'
+        });
+
+        const four = await tracker.trackChanges(cds.utils.uuid(), { banks: banks(4, '100') }, { banks: banks(4, '200') });
+        expect(four.map(change => change.recordIdentifier)).to.deep.equal(['Bank #1 (DE)', 'Bank #2 (DE)', 'Bank #3 (DE)', 'Bank #4 (DE)']);
+    });
+
+    it('should not coalesce changes with different values', async () => {
+        const tracker = new ChangeTracker();
+        const newBanks = banks(6, '200');
+        newBanks[5].bankKey = '300';
+
+        const changes = await tracker.trackChanges(cds.utils.uuid(), { banks: banks(6, '100') }, { banks: newBanks });
+
+        expect(changes.map(change => change.newValue)).to.deep.equal(['200', '300']);
+        expect(changes[0].recordIdentifier).to.match(/^5 records: /);
+        expect(changes[1].recordIdentifier).to.equal('Bank #6 (DE)');
+    });
+});
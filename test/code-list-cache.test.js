@@ -0,0 +1,50 @@
+const { expect } = require('chai');
+
+describe('Code List Cache - in-memory reads', () => {
+    let cache;
+
+    const rows = [
+        { code: 'NET30', locale: 'en', name: 'Net 30 days', isActive: true },
+        { code: 'NET15', locale: 'en', name: 'Net 15 days', isActive: false },
+        { code: 'NET30', locale: 'de', name: '30 Tage netto', isActive: true }
+    ];
+    const target = { name: 'CoupaService.PaymentTerms', elements: { code: {}, locale: {}, name: {}, isActive: {} } };
+    const request = (SELECT, language = 'en') => ({ query: { SELECT }, target, _: { req: { headers: { 'accept-language': language } } } });
+    const fromDatabase = async () => { throw new Error('database should not be read'); };
+
+    before(() => {
+        cache = Object.create(require('../srv/lib/shared/code-list-cache'));
+        cache._partitions = async () => new Map([
+            ['en', rows.filter(row => row.locale === 'en')],
+            ['de', rows.filter(row => row.locale === 'de')]
+        ]);
+    });
+
+    it('should serve the rows of the request locale', async () => {
+        const result = await cache.read('PaymentTerms', request({ from: { ref: ['CoupaService.PaymentTerms'] }, count: true }, 'de-DE,de;q=0.9'), fromDatabase);
+
+        expect(result).to.deep.equal([{ code: 'NET30', locale: 'de', name: '30 Tage netto', isActive: true }]);
+        expect(result.$count).to.equal(1);
+    });
+
+    it('should evaluate filters, $select, $orderby and $top in memory', async () => {
+        const result = await cache.read('PaymentTerms', request({
+            from: { ref: ['CoupaService.PaymentTerms'] },
+            columns: [{ ref: ['code'] }, { ref: ['name'], as: 'text' }],
+            where: [{ ref: ['isActive'] }, '=', { val: true }],
+            orderBy: [{ ref: ['code'], sort: 'desc' }],
+            limit: { rows: { val: 10 } }
+        }), fromDatabase);
+
+        expect(result).to.deep.equal([{ code: 'NET30', text: 'Net 30 days' }]);
+    });
+
+    it('should pass other queries to the database and filter them by locale', async () => {
+        const result = await cache.read('PaymentTerms', request({
+            from: { ref: ['CoupaService.PaymentTerms'] },
+            search: [{ val: 'Net' }]
+        }, 'fr'), async () => rows.map(row => ({ ...row })));
+
+        expect(result.map(row => row.locale)).to.deep.equal(['en', 'en']);
+    });
+});
@@ -0,0 +1,62 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Duplicate Checker - Batch', () => {
+    let duplicateChecker;
+    let partnerBulkIngest;
+    let db;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        db = await cds.connect.to('db');
+        duplicateChecker = require('../srv/lib/shared/duplicate-checker');
+        partnerBulkIngest = require('../srv/lib/shared/partner-bulk-ingest');
+    });
+
+    it('should match VAT IDs and names for many requests and record the results', async () => {
+        const { ExistingPartners, DuplicateChecks, BusinessPartnerRequests } = db.entities('mdm.db');
+        await INSERT.into(ExistingPartners).entries([
+            { sapBpNumber: '9100000001', partnerName: 'Batchdup Vat Holder', establishedVatId: 'DE999000111' },
+            { sapBpNumber: '9100000002', partnerName: 'Batchdup Named Partner AG' }
+        ]);
+        const [vatRequest, nameRequest, cleanRequest] = await partnerBulkIngest.insertRequests([
+            { partnerName: 'Unrelated Vat Owner', vatIds: [{ country_code: 'DE', vatNumber: 'DE999000111' }] },
+            { partnerName: 'Batchdup Named Partner' },
+            { partnerName: 'Qxqxq Nothing Alike' }
+        ], 'Coupa');
+
+        const results = await duplicateChecker.checkDuplicatesBatch([vatRequest.ID, nameRequest.ID, cleanRequest.ID, vatRequest.ID]);
+
+        expect(results.size).to.equal(3);
+        expect(results.get(vatRequest.ID).map(d => [d.sapBpNumber, d.matchType])).to.deep.equal([['9100000001', 'VAT']]);
+        expect(results.get(nameRequest.ID).map(d => [d.sapBpNumber, d.matchType])).to.deep.equal([['9100000002', 'Name']]);
+        expect(results.get(cleanRequest.ID)).to.be.empty;
+
+        const checks = await SELECT.from(DuplicateChecks).where({ request_ID: { in: [vatRequest.ID, nameRequest.ID, cleanRequest.ID] } });
+        expect(checks).to.have.length(2);
+        const requests = await SELECT.from(BusinessPartnerRequests)
+            .columns('ID', 'duplicateCheckStatus')
+            .where({ ID: { in: [vatRequest.ID, cleanRequest.ID] } });
+        expect(requests.find(r => r.ID === vatRequest.ID).duplicateCheckStatus).to.equal('1 Duplicate Found');
+        expect(requests.find(r => r.ID === cleanRequest.ID).duplicateCheckStatus).to.equal('No Duplicates');
+    });
+
+    it('should bound name matches when a broad name matches many partners', async () => {
+        const { ExistingPartners } = db.entities('mdm.db');
+        const partners = [];
+        for (let i = 0; i < 25; i++) {
+            partners.push({ sapBpNumber: `92000000${String(i).padStart(2, '0')}`, partnerName: `Zbroad Common ${i}` });
+        }
+        partners.push({ sapBpNumber: '9200000099', partnerName: 'Zbroad Rare GmbH' });
+        await INSERT.into(ExistingPartners).entries(partners);
+        const [broad, rare] = await partnerBulkIngest.insertRequests([
+            { partnerName: 'Zbroad' },
+            { partnerName: 'Zbroad Rare' }
+        ], 'Coupa');
+
+        const results = await duplicateChecker.checkDuplicatesBatch([broad.ID, rare.ID]);
+
+        expect(results.get(broad.ID)).to.have.length(10);
+        expect(results.get(rare.ID).map(d => d.sapBpNumber)).to.deep.equal(['9200000099']);
+    });
+});
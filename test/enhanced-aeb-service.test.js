@@ -0,0 +1,89 @@
+const { expect } = require('chai');
+const sinon = require('sinon');
+const axios = require('axios');
+
+describe('Enhanced AEB Service - Batched Screening', () => {
+    let EnhancedAEBService;
+
+    before(() => {
+        EnhancedAEBService = require('../srv/lib/enhanced-aeb-service').constructor;
+    });
+
+    const screeningData = (name, country) => ({
+        name,
+        addresses: [{ ID: `ADDR-${name}`, name1: name, street: 'Main St 1', city: 'Berlin', postalCode: '10115', country_code: country }]
+    });
+
+    function countingService(options) {
+        const service = new EnhancedAEBService({ useMock: true, batchWindowMs: 10, ...options });
+        const mockScreenAddresses = service.mockScreenAddresses.bind(service);
+        service.calls = [];
+        service.mockScreenAddresses = async (payload) => {
+            service.calls.push(payload.addresses.length);
+            return mockScreenAddresses(payload);
+        };
+        return service;
+    }
+
+    it('should screen concurrent requests in one call and map results back', async () => {
+        const service = countingService();
+        const [clean, sanctioned] = await Promise.all([
+            service.performScreening(screeningData('Acme Corp', 'DE')),
+            service.performScreening(screeningData('Acme Corp', 'IR'))
+        ]);
+
+        expect(service.calls).to.deep.equal([2]);
+        expect(clean.status).to.equal('Pass');
+        expect(clean.results[0].referenceId).to.equal('ADDR-Acme Corp');
+        expect(sanctioned.status).to.equal('Blocked');
+    });
+
+    it('should answer repeated addresses from the cache until the list version changes', async () => {
+        const service = countingService({ listVersion: 'v1' });
+        await service.performScreening(screeningData('Acme Corp', 'DE'));
+        await service.performScreening(screeningData('  ACME   corp', 'DE'));
+        expect(service.calls).to.deep.equal([1]);
+
+        service.setListVersion('v2');
+        await service.performScreening(screeningData('Acme Corp', 'DE'));
+        expect(service.calls).to.deep.equal([1, 1]);
+    });
+
+    it('should split batches at the configured batch size', async () => {
+        const service = countingService({ batchSize: 2 });
+        await Promise.all(['A', 'B', 'C'].map(name => service.performScreening(screeningData(name, 'DE'))));
+        expect(service.calls).to.deep.equal([2, 1]);
+    });
+
+    it('should not cache mock fallback results of a failed API call', async () => {
+        const service = new EnhancedAEBService({ useMock: false, batchWindowMs: 10 });
+        service.AEB_API_KEY = 'test-key';
+        service.AEB_CLIENT_ID = 'test-client';
+        const post = sinon.stub(axios, 'post');
+        post.onFirstCall().rejects(new Error('connect ECONNREFUSED'));
+        post.onSecondCall().resolves({
+            data: {
+                screeningId: 'AEB-REAL-1',
+                results: [{ referenceId: 'BATCH_0', matchFound: false, riskScore: 5, status: 'PASS', hits: [] }]
+            }
+        });
+
+        try {
+            const outage = await service.performScreening(screeningData('Acme Corp', 'DE'));
+            expect(outage.fallback).to.equal(true);
+            expect(outage.results[0].fallback).to.equal(true);
+            expect(service.screeningCache.size).to.equal(0);
+
+            const real = await service.performScreening(screeningData('Acme Corp', 'DE'));
+            expect(real.fallback).to.equal(false);
+            expect(real.screeningId).to.equal('AEB-REAL-1');
+            expect(real.riskScore).to.equal(5);
+
+            // The real result is cached
+            await service.performScreening(screeningData('Acme Corp', 'DE'));
+            expect(post.callCount).to.equal(2);
+        } finally {
+            post.restore();
+        }
+    });
+});
@@ -0,0 +1,65 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Keyset Pagination', () => {
+    const REQUESTS = 'mdm.db.BusinessPartnerRequests';
+    let keyset;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        keyset = require('../srv/lib/shared/keyset-pagination');
+    });
+
+    it('should round-trip the sort key values of a row through a cursor', () => {
+        const order = keyset.ORDERS.createdAt;
+        const row = { createdAt: '2026-01-15T10:00:00.000Z', ID: cds.utils.uuid(), partnerName: 'Not in the cursor' };
+
+        const cursor = keyset.encodeCursor(row, order);
+
+        expect(cursor).to.match(/^[A-Za-z0-9_-]+$/);
+        expect(keyset.decodeCursor(cursor, order)).to.deep.equal([row.createdAt, row.ID]);
+    });
+
+    it('should reject invalid cursors', () => {
+        const order = keyset.ORDERS.createdAt;
+        const encode = (value) => Buffer.from(JSON.stringify(value)).toString('base64url');
+
+        expect(keyset.decodeCursor('not a cursor', order)).to.equal(null);
+        expect(keyset.decodeCursor(encode(['2026-01-15T10:00:00.000Z']), order)).to.equal(null);
+        expect(keyset.decodeCursor(encode({ createdAt: '2026-01-15T10:00:00.000Z', ID: 'x' }), order)).to.equal(null);
+        expect(keyset.decodeCursor(encode(['2026-01-15T10:00:00.000Z', { ID: 'x' }]), order)).to.equal(null);
+        expect(() => keyset.pageQuery(SELECT.from(REQUESTS), { cursor: 'not a cursor', pageSize: 10 }))
+            .to.throw('Invalid pagination cursor');
+    });
+
+    it('should page through rows with equal createdAt without gaps or repeats', async () => {
+        const sourceSystem = 'KeysetTest';
+        const rows = ['2026-01-15T10:00:00.000Z', '2026-01-15T10:00:00.000Z', '2026-01-15T10:00:00.000Z',
+            '2026-01-14T10:00:00.000Z', '2026-01-16T10:00:00.000Z'].map((createdAt, i) => ({
+            ID: cds.utils.uuid(),
+            requestNumber: `KEYSET-${i}`,
+            partnerName: `Keyset Partner ${i}`,
+            sourceSystem,
+            createdAt
+        }));
+        await INSERT.into(REQUESTS).entries(rows);
+
+        const seen = [];
+        let cursor = null;
+        let pages = 0;
+        do {
+            const query = SELECT.from(REQUESTS).columns('ID', 'createdAt').where({ sourceSystem });
+            keyset.pageQuery(query, { cursor, pageSize: 2 });
+            const page = keyset.toPage(await query, 2);
+            seen.push(...page.items.map(item => item.ID));
+            cursor = page.nextCursor;
+            pages++;
+        } while (cursor && pages < 10);
+
+        const expected = [...rows]
+            .sort((a, b) => b.createdAt.localeCompare(a.createdAt) || (a.ID < b.ID ? 1 : -1))
+            .map(row => row.ID);
+        expect(pages).to.equal(3);
+        expect(seen).to.deep.equal(expected);
+    });
+});
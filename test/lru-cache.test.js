@@ -0,0 +1,117 @@
+const { expect } = require('chai');
+const sinon = require('sinon');
+const LruCache = require('../srv/lib/shared/lru-cache');
+
+describe('LRU Cache', () => {
+    let clock;
+
+    beforeEach(() => {
+        clock = sinon.useFakeTimers({ now: 0, toFake: ['Date'] });
+    });
+
+    afterEach(() => {
+        clock.restore();
+    });
+
+    it('should expire entries after their TTL', () => {
+        const cache = new LruCache({ maxEntries: 10, ttl: 1000 });
+        cache.set('a', 1);
+        cache.set('b', 2, 5000);
+
+        clock.tick(999);
+        expect(cache.get('a')).to.equal(1);
+
+        clock.tick(1);
+        expect(cache.get('a')).to.equal(undefined);
+        expect(cache.get('b')).to.equal(2);
+        expect(cache.size).to.equal(1);
+
+        clock.tick(4000);
+        expect(cache.prune()).to.equal(1);
+        expect(cache.getStats()).to.include({ size: 0, hits: 2, misses: 1, expirations: 2 });
+    });
+
+    it('should evict the least recently used entry when full', () => {
+        const cache = new LruCache({ maxEntries: 2, ttl: 1000 });
+        cache.set('a', 1);
+        cache.set('b', 2);
+
+        // A hit makes 'a' the most recently used entry, so 'b' goes first
+        expect(cache.get('a')).to.equal(1);
+        cache.set('c', 3);
+
+        expect(cache.get('b')).to.equal(undefined);
+        expect(cache.get('a')).to.equal(1);
+        expect(cache.get('c')).to.equal(3);
+        expect(cache.getStats()).to.include({ size: 2, evictions: 1 });
+    });
+
+    it('should drop expired entries before evicting live ones', () => {
+        const cache = new LruCache({ maxEntries: 2, ttl: 1000 });
+        cache.set('a', 1, 5000);
+        cache.set('b', 2);
+
+        clock.tick(1000);
+        cache.set('c', 3);
+
+        expect(cache.get('a')).to.equal(1);
+        expect(cache.get('c')).to.equal(3);
+        expect(cache.getStats()).to.include({ evictions: 0, expirations: 1 });
+    });
+
+    it('should share one computation between concurrent misses', async () => {
+        const cache = new LruCache({ maxEntries: 10, ttl: 1000 });
+        const compute = sinon.stub().resolves('value');
+
+        const results = await Promise.all([
+            cache.getOrCompute('key', compute),
+            cache.getOrCompute('key', compute),
+            cache.getOrCompute('key', compute)
+        ]);
+
+        expect(results).to.deep.equal(['value', 'value', 'value']);
+        expect(compute.callCount).to.equal(1);
+        expect(await cache.getOrCompute('key', compute)).to.equal('value');
+        expect(compute.callCount).to.equal(1);
+        expect(cache.pending.size).to.equal(0);
+    });
+
+    it('should not cache a failed computation', async () => {
+        const cache = new LruCache({ maxEntries: 10, ttl: 1000 });
+        const compute = sinon.stub();
+        compute.onFirstCall().rejects(new Error('database unavailable'));
+        compute.onSecondCall().resolves('value');
+
+        const failures = await Promise.allSettled([cache.getOrCompute('key', compute), cache.getOrCompute('key', compute)]);
+
+        expect(failures.map(result => result.status)).to.deep.equal(['rejected', 'rejected']);
+        expect(cache.size).to.equal(0);
+        expect(await cache.getOrCompute('key', compute)).to.equal('value');
+        expect(compute.callCount).to.equal(2);
+    });
+
+    it('should not cache a value invalidated while it was computed', async () => {
+        const cache = new LruCache({ maxEntries: 10, ttl: 1000 });
+        let finish;
+        const computing = cache.getOrCompute('key', () => new Promise(resolve => { finish = resolve; }));
+
+        await Promise.resolve();
+        cache.deleteWhere(() => true);
+        finish('stale');
+
+        expect(await computing).to.equal('stale');
+        expect(cache.get('key')).to.equal(undefined);
+        expect(await cache.getOrCompute('key', async () => 'fresh')).to.equal('fresh');
+        expect(cache.get('key')).to.equal('fresh');
+    });
+
+    it('should remove only the entries matching a predicate', () => {
+        const cache = new LruCache({ maxEntries: 10, ttl: 1000 });
+        cache.set('a', { entity: 'ValidationRules' });
+        cache.set('b', { entity: 'SectionValidationRules' });
+        cache.set('c', { entity: 'ValidationRules' });
+
+        expect(cache.deleteWhere(value => value.entity === 'ValidationRules')).to.equal(2);
+        expect(Array.from(cache.entries.keys())).to.deep.equal(['b']);
+    });
+});
@@ -0,0 +1,166 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+const sinon = require('sinon');
+const axios = require('axios');
+
+describe('Notification Outbox - Worker', () => {
+    const OUTBOX = 'mdm.db.NotificationOutbox';
+    let outbox;
+    let post;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        const notificationOutbox = require('../srv/lib/notification-outbox');
+        outbox = new notificationOutbox.constructor();
+        outbox.db = await cds.connect.to('db');
+        outbox.retryDelay = 1000;
+        outbox.maxAttempts = 3;
+        outbox.batchSize = 1000;
+    });
+
+    beforeEach(() => {
+        post = sinon.stub(axios, 'post');
+    });
+
+    afterEach(() => {
+        sinon.restore();
+    });
+
+    const minutesFromNow = (minutes) => new Date(Date.now() + minutes * 60 * 1000).toISOString();
+
+    const queue = async (fields = {}) => {
+        const entry = {
+            ID: cds.utils.uuid(),
+            target: `Outbox-Test-${cds.utils.uuid()}`,
+            url: 'https://satellite.example.com/webhook',
+            payload: JSON.stringify({ event: 'StatusChanged' }),
+            status: 'Pending',
+            attempts: 0,
+            enqueuedAt: minutesFromNow(-1),
+            nextAttemptAt: minutesFromNow(-1),
+            ...fields
+        };
+        await INSERT.into(OUTBOX).entries(entry);
+        return entry;
+    };
+
+    const read = (entry) => SELECT.one.from(OUTBOX).where({ ID: entry.ID });
+
+    it('should deliver due entries and leave leased entries to their worker', async () => {
+        post.resolves({ status: 200, data: {} });
+        const due = await queue();
+        const leased = await queue({ status: 'Processing', attempts: 1, lockedUntil: minutesFromNow(5) });
+        const expired = await queue({ status: 'Processing', attempts: 1, lockedUntil: minutesFromNow(-1) });
+        const later = await queue({ nextAttemptAt: minutesFromNow(5) });
+
+        await outbox.drain();
+
+        expect(await read(due)).to.include({ status: 'Sent', attempts: 1, lockedUntil: null });
+        expect(await read(leased)).to.include({ status: 'Processing', attempts: 1 });
+        expect(await read(expired)).to.include({ status: 'Sent', attempts: 2 });
+        expect(await read(later)).to.include({ status: 'Pending', attempts: 0 });
+    });
+
+    it('should deliver the entries of a fast target while a slow target is still in progress', async () => {
+        let releaseSlow;
+        const slowResponse = new Promise(resolve => { releaseSlow = resolve; });
+        post.callsFake(async (url) => url.includes('slow') ? slowResponse : { status: 200, data: {} });
+        const waitFor = async (condition) => {
+            for (let i = 0; i < 100 && !await condition(); i++) {
+                await new Promise(resolve => setTimeout(resolve, 20));
+            }
+        };
+        const status = async (entry) => (await read(entry)).status;
+
+        const slow = await queue({ url: 'https://slow.example.com/webhook' });
+        const fast = await queue();
+        outbox.wakeUp();
+        await waitFor(async () => await status(fast) === 'Sent');
+
+        expect(await status(fast)).to.equal('Sent');
+        expect(await status(slow)).to.equal('Processing');
+
+        // A later claim pass runs while the slow delivery is still waiting for its response
+        const next = await queue();
+        outbox.wakeUp();
+        await waitFor(async () => await status(next) === 'Sent');
+
+        expect(await status(next)).to.equal('Sent');
+        expect(await status(slow)).to.equal('Processing');
+
+        releaseSlow({ status: 200, data: {} });
+        await Promise.all(outbox.deliveries);
+        expect(await status(slow)).to.equal('Sent');
+        expect(outbox.claimed.get(slow.target)).to.equal(0);
+    });
+
+    it('should leave entries of a target with its limit of deliveries in progress for a later pass', async () => {
+        post.resolves({ status: 200, data: {} });
+        const target = `Outbox-Test-${cds.utils.uuid()}`;
+        const entries = [];
+        for (let i = 0; i <= outbox.targetConcurrency; i++) {
+            entries.push(await queue({ target }));
+        }
+
+        const first = await outbox.drain();
+        const second = await outbox.drain();
+
+        expect(first).to.include({ claimed: outbox.targetConcurrency, sent: outbox.targetConcurrency });
+        expect(second).to.include({ claimed: 1, sent: 1 });
+        for (const entry of entries) {
+            expect(await read(entry)).to.include({ status: 'Sent', attempts: 1 });
+        }
+    });
+
+    it('should retry failed deliveries with exponential backoff', async () => {
+        post.rejects(new Error('connect ECONNREFUSED'));
+        const entry = await queue();
+
+        const startedAt = Date.now();
+        await outbox.drain();
+
+        const row = await read(entry);
+        expect(row).to.include({ status: 'Pending', attempts: 1, lastError: 'connect ECONNREFUSED', lockedUntil: null });
+        const delay = Date.parse(row.nextAttemptAt) - startedAt;
+        expect(delay).to.be.within(1000, 1200 + (Date.now() - startedAt));
+
+        expect(outbox.backoff(3)).to.be.within(4000, 4800);
+        expect(outbox.backoff(30)).to.be.within(outbox.maxRetryDelay, outbox.maxRetryDelay * 1.2);
+    });
+
+    it('should move entries to the dead letter after the last attempt', async () => {
+        post.rejects(new Error('Request failed with status code 500'));
+        const entry = await queue({ attempts: outbox.maxAttempts - 1 });
+
+        const summary = await outbox.drain();
+
+        expect(summary.deadLettered).to.be.at.least(1);
+        expect(await read(entry)).to.include({ status: 'DeadLetter', attempts: outbox.maxAttempts, lastError: 'Request failed with status code 500' });
+
+        post.resolves({ status: 200, data: {} });
+        expect(await outbox.retryDeadLetters(entry.target)).to.equal(1);
+        await outbox.drain();
+        expect(await read(entry)).to.include({ status: 'Sent', attempts: 1 });
+    });
+
+    it('should purge finished entries after their retention period', async () => {
+        const days = (n) => new Date(Date.now() - n * 24 * 60 * 60 * 1000).toISOString();
+        const oldSent = await queue({ status: 'Sent', nextAttemptAt: days(8) });
+        const recentSent = await queue({ status: 'Sent', nextAttemptAt: days(1) });
+        const oldDeadLetter = await queue({ status: 'DeadLetter', nextAttemptAt: days(31) });
+        const recentDeadLetter = await queue({ status: 'DeadLetter', nextAttemptAt: days(8) });
+
+        const deleted = await outbox.purge();
+
+        expect(deleted.Sent).to.be.at.least(1);
+        expect(deleted.DeadLetter).to.be.at.least(1);
+        expect(await read(oldSent)).to.not.exist;
+        expect(await read(oldDeadLetter)).to.not.exist;
+        expect(await read(recentSent)).to.exist;
+        expect(await read(recentDeadLetter)).to.exist;
+
+        const metrics = await outbox.getMetrics();
+        expect(metrics.depth).to.have.all.keys('Pending', 'Processing', 'DeadLetter');
+        expect(metrics.depth.DeadLetter).to.be.at.least(1);
+    });
+});
@@ -0,0 +1,124 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+const { validationResult } = require('express-validator');
+const { Readable } = require('stream');
+
+describe('Partner Bulk Ingest - NDJSON chunks', () => {
+    let partnerBulkIngest;
+
+    before(() => {
+        partnerBulkIngest = require('../srv/lib/shared/partner-bulk-ingest');
+    });
+
+    const line = (partnerName) => JSON.stringify({ partnerName, addresses: [{ addressType: 'Main', city: 'Berlin' }] });
+
+    it('should read records in chunks with their line numbers', async () => {
+        const body = [line('Alpha Corp'), '', 'not json', line('Bravo Corp'), '[1]'].join('\r\n');
+        const chunks = [];
+        for await (const chunk of partnerBulkIngest.readNdjsonChunks(Readable.from([body]), 2)) {
+            chunks.push(chunk);
+        }
+
+        expect(chunks.map(chunk => chunk.length)).to.deep.equal([2, 2]);
+        expect(chunks[0][0]).to.include({ line: 1, error: null });
+        expect(chunks[0][1].line).to.equal(3);
+        expect(chunks[0][1].error).to.match(/^Invalid JSON/);
+        expect(chunks[1][1].error).to.equal('Each line must be a JSON object');
+    });
+
+    it('should write a chunk at once and isolate failing records', async () => {
+        const ingest = Object.create(partnerBulkIngest);
+        const calls = [];
+        ingest.insertRequests = async (records) => {
+            calls.push(records.length);
+            if (records.length > 1 || records[0].partnerName === 'Bravo Corp') {
+                throw new Error('constraint violation');
+            }
+            return [{ ID: `ID-${records[0].partnerName}`, requestNumber: 'MDM-0000000001' }];
+        };
+        const chunk = [
+            { line: 1, record: JSON.parse(line('Alpha Corp')), error: null },
+            { line: 2, record: JSON.parse(line('Bravo Corp')), error: null },
+            { line: 3, record: { partnerName: 'Ch' }, error: null }
+        ];
+
+        const results = await ingest.processChunk(chunk, 'Coupa');
+
+        expect(calls).to.deep.equal([2, 1, 1]);
+        expect(results.map(result => result.status)).to.deep.equal(['Success', 'Error', 'Error']);
+        expect(results[0].requestId).to.equal('ID-Alpha Corp');
+        expect(results[1].errors).to.deep.equal(['constraint violation']);
+        expect(results[2].line).to.equal(3);
+    });
+
+    it('should apply the create endpoint rules to each record', async () => {
+        const ingest = Object.create(partnerBulkIngest);
+        const written = [];
+        ingest.insertRequests = async (records) => {
+            written.push(...records);
+            return records.map((record, i) => ({ ID: `ID-${i}`, requestNumber: `MDM-000000000${i}` }));
+        };
+        const record = (fields) => ({ ...JSON.parse(line('Alpha Corp')), ...fields });
+        const chunk = [
+            { line: 1, record: record({ partnerName: '  Smith & Sons  ' }), error: null },
+            { line: 2, record: record({ partnerName: 'Alpha <Corp>' }), error: null },
+            { line: 3, record: record({ partnerName: 'A'.repeat(101) }), error: null },
+            { line: 4, record: record({ requesterEmail: 'not-an-email' }), error: null },
+            { line: 5, record: record({ entityType: 'Vendor' }), error: null }
+        ];
+
+        const results = await ingest.processChunk(chunk, 'Coupa');
+
+        expect(results.map(result => result.status)).to.deep.equal(['Success', 'Error', 'Error', 'Error', 'Error']);
+        expect(written).to.have.length(1);
+        expect(written[0].partnerName).to.equal('Smith &amp; Sons');
+        expect(results[1].errors).to.deep.equal(['partnerName: Partner name contains invalid characters']);
+        expect(results[2].errors).to.deep.equal(['partnerName: Partner name must be between 2 and 100 characters']);
+        expect(results[3].errors).to.deep.equal(['requesterEmail: Invalid email format']);
+        expect(results[4].errors).to.deep.equal(['entityType: Entity type must be Supplier, Customer, or Both']);
+    });
+});
+
+describe('Partner Bulk Ingest - Request number round trip', () => {
+    let partnerBulkIngest;
+    let validation;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        partnerBulkIngest = require('../srv/lib/shared/partner-bulk-ingest');
+        validation = require('../srv/middleware/validation');
+    });
+
+    // Run the validation chains of an endpoint (without the error response middleware)
+    const validate = async (rules, req) => {
+        for (const rule of rules.slice(0, -1)) {
+            await rule.run(req);
+        }
+        return validationResult(req).array();
+    };
+
+    it('should create requests that the status endpoints accept and find', async () => {
+        const records = ['Round Trip Alpha GmbH', 'Round Trip Bravo GmbH'].map(partnerName => ({
+            partnerName,
+            addresses: [{ addressType: 'Main', city: 'Berlin', country_code: 'DE' }]
+        }));
+        const created = await partnerBulkIngest.insertRequests(records, 'Coupa');
+        const requestNumbers = created.map(request => request.requestNumber);
+
+        for (const requestNumber of requestNumbers) {
+            expect(await validate(validation.validateRequestNumber, { params: { requestNumber } })).to.be.empty;
+        }
+        expect(await validate(validation.validateBulkStatus, { body: { requestNumbers } })).to.be.empty;
+        expect(await validate(validation.validateWebhook, { body: { requestNumber: requestNumbers[0] } })).to.be.empty;
+
+        const found = await SELECT.from('mdm.db.BusinessPartnerRequests')
+            .columns('requestNumber', 'sourceSystem')
+            .where({ requestNumber: { in: requestNumbers } });
+        expect(found.map(request => request.requestNumber)).to.have.members(requestNumbers);
+    });
+
+    it('should still reject malformed request numbers', async () => {
+        const errors = await validate(validation.validateRequestNumber, { params: { requestNumber: 'mdm-1' } });
+        expect(errors).to.have.length(1);
+    });
+});
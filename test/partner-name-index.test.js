@@ -0,0 +1,94 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Partner Name Index - Blocking Keys', () => {
+    let partnerNameIndex;
+    let db;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        db = await cds.connect.to('db');
+        partnerNameIndex = require('../srv/lib/partner-name-index');
+    });
+
+    it('should strip legal suffixes and punctuation when normalizing', () => {
+        expect(partnerNameIndex.normalizePartnerName('ACME Trading GmbH')).to.equal('acme trading');
+        expect(partnerNameIndex.normalizePartnerName('Acme Trading, Ltd.')).to.equal('acme trading');
+    });
+
+    it('should give misspelled names shared blocking keys', () => {
+        const keys = partnerNameIndex.blockingKeys(partnerNameIndex.normalizePartnerName('Acme Trading GmbH'));
+        const misspelled = partnerNameIndex.blockingKeys(partnerNameIndex.normalizePartnerName('Akme Tradeing Ltd'));
+        expect(keys).to.include.members(['t:acme', 't:trad']);
+        expect(misspelled.filter(key => keys.includes(key))).to.not.be.empty;
+    });
+
+    it('should find partners created after the index was built', async () => {
+        const { ExistingPartners } = db.entities('mdm.db');
+        partnerNameIndex.attach(db);
+        await partnerNameIndex.ensureBuilt(db);
+
+        const ID = cds.utils.uuid();
+        await INSERT.into(ExistingPartners).entries({ ID, sapBpNumber: '9999999901', partnerName: 'Zyxwv Blocking Test AG' });
+        expect(await partnerNameIndex.candidates('zyxwv blocking test')).to.include(ID);
+
+        await UPDATE(ExistingPartners).set({ partnerName: 'Qqrst Renamed Partner AG' }).where({ ID });
+        expect(await partnerNameIndex.candidates('zyxwv')).to.not.include(ID);
+        expect(await partnerNameIndex.candidates('qqrst renamed partner')).to.include(ID);
+
+        await DELETE.from(ExistingPartners).where({ ID });
+        expect(await partnerNameIndex.candidates('qqrst renamed partner')).to.not.include(ID);
+    });
+
+    it('should rebuild only when partners were loaded without the handlers', async () => {
+        const { ExistingPartners, ExistingPartnerNameKeys, ExistingPartnerNameIndexState } = db.entities('mdm.db');
+        partnerNameIndex.attach(db);
+        await partnerNameIndex.ensureBuilt(db);
+
+        // A partner without blocking keys (suffix only) and a key row that a rebuild drops
+        await INSERT.into(ExistingPartners).entries({ ID: cds.utils.uuid(), sapBpNumber: '9999999902', partnerName: 'AG' });
+        const staleKey = { blockingKey: 't:zzzz', partner_ID: cds.utils.uuid() };
+        await INSERT.into(ExistingPartnerNameKeys).entries(staleKey);
+
+        partnerNameIndex.ready = null;
+        await partnerNameIndex.ensureBuilt(db);
+        expect(await SELECT.one.from(ExistingPartnerNameKeys).where(staleKey)).to.exist;
+
+        // Partners the marker does not account for trigger a rebuild
+        await UPDATE(ExistingPartnerNameIndexState).with({ partnerCount: { '-=': 1 } }).where({ ID: 'ExistingPartners' });
+        partnerNameIndex.ready = null;
+        await partnerNameIndex.ensureBuilt(db);
+        expect(await SELECT.one.from(ExistingPartnerNameKeys).where(staleKey)).to.not.exist;
+
+        const [{ partners }] = await SELECT.from(ExistingPartners).columns('count(1) as partners');
+        const state = await SELECT.one.from(ExistingPartnerNameIndexState).where({ ID: 'ExistingPartners' });
+        expect(state.partnerCount).to.equal(partners);
+    });
+
+    it('should skip common keys and inactive partners', async () => {
+        const { ExistingPartners } = db.entities('mdm.db');
+        partnerNameIndex.attach(db);
+        await partnerNameIndex.ensureBuilt(db);
+
+        const partner = (partnerName, status = 'Active') => ({ ID: cds.utils.uuid(), sapBpNumber: '99999999', partnerName, status });
+        const [alpha, bravo, charlie, inactive] = [
+            partner('Qwvoxx Alpha'), partner('Qwvoxx Bravo'), partner('Qwvoxx Charlie'), partner('Qwvoxx Delta', 'Inactive')
+        ];
+        await INSERT.into(ExistingPartners).entries([alpha, bravo, charlie, inactive]);
+
+        const maxKeyPartners = partnerNameIndex.maxKeyPartners;
+        partnerNameIndex.maxKeyPartners = 2;
+        try {
+            const candidates = await partnerNameIndex.candidates('qwvoxx alpha');
+            expect(candidates).to.include(alpha.ID);
+            expect(candidates).to.not.include.members([bravo.ID]);
+            expect(candidates).to.not.include.members([charlie.ID]);
+        } finally {
+            partnerNameIndex.maxKeyPartners = maxKeyPartners;
+        }
+
+        const candidates = await partnerNameIndex.candidates('qwvoxx');
+        expect(candidates).to.include.members([alpha.ID, bravo.ID, charlie.ID]);
+        expect(candidates).to.not.include(inactive.ID);
+    });
+});
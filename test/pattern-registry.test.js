@@ -0,0 +1,67 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Pattern Registry - Country Patterns', () => {
+    let patternRegistry;
+    let ValidationService;
+    let db;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        db = await cds.connect.to('db');
+        patternRegistry = require('../srv/lib/shared/pattern-registry');
+        ValidationService = require('../srv/lib/validation-service');
+        patternRegistry.invalidate();
+        await patternRegistry.load(db);
+    });
+
+    it('should use VAT and postal code patterns loaded from the CSV tables', () => {
+        // Norway, Switzerland and Poland are only in the tables, not in the built-in patterns
+        expect(patternRegistry.checkVatNumber('NO123456789MVA')).to.equal(null);
+        expect(patternRegistry.checkVatNumber('NO123456789')).to.equal('Invalid VAT number format for NO');
+        expect(patternRegistry.checkVatNumber('CHE123456789MWST', 'CH')).to.equal(null);
+        expect(patternRegistry.checkPostalCode('PL', '00-001')).to.equal(null);
+        expect(patternRegistry.checkPostalCode('PL', '00001')).to.equal('Postal code format for PL is invalid. Expected format: 00-001');
+    });
+
+    it('should check IBAN lengths and check digits', () => {
+        expect(patternRegistry.checkIban('NO93 8601 1117 947')).to.equal(null);
+        expect(patternRegistry.checkIban('DE89370400440532013000')).to.equal(null);
+        expect(patternRegistry.checkIban('DE8937040044053201300')).to.equal('IBAN length for DE should be 22 characters, but got 21');
+        expect(patternRegistry.checkIban('DE89370400440532013001')).to.equal('Invalid IBAN check digits');
+    });
+
+    it('should check all children of a request in one call', () => {
+        const { errors } = patternRegistry.validateRequestData({
+            addresses: [{ country_code: 'PL', postalCode: '00-001' }, { country_code: 'CH', postalCode: '80010' }],
+            banks: [{ iban: 'DE89370400440532013001' }],
+            vatIds: [{ vatNumber: 'NO123456789MVA', country_code: 'NO' }, { vatNumber: 'EL12345678', country_code: 'EL' }],
+            subAccounts: [{ banks: [{ iban: 'NO9386011117947' }] }]
+        });
+
+        expect(errors.map(error => [error.entity, error.index, error.field])).to.deep.equal([
+            ['PartnerAddresses', 1, 'postalCode'],
+            ['PartnerBanks', 0, 'iban'],
+            ['PartnerVatIds', 1, 'vatNumber']
+        ]);
+    });
+
+    it('should report IBAN and VAT rules of validateRequest from the registry', async () => {
+        const service = new ValidationService(db);
+        const validate = (data) => service.validateRequest(data, 'Submitted', 'Coupa', 'Supplier', 'Create');
+        const ruleCodes = (result) => result.errors.map(error => error.ruleCode);
+
+        const invalid = await validate({
+            banks: [{ iban: 'DE89370400440532013001' }],
+            vatIds: [{ vatNumber: 'NO123456789', country_code: 'NO' }]
+        });
+        expect(ruleCodes(invalid)).to.include.members(['VAL_BANK_IBAN', 'VAL_VAT_FORMAT']);
+
+        const valid = await validate({
+            banks: [{ iban: 'NO9386011117947' }],
+            vatIds: [{ vatNumber: 'NO123456789MVA', country_code: 'NO' }]
+        });
+        expect(ruleCodes(valid)).to.not.include.members(['VAL_BANK_IBAN']);
+        expect(ruleCodes(valid)).to.not.include.members(['VAL_VAT_FORMAT']);
+    });
+});
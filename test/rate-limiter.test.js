@@ -0,0 +1,84 @@
+const { expect } = require('chai');
+const sinon = require('sinon');
+const { TokenBucket, Semaphore } = require('../srv/lib/shared/rate-limiter');
+
+describe('Rate Limiter', () => {
+    describe('TokenBucket', () => {
+        let clock;
+
+        beforeEach(() => {
+            clock = sinon.useFakeTimers({ now: 0 });
+        });
+
+        afterEach(() => {
+            clock.restore();
+        });
+
+        it('should allow a burst and then space calls to the sustained rate', async () => {
+            const bucket = new TokenBucket({ ratePerSecond: 10, burst: 2 });
+            const grantedAt = [];
+
+            const takes = [1, 2, 3, 4, 5].map(() => bucket.take().then(() => grantedAt.push(Date.now())));
+            await clock.tickAsync(1000);
+            await Promise.all(takes);
+
+            expect(grantedAt).to.deep.equal([0, 0, 100, 200, 300]);
+        });
+
+        it('should refill tokens while idle, up to the burst size', async () => {
+            const bucket = new TokenBucket({ ratePerSecond: 10, burst: 2 });
+            await Promise.all([bucket.take(), bucket.take()]);
+
+            await clock.tickAsync(5000);
+            const grantedAt = [];
+            const takes = [1, 2, 3].map(() => bucket.take().then(() => grantedAt.push(Date.now())));
+            await clock.tickAsync(1000);
+            await Promise.all(takes);
+
+            expect(grantedAt).to.deep.equal([5000, 5000, 5100]);
+        });
+
+        it('should not wait when the rate is unlimited', async () => {
+            const bucket = new TokenBucket({ ratePerSecond: Infinity });
+
+            await Promise.all(Array.from({ length: 100 }, () => bucket.take()));
+
+            expect(Date.now()).to.equal(0);
+        });
+    });
+
+    describe('Semaphore', () => {
+        it('should bound the number of concurrent holders and serve waiters in order', async () => {
+            const semaphore = new Semaphore(2);
+            let active = 0;
+            let maxActive = 0;
+            const started = [];
+
+            const task = (id) => semaphore.run(async () => {
+                started.push(id);
+                active++;
+                maxActive = Math.max(maxActive, active);
+                await new Promise(resolve => setTimeout(resolve, 5));
+                active--;
+                return id;
+            });
+
+            const results = await Promise.all([1, 2, 3, 4, 5].map(task));
+
+            expect(results).to.deep.equal([1, 2, 3, 4, 5]);
+            expect(started).to.deep.equal([1, 2, 3, 4, 5]);
+            expect(maxActive).to.equal(2);
+            expect(semaphore.active).to.equal(0);
+            expect(semaphore.waiting).to.have.length(0);
+        });
+
+        it('should release the slot when the function fails', async () => {
+            const semaphore = new Semaphore(1);
+
+            await semaphore.run(async () => { throw new Error('VIES unavailable'); }).catch(() => {});
+
+            expect(await semaphore.run(async () => 'next')).to.equal('next');
+            expect(semaphore.active).to.equal(0);
+        });
+    });
+});
@@ -0,0 +1,155 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+const sinon = require('sinon');
+
+describe('Request Number Generator - Concurrency', () => {
+    let requestNumberGenerator;
+    let db;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        db = await cds.connect.to('db');
+        requestNumberGenerator = require('../srv/utils/request-number-generator');
+    });
+
+    const parallel = (count, fn) => Promise.all(Array.from({ length: count }, (_, i) => fn(i)));
+
+    it('should hand out distinct numbers to concurrent getNextNumber calls', async () => {
+        const numbers = await parallel(20, () => requestNumberGenerator.getNextNumber('SALESFORCE', db));
+
+        expect(new Set(numbers).size).to.equal(20);
+        numbers.forEach(number => expect(number).to.match(/^SALESFORCE-\d{10}$/));
+        const values = numbers.map(number => Number(number.split('-')[1])).sort((a, b) => a - b);
+        expect(values[19] - values[0]).to.equal(19);
+    });
+
+    it('should reserve disjoint contiguous ranges for concurrent getNextNumbers calls', async () => {
+        const ranges = await parallel(5, () => requestNumberGenerator.getNextNumbers('PI', 4, db));
+
+        const values = ranges.flat().map(number => Number(number.split('-')[1]));
+        expect(new Set(values).size).to.equal(20);
+        ranges.forEach(range => {
+            const first = Number(range[0].split('-')[1]);
+            expect(range.map(number => Number(number.split('-')[1]))).to.deep.equal([first, first + 1, first + 2, first + 3]);
+        });
+    });
+
+    it('should create a missing counter once when callers race for it', async () => {
+        const counter = 'RACE-TEST';
+        const values = await parallel(10, () => requestNumberGenerator.nextValue(counter, db, async () => 100));
+
+        expect(values.sort((a, b) => a - b)).to.deep.equal([101, 102, 103, 104, 105, 106, 107, 108, 109, 110]);
+        const rows = await SELECT.from('mdm.db.RequestNumberCounters').where({ prefix: counter });
+        expect(rows).to.have.length(1);
+        expect(Number(rows[0].lastNumber)).to.equal(110);
+    });
+
+    it('should not run a counter INSERT that loses the race in the caller\'s transaction', async () => {
+        const callerStatements = [];
+        let counterExists = false;
+        const caller = {
+            run: async (query) => {
+                callerStatements.push(Object.keys(query)[0]);
+                if (query.UPDATE) return counterExists ? 1 : 0;
+                if (query.SELECT) return counterExists ? { prefix: 'LOST-RACE', lastNumber: 42 } : null;
+                throw new Error(`Unexpected statement ${JSON.stringify(query)}`);
+            }
+        };
+        const contexts = [];
+        const root = {
+            tx: async (context, fn) => {
+                contexts.push(context);
+                return fn({
+                    run: async () => {
+                        counterExists = true; // Created by the caller that won
+                        throw new Error('unique constraint violated');
+                    }
+                });
+            }
+        };
+        const configured = cds.env.requires.db.kind;
+        const connect = sinon.stub(cds.connect, 'to').resolves(root);
+        cds.env.requires.db.kind = 'postgres';
+        try {
+            expect(await requestNumberGenerator._reserve('LOST-RACE', 1, caller, async () => 0)).to.equal(42);
+        } finally {
+            cds.env.requires.db.kind = configured;
+            connect.restore();
+        }
+
+        expect(contexts).to.have.length(1);
+        expect(callerStatements).to.deep.equal(['UPDATE', 'SELECT', 'UPDATE', 'SELECT']);
+    });
+
+    it('should not hand out a block again after the transaction that reserved it rolled back', async () => {
+        const counter = 'BLOCK-ROLLBACK';
+        const seed = async () => 0;
+        requestNumberGenerator.blockSize = 5;
+        try {
+            let failure;
+            try {
+                await cds.tx(async (tx) => {
+                    expect(await requestNumberGenerator.nextValue(counter, tx, seed)).to.equal(1);
+                    throw new Error('create failed');
+                });
+            } catch (error) {
+                failure = error;
+            }
+            expect(failure.message).to.equal('create failed');
+            expect(await SELECT.one.from('mdm.db.RequestNumberCounters').where({ prefix: counter })).to.not.exist;
+
+            // The number of the rolled-back create is free again; the rest of the block is only used after a commit
+            expect(await cds.tx(tx => requestNumberGenerator.nextValue(counter, tx, seed))).to.equal(1);
+            expect(await requestNumberGenerator.nextValue(counter, db, seed)).to.equal(2);
+
+            const row = await SELECT.one.from('mdm.db.RequestNumberCounters').where({ prefix: counter });
+            expect(Number(row.lastNumber)).to.equal(5);
+        } finally {
+            requestNumberGenerator.blockSize = 1;
+            requestNumberGenerator._blocks.delete(counter);
+        }
+    });
+
+    it('should reserve blocks in a root transaction of their own', async () => {
+        const counter = 'BLOCK-ROOT';
+        const callerStatements = [];
+        const caller = {
+            run: async (query) => {
+                callerStatements.push(Object.keys(query)[0]);
+            }
+        };
+        const contexts = [];
+        let lastNumber = 0;
+        const root = {
+            tx: async (context, fn) => {
+                contexts.push(context);
+                return fn({
+                    run: async (query) => {
+                        if (query.UPDATE) {
+                            lastNumber += 5;
+                            return 1;
+                        }
+                        return { lastNumber };
+                    }
+                });
+            }
+        };
+        const configured = cds.env.requires.db.kind;
+        const connect = sinon.stub(cds.connect, 'to').resolves(root);
+        cds.env.requires.db.kind = 'postgres';
+        requestNumberGenerator.blockSize = 5;
+        try {
+            const values = await parallel(7, () => requestNumberGenerator.nextValue(counter, caller));
+
+            expect(values.sort((a, b) => a - b)).to.deep.equal([1, 2, 3, 4, 5, 6, 7]);
+        } finally {
+            cds.env.requires.db.kind = configured;
+            connect.restore();
+            requestNumberGenerator.blockSize = 1;
+            requestNumberGenerator._blocks.delete(counter);
+        }
+
+        expect(contexts).to.have.length(2);
+        expect(callerStatements).to.deep.equal([]);
+    });
+});
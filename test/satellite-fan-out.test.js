@@ -0,0 +1,99 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Satellite Fan-out', () => {
+    let CircuitBreaker;
+    let satelliteSystemsFromConfig;
+
+    before(() => {
+        ({ CircuitBreaker } = require('../srv/lib/shared/rate-limiter'));
+        ({ satelliteSystemsFromConfig } = require('../srv/lib/notification-service'));
+    });
+
+    it('should read the satellite registry with per-system timeouts', () => {
+        const systems = satelliteSystemsFromConfig([
+            { configKey: 'satellite.Coupa', configValue: 'http://localhost:4004/satellite-mock/coupa/webhook/mdm-approval', description: 'Coupa' },
+            { configKey: 'satellite.Coupa.timeoutMs', configValue: '5000' },
+            { configKey: 'satellite.PI', configValue: 'http://localhost:4004/satellite-mock/pi/webhook/mdm-approval' },
+            // A timeout without an active URL row does not make a system
+            { configKey: 'satellite.Salesforce.timeoutMs', configValue: '3000' }
+        ]);
+
+        expect(systems.map(system => system.name)).to.deep.equal(['Coupa', 'PI']);
+        expect(systems[0].timeoutMs).to.equal(5000);
+        expect(systems[1].timeoutMs).to.equal(null);
+    });
+
+    it('should open the circuit after consecutive failures and close it after a trial call', async () => {
+        const breaker = new CircuitBreaker({ threshold: 2, cooldownMs: 20 });
+
+        breaker.recordFailure();
+        expect(breaker.tryAcquire()).to.equal(true);
+        breaker.recordFailure();
+        expect(breaker.state).to.equal('open');
+        expect(breaker.tryAcquire()).to.equal(false);
+
+        await new Promise(resolve => setTimeout(resolve, 30));
+        expect(breaker.state).to.equal('half-open');
+        expect(breaker.tryAcquire()).to.equal(true);
+        expect(breaker.tryAcquire()).to.equal(false);
+
+        breaker.recordSuccess();
+        expect(breaker.state).to.equal('closed');
+    });
+});
+
+describe('Satellite Fan-out - Delivery Outcome', () => {
+    let notificationOutbox;
+    let db;
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        db = await cds.connect.to('db');
+        notificationOutbox = require('../srv/lib/notification-outbox');
+    });
+
+    const setUp = async () => {
+        const notificationId = cds.utils.uuid();
+        const requestId = cds.utils.uuid();
+        await INSERT.into('mdm.db.ChangeNotifications').entries({ ID: notificationId, bpNumber: '9999999902', notificationSent: false });
+        await INSERT.into('mdm.db.NotificationAcknowledgments').entries(['Coupa', 'PI'].map(targetSystem => ({
+            ID: cds.utils.uuid(), notification_ID: notificationId, request_ID: requestId, targetSystem, status: 'Pending'
+        })));
+        const entries = ['Coupa', 'PI'].map(target => ({
+            ID: cds.utils.uuid(), notification_ID: notificationId, request_ID: requestId, target, status: 'Processing'
+        }));
+        await INSERT.into('mdm.db.NotificationOutbox').entries(entries);
+        return { notificationId, requestId, entries };
+    };
+
+    const markSent = (entry) => UPDATE('mdm.db.NotificationOutbox').set({ status: 'Sent' }).where({ ID: entry.ID });
+
+    it('should mark the notification as sent only when every webhook is delivered', async () => {
+        const { notificationId, entries } = await setUp();
+
+        await markSent(entries[0]);
+        await notificationOutbox.recordNotificationOutcome(db, entries[0], 'Sent');
+        let notification = await SELECT.one.from('mdm.db.ChangeNotifications').where({ ID: notificationId });
+        expect(notification.notificationSent).to.equal(false);
+
+        await markSent(entries[1]);
+        await notificationOutbox.recordNotificationOutcome(db, entries[1], 'Sent');
+        notification = await SELECT.one.from('mdm.db.ChangeNotifications').where({ ID: notificationId });
+        expect(notification.notificationSent).to.equal(true);
+        expect(notification.notificationSentAt).to.not.equal(null);
+    });
+
+    it('should mark the acknowledgement of a dead-lettered webhook as failed', async () => {
+        const { notificationId, requestId, entries } = await setUp();
+
+        await notificationOutbox.recordNotificationOutcome(db, entries[1], 'DeadLetter', 'timeout of 5000ms exceeded');
+
+        const acknowledgements = await SELECT.from('mdm.db.NotificationAcknowledgments').where({ request_ID: requestId });
+        const pi = acknowledgements.find(a => a.targetSystem === 'PI');
+        expect(pi).to.include({ status: 'Failed', lastError: 'timeout of 5000ms exceeded' });
+        expect(acknowledgements.find(a => a.targetSystem === 'Coupa').status).to.equal('Pending');
+        const notification = await SELECT.one.from('mdm.db.ChangeNotifications').where({ ID: notificationId });
+        expect(notification.notificationSent).to.equal(false);
+    });
+});
@@ -0,0 +1,83 @@
+const { expect } = require('chai');
+
+describe('Status Feed', () => {
+    let statusFeed;
+
+    before(() => {
+        statusFeed = require('../srv/lib/status-feed');
+    });
+
+    it('should pick the tracked columns set by an UPDATE', () => {
+        const values = statusFeed.updatedValues({
+            data: { status: 'Approved', comments: 'ok' },
+            with: { sapBpNumber: { val: '1000001' }, modifiedAt: { func: 'now' } }
+        });
+
+        expect(values).to.deep.equal({ status: 'Approved', sapBpNumber: '1000001' });
+        expect(statusFeed.updatedValues({ data: { partnerName: 'Acme' } })).to.deep.equal({});
+    });
+
+    it('should serve cursors covered by the buffer without the database', async () => {
+        const feed = Object.create(statusFeed);
+        feed.buffer = [
+            { sequence: 11, requestNumber: 'COUPA-1', sourceSystem: 'Coupa' },
+            { sequence: 12, requestNumber: 'PI-1', sourceSystem: 'PI' },
+            { sequence: 13, requestNumber: 'COUPA-2', sourceSystem: 'Coupa' }
+        ];
+        feed.floor = 10;
+        feed.lastSequence = 14;
+        feed.db = { run: () => { throw new Error('database read'); } };
+
+        const page = await feed.read(11, { sourceSystem: 'Coupa', requestNumbers: null });
+
+        expect(page.events.map(event => event.sequence)).to.deep.equal([13]);
+        expect(page.cursor).to.equal(14);
+    });
+
+    it('should answer 304 when the validators still match', () => {
+        const headers = {};
+        const res = {
+            statusCode: 200,
+            set(name, value) {
+                Object.assign(headers, typeof name === 'string' ? { [name]: value } : name);
+                return res;
+            },
+            status(code) {
+                res.statusCode = code;
+                return res;
+            },
+            end() {},
+            type() { return res; },
+            send(body) { res.body = body; }
+        };
+        const body = { success: true, data: { requestNumber: 'COUPA-1', status: 'Approved' } };
+
+        statusFeed.sendConditional({ fresh: false }, res, body, '2025-01-15T10:00:00Z');
+        expect(res.body).to.equal(JSON.stringify(body));
+        expect(headers['Last-Modified']).to.equal('Wed, 15 Jan 2025 10:00:00 GMT');
+        expect(headers.ETag).to.match(/^W\/"[\w-]+"$/);
+
+        statusFeed.sendConditional({ fresh: true }, res, body);
+        expect(res.statusCode).to.equal(304);
+
+        // Revalidation before the body is read: same validators as the full response
+        statusFeed.sendConditional({ fresh: false }, res, body, '2025-01-15T10:00:00Z');
+        const etag = headers.ETag;
+        expect(statusFeed.notModified({ fresh: false }, res, '2025-01-15T10:00:00Z')).to.equal(false);
+        expect(headers.ETag).to.equal(etag);
+        expect(statusFeed.notModified({ fresh: false }, res, '2025-01-15T10:00:01Z')).to.equal(false);
+        expect(headers.ETag).to.not.equal(etag);
+
+        // Changes within one second share Last-Modified; only the ETag tells them apart
+        statusFeed.notModified({ fresh: false }, res, '2025-01-15T10:00:01.250Z');
+        const lastModified = headers['Last-Modified'];
+        const etagInSecond = headers.ETag;
+        statusFeed.notModified({ fresh: false }, res, '2025-01-15T10:00:01.750Z');
+        expect(headers['Last-Modified']).to.equal(lastModified);
+        expect(headers.ETag).to.not.equal(etagInSecond);
+
+        res.statusCode = 200;
+        expect(statusFeed.notModified({ fresh: true }, res, '2025-01-15T10:00:00Z')).to.equal(true);
+        expect(res.statusCode).to.equal(304);
+    });
+});
@@ -0,0 +1,34 @@
+const { expect } = require('chai');
+const TokenIndex = require('../srv/lib/shared/token-index');
+
+describe('Token Index - partner search', () => {
+    let index;
+
+    beforeEach(() => {
+        index = new TokenIndex();
+        index.add('P1', ['acme', 'trading', 'walldorf', 'de123456789']);
+        index.add('P2', ['acme', 'logistics', 'paris']);
+        index.add('P3', ['acmetech', 'berlin']);
+    });
+
+    it('should match all terms, exact tokens before prefixes', () => {
+        expect(index.search(['acme']).map(hit => hit.id)).to.deep.equal(['P1', 'P2', 'P3']);
+        expect(index.search(['acme'])[2].score).to.equal(1);
+        expect(index.search(['acm', 'par']).map(hit => hit.id)).to.deep.equal(['P2']);
+        expect(index.search(['acme', 'munich'])).to.be.empty;
+    });
+
+    it('should only match exact tokens without prefix matching', () => {
+        expect(index.search(['de123'], { prefix: false })).to.be.empty;
+        expect(index.search(['de123456789'], { prefix: false }).map(hit => hit.id)).to.deep.equal(['P1']);
+    });
+
+    it('should replace and remove documents', () => {
+        index.add('P1', ['globex', 'walldorf']);
+        index.remove('P2');
+
+        expect(index.search(['acme']).map(hit => hit.id)).to.deep.equal(['P3']);
+        expect(index.search(['glob']).map(hit => hit.id)).to.deep.equal(['P1']);
+        expect(index.size).to.equal(2);
+    });
+});
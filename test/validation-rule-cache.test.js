@@ -0,0 +1,86 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+
+describe('Validation Rule Cache - targeted invalidation', () => {
+    let test;
+    let service;
+
+    const entry = (entity, context, locales = ['en']) => ({ entity, context, locales, rules: [] });
+    const cachedKeys = () => Array.from(service.validationCache.entries.keys()).sort();
+
+    before(async () => {
+        test = cds.test(__dirname + '/../');
+        await test;
+        const ValidationService = require('../srv/lib/validation-service');
+        service = new ValidationService(await cds.connect.to('db'));
+    });
+
+    beforeEach(() => {
+        service.clearCache();
+        service.validationCache.set('submitted-coupa', entry('ValidationRules', { status: 'Submitted', sourceSystem: 'Coupa', entityType: 'Supplier', requestType: 'Create' }));
+        service.validationCache.set('submitted-coupa-de', entry('ValidationRules', { status: 'Submitted', sourceSystem: 'Coupa', entityType: 'Supplier', requestType: 'Create' }, ['de']));
+        service.validationCache.set('submitted-pi', entry('ValidationRules', { status: 'Submitted', sourceSystem: 'PI', entityType: 'Customer', requestType: 'Create' }));
+        service.validationCache.set('draft-coupa', entry('ValidationRules', { status: 'Draft', sourceSystem: 'Coupa', entityType: 'Supplier', requestType: 'Create' }));
+        service.validationCache.set('section-submitted', entry('SectionValidationRules', { status: 'Submitted', sourceSystem: 'Coupa', entityType: 'Supplier' }));
+    });
+
+    it('should drop only the lookups whose context and locale a rule matches', () => {
+        const removed = service.invalidateRules('ValidationRules', [
+            { locale: 'en', status: 'Submitted', sourceSystem: 'Coupa', entityType: null, requestType: null }
+        ]);
+
+        expect(removed).to.equal(1);
+        expect(cachedKeys()).to.deep.equal(['draft-coupa', 'section-submitted', 'submitted-coupa-de', 'submitted-pi']);
+    });
+
+    it('should treat empty and missing rule fields as matching every context', () => {
+        const removed = service.invalidateRules('ValidationRules', [{ status: 'Submitted' }]);
+
+        expect(removed).to.equal(3);
+        expect(cachedKeys()).to.deep.equal(['draft-coupa', 'section-submitted']);
+    });
+
+    it('should match the old and the new values of an updated rule', () => {
+        const removed = service.invalidateRules('ValidationRules', [
+            { locale: 'en', status: 'Draft', sourceSystem: null, entityType: null, requestType: null },
+            { locale: 'en', status: 'Submitted', sourceSystem: 'PI', entityType: null, requestType: null }
+        ]);
+
+        expect(removed).to.equal(2);
+        expect(cachedKeys()).to.deep.equal(['section-submitted', 'submitted-coupa', 'submitted-coupa-de']);
+    });
+
+    it('should drop every lookup of the entity when no rules are given', () => {
+        const removed = service.invalidateRules('SectionValidationRules', []);
+
+        expect(removed).to.equal(1);
+        expect(cachedKeys()).to.deep.equal(['draft-coupa', 'submitted-coupa', 'submitted-coupa-de', 'submitted-pi']);
+    });
+
+    it('should invalidate the affected lookups when a rule is toggled in the admin service', async () => {
+        service.clearCache();
+        const submitted = { status: 'Submitted', sourceSystem: 'Coupa', entityType: 'Supplier', requestType: 'Create' };
+        const draft = { ...submitted, status: 'Draft' };
+        const ruleCodes = (rules) => rules.map(rule => rule.ruleCode);
+        const toggle = () => test.post('/admin/ValidationRules(ID=31,IsActiveEntity=true)/AdminService.toggleActive', {});
+
+        expect(ruleCodes(await service.getApplicableRules(submitted, 'en'))).to.include('VAL_BANK_IBAN');
+        await service.getApplicableRules(draft, 'en');
+        await service.getApplicableRules(submitted, 'de');
+        expect(service.validationCache.size).to.equal(3);
+
+        try {
+            await toggle();
+
+            // Rule 31 (en, Submitted, Create) only affects the English Submitted lookup
+            expect(cachedKeys()).to.deep.equal([
+                'ValidationRules|Draft|Coupa|Supplier|Create|en',
+                'ValidationRules|Submitted|Coupa|Supplier|Create|de'
+            ]);
+            expect(ruleCodes(await service.getApplicableRules(submitted, 'en'))).to.not.include('VAL_BANK_IBAN');
+        } finally {
+            await toggle();
+        }
+        expect(ruleCodes(await service.getApplicableRules(submitted, 'en'))).to.include('VAL_BANK_IBAN');
+    });
+});
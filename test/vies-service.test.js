@@ -0,0 +1,144 @@
+const cds = require('@sap/cds');
+const { expect } = require('chai');
+const sinon = require('sinon');
+
+describe('VIES Service - caching and rate limits', () => {
+    const RESULTS = 'mdm.db.ViesValidationResults';
+    let VIESService;
+
+    const createService = (options = {}) => new VIESService({
+        useMockService: true,
+        mockLatencyMs: 20,
+        ratePerSecond: Infinity,
+        persistentCache: false,
+        ...options
+    });
+
+    before(async () => {
+        await cds.test(__dirname + '/../');
+        VIESService = require('../srv/lib/vies-service');
+    });
+
+    beforeEach(async () => {
+        await DELETE.from(RESULTS);
+    });
+
+    afterEach(() => {
+        sinon.restore();
+    });
+
+    it('should share one VIES call between concurrent checks of the same VAT number', async () => {
+        const service = createService();
+        const viesCall = sinon.spy(service, 'performMockViesValidation');
+
+        const results = await service.validateVatIdsBatch([
+            { countryCode: 'DE', vatNumber: '811569869' },
+            { countryCode: 'de', vatNumber: '811 569 869' },
+            { countryCode: 'DE', vatNumber: '811569869' },
+            { countryCode: 'FR', vatNumber: '40303265045' }
+        ]);
+
+        expect(viesCall.callCount).to.equal(2);
+        expect(results.map(result => result.isValid)).to.deep.equal([true, true, true, true]);
+        expect(results.filter(result => result.coalesced)).to.have.length(2);
+        expect(results[1].companyName).to.equal(results[0].companyName);
+        expect(service.getCacheStats()).to.include({ requests: 4, coalesced: 2, viesCalls: 2, inFlight: 0 });
+
+        // Later checks are answered from memory
+        const cached = await service.validateVatId('DE', '811569869');
+        expect(cached.fromCache).to.equal(true);
+        expect(viesCall.callCount).to.equal(2);
+    });
+
+    it('should keep the number of VIES calls in flight within the concurrency bound', async () => {
+        const service = createService({ maxConcurrent: 2 });
+        const performMock = service.performMockViesValidation.bind(service);
+        let active = 0;
+        let maxActive = 0;
+        sinon.stub(service, 'performMockViesValidation').callsFake(async (...args) => {
+            active++;
+            maxActive = Math.max(maxActive, active);
+            try {
+                return await performMock(...args);
+            } finally {
+                active--;
+            }
+        });
+
+        const vatNumbers = ['811569861', '811569862', '811569863', '811569864', '811569865', '811569866'];
+        const results = await service.validateVatIdsBatch(vatNumbers.map(vatNumber => ({ countryCode: 'DE', vatNumber })));
+
+        expect(results.map(result => result.vatNumber)).to.deep.equal(vatNumbers);
+        expect(service.performMockViesValidation.callCount).to.equal(6);
+        expect(maxActive).to.equal(2);
+        expect(service.concurrency.active).to.equal(0);
+    });
+
+    it('should take a token from the rate limiter for each VIES call only', async () => {
+        const service = createService();
+        const take = sinon.spy(service.rateLimiter, 'take');
+
+        await service.validateVatIdsBatch([
+            { countryCode: 'DE', vatNumber: '811569869' },
+            { countryCode: 'DE', vatNumber: '811569869' },
+            { countryCode: 'DE', vatNumber: '12345' }
+        ]);
+
+        // The repeated number shares the first call; the malformed one fails the format check
+        expect(take.callCount).to.equal(1);
+    });
+
+    it('should answer from a stored result and not call VIES', async () => {
+        const validatedAt = new Date(Date.now() - 60 * 60 * 1000).toISOString();
+        await INSERT.into(RESULTS).entries({
+            countryCode: 'DE',
+            vatNumber: '811569869',
+            isValid: true,
+            validatedAt,
+            result: JSON.stringify({
+                isValid: true,
+                vatNumber: '811569869',
+                countryCode: 'DE',
+                companyName: 'Stored Company GmbH',
+                source: 'vies_soap'
+            })
+        });
+        const service = createService({ persistentCache: true });
+        const viesCall = sinon.spy(service, 'performMockViesValidation');
+
+        const result = await service.validateVatId('DE', '811569869');
+
+        expect(viesCall.called).to.equal(false);
+        expect(result).to.include({ isValid: true, companyName: 'Stored Company GmbH', source: 'vies_soap', fromCache: true });
+        expect(Date.parse(result.cachedAt)).to.equal(Date.parse(validatedAt));
+        expect(service.getCacheStats()).to.include({ persistentHits: 1, memoryHits: 0, viesCalls: 0 });
+
+        await service.validateVatId('DE', '811569869');
+        expect(service.getCacheStats()).to.include({ persistentHits: 1, memoryHits: 1 });
+    });
+
+    it('should call VIES for an expired stored result and store the new one', async () => {
+        const service = createService({ persistentCache: true, cacheTTL: 60 * 60 * 1000 });
+        await INSERT.into(RESULTS).entries({
+            countryCode: 'DE',
+            vatNumber: '811569869',
+            isValid: false,
+            validatedAt: new Date(Date.now() - 2 * 60 * 60 * 1000).toISOString(),
+            result: JSON.stringify({ isValid: false, source: 'vies_soap' })
+        });
+        const viesCall = sinon.spy(service, 'performMockViesValidation');
+
+        const result = await service.validateVatId('DE', '811569869');
+
+        expect(viesCall.callCount).to.equal(1);
+        expect(result).to.include({ isValid: true, source: 'vies_mock' });
+        const stored = await SELECT.one.from(RESULTS).where({ countryCode: 'DE', vatNumber: '811569869' });
+        expect(stored.isValid).to.equal(true);
+        expect(JSON.parse(stored.result).source).to.equal('vies_mock');
+
+        // Another instance finds the stored result
+        const other = createService({ persistentCache: true, cacheTTL: 60 * 60 * 1000 });
+        expect(await other.validateVatId('DE', '811569869')).to.include({ source: 'vies_mock', fromCache: true });
+        expect(other.getCacheStats()).to.include({ persistentHits: 1, viesCalls: 0 });
+    });
+});